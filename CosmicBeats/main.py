@@ -3,22 +3,68 @@
 // Licensed under the MIT license.
 '''
 from src.sim.simulator import Simulator
-import sys
+from src.sim.profiler import Profiler
+from src.models.models_cdn.objectdictionary import ObjectDictionary
+from src.models.models_cdn.hashroutingtable import HashRoutingTable
+import argparse
+import os
 import time
 import random
 
 if __name__ == "__main__":
     random.seed(0)
-    _filepath = ''
 
-    #look for the config file path in the command line arguments
+    #look for the config file path and the options in the command line arguments
+    _parser = argparse.ArgumentParser()
+    _parser.add_argument("config", nargs = "?", default = "configs/config.json", help = "Path to the config file")
+    _parser.add_argument("--precompute-fov", type = int, default = None, metavar = "N",
+                         help = "Precompute the FoVs of all the nodes with N processes before the simulation starts, unless a matching FoV cache exists")
+    _parser.add_argument("--processes", type = int, default = 1, metavar = "N",
+                         help = "Shard the nodes over N processes to run the simulation (see ManagerMultiprocess)")
+    _parser.add_argument("--profile", default = None, metavar = "PATH",
+                         help = "Profile the node and model calls and write the report to PATH (.json or .csv)")
+    _parser.add_argument("--profile-interval", type = float, default = None, metavar = "SECONDS",
+                         help = "With --profile, print the epochs/s and requests/s every SECONDS")
+    _parser.add_argument("--checkpoint", default = None, metavar = "PATH",
+                         help = "Save a checkpoint of the simulation state to PATH (see Checkpoint)")
+    _parser.add_argument("--checkpoint-at", type = int, default = None, metavar = "N",
+                         help = "With --checkpoint, take the checkpoint after N epochs instead of at the end of the simulation")
+    _parser.add_argument("--resume", default = None, metavar = "PATH",
+                         help = "Resume the simulation from the checkpoint at PATH. The config must have the same nodes and models")
+    _parser.add_argument("--intern-object-ids", action = "store_true",
+                         help = "Encode the object IDs of the user traces as integers (see ObjectDictionary) and run on them. The encoded traces are kept next to the config and reused")
+    _parser.add_argument("--cache-hash-routes", action = "store_true",
+                         help = "Save the hash routing table of hash_check (see HashRoutingTable) next to the config and reuse it while the ISLs and the colors don't change")
+    _args = _parser.parse_args()
+    _filepath = _args.config
 
-    if(len(sys.argv) > 1):
-        _filepath = sys.argv[1]
-    else:
-        _filepath = "configs/config.json"
+    #The encoded traces are read by the user nodes. So, they are ready before the simulation environment is created
+    if _args.intern_object_ids:
+        _objectIDsPath = os.path.splitext(_filepath)[0] + "_objectids"
+        _objectDictionary, _loaded = ObjectDictionary.prepare(_filepath, _objectIDsPath)
+        ObjectDictionary.activate(_objectDictionary)
+        print(f"[Simulator Info] {'Loaded' if _loaded else 'Encoded'} the {len(_objectDictionary)} object IDs of the traces {'from' if _loaded else 'to'} {_objectIDsPath}")
 
-    _sim = Simulator(_filepath)
+    #The hash buckets of the satellites (see hash_check of ModelCDNProvider) are built once for the ISLs and colors of this config and reused
+    if _args.cache_hash_routes:
+        HashRoutingTable.set_CacheDirectory(os.path.splitext(_filepath)[0] + "_hashroutes")
+
+    if _args.profile is not None:
+        Profiler.enable(_args.profile, _args.profile_interval)
+
+    _sim = Simulator(_filepath, _numProcesses = _args.processes, _resumePath = _args.resume)
+
+    #Reuse the precomputed FoVs of this config if there are any. They are only loaded if they match the config
+    _fovCachePath = os.path.splitext(_filepath)[0] + "_fovcache"
+    if os.path.isdir(_fovCachePath) and _sim.call_RuntimeAPIs("load_FOVs", _inputPath = _fovCachePath):
+        print(f"[Simulator Info] Loaded the precomputed FoVs from {_fovCachePath}")
+    elif _args.precompute_fov is not None:
+        _startTime = time.perf_counter()
+        _sim.call_RuntimeAPIs("compute_FOVs", _numProcesses = _args.precompute_fov, _outputPath = _fovCachePath)
+        print(f"[Simulator Info] Time required to precompute the FoVs: {time.perf_counter() - _startTime} seconds. Saved to {_fovCachePath}")
+
+    if _args.checkpoint is not None:
+        _sim.call_RuntimeAPIs("save_Checkpoint", _outputPath = _args.checkpoint, _epoch = _args.checkpoint_at)
 
     _startTime = time.perf_counter()
 
@@ -29,4 +75,4 @@ if __name__ == "__main__":
     _endTime = time.perf_counter()
 
     print(f"[Simulator Info] Time required to run the simulation: {_endTime-_startTime} seconds.")
- 
+
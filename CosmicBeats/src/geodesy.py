@@ -0,0 +1,146 @@
+'''
+// Copyright (c) Microsoft Corporation.
+// Licensed under the MIT license.
+
+@desc
+    Closed-form WGS84 geodesy over NumPy arrays. It's the backend of src.utils.Location.
+    All the functions take scalars or arrays (broadcast together) and return arrays of the broadcast shape.
+    ecef_to_geodetic, which is called for single points every epoch (Location to_lat_long), returns floats for scalars.
+    Positions are in ITRF/ECEF meters. Angles are in degrees.
+'''
+import math
+import numpy as np
+
+WGS84_A = 6378137.0                         # semi-major axis (m)
+WGS84_F = 1 / 298.257223563                 # flattening
+WGS84_B = WGS84_A * (1 - WGS84_F)           # semi-minor axis (m)
+WGS84_E2 = WGS84_F * (2 - WGS84_F)          # first eccentricity squared
+WGS84_EP2 = WGS84_E2 / (1 - WGS84_E2)       # second eccentricity squared
+EARTH_MEAN_RADIUS = 6371008.8               # IUGG mean radius (m)
+
+def geodetic_to_ecef(lat, lon, height = 0.0) -> 'tuple[np.ndarray, np.ndarray, np.ndarray]':
+    """
+    Converts WGS84 latitude, longitude, height to x, y, z
+
+    Arguments:
+        lat - latitude in degrees
+        lon - longitude in degrees
+        height - height in meters relative to WGS84's ground
+    Returns:
+        Tuple (x, y, z) in meters
+    """
+    _lat = np.radians(np.asarray(lat, dtype=np.float64))
+    _lon = np.radians(np.asarray(lon, dtype=np.float64))
+    _height = np.asarray(height, dtype=np.float64)
+    _sinLat = np.sin(_lat)
+    _cosLat = np.cos(_lat)
+    _n = WGS84_A / np.sqrt(1 - WGS84_E2 * _sinLat**2)    # prime vertical radius of curvature
+    _x = (_n + _height) * _cosLat * np.cos(_lon)
+    _y = (_n + _height) * _cosLat * np.sin(_lon)
+    _z = (_n * (1 - WGS84_E2) + _height) * _sinLat
+    return _x, _y, _z
+
+def ecef_to_geodetic(x, y, z) -> 'tuple[np.ndarray, np.ndarray, np.ndarray]':
+    """
+    Converts x, y, z to WGS84 latitude, longitude, height.
+    Uses the closed-form solution of Zhu (1993) as given by Heikkinen, so there is no iteration.
+    It's accurate to well below a millimeter from the ground to far beyond the geostationary orbit,
+    but not valid within ~40 km of the center of the Earth.
+    A single point is converted with plain float arithmetic, as numpy is slow on scalars.
+
+    Arguments:
+        x, y, z - position in meters
+    Returns:
+        Tuple (lat, lon, height) in (degrees, degrees, meters). Floats for a single point
+    """
+    if np.ndim(x) == 0 and np.ndim(y) == 0 and np.ndim(z) == 0:
+        _x, _y, _z = float(x), float(y), float(z)
+        _atan2, _degrees = math.atan2, math.degrees
+    else:
+        _x, _y, _z = np.broadcast_arrays(np.asarray(x, dtype=np.float64), np.asarray(y, dtype=np.float64), np.asarray(z, dtype=np.float64))
+        _atan2, _degrees = np.arctan2, np.degrees
+    _a2 = WGS84_A**2
+    _b2 = WGS84_B**2
+
+    #Only the arithmetic operators are used below, so that it works on floats and arrays alike
+    _p2 = _x**2 + _y**2
+    _p = _p2**0.5
+    _z2 = _z**2
+    _f = 54 * _b2 * _z2
+    _g = _p2 + (1 - WGS84_E2) * _z2 - WGS84_E2 * (_a2 - _b2)
+    _c = WGS84_E2**2 * _f * _p2 / _g**3
+    _s = (1 + _c + (_c**2 + 2 * _c)**0.5)**(1 / 3)
+    _k = _s + 1 + 1 / _s
+    _pp = _f / (3 * _k**2 * _g**2)
+    _q = (1 + 2 * WGS84_E2**2 * _pp)**0.5
+    _r0Squared = _a2 / 2 * (1 + 1 / _q) - _pp * (1 - WGS84_E2) * _z2 / (_q * (1 + _q)) - _pp * _p2 / 2
+    _r0 = -(_pp * WGS84_E2 * _p) / (1 + _q) + (_r0Squared * (_r0Squared > 0))**0.5
+    _u = ((_p - WGS84_E2 * _r0)**2 + _z2)**0.5
+    _v = ((_p - WGS84_E2 * _r0)**2 + (1 - WGS84_E2) * _z2)**0.5
+    _z0 = _b2 * _z / (WGS84_A * _v)
+
+    _height = _u * (1 - _b2 / (WGS84_A * _v))
+    _lat = _degrees(_atan2(_z + WGS84_EP2 * _z0, _p))
+    _lon = _degrees(_atan2(_y, _x))
+    return _lat, _lon, _height
+
+def enu_basis(lat, lon) -> 'tuple[np.ndarray, np.ndarray, np.ndarray]':
+    """
+    Returns the local east, north, up unit vectors at geodetic latitudes and longitudes
+
+    Arguments:
+        lat - latitude in degrees
+        lon - longitude in degrees
+    Returns:
+        Tuple (east, north, up) - arrays of shape (..., 3)
+    """
+    _lat = np.radians(np.asarray(lat, dtype=np.float64))
+    _lon = np.radians(np.asarray(lon, dtype=np.float64))
+    _sinLat, _cosLat = np.sin(_lat), np.cos(_lat)
+    _sinLon, _cosLon = np.sin(_lon), np.cos(_lon)
+    _east = np.stack(np.broadcast_arrays(-_sinLon, _cosLon, np.zeros_like(_lon)), axis=-1)
+    _north = np.stack(np.broadcast_arrays(-_sinLat * _cosLon, -_sinLat * _sinLon, _cosLat), axis=-1)
+    _up = np.stack(np.broadcast_arrays(_cosLat * _cosLon, _cosLat * _sinLon, _sinLat), axis=-1)
+    return _east, _north, _up
+
+def elevation_azimuth(targets, observers) -> 'tuple[np.ndarray, np.ndarray, np.ndarray]':
+    """
+    Topocentric elevation, azimuth and range of targets seen from observers (e.g., satellites from ground stations).
+    The horizon is the plane normal to the WGS84 ellipsoid at the observer. There's no refraction or aberration.
+
+    Arguments:
+        targets - target positions in meters, array of shape (..., 3)
+        observers - observer positions in meters, array of shape (..., 3). Broadcast against targets
+    Returns:
+        Tuple (elevation, azimuth, range) in (degrees, degrees clockwise from north in [0, 360), meters)
+    """
+    _targets = np.asarray(targets, dtype=np.float64)
+    _observers = np.asarray(observers, dtype=np.float64)
+    _lat, _lon, _ = ecef_to_geodetic(_observers[..., 0], _observers[..., 1], _observers[..., 2])
+    _east, _north, _up = enu_basis(_lat, _lon)
+
+    _delta = _targets - _observers
+    _e = np.sum(_delta * _east, axis=-1)
+    _n = np.sum(_delta * _north, axis=-1)
+    _u = np.sum(_delta * _up, axis=-1)
+    _range = np.sqrt(_e**2 + _n**2 + _u**2)
+    _elevation = np.degrees(np.arcsin(_u / _range))
+    _azimuth = np.degrees(np.arctan2(_e, _n)) % 360.0
+    _azimuth = np.where(_azimuth >= 360.0, 0.0, _azimuth)      #-0.0000...1 % 360 rounds to 360
+    return _elevation, _azimuth, _range
+
+def great_circle_distance(lat1, lon1, lat2, lon2, radius: float = EARTH_MEAN_RADIUS) -> np.ndarray:
+    """
+    Great-circle distance between points on a sphere (haversine formula)
+
+    Arguments:
+        lat1, lon1 - first points in degrees
+        lat2, lon2 - second points in degrees
+        radius - radius of the sphere in meters. Mean radius of the Earth by default
+    Returns:
+        Distance in meters
+    """
+    _lat1, _lon1 = np.radians(lat1), np.radians(lon1)
+    _lat2, _lon2 = np.radians(lat2), np.radians(lon2)
+    _h = np.sin((_lat2 - _lat1) / 2)**2 + np.cos(_lat1) * np.cos(_lat2) * np.sin((_lon2 - _lon1) / 2)**2
+    return 2 * radius * np.arcsin(np.sqrt(np.clip(_h, 0, 1)))
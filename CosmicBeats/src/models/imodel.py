@@ -8,8 +8,11 @@ Created on: 27 Sep 2022
 This module includes the interface definition of the model. 
 """
 from abc import ABC, abstractmethod
+from functools import partial
 from enum import Enum
 
+from src.sim.checkpoint import Checkpoint
+
 class EModelTag(Enum):
     """
     An enum listing the tags of model implementation.
@@ -117,9 +120,79 @@ class IModel(ABC):
         '''
         pass
 
+    def get_APIHandle(
+            self,
+            _apiName: str) -> callable:
+        '''
+        @desc
+            This method returns a handle of an API of the model. Calling the handle with the keyworded arguments is the same as calling call_APIs with the API name.
+            A caller invoking an API many times (e.g., in the loop over the requests) can fetch the handle once.
+            By default, the handle goes through call_APIs. A model can override it to return the pre-resolved API handler bound to the model instance.
+        @param[in] _apiName
+            Name of the API
+        @return
+            Callable taking the keyworded arguments of the API
+        '''
+        return partial(self.call_APIs, _apiName)
+
+    def get_Checkpoint(self) -> dict:
+        """
+        @desc
+            This method returns the state of the model instance to be stored in a checkpoint (see Checkpoint).
+            By default, it's the attributes of the instance except the references to the other simulation objects, the callables, the locks, and the skyfield objects.
+            The attributes listed in the _checkpointExclude class attribute are not stored either, i.e., they keep the values given by the config on a restore.
+        @return
+            Dictionary of the state. It must be picklable.
+        """
+        return Checkpoint.get_InstanceState(self)
+
+    def restore_Checkpoint(
+            self,
+            _state: dict):
+        """
+        @desc
+            This method restores the state returned by get_Checkpoint on a model instance created from the same config
+        @param[in]  _state
+            State of the model
+        """
+        Checkpoint.set_InstanceState(self, _state)
+
+    def get_SharedCheckpoint(self):
+        """
+        @desc
+            This method returns the state shared by all the instances of the model class (e.g., the static tables) to be stored in a checkpoint.
+            It's called on one instance of the class. By default, the model has no shared state.
+        @return
+            Picklable state, or None
+        """
+        return None
+
+    def restore_SharedCheckpoint(
+            self,
+            _state):
+        """
+        @desc
+            This method restores the state returned by get_SharedCheckpoint. It's called on one instance of the class.
+        @param[in]  _state
+            Shared state of the model class
+        """
+        pass
+
     @abstractmethod
     def Execute(self):
         """
         This method executes the tasks that needed to be performed by the model.
         """
-        pass
\ No newline at end of file
+        pass
+
+    def needs_Tick(self) -> bool:
+        """
+        @desc
+            This method tells whether Execute has any work to do at the current epoch.
+            If none of the models of a node needs a tick, the manager skips the node in that epoch (see INode needs_Tick).
+            A model whose Execute is idle should override it. By default, the model is always executed.
+        @return
+            True:   If Execute has to be called
+            False:  Otherwise
+        """
+        return True
@@ -13,6 +13,10 @@ class LRU_Cache:
     def __contains__(self, key):
         return key in self.__cache
 
+    # return a view of the cached object ids
+    def keys(self):
+        return self.__cache.keys()
+
     def admit(self, id, size, time, **kwargs):
         if size > self.__cache_capacity:
             return None 
@@ -43,6 +47,10 @@ class LRU_Freq_Cache:
     def __contains__(self, key):
         return key in self.__cache
 
+    # return a view of the cached object ids
+    def keys(self):
+        return self.__cache.keys()
+
     # return iterator for querying most frequent accessed items 
     def get_most_frequent_objects_iterator(self):
         for k in reversed(self.__freq.keys()):
@@ -0,0 +1,283 @@
+'''
+// Copyright (c) Microsoft Corporation.
+// Licensed under the MIT license.
+
+@desc
+    This module implements the routing table of the hash buckets of ModelCDNProvider (see hash_check).
+    Each satellite sends the requests of a color to the first satellite of that color found by a breadth-first search from it over the ISLs
+    (the neighbor lists of the satellites), up to _maxHops hops, along with the hop vector of the path (the hops along each axis:
+    neighbors 0 and 1 are the first axis, 2 and 3 the second). The colors and the ISLs are static. So, the table is built once for all the satellites
+    with a BFS run from all of them at once, level by level on arrays, which visits the nodes in the same order as the BFS from each satellite.
+    The memory of the search is in the number of the nodes up to _maxHops hops away from the satellites, not in the square of the number of the satellites.
+    The table is kept per topology in the process and optionally saved to a cache directory (see set_CacheDirectory). The cache is only loaded if its key
+    (the neighbor lists and the colors of the satellites) matches.
+'''
+import os
+import json
+import hashlib
+
+import numpy as np
+
+class HashRoutingTable():
+    '''
+    Bucket and hop vector of each color for each satellite
+    '''
+    _version = 1
+    _maxHops = 5                    # the satellites up to this many hops away are searched
+    _numOfAxes = 2                  # length of the hop vector. Neighbor i of a satellite is along axis i // 2
+    _headerFileName = "header.json"
+
+    __tables: 'dict[int, HashRoutingTable]' = {}    # table of each topology ID in this process. See get_Table
+    __cacheDirectory: str = None                    # See set_CacheDirectory
+
+    @staticmethod
+    def set_CacheDirectory(_directory: str):
+        '''
+        @desc
+            Sets the directory where the tables are saved and looked up. None disables the cache
+        @param[in]  _directory
+            Path of the directory
+        '''
+        HashRoutingTable.__cacheDirectory = _directory
+
+    @staticmethod
+    def get_Table(_topologyID: int) -> 'HashRoutingTable':
+        '''
+        @desc
+            Returns the table of a topology in this process, None if it isn't built yet (see set_Table)
+        '''
+        return HashRoutingTable.__tables.get(_topologyID, None)
+
+    @staticmethod
+    def set_Table(
+            _topologyID: int,
+            _table: 'HashRoutingTable'):
+        '''
+        @desc
+            Keeps the table of a topology in this process
+        '''
+        HashRoutingTable.__tables[_topologyID] = _table
+
+    @staticmethod
+    def get_Key(
+            _nodeIDs: 'list[int]',
+            _neighbors: 'list[list[int]]',
+            _colors: 'list[int]',
+            _numOfColors: int) -> str:
+        '''
+        @desc
+            Computes the key of the ISLs and the colors of the satellites
+        @param[in]  _nodeIDs
+            List of the node IDs of the satellites
+        @param[in]  _neighbors
+            Neighbor node IDs of each satellite, -1 for no neighbor
+        @param[in]  _colors
+            Color of each satellite
+        @param[in]  _numOfColors
+            Number of colors
+        @return
+            Hex digest string
+        '''
+        _hash = hashlib.sha1()
+        _hash.update(f"{HashRoutingTable._version},{HashRoutingTable._maxHops},{_numOfColors}\n".encode())
+        for _nodeID, _nodeNeighbors, _color in zip(_nodeIDs, _neighbors, _colors):
+            _hash.update(f"{int(_nodeID)},{int(_color)},{','.join(str(int(_neighbor)) for _neighbor in _nodeNeighbors)}\n".encode())
+        return _hash.hexdigest()
+
+    @staticmethod
+    def build(
+            _nodeIDs: 'list[int]',
+            _neighbors: 'list[list[int]]',
+            _colors: 'list[int]',
+            _numOfColors: int) -> 'HashRoutingTable':
+        '''
+        @desc
+            Builds the table with a BFS from all the satellites at once. A level of the BFS has the (source, node, hop vector) of all the sources,
+            grouped by source in the order of the BFS from the source. The next level is the first discovery of each (source, neighbor)
+            in the order of the nodes and then of their neighbors, i.e., the order in which the BFS queue of the source gets them.
+            The bucket of a color for a source is its first node of the color in this order
+        @param[in]  _nodeIDs
+            List of the node IDs of the satellites
+        @param[in]  _neighbors
+            Neighbor node IDs of each satellite, -1 for no neighbor
+        @param[in]  _colors
+            Color of each satellite
+        @param[in]  _numOfColors
+            Number of colors
+        @return
+            The table
+        '''
+        _numOfNodes = len(_nodeIDs)
+        _index = {int(_nodeID): _idx for _idx, _nodeID in enumerate(_nodeIDs)}
+        _width = max([len(_nodeNeighbors) for _nodeNeighbors in _neighbors] + [0])
+        if _width > 2 * HashRoutingTable._numOfAxes:
+            raise Exception(f"[HashRoutingTable Error]: A satellite has {_width} neighbors. The hop vector has {HashRoutingTable._numOfAxes} axes of 2 neighbors")
+        _adjacency = np.full((_numOfNodes, _width), -1, dtype=np.int64)
+        for _idx, _nodeNeighbors in enumerate(_neighbors):
+            for _slot, _neighbor in enumerate(_nodeNeighbors):
+                if int(_neighbor) != -1:
+                    if int(_neighbor) not in _index:
+                        raise Exception(f"[HashRoutingTable Error]: Neighbor {_neighbor} of node {_nodeIDs[_idx]} is not a satellite with ModelCDNProvider")
+                    _adjacency[_idx, _slot] = _index[int(_neighbor)]
+        _steps = np.zeros((_width, HashRoutingTable._numOfAxes), dtype=np.int16)     # hop vector increment through each neighbor slot
+        _steps[np.arange(_width), np.arange(_width) // 2] = 1
+        _colors = np.asarray(_colors, dtype=np.int64)
+
+        _buckets = np.full((_numOfNodes, _numOfColors), -1, dtype=np.int64)
+        _hops = np.full((_numOfNodes, _numOfColors, HashRoutingTable._numOfAxes), -1, dtype=np.int16)
+        _seen = np.arange(_numOfNodes, dtype=np.int64) * (_numOfNodes + 1)      # sorted keys (source * _numOfNodes + node) of the visited nodes of each source
+
+        _sources = np.arange(_numOfNodes)
+        _nodes = np.arange(_numOfNodes)
+        _levelHops = np.zeros((_numOfNodes, HashRoutingTable._numOfAxes), dtype=np.int16)
+        for _level in range(HashRoutingTable._maxHops + 1):
+            #The first node of each (source, color) not found on an earlier level
+            _levelColors = _colors[_nodes]
+            _new = _buckets[_sources, _levelColors] == -1
+            _keys = _sources[_new] * _numOfColors + _levelColors[_new]
+            _, _first = np.unique(_keys, return_index=True)
+            _first = np.flatnonzero(_new)[_first]
+            _buckets[_sources[_first], _levelColors[_first]] = _nodes[_first]
+            _hops[_sources[_first], _levelColors[_first]] = _levelHops[_first]
+            if _level == HashRoutingTable._maxHops or len(_nodes) == 0:
+                break
+
+            #The next level, in the order of the nodes and their neighbor slots
+            _nextSources = np.repeat(_sources, _width)
+            _nextNodes = _adjacency[_nodes].reshape(-1)
+            _nextHops = (_levelHops[:, None, :] + _steps[None, :, :]).reshape(-1, HashRoutingTable._numOfAxes)
+            _valid = _nextNodes != -1
+            _nextKeys = _nextSources[_valid] * _numOfNodes + _nextNodes[_valid]
+            _positions = np.minimum(np.searchsorted(_seen, _nextKeys), len(_seen) - 1)
+            _valid[_valid] = _seen[_positions] != _nextKeys
+            _newKeys, _first = np.unique(_nextSources[_valid] * _numOfNodes + _nextNodes[_valid], return_index=True)
+            _first = np.sort(np.flatnonzero(_valid)[_first])
+            _sources, _nodes, _levelHops = _nextSources[_first], _nextNodes[_first], _nextHops[_first]
+            _seen = np.union1d(_seen, _newKeys)
+
+        _nodeIDs = np.asarray(_nodeIDs, dtype=np.int64)
+        _buckets = np.where(_buckets != -1, _nodeIDs[_buckets], -1)
+        return HashRoutingTable(_nodeIDs, _buckets, _hops)
+
+    @staticmethod
+    def load(
+            _dirPath: str,
+            _key: str) -> 'HashRoutingTable':
+        '''
+        @desc
+            Loads a table saved by save
+        @param[in]  _dirPath
+            Path of the cache directory
+        @param[in]  _key
+            Key of the ISLs and the colors (see get_Key)
+        @return
+            The table. None if there is no table or it was built for another key
+        '''
+        try:
+            with open(os.path.join(_dirPath, HashRoutingTable._headerFileName), "r") as _f:
+                _header = json.load(_f)
+        except (OSError, ValueError):
+            return None
+        if _header.get("version") != HashRoutingTable._version or _header.get("key") != _key:
+            return None
+        return HashRoutingTable(
+            np.load(os.path.join(_dirPath, "nodeIDs.npy")),
+            np.load(os.path.join(_dirPath, "buckets.npy")),
+            np.load(os.path.join(_dirPath, "hops.npy")))
+
+    def save(
+            self,
+            _dirPath: str,
+            _key: str):
+        '''
+        @desc
+            Saves the table to a cache directory. The columns and the header are written to temporary files and renamed,
+            the header last. So, neither an interrupted save nor the processes saving the same table at once leave a broken cache behind
+        @param[in]  _dirPath
+            Path of the cache directory. It's created if needed
+        @param[in]  _key
+            Key of the ISLs and the colors (see get_Key)
+        '''
+        os.makedirs(_dirPath, exist_ok=True)
+        _headerPath = os.path.join(_dirPath, HashRoutingTable._headerFileName)
+        if os.path.exists(_headerPath):
+            os.remove(_headerPath)
+        _suffix = "." + str(os.getpid()) + ".tmp"
+        for _name, _column in (("nodeIDs", self.__nodeIDs), ("buckets", self.__buckets), ("hops", self.__hops)):
+            _path = os.path.join(_dirPath, _name + ".npy")
+            with open(_path + _suffix, "wb") as _f:
+                np.save(_f, _column)
+            os.replace(_path + _suffix, _path)
+        with open(_headerPath + _suffix, "w") as _f:
+            json.dump({"version": HashRoutingTable._version, "key": _key, "numOfNodes": len(self.__nodeIDs), "numOfColors": self.__buckets.shape[1]}, _f, indent = 4)
+        os.replace(_headerPath + _suffix, _headerPath)
+
+    @staticmethod
+    def prepare(
+            _nodeIDs: 'list[int]',
+            _neighbors: 'list[list[int]]',
+            _colors: 'list[int]',
+            _numOfColors: int) -> 'tuple[HashRoutingTable, bool]':
+        '''
+        @desc
+            Loads the table from the cache directory if it matches. Otherwise, builds it and saves it there (see set_CacheDirectory)
+        @param[in]  _nodeIDs
+            List of the node IDs of the satellites
+        @param[in]  _neighbors
+            Neighbor node IDs of each satellite, -1 for no neighbor
+        @param[in]  _colors
+            Color of each satellite
+        @param[in]  _numOfColors
+            Number of colors
+        @return
+            The table
+            True if it was loaded from the cache, False if it was built
+        '''
+        _directory = HashRoutingTable.__cacheDirectory
+        _key = None
+        if _directory is not None:
+            _key = HashRoutingTable.get_Key(_nodeIDs, _neighbors, _colors, _numOfColors)
+            _table = HashRoutingTable.load(_directory, _key)
+            if _table is not None:
+                return _table, True
+        _table = HashRoutingTable.build(_nodeIDs, _neighbors, _colors, _numOfColors)
+        if _directory is not None:
+            _table.save(_directory, _key)
+        return _table, False
+
+    def get_Routes(
+            self,
+            _nodeID: int) -> 'tuple[list[int], list]':
+        '''
+        @desc
+            Returns the buckets of a satellite
+        @param[in]  _nodeID
+            Node ID of the satellite
+        @return
+            Node ID of the bucket of each color, -1 if no satellite of the color is close enough
+            Hop vector to the bucket of each color, -1 if there is no bucket
+        '''
+        _idx = self.__index[int(_nodeID)]
+        _buckets = self.__buckets[_idx].tolist()
+        _hops = self.__hops[_idx].tolist()
+        return _buckets, [_hops[i] if _bucket != -1 else -1 for i, _bucket in enumerate(_buckets)]
+
+    def __init__(
+            self,
+            _nodeIDs: np.ndarray,
+            _buckets: np.ndarray,
+            _hops: np.ndarray) -> None:
+        '''
+        @desc
+            Constructor of the class. Use build or load
+        @param[in]  _nodeIDs
+            Node IDs of the satellites
+        @param[in]  _buckets
+            Node ID of the bucket of each satellite (row) and color (column), -1 for no bucket
+        @param[in]  _hops
+            Hop vector of each satellite and color
+        '''
+        self.__nodeIDs = _nodeIDs
+        self.__buckets = _buckets
+        self.__hops = _hops
+        self.__index = {_nodeID: _idx for _idx, _nodeID in enumerate(_nodeIDs.tolist())}
@@ -1,4 +1,5 @@
 import threading
+import types
 import queue
 import numpy as np
 from src.nodes.inode import INode, ENodeType
@@ -15,9 +16,14 @@ from src.nodes.topology import Topology
 
 from src.utils import Location
 from src.utils import File
+from src.sim.resourceregistry import ResourceRegistry
 
 from src.models.models_cdn.cache.lru import LRU_Cache
+from src.simlogging.recordsinkbinary import RecordSinkBinary
+from src.models.models_cdn.objectdictionary import ObjectDictionary
+from src.models.models_cdn.hashroutingtable import HashRoutingTable
 
+import os
 import json 
 import hashlib
 
@@ -33,6 +39,18 @@ class ModelCDNProvider(IModel):
     
     __global_cache = {}
     cafe_push_back = True 
+    # hash color of the string object IDs (see __hash_check). It's cleared once it has __color_memo_limit IDs
+    __color_memo = {}
+    __color_memo_limit = 1 << 20
+
+    # APIs bringing traffic to the satellite. The epoch hooks only run for the satellites that got any (see needs_post_epoch_hook)
+    __trafficAPIs = {"handle_requests", "record", "redistribute", "proactive_cache_push"}
+    # Attributes not stored in a checkpoint (see IModel get_Checkpoint). The parameters are taken from the config of the resumed run,
+    # so that a sweep can fork from a warmed checkpoint. The hash buckets are found again along with their record handles (see __hash_bfs)
+    _checkpointExclude = (
+        "_ModelCDNProvider__neighbors", "hash_number", "_ModelCDNProvider__useGS", "_ModelCDNProvider__prefetch_byte",
+        "_ModelCDNProvider__allow_uplink", "_ModelCDNProvider__prefetch_strategy", "_ModelCDNProvider__logLocation",
+        "_ModelCDNProvider__hash_buckets", "_ModelCDNProvider__hash_hops", "_ModelCDNProvider__hash_routes", "_ModelCDNProvider__recordSink")
 
     @property
     def cache(self):
@@ -121,8 +139,55 @@ class ModelCDNProvider(IModel):
         #     _ret = self.__apiHandlerDictionary[_apiName](self, **_kwargs)
         # except Exception as e:
         #     print(f"[ModelCDNProvider]: An unhandled API request has been received by {self.__ownernode.nodeID}: ", e)
+        if _apiName in self.__trafficAPIs:
+            self.__hasTraffic = True
         _ret = self.__apiHandlerDictionary[_apiName](self, **_kwargs) 
         return _ret
+
+    def get_APIHandle(
+            self,
+            _apiName: str) -> callable:
+        '''
+        @desc
+            This method returns the handle of an API, resolved once per model instance. See IModel get_APIHandle
+        @param[in] _apiName
+            Name of the API
+        @return
+            Callable taking the keyworded arguments of the API
+        '''
+        _handle = self.__apiHandles.get(_apiName, None)
+        if _handle is None:
+            if _apiName not in self.__apiHandlerDictionary:
+                raise Exception(f"[ModelCDNProvider Error]: The API {_apiName} is not supported")
+            if _apiName in self.__trafficAPIs:
+                #The traffic APIs have to flag the post epoch hook. So, they still go through call_APIs
+                _handle = IModel.get_APIHandle(self, _apiName)
+            else:
+                _handle = types.MethodType(self.__apiHandlerDictionary[_apiName], self)
+            self.__apiHandles[_apiName] = _handle
+        return _handle
+
+    def __get_NeighborAPIHandles(
+            self,
+            _apiName: str) -> list:
+        '''
+        @desc
+            This method returns the handles of an API of the neighbors, in the order of the neighbor list.
+            They are resolved at the first call, so the topology has to be set.
+            The handle is None if the neighbor isn't in the topology.
+        @param[in] _apiName
+            Name of the API
+        @return
+            List of the handles
+        '''
+        _handles = self.__neighborAPIHandles.get(_apiName, None)
+        if _handles is None:
+            _handles = []
+            for _neighbor in self.__neighbors:
+                _neighborNode = self.__myTopology.get_Node(_neighbor)
+                _handles.append(_neighborNode.has_ModelWithName('ModelCDNProvider').get_APIHandle(_apiName) if _neighborNode is not None else None)
+            self.__neighborAPIHandles[_apiName] = _handles
+        return _handles
     
 
     def __init__(
@@ -137,7 +202,10 @@ class ModelCDNProvider(IModel):
         _useGS: bool,
         _prefetch_byte: float,
         _allow_uplink: bool,
-        _prefetch_strategy: str
+        _prefetch_strategy: str,
+        _recordFormat: str = "text",
+        _recordIDWidth: int = 32,
+        _logLocation: bool = False
     ) -> None:
         '''
         @desc
@@ -148,6 +216,12 @@ class ModelCDNProvider(IModel):
             Logger instance
         @param[in]  _minElevation
             Minimum elevation angle of view in degrees
+        @param[in]  _recordFormat
+            Format of the request records (see __record). "text" for the [Requests Records] log lines or "binary" for the columns of RecordSinkBinary
+        @param[in]  _recordIDWidth
+            Width of the object ID column of the binary records in bytes. Not used for the integer object IDs (see ObjectDictionary)
+        @param[in]  _logLocation
+            True to log the location of the satellite at every epoch. Default is False
         '''
         assert _ownernodeins is not None
         assert _loggerins is not None
@@ -183,14 +257,28 @@ class ModelCDNProvider(IModel):
         self.__byte_hit = 0
         self.__isl = [0, 0, 0, 0]
         self.__prefetch_strategy = _prefetch_strategy
+        self.__hasTraffic = False
+        self.__logLocation = _logLocation
+        self.__apiHandles = {}              #API name is the key. See get_APIHandle
+        self.__neighborAPIHandles = {}      #API name is the key. See __get_NeighborAPIHandles
         # with open("../isl/sat_color_2_hops.json", "r") as f:
         # with open("../isl/sat_color_3_hops.json", "r") as f:
         # with open("../isl/sat_color_16.json", "r") as f:
-        with open(_topologyFile, "r") as f:
-            data = json.load(f)
-            self.hash_number = data[str(self.__ownernode.nodeID)]
+        #The file is the same for all the satellites. So, it's parsed once
+        data = ResourceRegistry.load_JSON(_topologyFile)
+        self.hash_number = data[str(self.__ownernode.nodeID)]
         self.__hash_buckets = None 
 
+        #The binary records are next to the log file of the node, e.g., Log_Constln1_0_SAT_0.rec
+        self.__recordSink: RecordSinkBinary = None
+        if _recordFormat == "binary":
+            _logPath = getattr(_loggerins, "filePath", None)
+            if _logPath is None:
+                raise Exception("[ModelCDNProvider Error]: The binary request records need a file logger (e.g., LoggerFileChunkwise).")
+            self.__recordSink = RecordSinkBinary(os.path.splitext(_logPath)[0] + ".rec", _recordIDWidth, _integerIDs = ObjectDictionary.get_Active() is not None)
+        elif _recordFormat != "text":
+            raise Exception(f"[ModelCDNProvider Error]: Unknown record_format {_recordFormat}. It should be text or binary.")
+
 
     def Execute(self) -> None:
         # Run active scheduling policies
@@ -201,10 +289,13 @@ class ModelCDNProvider(IModel):
         #     neighbor_node = self.__myTopology.get_Node(neighbor)
         #     latency.append(neighbor_node.get_Position(self.__ownernode.timestamp).get_distance(self.__ownernode.get_Position(self.__ownernode.timestamp)) / 3e8)
         # print(latency)
-        if self.ownerNode.nodeID in [1008, 1693, 2412]:
+        if self.__logLocation:
             self.__logger.write_Log(f'[Location]: {self.ownerNode.get_Position(self.ownerNode.timestamp).to_lat_long()}', ELogType.LOGALL, self.__ownernode.timestamp, self.iName) 
         
 
+    def needs_Tick(self) -> bool:
+        return self.__activeSchedulingStrategy is not ModelCDNProvider.__no_op or self.__logLocation
+
     def __handle_requests(self, **kwargs) -> list:
         return self.__handleRequestsStrategy(self, **kwargs)
 
@@ -219,6 +310,7 @@ class ModelCDNProvider(IModel):
             self.__set_my_topology()
 
         requests :list[File] = kwargs['requests']
+        _checkInCache = self.__get_NeighborAPIHandles('check_in_cache')
         hits = []
         for request in requests:
 
@@ -233,9 +325,8 @@ class ModelCDNProvider(IModel):
                 remote_replicas_node: INode = None
                 i = 3
                 while i >= 0:
-                    neighbor_node = self.__myTopology.get_Node(self.__neighbors[i])
-                    if neighbor_node.has_ModelWithName('ModelCDNProvider').call_APIs('check_in_cache', request_id=request.id):
-                        remote_replicas_node = neighbor_node
+                    if _checkInCache[i](request_id=request.id):
+                        remote_replicas_node = self.__myTopology.get_Node(self.__neighbors[i])
                         break
                     i -= 1
                 
@@ -274,6 +365,7 @@ class ModelCDNProvider(IModel):
             self.__set_my_topology()
 
         requests :list[File] = kwargs['requests']
+        _checkInCache = self.__get_NeighborAPIHandles('check_in_cache')
         hits = []
         for request in requests:
             if request.id in self.__cache:
@@ -287,9 +379,8 @@ class ModelCDNProvider(IModel):
                 remote_replicas_node: INode = None
                 i = 3
                 while i >= 0:
-                    neighbor_node = self.__myTopology.get_Node(self.__neighbors[i])
-                    if neighbor_node.has_ModelWithName('ModelCDNProvider').call_APIs('check_in_cache', request_id=request.id):
-                        remote_replicas_node = neighbor_node
+                    if _checkInCache[i](request_id=request.id):
+                        remote_replicas_node = self.__myTopology.get_Node(self.__neighbors[i])
                         break
                     i -= 1
                 
@@ -324,6 +415,7 @@ class ModelCDNProvider(IModel):
             self.__set_my_topology()
 
         requests :list[File] = kwargs['requests']
+        _checkInCache = self.__get_NeighborAPIHandles('check_in_cache')
         hits = []
         for request in requests:
             if request.id in self.__cache:
@@ -337,9 +429,8 @@ class ModelCDNProvider(IModel):
                 remote_replicas_node: INode = None
                 i = 3
                 while i >= 0:
-                    neighbor_node = self.__myTopology.get_Node(self.__neighbors[i])
-                    if neighbor_node.has_ModelWithName('ModelCDNProvider').call_APIs('check_in_cache', request_id=request.id):
-                        remote_replicas_node = neighbor_node
+                    if _checkInCache[i](request_id=request.id):
+                        remote_replicas_node = self.__myTopology.get_Node(self.__neighbors[i])
                         break
                     i -= 1
                 
@@ -694,6 +785,8 @@ class ModelCDNProvider(IModel):
     def __search_neighbors(self, target, hops = 1):
         if hops == 0:
             return False, idx 
+        if self.__myTopology is None:
+            self.__set_my_topology()
         q = queue.Queue()
         seen = set()
         seen.add(self.__ownernode.nodeID)
@@ -720,6 +813,21 @@ class ModelCDNProvider(IModel):
     def __get_neighbors(self):
         return self.__neighbors
 
+    def __needs_prev_epoch_hook(self, **kwargs) -> bool:
+        """
+        @desc
+            API for checking if the prev_epoch_hook has any work to do. Only the prefetching from the ground stations is done there
+        """
+        return self.__useGS
+
+    def __needs_post_epoch_hook(self, **kwargs) -> bool:
+        """
+        @desc
+            API for checking if the post_epoch_hook has any work to do.
+            The counters it logs and resets only change if the satellite got traffic in the epoch or prefetched
+        """
+        return self.__useGS or self.__hasTraffic
+
     def __post_epoch_hook(self, **kwargs):
         if self.__myTopology is None:
             self.__set_my_topology() 
@@ -735,6 +843,7 @@ class ModelCDNProvider(IModel):
 
         self.__closest_gs = None
         self.__hit_or_admit.clear() 
+        self.__hasTraffic = False
 
     def __prev_epoch_hook(self, **kwargs):
         if self.__myTopology is None:
@@ -787,36 +896,36 @@ class ModelCDNProvider(IModel):
         traffic = []
         for req in requests:
             traffic.append([req.id, req.size])
+        if self.__recordSink is not None:
+            self.__recordSink.write_Records(self.__ownernode.timestamp.to_micros() // 1000000, kwargs["user_id"], kwargs["hops"], traffic)
+            return
         self.__logger.write_Log(f'[Requests Records]: {kwargs["user_id"]}, {kwargs["hops"]},{traffic}', ELogType.LOGALL, self.__ownernode.timestamp, self.iName) 
 
     def __hash_bfs(self):
+        #The buckets of all the satellites of the topology are found at once and kept for the other satellites (see HashRoutingTable)
         self.__set_my_topology()
-        l = [(self.__ownernode.nodeID, 0, [0, 0])]
-        seen = set()
-        seen.add(int(self.__ownernode.nodeID))
-        d = {}
-        hops_d = {}
-        while len(l) != 0:
-            cur, dist, hops = l[0]
-            l.pop(0)
-            node = self.__myTopology.get_Node(int(cur))
-            hash_number = node.has_ModelWithName('ModelCDNProvider').hash_number
-            if hash_number not in d:
-                d[hash_number] = int(cur)
-                hops_d[hash_number] = hops.copy()
-            for idx, neigh in enumerate(node.has_ModelWithName('ModelCDNProvider').call_APIs('get_neighbors')):
-                if int(neigh) not in seen and dist <= 4 and int(neigh) != -1:
-                    new_hop = hops.copy()
-                    new_hop[idx // 2] += 1
-                    l.append((int(neigh), dist + 1, new_hop))
-                    seen.add(int(neigh))
-        self.__hash_buckets = [-1 for _ in range(NUM_COLOR)] 
-        self.__hash_hops = [-1 for _  in range(NUM_COLOR)]
-        for i in range(len(self.__hash_buckets)):
-            if i in d:
-                self.__hash_buckets[i] = d[i] 
-                self.__hash_hops[i] = hops_d[i]
-        print(f"[Link]: [{self.ownerNode.nodeID},{self.__hash_buckets}]")
+        table = HashRoutingTable.get_Table(self.__myTopology.id)
+        if table is None:
+            providers = [node.has_ModelWithName('ModelCDNProvider') for node in self.__myTopology.nodes]
+            providers = [provider for provider in providers if provider is not None]
+            table, loaded = HashRoutingTable.prepare(
+                [provider.ownerNode.nodeID for provider in providers],
+                [provider.call_APIs('get_neighbors') for provider in providers],
+                [provider.hash_number for provider in providers],
+                NUM_COLOR)
+            HashRoutingTable.set_Table(self.__myTopology.id, table)
+            print(f"[ModelCDNProvider]: {'Loaded' if loaded else 'Built'} the hash routing table of {len(providers)} satellites")
+        self.__hash_buckets, self.__hash_hops = table.get_Routes(self.ownerNode.nodeID)
+        #Bucket of each color, i.e., the first color from it on (wrapping around) that has a bucket
+        self.__hash_routes = [-1 for _ in range(NUM_COLOR)]
+        for i in range(NUM_COLOR):
+            for probe in range(NUM_COLOR):
+                if self.__hash_buckets[(i + probe) % NUM_COLOR] != -1:
+                    self.__hash_routes[i] = (i + probe) % NUM_COLOR
+                    break
+            assert self.__hash_routes[i] != -1
+        #Handles of the record API of the buckets, which __hash_check fans the requests out to
+        self.__hash_records = [self.__myTopology.get_Node(int(_bucket)).has_ModelWithName('ModelCDNProvider').get_APIHandle('record') if _bucket != -1 else None for _bucket in self.__hash_buckets]
 
 
 
@@ -829,20 +938,30 @@ class ModelCDNProvider(IModel):
         # return 
         if self.__hash_buckets == None:
             self.__hash_bfs()
-        distributed_requests = [[] for _ in range(NUM_COLOR)]
+        # The color of each object is computed once: the encoded IDs have a column of colors in the dictionary, the others are memoized.
+        # The color of an encoded ID is the one of its original ID (see ObjectDictionary)
+        dictionary = ObjectDictionary.get_Active()
+        colors = dictionary.get_Colors(NUM_COLOR) if dictionary is not None else ModelCDNProvider.__color_memo
+        distributed_requests = {}
         for req in requests:
-            hash_id = int(hashlib.md5(req.id.encode()).hexdigest(), 16) % NUM_COLOR
-            hash_bucket_idx = hash_id
-            for i in range(NUM_COLOR):
-                if self.__hash_buckets[hash_bucket_idx] != -1:
-                    break
-                else:
-                    hash_bucket_idx = (hash_bucket_idx + 1) % NUM_COLOR
-            assert self.__hash_buckets[hash_bucket_idx] != -1
-            distributed_requests[hash_bucket_idx].append(req)
-        for i, reqs in enumerate(distributed_requests):
-            if len(distributed_requests[i]) != 0:
-                self.__myTopology.get_Node(int(self.__hash_buckets[i])).has_ModelWithName('ModelCDNProvider').call_APIs('record', requests=reqs, user_id=kwargs["user_id"], hops = self.__hash_hops[i])
+            color = colors[req.id] if dictionary is not None else colors.get(req.id, None)
+            if color is None:
+                color = ModelCDNProvider.__memoize_color(req.id)
+            distributed_requests.setdefault(self.__hash_routes[color], []).append(req)
+        for i in sorted(distributed_requests):
+            self.__hash_records[i](requests=distributed_requests[i], user_id=kwargs["user_id"], hops = self.__hash_hops[i])
+
+    @staticmethod
+    def __memoize_color(object_id: str) -> int:
+        '''
+        @desc
+            Computes the hash color of an object ID, the md5 of the ID modulo NUM_COLOR, and adds it to the memo table. The table is cleared once it's full
+        '''
+        color = int(hashlib.md5(object_id.encode()).hexdigest(), 16) % NUM_COLOR
+        if len(ModelCDNProvider.__color_memo) >= ModelCDNProvider.__color_memo_limit:
+            ModelCDNProvider.__color_memo.clear()
+        ModelCDNProvider.__color_memo[object_id] = color
+        return color
                 
 
 
@@ -960,6 +1079,8 @@ class ModelCDNProvider(IModel):
         "handle_requests": __handle_requests,
         "post_epoch_hook": __post_epoch_hook,
         "prev_epoch_hook": __prev_epoch_hook,
+        "needs_post_epoch_hook": __needs_post_epoch_hook,
+        "needs_prev_epoch_hook": __needs_prev_epoch_hook,
         "proactive_cache_push": __proactive_cache_receiver,
         "check_in_cache": __check_in_cache,
         "check_in_cafe_cache": __check_in_cafe_cache,
@@ -1011,6 +1132,13 @@ def init_ModelCDNProvider(
         It's a converted JSON object containing the model related info. 
         @key min_elevation
             Minimum elevation angle of view in degrees
+        @key record_format
+            Optional. Format of the request records, "text" for the [Requests Records] log lines or "binary" for the columns of RecordSinkBinary
+            next to the log file, which the cache replayer reads much faster. Default is "text"
+        @key record_id_width
+            Optional. Width of the object ID column of the binary records in bytes. Default is 32
+        @key log_location
+            Optional. True to log the location of the satellite at every epoch. Default is false
     @return
         Instance of the model class
     '''
@@ -1033,6 +1161,18 @@ def init_ModelCDNProvider(
     if "neighbors" not in _modelArgs:
         raise Exception("[ModelCDNProvider Error]: The model arguments should contain the neighbors parameter.") 
 
+    _recordFormat = "text"
+    if "record_format" in _modelArgs:
+        _recordFormat = _modelArgs.record_format
+
+    _recordIDWidth = 32
+    if "record_id_width" in _modelArgs:
+        _recordIDWidth = _modelArgs.record_id_width
+
+    _logLocation = False
+    if "log_location" in _modelArgs:
+        _logLocation = _modelArgs.log_location
+
     return ModelCDNProvider(_ownernodeins, 
                             _loggerins, 
                             _modelArgs.cache_size, 
@@ -1043,5 +1183,8 @@ def init_ModelCDNProvider(
                             _modelArgs.useGS,
                             _modelArgs.prefetch_byte,
                             _modelArgs.allow_uplink,
-                            _modelArgs.prefetch_strategy
+                            _modelArgs.prefetch_strategy,
+                            _recordFormat,
+                            _recordIDWidth,
+                            _logLocation
                             )
@@ -6,9 +6,11 @@ from src.sim.imanager import EManagerReqType
 from src.simlogging.ilogger import ILogger, ELogType
 
 from src.utils import File
+from src.sim.pendingresult import PendingResult
 
 import numpy as np
 import hashlib
+import functools
 
 class ModelCDNUser(IModel):
    
@@ -164,10 +166,14 @@ class ModelCDNUser(IModel):
             targetSatellite = self.__myTopology.get_Node(targetSatellites[i])
             requests = requestsPerSat[i]
             cdn_cache_hit_results = targetSatellite.has_ModelWithName('ModelCDNProvider').call_APIs('handle_requests', requests=list(requests), user_id = self.__ownernode.nodeID) 
-            self.__logger.write_Log(f"[Request Result]:{targetSatellite.nodeID},{cdn_cache_hit_results}", 
-                                    ELogType.LOGINFO, self.__ownernode.timestamp)
+            # The satellite may be run by another process, which sends the results back later (see ManagerMultiprocess)
+            PendingResult.when_Ready(cdn_cache_hit_results, functools.partial(self.__log_RequestResult, targetSatellite.nodeID, self.__ownernode.timestamp))
         self.__requests.clear()
 
+    def __log_RequestResult(self, _satelliteID: int, _timestamp, _results):
+        self.__logger.write_Log(f"[Request Result]:{_satelliteID},{_results}", 
+                                ELogType.LOGINFO, _timestamp)
+
     def __add_request(self, **kwargs):
         self.__requests.append(kwargs['request'])
 
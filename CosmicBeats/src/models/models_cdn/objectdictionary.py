@@ -0,0 +1,222 @@
+'''
+// Copyright (c) Microsoft Corporation.
+// Licensed under the MIT license.
+
+@desc
+    This module implements the integer encoding of the object IDs of the user traces (dictionary encoding).
+    The IDs of all the traces of a config are encoded once to dense integer codes, in the order of their first request (the traces in the config order).
+    The encoded traces have the same time:id:size lines with the code as the ID. They are saved in a directory (see main.py --intern-object-ids)
+    along with the dictionary (objects.txt, the ID of code i on line i) and a header.json recording the key of the traces they were encoded from
+    (the paths, sizes and modification times). A directory is only reused if its key matches.
+    While a dictionary is active (see activate), UserBasic reads the encoded traces. So, the requests, the caches and the records (hence the cache replayer)
+    work on integer IDs. The original ID of a code is still available (see get_Name), and so is the hash color of the original IDs
+    for the hash buckets of ModelCDNProvider (see get_Colors), which stay the same as with the original IDs.
+'''
+import os
+import json
+import hashlib
+
+class ObjectDictionary():
+    '''
+    Dictionary of the object IDs of the user traces and their encoded traces
+    '''
+    _formatVersion = 1
+    __active: 'ObjectDictionary' = None     # dictionary used by the simulation, if any. See activate
+
+    @staticmethod
+    def get_TracePaths(_configPath: str) -> 'list[str]':
+        '''
+        @desc
+            Returns the trace paths of the nodes of a config, without duplicates, in the config order
+        @param[in]  _configPath
+            Path of the config file
+        @return
+            List of the trace paths
+        '''
+        with open(_configPath, "r") as _file:
+            _config = json.load(_file)
+        _paths = []
+        for _topology in _config["topologies"]:
+            for _node in _topology["nodes"]:
+                if "trace" in _node and _node["trace"] not in _paths:
+                    _paths.append(_node["trace"])
+        return _paths
+
+    @staticmethod
+    def get_Key(_tracePaths: 'list[str]') -> str:
+        '''
+        @desc
+            Returns the key of the traces, a hash of their paths, sizes and modification times
+        '''
+        _hash = hashlib.md5()
+        for _path in _tracePaths:
+            _stat = os.stat(_path)
+            _hash.update(f"{_path}:{_stat.st_size}:{_stat.st_mtime_ns};".encode())
+        return _hash.hexdigest()
+
+    @staticmethod
+    def encode_Traces(
+            _tracePaths: 'list[str]',
+            _directory: str) -> 'ObjectDictionary':
+        '''
+        @desc
+            Encodes the object IDs of the traces and saves the encoded traces and the dictionary in the directory
+        @param[in]  _tracePaths
+            List of the trace paths
+        @param[in]  _directory
+            Path of the output directory
+        @return
+            The dictionary
+        '''
+        os.makedirs(_directory, exist_ok=True)
+        _codes = {}
+        _traces = {}
+        for _index, _path in enumerate(_tracePaths):
+            _traces[_path] = f"{_index}_{os.path.basename(_path)}"
+            with open(_path, "rb") as _input, open(os.path.join(_directory, _traces[_path]), "w") as _output:
+                for _line in _input:
+                    _tokens = _line.strip().decode('utf-8').split(':')
+                    if len(_tokens) < 2:
+                        _output.write(_line.decode('utf-8'))
+                        continue
+                    _code = _codes.get(_tokens[1], None)
+                    if _code is None:
+                        _code = len(_codes)
+                        _codes[_tokens[1]] = _code
+                    _tokens[1] = str(_code)
+                    _output.write(":".join(_tokens) + "\n")
+
+        # the codes are the positions in the insertion order
+        _names = list(_codes.keys())
+        with open(os.path.join(_directory, "objects.txt"), "w") as _file:
+            _file.write("\n".join(_names))
+        with open(os.path.join(_directory, "header.json"), "w") as _file:
+            json.dump({"version": ObjectDictionary._formatVersion, "key": ObjectDictionary.get_Key(_tracePaths), "traces": _traces}, _file)
+        return ObjectDictionary(_directory, _names, _traces)
+
+    @staticmethod
+    def load(_directory: str) -> 'ObjectDictionary':
+        '''
+        @desc
+            Loads the dictionary saved by encode_Traces
+        @param[in]  _directory
+            Path of the directory
+        @return
+            The dictionary
+        '''
+        with open(os.path.join(_directory, "header.json"), "r") as _file:
+            _header = json.load(_file)
+        with open(os.path.join(_directory, "objects.txt"), "r") as _file:
+            _content = _file.read()
+        _names = _content.split("\n") if len(_content) > 0 else []
+        return ObjectDictionary(_directory, _names, _header["traces"])
+
+    @staticmethod
+    def prepare(
+            _configPath: str,
+            _directory: str) -> 'tuple[ObjectDictionary, bool]':
+        '''
+        @desc
+            Loads the dictionary of the traces of a config from the directory if it matches the traces. Otherwise, encodes them there
+        @param[in]  _configPath
+            Path of the config file
+        @param[in]  _directory
+            Path of the directory
+        @return
+            The dictionary
+            True if it was loaded, False if the traces were encoded
+        '''
+        _tracePaths = ObjectDictionary.get_TracePaths(_configPath)
+        _headerPath = os.path.join(_directory, "header.json")
+        if os.path.isfile(_headerPath):
+            with open(_headerPath, "r") as _file:
+                _header = json.load(_file)
+            if (_header.get("version", None) == ObjectDictionary._formatVersion and _header["key"] == ObjectDictionary.get_Key(_tracePaths)
+                    and list(_header["traces"].keys()) == _tracePaths):
+                return ObjectDictionary.load(_directory), True
+        return ObjectDictionary.encode_Traces(_tracePaths, _directory), False
+
+    @staticmethod
+    def activate(_dictionary: 'ObjectDictionary'):
+        '''
+        @desc
+            Sets the dictionary used by the simulation. The nodes created from now on read the encoded traces. None switches it off
+        '''
+        ObjectDictionary.__active = _dictionary
+
+    @staticmethod
+    def get_Active() -> 'ObjectDictionary':
+        '''
+        @desc
+            Returns the dictionary used by the simulation, None if the object IDs are not encoded
+        '''
+        return ObjectDictionary.__active
+
+    @staticmethod
+    def get_Name(_objectID) -> str:
+        '''
+        @desc
+            Returns the original ID of an object. A string ID is returned as it is
+        @param[in]  _objectID
+            Code or original ID of the object
+        @return
+            Original ID
+        '''
+        if type(_objectID) is str:
+            return _objectID
+        return ObjectDictionary.__active.__names[_objectID]
+
+    def get_EncodedTrace(
+            self,
+            _tracePath: str) -> str:
+        '''
+        @desc
+            Returns the path of the encoded trace of a trace
+        @param[in]  _tracePath
+            Path of the trace as it is in the config
+        @return
+            Path of the encoded trace
+        '''
+        if _tracePath not in self.__traces:
+            raise Exception(f"[ObjectDictionary Error]: The trace {_tracePath} is not encoded in {self.__directory}")
+        return os.path.join(self.__directory, self.__traces[_tracePath])
+
+    def get_Colors(
+            self,
+            _numOfColors: int) -> 'list[int]':
+        '''
+        @desc
+            Returns the hash color of each code, the md5 of its original ID modulo the number of colors. It's computed once per number of colors
+        @param[in]  _numOfColors
+            Number of colors
+        @return
+            List of the colors, indexed by the code
+        '''
+        _colors = self.__colors.get(_numOfColors, None)
+        if _colors is None:
+            _colors = [int(hashlib.md5(_name.encode()).hexdigest(), 16) % _numOfColors for _name in self.__names]
+            self.__colors[_numOfColors] = _colors
+        return _colors
+
+    def __len__(self) -> int:
+        return len(self.__names)
+
+    def __init__(
+            self,
+            _directory: str,
+            _names: 'list[str]',
+            _traces: 'dict[str, str]') -> None:
+        '''
+        @desc
+            Constructor of the class. Use encode_Traces or load
+        @param[in]  _directory
+            Path of the directory of the encoded traces
+        @param[in]  _names
+            Original ID of each code
+        @param[in]  _traces
+            Dictionary where the trace path is the key and the file name of its encoded trace is the value
+        '''
+        self.__directory = _directory
+        self.__names = _names
+        self.__traces = _traces
+        self.__colors = {}      #number of colors is the key. See get_Colors
@@ -0,0 +1,215 @@
+'''
+// Copyright (c) Microsoft Corporation.
+// Licensed under the MIT license.
+
+@desc
+    This module implements the on-disk cache of the pass times of ModelFovTimeBased (see ManagerParallel compute_FOVs and load_FOVs).
+    The cache is a directory of columns, one .npy file per column:
+        nodeIDs (int64), pointers (int64) -> the passes of nodeIDs[i] are the rows pointers[i]:pointers[i + 1] of
+        starts (float64 unix), ends (float64 unix), otherIDs (int64), otherTypes (int64, ENodeType value)
+    and a header.json recording the key of the configuration the passes were computed for
+    (hash of the TLEs, the node positions, the minimum elevations and the simulation time).
+    A cache is only loaded if its key matches the current configuration. The columns are memory-mapped and
+    the pass table of a node is only built when the node asks for it.
+'''
+import os
+import json
+import hashlib
+from collections.abc import MutableMapping
+
+import numpy as np
+
+from src.utils import Time
+
+class FovTable(MutableMapping):
+    '''
+    Lazy node ID -> pass table mapping over the memory-mapped columns of a cache.
+    The pass table of a node is the numpy array of (start datetime, end datetime, nodeID, ENodeType value) rows used by ModelFovTimeBased.
+    '''
+    def __init__(
+            self,
+            _nodeIDs: np.ndarray,
+            _pointers: np.ndarray,
+            _starts: np.ndarray,
+            _ends: np.ndarray,
+            _otherIDs: np.ndarray,
+            _otherTypes: np.ndarray) -> None:
+        '''
+        @desc
+            Constructor of the class
+        @param[in]  _nodeIDs, _pointers, _starts, _ends, _otherIDs, _otherTypes
+            Columns of the cache. See the module description
+        '''
+        self.__positions = {int(_nodeID): _pos for _pos, _nodeID in enumerate(_nodeIDs)}
+        self.__pointers = _pointers
+        self.__starts = _starts
+        self.__ends = _ends
+        self.__otherIDs = _otherIDs
+        self.__otherTypes = _otherTypes
+        self.__tables = {}     #Pass tables that have been built or set. Node ID is the key
+
+    def __build(
+            self,
+            _position: int) -> np.ndarray:
+        '''
+        @desc
+            Builds the pass table of a node from the columns
+        @param[in]  _position
+            Position of the node in the nodeIDs column
+        @return
+            numpy array of nx4
+        '''
+        _first, _last = int(self.__pointers[_position]), int(self.__pointers[_position + 1])
+        _table = np.empty((_last - _first, 4), dtype=object)
+        _table[:, 0] = [Time().from_unix(_start).to_datetime() for _start in self.__starts[_first:_last].tolist()]
+        _table[:, 1] = [Time().from_unix(_end).to_datetime() for _end in self.__ends[_first:_last].tolist()]
+        _table[:, 2] = self.__otherIDs[_first:_last].tolist()
+        _table[:, 3] = self.__otherTypes[_first:_last].tolist()
+        return _table
+
+    def __getitem__(
+            self,
+            _nodeID: int) -> np.ndarray:
+        if _nodeID not in self.__tables:
+            self.__tables[_nodeID] = self.__build(self.__positions[_nodeID])
+        return self.__tables[_nodeID]
+
+    def __setitem__(
+            self,
+            _nodeID: int,
+            _table: np.ndarray):
+        self.__tables[_nodeID] = _table
+
+    def __delitem__(
+            self,
+            _nodeID: int):
+        if _nodeID not in self.__tables and _nodeID not in self.__positions:
+            raise KeyError(_nodeID)
+        #Keep the node as a key with no passes, so that the columns are not used for it again
+        self.__tables[_nodeID] = None
+
+    def __iter__(self):
+        return iter(set(self.__positions) | set(self.__tables))
+
+    def __len__(self) -> int:
+        return len(set(self.__positions) | set(self.__tables))
+
+class FovCache():
+    '''
+    Columnar, validated on-disk format of the pass times of ModelFovTimeBased
+    '''
+    _version = 1
+    _headerFileName = "header.json"
+    _columns = {"nodeIDs": np.int64, "pointers": np.int64, "starts": np.float64, "ends": np.float64, "otherIDs": np.int64, "otherTypes": np.int64}
+
+    @staticmethod
+    def get_Key(
+            _nodes: 'list[tuple]',
+            _startUnix: float,
+            _endUnix: float,
+            _delta: float) -> str:
+        '''
+        @desc
+            Computes the key of a configuration
+        @param[in]  _nodes
+            List of (nodeID, ENodeType value, position, minimum elevation) of the nodes having ModelFovTimeBased.
+            Position is (TLE line 1, TLE line 2) for a satellite and (latitude, longitude, altitude) for the others
+        @param[in]  _startUnix
+            Start of the simulation (unix time)
+        @param[in]  _endUnix
+            End of the simulation (unix time)
+        @param[in]  _delta
+            Time gap between two epochs in seconds
+        @return
+            Hex digest string
+        '''
+        _hash = hashlib.sha1()
+        _hash.update(f"{FovCache._version},{float(_startUnix)!r},{float(_endUnix)!r},{float(_delta)!r}\n".encode())
+        for _nodeID, _nodeType, _position, _minElevation in sorted(_nodes, key = lambda _node: _node[0]):
+            _position = ",".join(_x.strip() if isinstance(_x, str) else repr(float(_x)) for _x in _position)
+            _hash.update(f"{int(_nodeID)},{int(_nodeType)},{_position},{float(_minElevation)!r}\n".encode())
+        return _hash.hexdigest()
+
+    @staticmethod
+    def read_Key(_dirPath: str) -> str:
+        '''
+        @desc
+            Reads the key of a cache
+        @param[in]  _dirPath
+            Path of the cache directory
+        @return
+            Key string. None if there is no valid header
+        '''
+        try:
+            with open(os.path.join(_dirPath, FovCache._headerFileName), "r") as _f:
+                _header = json.load(_f)
+        except (OSError, ValueError):
+            return None
+        if _header.get("version") != FovCache._version:
+            return None
+        return _header.get("key")
+
+    @staticmethod
+    def save(
+            _dirPath: str,
+            _key: str,
+            _fovDict: dict):
+        '''
+        @desc
+            Saves the pass tables to a cache directory.
+            The header is removed first and written last, so an interrupted save never leaves a valid looking cache behind.
+        @param[in]  _dirPath
+            Path of the cache directory. It's created if needed
+        @param[in]  _key
+            Key of the configuration (see get_Key)
+        @param[in]  _fovDict
+            Dictionary where the key is the node ID and the value is the pass table of the node
+        '''
+        os.makedirs(_dirPath, exist_ok=True)
+        _headerPath = os.path.join(_dirPath, FovCache._headerFileName)
+        if os.path.exists(_headerPath):
+            os.remove(_headerPath)
+
+        _nodeIDs = sorted(_nodeID for _nodeID, _table in _fovDict.items() if _table is not None and len(_table) > 0)
+        _tables = [_fovDict[_nodeID] for _nodeID in _nodeIDs]
+        _counts = [len(_table) for _table in _tables]
+        _rows = [_row for _table in _tables for _row in _table]
+        _columns = {
+            "nodeIDs": _nodeIDs,
+            "pointers": np.concatenate(([0], np.cumsum(_counts, dtype=np.int64))),
+            "starts": [_row[0].timestamp() for _row in _rows],
+            "ends": [_row[1].timestamp() for _row in _rows],
+            "otherIDs": [_row[2] for _row in _rows],
+            "otherTypes": [_row[3] for _row in _rows]}
+        for _name, _dtype in FovCache._columns.items():
+            np.save(os.path.join(_dirPath, _name + ".npy"), np.asarray(_columns[_name], dtype=_dtype))
+
+        _header = {
+            "version": FovCache._version,
+            "key": _key,
+            "numOfNodes": len(_nodeIDs),
+            "numOfPasses": len(_rows),
+            "columns": {_name: np.dtype(_dtype).name for _name, _dtype in FovCache._columns.items()}}
+        _tempPath = _headerPath + "." + str(os.getpid()) + ".tmp"
+        with open(_tempPath, "w") as _f:
+            json.dump(_header, _f, indent = 4)
+        os.replace(_tempPath, _headerPath)
+
+    @staticmethod
+    def load(
+            _dirPath: str,
+            _key: str) -> FovTable:
+        '''
+        @desc
+            Loads the pass tables from a cache directory. The columns are memory-mapped.
+        @param[in]  _dirPath
+            Path of the cache directory
+        @param[in]  _key
+            Key of the current configuration (see get_Key)
+        @return
+            FovTable instance. None if there is no cache or it was computed for another configuration
+        '''
+        if FovCache.read_Key(_dirPath) != _key:
+            return None
+        _columns = [np.load(os.path.join(_dirPath, _name + ".npy"), mmap_mode = 'r') for _name in FovCache._columns]
+        return FovTable(*_columns)
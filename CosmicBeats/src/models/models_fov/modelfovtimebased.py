@@ -17,11 +17,17 @@ import threading
 import numpy as np
 
 from src.models.imodel import IModel, EModelTag
-from src.nodes.inode import INode
+from src.nodes.inode import INode, ENodeType
 from src.nodes.itopology import ITopology
 from src.simlogging.ilogger import ILogger
 from src.sim.imanager import EManagerReqType
 from src.simlogging.ilogger import ILogger, ELogType
+from src.utils import Time
+from src.models.models_orbital.constellationpropagator import ConstellationPropagator
+from src.models.models_fov.passfinder import PassFinder
+from src.models.models_fov.passindex import PassIndex
+from src.models.models_fov.visibilitytensor import VisibilityTensor
+from src.models.models_fov.fovcache import FovCache
 
 class ModelFovTimeBased(IModel):
    
@@ -33,7 +39,10 @@ class ModelFovTimeBased(IModel):
     
     __nodeToTimes = {} #Static variable to hold the pass times for each node. Node id is the key and the value is a numpy array of (start, end, nodeID, ENodeType) tuples 
     __nodeToNode = {} #static variable to see if this pair of nodes has been calculated. Node id is the key and the value is a list of node ids
+    __nodeToIndex = {} #static variable to hold the interval index of the pass times of each node. Node id is the key and the value is a (pass times array, PassIndex) tuple
     __preloaded = False #static variable to see if the pass times have been preloaded
+    __visibilityTensor = None #static variable to hold the precomputed visibility of all the nodes at every epoch. See VisibilityTensor
+    __visibilityTensorLock = threading.Lock() #Lock for the visibility tensor
     __nodeToTimesLock = threading.Lock() #Lock for the static variable
     
     @property
@@ -124,6 +133,12 @@ class ModelFovTimeBased(IModel):
         
         _targetNodeTypes = _kwargs['_targetNodeTypes']
         
+        if self.__visibilityTensorPath is not None:
+            #The epochs of the simulation time grid are answered by the visibility tensor. The rest fall back to the pass times
+            _ret = self.__get_ViewFromTensor(_myTime, _targetNodeTypes)
+            if _ret is not None:
+                return _ret
+        
         #If the pass times have not been preloaded, don't bother searching
         if not ModelFovTimeBased.__preloaded:
             self.__find_Passes(_targetNodeTypes = _targetNodeTypes)
@@ -133,19 +148,94 @@ class ModelFovTimeBased(IModel):
         if _fp is None or len(_fp) == 0:
             return []
                 
-        #Find the indices of the passes that are in the current time
-        _datetime = _myTime.to_datetime()
+        #Find the passes that are in the current time through the interval index of the pass table
+        #The index is rebuilt whenever the pass table of the node is replaced
+        _indexEntry = ModelFovTimeBased.__nodeToIndex.get(self.__ownernode.nodeID)
+        if _indexEntry is None or _indexEntry[0] is not _fp:
+            _indexEntry = (_fp, PassIndex(_fp))
+            ModelFovTimeBased.__nodeToIndex[self.__ownernode.nodeID] = _indexEntry
+
         _targetNodeInt = [i.value for i in _targetNodeTypes]
+        _ret = _indexEntry[1].get_Visible(_myTime.to_unix(), _targetNodeInt)
         
-        _fpDesiredInds = np.argwhere((_fp[:,0] <= _datetime) & (_fp[:,1] >= _datetime) & (np.isin(_fp[:,3], _targetNodeInt)))
-        _fpDesiredInds = _fpDesiredInds.flatten()
-        _ret = [i[2] for i in _fp[_fpDesiredInds]]
+        return _ret
+    
+    def __get_ViewFromTensor(
+            self,
+            _myTime: Time,
+            _targetNodeTypes: 'list[ENodeType]') -> 'list[int]':
+        """
+        @desc
+            This method looks up the view of the owner node in the visibility tensor. The tensor is loaded or built on the first call.
+        @param[in]  _myTime
+            Time of the FoV search
+        @param[in]  _targetNodeTypes
+            List of the node types that we are interested in
+        @return
+            A list of node IDs that can be seen, highest elevation first. 
+            None if the tensor can't answer, e.g., the time is not on the simulation time grid or the view is between two satellites
+        """
+        _tensor = ModelFovTimeBased.__visibilityTensor
+        if _tensor is None:
+            _tensor = self.__setup_VisibilityTensor()
         
-        #if len(_fpDesiredInds) > 0 and _myTime not in _kwargs:
-        #    #Let's update the list. We don't need to keep the old ones 
-        #    ModelFovTimeBased.__nodeToTimes[self.__ownernode.nodeID] = _fp[_fpDesiredInds[0]:] 
+        if self.__isSatellite is None:
+            self.__isSatellite = self.__ownernode.has_ModelWithTag(EModelTag.ORBITAL) is not None
         
-        return _ret
+        _targetNodeInt = [i.value for i in _targetNodeTypes]
+        if self.__isSatellite:
+            if ENodeType.SAT.value in _targetNodeInt:
+                return None
+            return _tensor.get_VisibleGrounds(self.__ownernode.nodeID, _myTime.to_unix(), _targetNodeInt)
+        
+        if _targetNodeInt != [ENodeType.SAT.value]:
+            return None
+        return _tensor.get_VisibleSatellites(self.__ownernode.nodeID, _myTime.to_unix())
+    
+    def __setup_VisibilityTensor(self) -> VisibilityTensor:
+        """
+        @desc
+            This method loads the visibility tensor of all the satellites and the ground nodes having this model in the topology.
+            If the file doesn't exist or it was built for another configuration, the tensor is built and saved to the file.
+        @return
+            VisibilityTensor instance
+        """
+        with ModelFovTimeBased.__visibilityTensorLock:
+            if ModelFovTimeBased.__visibilityTensor is not None:
+                return ModelFovTimeBased.__visibilityTensor
+            
+            _fovNodes = [_node for _node in self.__get_MyTopology().nodes if _node.has_ModelWithName(self.iName)]
+            _satNodes = [_node for _node in _fovNodes if _node.has_ModelWithTag(EModelTag.ORBITAL)]
+            _groundNodes = [_node for _node in _fovNodes if not _node.has_ModelWithTag(EModelTag.ORBITAL)]
+            _, _, _minElevations = self.__get_MinElevations(_satNodes, _groundNodes)
+            
+            _satIDs = [_node.nodeID for _node in _satNodes]
+            _groundIDs = [_node.nodeID for _node in _groundNodes]
+            _groundTypes = [_node.nodeType.value for _node in _groundNodes]
+            _groundLocations = [(_node.lat, _node.lon, _node.alt) for _node in _groundNodes]
+            _startUnix = self.__ownernode.simStartTime.to_unix()
+            _endUnix = self.__ownernode.simEndTime.to_unix()
+            _delta = self.__ownernode.deltaTime
+            
+            _key = VisibilityTensor.get_Key(_satIDs, [tuple(_node.get_TLE()[-2:]) for _node in _satNodes], _groundIDs, _groundTypes, 
+                                            _groundLocations, _minElevations, _startUnix, _endUnix, _delta)
+            _tensor = VisibilityTensor.load(self.__visibilityTensorPath, _key)
+            
+            if _tensor is None:
+                for _satNode in _satNodes:
+                    ConstellationPropagator.register_Satellite(_satNode.nodeID, _satNode.get_TLE())
+                _satIndices = [ConstellationPropagator.get_Index(_satID) for _satID in _satIDs]
+                _groundPositions, _groundUp = PassFinder.get_GroundFrames(*zip(*_groundLocations)) if len(_groundLocations) > 0 else (np.zeros((0, 3)), np.zeros((0, 3)))
+                
+                _tensor = VisibilityTensor.build(_key, _satIDs, _satIndices, _groundIDs, _groundTypes, _groundPositions, _groundUp, 
+                                                 _minElevations, _startUnix, _endUnix, _delta)
+                _tensor.save(self.__visibilityTensorPath)
+                self.__logger.write_Log(f"Visibility tensor is built and saved to {self.__visibilityTensorPath}", ELogType.LOGINFO, self.__ownernode.timestamp, self.iName)
+            else:
+                self.__logger.write_Log(f"Visibility tensor is loaded from {self.__visibilityTensorPath}", ELogType.LOGINFO, self.__ownernode.timestamp, self.iName)
+            
+            ModelFovTimeBased.__visibilityTensor = _tensor
+            return _tensor
     
     def __log_Pass(self, _otherNode:INode, _startTime:'Time', _endTime:'Time'):
         """
@@ -178,22 +268,16 @@ class ModelFovTimeBased(IModel):
         """              
         _targetTypes = _kwargs['_targetNodeTypes']
         
-        # Get the node topology ID and find the corresponding topology (node list) from the manager
-        _topologyID = self.__ownernode.topologyID
-        _topologies = self.__ownernode.managerInstance.req_Manager(EManagerReqType.GET_TOPOLOGIES)
-        
-        _myTopology:ITopology = None
-        for _topology in _topologies:
-            if _topology.id == _topologyID:
-                _myTopology = _topology
-                break
-        
-        assert _myTopology is not None, "[Simulation Error]: A topology should have been found for an existing node"
+        _myTopology = self.__get_MyTopology()
         
         #let's find all the target nodes
         _targetNodes = [_myTopology.get_NodesOfAType(_targetType) for _targetType in _targetTypes]
         _targetNodes = [item for sublist in _targetNodes for item in sublist]
         
+        if self.__vectorizedPasses:
+            #Find the passes of all the satellite x ground node pairs together. The remaining pairs (if any) go through the loop below
+            self.__find_PassesVectorized(_myTopology, _targetNodes)
+
         #This should be relatively thread safe. The worst that can happen is that we will find the same pass twice
         #That has less of an impact than locking the whole thing
         _currentOnes = ModelFovTimeBased.__nodeToNode[self.__ownernode.nodeID]
@@ -260,6 +344,138 @@ class ModelFovTimeBased(IModel):
                     
                     ModelFovTimeBased.__nodeToTimesLock.release()                
                 
+    def __get_MyTopology(self) -> ITopology:
+        """
+        @desc
+            This method finds the topology of the owner node from the manager
+        @return
+            Topology instance
+        """
+        # Get the node topology ID and find the corresponding topology (node list) from the manager
+        _topologyID = self.__ownernode.topologyID
+        _topologies = self.__ownernode.managerInstance.req_Manager(EManagerReqType.GET_TOPOLOGIES)
+        
+        _myTopology:ITopology = None
+        for _topology in _topologies:
+            if _topology.id == _topologyID:
+                _myTopology = _topology
+                break
+        
+        assert _myTopology is not None, "[Simulation Error]: A topology should have been found for an existing node"
+        return _myTopology
+
+    def __get_MinElevations(
+            self,
+            _satNodes: 'list[INode]',
+            _groundNodes: 'list[INode]') -> 'tuple[list, list, np.ndarray]':
+        """
+        @desc
+            This method finds the minimum elevation angle of every satellite x ground node pair. 
+            Same as the per pair search, the higher of the two nodes' minimum elevations is used.
+        @param[in]  _satNodes
+            List of the satellite nodes
+        @param[in]  _groundNodes
+            List of the ground nodes
+        @return
+            Tuple of (models of the satellites, models of the ground nodes, minimum elevations of shape (number of satellites, number of ground nodes)).
+            The model is None for a node not having this model.
+        """
+        _satModels = [_satNode.has_ModelWithName(self.iName) for _satNode in _satNodes]
+        _groundModels = [_groundNode.has_ModelWithName(self.iName) for _groundNode in _groundNodes]
+        _satMinElevations = np.array([_model.__minElevation if _model else 0 for _model in _satModels], dtype=float)
+        _groundMinElevations = np.array([_model.__minElevation if _model else 0 for _model in _groundModels], dtype=float)
+        return _satModels, _groundModels, np.maximum(_satMinElevations[:, None], _groundMinElevations[None, :])
+
+    def __add_Passes(
+            self,
+            _nodeID: int,
+            _passes: list):
+        """
+        @desc
+            This method adds the passes to the pass times of a node, keeping them sorted by the start time.
+        @param[in]  _nodeID
+            ID of the node
+        @param[in]  _passes
+            List of (start, end, nodeID, ENodeType value) tuples. See __find_Passes
+        """
+        with ModelFovTimeBased.__nodeToTimesLock:
+            _orig = ModelFovTimeBased.__nodeToTimes[_nodeID]
+            if _orig is None:
+                _new = np.array(_passes)
+            else:
+                _new = np.append(_orig, _passes, axis=0)
+            assert _new.shape[1] == 4, "[FovTimeBased Error]: The shape of the passes array is not correct"
+            ModelFovTimeBased.__nodeToTimes[_nodeID] = _new[_new[:,0].argsort()]
+
+    def __find_PassesVectorized(
+            self,
+            _myTopology: ITopology,
+            _targetNodes: 'list[INode]'):
+        """
+        @desc
+            This method finds the passes between all the satellites and the ground nodes in one go (see PassFinder).
+            If the owner node is a satellite, all the satellites of the topology having this model are paired with the target ground nodes.
+            Otherwise, all the nodes of the owner's type having this model are paired with the target satellites.
+            The pairs that have already been calculated are skipped. Pairs of two satellites are left for the per pair search.
+        @param[in]  _myTopology
+            Topology of the owner node
+        @param[in]  _targetNodes
+            List of the target nodes
+        """
+        _ownerIsSat = self.__ownernode.has_ModelWithTag(EModelTag.ORBITAL) is not None
+        _fovNodes = [_node for _node in _myTopology.nodes if _node.has_ModelWithName(self.iName)]
+        if _ownerIsSat:
+            _satNodes = [_node for _node in _fovNodes if _node.has_ModelWithTag(EModelTag.ORBITAL)]
+            _groundNodes = [_node for _node in _targetNodes if not _node.has_ModelWithTag(EModelTag.ORBITAL)]
+        else:
+            _satNodes = [_node for _node in _targetNodes if _node.has_ModelWithTag(EModelTag.ORBITAL)]
+            _groundNodes = [_node for _node in _fovNodes if _node.nodeType == self.__ownernode.nodeType and not _node.has_ModelWithTag(EModelTag.ORBITAL)]
+
+        #Only the pairs that haven't been calculated yet
+        _needed = np.array([[_groundNode.nodeID not in ModelFovTimeBased.__nodeToNode[_satNode.nodeID] for _groundNode in _groundNodes]
+                            for _satNode in _satNodes], dtype=bool).reshape(len(_satNodes), len(_groundNodes))
+        if not _needed.any():
+            return
+
+        for _satNode in _satNodes:
+            ConstellationPropagator.register_Satellite(_satNode.nodeID, _satNode.get_TLE())
+        _satIndices = [ConstellationPropagator.get_Index(_satNode.nodeID) for _satNode in _satNodes]
+
+        _satModels, _groundModels, _minElevations = self.__get_MinElevations(_satNodes, _groundNodes)
+
+        _groundPositions, _groundUp = PassFinder.get_GroundFrames([_node.lat for _node in _groundNodes],
+                                                                  [_node.lon for _node in _groundNodes],
+                                                                  [_node.alt for _node in _groundNodes])
+        _startTime = max(self.__ownernode.simStartTime, self.__ownernode.timestamp)
+        _sat, _ground, _starts, _ends = PassFinder.find_Passes(_satIndices, _groundPositions, _groundUp, _minElevations,
+                                                               _startTime.to_unix(), self.__ownernode.simEndTime.to_unix(), self.__ownernode.deltaTime)
+
+        #Mark the pairs as calculated
+        for _satPos, _groundPos in np.argwhere(_needed):
+            ModelFovTimeBased.__nodeToNode[_satNodes[_satPos].nodeID].append(_groundNodes[_groundPos].nodeID)
+            ModelFovTimeBased.__nodeToNode[_groundNodes[_groundPos].nodeID].append(_satNodes[_satPos].nodeID)
+
+        _keep = _needed[_sat, _ground]
+        _satPasses = {}
+        _groundPasses = {}
+        for _satPos, _groundPos, _start, _end in zip(_sat[_keep], _ground[_keep], _starts[_keep], _ends[_keep]):
+            _satNode = _satNodes[_satPos]
+            _groundNode = _groundNodes[_groundPos]
+            _passStart = Time().from_unix(_start)
+            _passEnd = Time().from_unix(_end)
+
+            #The pass is logged by the node of the owner's side, as in the per pair search
+            if _ownerIsSat and _satModels[_satPos]:
+                _satModels[_satPos].__log_Pass(_groundNode, _passStart, _passEnd)
+            elif not _ownerIsSat and _groundModels[_groundPos]:
+                _groundModels[_groundPos].__log_Pass(_satNode, _passStart, _passEnd)
+
+            _satPasses.setdefault(_satNode.nodeID, []).append((_passStart.to_datetime(), _passEnd.to_datetime(), _groundNode.nodeID, _groundNode.nodeType.value))
+            _groundPasses.setdefault(_groundNode.nodeID, []).append((_passStart.to_datetime(), _passEnd.to_datetime(), _satNode.nodeID, _satNode.nodeType.value))
+
+        for _nodeID, _passes in list(_satPasses.items()) + list(_groundPasses.items()):
+            self.__add_Passes(_nodeID, _passes)
+
     def __get_GlobalDictionary(self, **_kwargs):
         """
         @desc
@@ -281,16 +497,39 @@ class ModelFovTimeBased(IModel):
                 A dictionary where the key is the node ID and the value is a list of the passes of the node. See __find_Passes for the format of the pass
         """
         ModelFovTimeBased.__nodeToTimes = _kwargs['_globalDictionary']
+        ModelFovTimeBased.__nodeToIndex = {}
         #If we are setting the global dictionary, this means that all the passes are already found. 
         ModelFovTimeBased.__preloaded = True
         
+    def __get_CacheKey(self, **_kwargs) -> str:
+        """
+        @desc
+            This method computes the key of the pass times of the topology for the on-disk cache (see FovCache).
+            Technically, this is not an API of an individual node's model but global. But it's here
+        @return
+            Key string. It changes if any TLE, node position, minimum elevation or the simulation time changes
+        """
+        _nodes = []
+        for _node in self.__get_MyTopology().nodes:
+            _model = _node.has_ModelWithName(self.iName)
+            if _model is None:
+                continue
+            if _node.has_ModelWithTag(EModelTag.ORBITAL):
+                _position = tuple(_node.get_TLE()[-2:])
+            else:
+                _position = (_node.lat, _node.lon, _node.alt)
+            _nodes.append((_node.nodeID, _node.nodeType.value, _position, _model.__minElevation))
+        
+        return FovCache.get_Key(_nodes, self.__ownernode.simStartTime.to_unix(), self.__ownernode.simEndTime.to_unix(), self.__ownernode.deltaTime)
+        
     # API dictionary where API name is the key and handler function is the value
     __apiHandlerDictionary = {
         "get_View": __get_View,
         "find_Passes": __find_Passes,
         "log_Pass": __log_Pass,
         "get_GlobalDictionary": __get_GlobalDictionary,
-        "set_GlobalDictionary": __set_GlobalDictionary
+        "set_GlobalDictionary": __set_GlobalDictionary,
+        "get_CacheKey": __get_CacheKey
     }
 
     def call_APIs(
@@ -320,7 +559,9 @@ class ModelFovTimeBased(IModel):
         self, 
         _ownernodeins: INode, 
         _loggerins: ILogger,
-        _minElevation: float) -> None:
+        _minElevation: float,
+        _vectorizedPasses: bool = False,
+        _visibilityTensor: str = None) -> None:
         '''
         @desc
             Constructor of the class
@@ -330,6 +571,10 @@ class ModelFovTimeBased(IModel):
             Logger instance
         @param[in]  _minElevation
             Minimum elevation angle of view in degrees
+        @param[in]  _vectorizedPasses
+            Wether to find the passes of all the satellite x ground node pairs together (see PassFinder). Default is False
+        @param[in]  _visibilityTensor
+            Path of the visibility tensor file (see VisibilityTensor). If it's set, the views at the epochs are served from the tensor. Default is None
         '''
         assert _ownernodeins is not None
         assert _loggerins is not None
@@ -337,6 +582,9 @@ class ModelFovTimeBased(IModel):
         self.__ownernode = _ownernodeins
         self.__logger = _loggerins
         self.__minElevation = _minElevation
+        self.__vectorizedPasses = _vectorizedPasses
+        self.__visibilityTensorPath = _visibilityTensor
+        self.__isSatellite = None
         
                             
         ModelFovTimeBased.__nodeToTimes[self.__ownernode.nodeID] = None
@@ -344,6 +592,41 @@ class ModelFovTimeBased(IModel):
         
     def Execute(self) -> None:
         pass
+
+    def needs_Tick(self) -> bool:
+        #The views are computed when they are asked for
+        return False
+
+    def get_SharedCheckpoint(self):
+        """
+        @desc
+            This method returns the pass times found so far, which are shared by all the instances, for a checkpoint (see Checkpoint).
+            The interval indexes and the visibility tensor are not stored. They are rebuilt when they are needed.
+        @return
+            Dictionary of the pass times, the calculated pairs, and the preloaded flag
+        """
+        with ModelFovTimeBased.__nodeToTimesLock:
+            return {
+                "nodeToTimes": dict(ModelFovTimeBased.__nodeToTimes),
+                "nodeToNode": {_nodeID: list(_nodeIDs) for _nodeID, _nodeIDs in ModelFovTimeBased.__nodeToNode.items()},
+                "preloaded": ModelFovTimeBased.__preloaded}
+
+    def restore_SharedCheckpoint(
+            self,
+            _state):
+        """
+        @desc
+            This method restores the pass times returned by get_SharedCheckpoint
+        @param[in]  _state
+            Shared state of the model class
+        """
+        if _state is None:
+            return
+        with ModelFovTimeBased.__nodeToTimesLock:
+            ModelFovTimeBased.__nodeToTimes = _state["nodeToTimes"]
+            ModelFovTimeBased.__nodeToNode = _state["nodeToNode"]
+            ModelFovTimeBased.__nodeToIndex = {}
+            ModelFovTimeBased.__preloaded = _state["preloaded"]
                     
 def init_ModelFovTimeBased(
                     _ownernodeins: INode, 
@@ -360,6 +643,13 @@ def init_ModelFovTimeBased(
         It's a converted JSON object containing the model related info. 
         @key min_elevation
             Minimum elevation angle of view in degrees
+        @key vectorized_passes
+            Optional. Wether to find the passes of all the satellite x ground node pairs together over the simulation time grid
+            instead of running a skyfield search per pair. Accurate to within one time step. Default is False
+        @key visibility_tensor
+            Optional. Path of the visibility tensor file, e.g., next to the config file. The satellites visible from each ground node at each epoch
+            are computed once, sorted by the elevation angle and saved there. Later runs on the same constellation load the file.
+            get_View at the epochs becomes a slice of the tensor. Default is None
     @return
         Instance of the model class
     '''
@@ -370,4 +660,12 @@ def init_ModelFovTimeBased(
     if "min_elevation" not in _modelArgs:
         raise Exception("[ModelFovTimeBased Error]: The model arguments should contain the min_elevation parameter.")
     
-    return ModelFovTimeBased(_ownernodeins, _loggerins, _modelArgs.min_elevation)
+    _vectorizedPasses = False
+    if "vectorized_passes" in _modelArgs:
+        _vectorizedPasses = _modelArgs.vectorized_passes
+
+    _visibilityTensor = None
+    if "visibility_tensor" in _modelArgs:
+        _visibilityTensor = _modelArgs.visibility_tensor
+
+    return ModelFovTimeBased(_ownernodeins, _loggerins, _modelArgs.min_elevation, _vectorizedPasses, _visibilityTensor)
@@ -0,0 +1,226 @@
+'''
+// Copyright (c) Microsoft Corporation.
+// Licensed under the MIT license.
+
+@desc
+    This module implements a vectorized pass finder for ModelFovTimeBased.
+    Instead of running skyfield find_events for every (satellite, ground node) pair, the elevation angles of all the pairs
+    are computed together over the simulation time grid using numpy broadcasting over the ITRS positions of the satellites.
+    The rise/set edges found on the grid are then refined by bisection, again for all the edges at once.
+    Passes shorter than one grid step that fall between two samples can be missed, so the result is accurate to within one time step.
+'''
+import numpy as np
+from skyfield.api import wgs84
+
+from src.models.models_orbital.constellationpropagator import ConstellationPropagator
+
+class PassFinder():
+    '''
+    Vectorized pass finder for all the satellite x ground node pairs.
+    The satellites should be registered to the ConstellationPropagator.
+    '''
+    _elementsPerChunk = 4000000     #Number of (time, satellite, ground node) elements evaluated together. Bounds the memory use
+    _edgeTolerance = 0.1            #The rise/set times are refined down to this (seconds)
+
+    @staticmethod
+    def get_GroundFrames(
+            _latitudes,
+            _longitudes,
+            _altitudes) -> 'tuple[np.ndarray, np.ndarray]':
+        '''
+        @desc
+            Computes the ITRS positions and the local up vectors (geodetic normals) of the ground nodes
+        @param[in]  _latitudes
+            Latitudes in degrees
+        @param[in]  _longitudes
+            Longitudes in degrees
+        @param[in]  _altitudes
+            Altitudes above the WGS84 ellipsoid in meters
+        @return
+            Tuple of (positions, up vectors), both of shape (number of ground nodes, 3). Positions are in meters
+        '''
+        _positions = np.array([wgs84.latlon(_lat, _lon, elevation_m=_alt).itrs_xyz.m
+                                for _lat, _lon, _alt in zip(_latitudes, _longitudes, _altitudes)]).reshape(-1, 3)
+        _lat = np.radians(np.asarray(_latitudes, dtype=np.float64))
+        _lon = np.radians(np.asarray(_longitudes, dtype=np.float64))
+        _up = np.stack((np.cos(_lat) * np.cos(_lon), np.cos(_lat) * np.sin(_lon), np.sin(_lat)), axis=-1)
+        return _positions, _up
+
+    @staticmethod
+    def get_SinElevation(
+            _satPositions: np.ndarray,
+            _groundPositions: np.ndarray,
+            _groundUp: np.ndarray) -> np.ndarray:
+        '''
+        @desc
+            Computes the sine of the elevation angles of the satellites seen from the ground nodes.
+            All the arguments are broadcast against each other.
+        @param[in]  _satPositions
+            Satellite positions (..., 3)
+        @param[in]  _groundPositions
+            Ground node positions (..., 3)
+        @param[in]  _groundUp
+            Up vectors of the ground nodes (..., 3)
+        @return
+            Numpy array of sin(elevation)
+        '''
+        _delta = _satPositions - _groundPositions
+        return np.sum(_delta * _groundUp, axis=-1) / np.linalg.norm(_delta, axis=-1)
+
+    @staticmethod
+    def __get_Margin(
+            _satPositions: np.ndarray,
+            _groundPositions: np.ndarray,
+            _groundUp: np.ndarray,
+            _sinMinElevations: np.ndarray) -> np.ndarray:
+        '''
+        @desc
+            Computes sin(elevation) - sin(minimum elevation). The satellite is visible where it's non-negative.
+        @param[in]  _sinMinElevations
+            Sine of the minimum elevation angles (...)
+        @return
+            Numpy array of the margins
+        '''
+        return PassFinder.get_SinElevation(_satPositions, _groundPositions, _groundUp) - _sinMinElevations
+
+    @staticmethod
+    def find_Passes(
+            _satIndices,
+            _groundPositions: np.ndarray,
+            _groundUp: np.ndarray,
+            _minElevations: np.ndarray,
+            _startUnix: float,
+            _endUnix: float,
+            _delta: float) -> 'tuple[np.ndarray, np.ndarray, np.ndarray, np.ndarray]':
+        '''
+        @desc
+            Finds the passes of all the satellite x ground node pairs in [_startUnix, _endUnix].
+            If a pass is ongoing at the start (end), its start (end) time is the start (end) of the window. Same as ModelOrbit get_Passes.
+        @param[in]  _satIndices
+            Rows of the satellites in the ConstellationPropagator (see ConstellationPropagator.get_Index)
+        @param[in]  _groundPositions
+            ITRS positions of the ground nodes (number of ground nodes, 3) in meters
+        @param[in]  _groundUp
+            Up vectors of the ground nodes (number of ground nodes, 3)
+        @param[in]  _minElevations
+            Minimum elevation angles in degrees of shape (number of satellites, number of ground nodes)
+        @param[in]  _startUnix
+            Start of the window (unix time)
+        @param[in]  _endUnix
+            End of the window (unix time)
+        @param[in]  _delta
+            Time step of the grid in seconds
+        @return
+            Tuple of (satellite positions in _satIndices, ground node positions in _groundPositions, start unix times, end unix times) arrays.
+            The passes are sorted by the start time.
+        '''
+        _satIndices = np.asarray(_satIndices, dtype=np.int64)
+        _numOfSats = len(_satIndices)
+        _numOfGrounds = len(_groundPositions)
+        _sinMin = np.sin(np.radians(np.broadcast_to(_minElevations, (_numOfSats, _numOfGrounds))))
+
+        _times = np.arange(_startUnix, _endUnix, _delta)
+        if len(_times) == 0 or _times[-1] < _endUnix:
+            _times = np.append(_times, _endUnix)
+
+        _chunk = max(2, PassFinder._elementsPerChunk // max(1, _numOfSats * _numOfGrounds))
+
+        #Edges found on the grid. Each of them is (flat pair index, time before the edge, time after the edge)
+        _risePairs, _riseLow, _riseHigh = [], [], []
+        _setPairs, _setLow, _setHigh = [], [], []
+        _initial = None
+        _previous = None
+        for _first in range(0, len(_times), _chunk):
+            _chunkTimes = _times[_first:_first + _chunk]
+            _positions, _ = ConstellationPropagator.propagate(_chunkTimes)
+            _positions = _positions[:, _satIndices]
+            _visible = PassFinder.__get_Margin(_positions[:, :, None, :], _groundPositions[None, None], _groundUp[None, None], _sinMin[None]) >= 0
+            _visible = _visible.reshape(len(_chunkTimes), -1)
+
+            if _initial is None:
+                _initial = _visible[0]
+                _lowTimes = _chunkTimes
+                _states = _visible
+            else:
+                _lowTimes = np.concatenate(([_previous[0]], _chunkTimes))
+                _states = np.concatenate((_previous[1][None], _visible))
+            _previous = (_chunkTimes[-1], _visible[-1])
+
+            _step, _pair = np.nonzero(_states[1:] != _states[:-1])
+            _rising = _states[_step + 1, _pair]
+            for _mask, _pairs, _low, _high in ((_rising, _risePairs, _riseLow, _riseHigh), (~_rising, _setPairs, _setLow, _setHigh)):
+                _pairs.append(_pair[_mask])
+                _low.append(_lowTimes[_step[_mask]])
+                _high.append(_lowTimes[_step[_mask] + 1])
+
+        _risePairs, _riseTimes = PassFinder.__refine(np.concatenate(_risePairs), np.concatenate(_riseLow), np.concatenate(_riseHigh),
+                                                    True, _satIndices, _groundPositions, _groundUp, _sinMin)
+        _setPairs, _setTimes = PassFinder.__refine(np.concatenate(_setPairs), np.concatenate(_setLow), np.concatenate(_setHigh),
+                                                  False, _satIndices, _groundPositions, _groundUp, _sinMin)
+
+        #The passes that are ongoing at the start or the end of the window are cut there
+        _ongoingStart = np.flatnonzero(_initial)
+        _ongoingEnd = np.flatnonzero(_previous[1])
+        _startPairs = np.concatenate((_ongoingStart, _risePairs))
+        _startTimes = np.concatenate((np.full(len(_ongoingStart), float(_startUnix)), _riseTimes))
+        _endPairs = np.concatenate((_setPairs, _ongoingEnd))
+        _endTimes = np.concatenate((_setTimes, np.full(len(_ongoingEnd), float(_endUnix))))
+
+        #For each pair, the starts and the ends alternate in time. So, the k-th start of a pair goes with its k-th end
+        _startOrder = np.lexsort((_startTimes, _startPairs))
+        _endOrder = np.lexsort((_endTimes, _endPairs))
+        assert np.array_equal(_startPairs[_startOrder], _endPairs[_endOrder]), "[PassFinder Error]: Unmatched rise and set edges"
+        _pairs = _startPairs[_startOrder]
+        _starts = _startTimes[_startOrder]
+        _ends = _endTimes[_endOrder]
+
+        _order = np.argsort(_starts, kind='stable')
+        _sat, _ground = np.divmod(_pairs[_order], _numOfGrounds)
+        return _sat, _ground, _starts[_order], _ends[_order]
+
+    @staticmethod
+    def __refine(
+            _pairs: np.ndarray,
+            _low: np.ndarray,
+            _high: np.ndarray,
+            _rising: bool,
+            _satIndices: np.ndarray,
+            _groundPositions: np.ndarray,
+            _groundUp: np.ndarray,
+            _sinMin: np.ndarray) -> 'tuple[np.ndarray, np.ndarray]':
+        '''
+        @desc
+            Refines the edges by bisection. All the edges are bisected together.
+        @param[in]  _pairs
+            Flat (satellite, ground node) pair indices of the edges
+        @param[in]  _low
+            Times before the edges
+        @param[in]  _high
+            Times after the edges
+        @param[in]  _rising
+            True if the edges are rises (not visible -> visible). False for the sets
+        @param[in]  _satIndices, _groundPositions, _groundUp, _sinMin
+            See find_Passes
+        @return
+            Tuple of (pair indices, edge times)
+        '''
+        if len(_pairs) == 0:
+            return _pairs, _low.astype(np.float64)
+
+        _numOfGrounds = len(_groundPositions)
+        _sat, _ground = np.divmod(_pairs, _numOfGrounds)
+        _rows = _satIndices[_sat]
+        _low = _low.astype(np.float64)
+        _high = _high.astype(np.float64)
+
+        _numOfIterations = int(np.ceil(np.log2(max(np.max(_high - _low), PassFinder._edgeTolerance) / PassFinder._edgeTolerance)))
+        for _ in range(_numOfIterations):
+            _mid = (_low + _high) / 2
+            _positions = ConstellationPropagator.propagate_Pairs(_rows, _mid)
+            _visible = PassFinder.__get_Margin(_positions, _groundPositions[_ground], _groundUp[_ground], _sinMin[_sat, _ground]) >= 0
+            #Move the end of the interval that has the same state as the midpoint
+            _afterEdge = _visible if _rising else ~_visible
+            _high = np.where(_afterEdge, _mid, _high)
+            _low = np.where(_afterEdge, _low, _mid)
+
+        return _pairs, (_low + _high) / 2
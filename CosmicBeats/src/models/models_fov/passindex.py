@@ -0,0 +1,79 @@
+'''
+// Copyright (c) Microsoft Corporation.
+// Licensed under the MIT license.
+
+@desc
+    This module implements an interval index over the pass times of a node (see ModelFovTimeBased).
+    The passes are kept as typed float64 unix start/end arrays, separately for each node type and sorted by the start time.
+    As no pass is longer than the longest pass of its node type, only the passes starting in [time - longest pass, time]
+    can contain the queried time. Both ends of that window are found by binary search.
+    So, a visibility query costs O(log n + k) instead of a linear scan over the Python datetimes.
+'''
+import numpy as np
+
+class PassIndex():
+    '''
+    Interval index over the pass table of a node.
+    The pass table is the numpy array of (start datetime, end datetime, nodeID, ENodeType value) rows used by ModelFovTimeBased.
+    '''
+    def __init__(
+            self,
+            _passes: np.ndarray) -> None:
+        '''
+        @desc
+            Constructor of the class. Builds the index from the pass table.
+        @param[in]  _passes
+            numpy array of nx4 where each row is (start datetime, end datetime, nodeID, ENodeType value)
+        '''
+        self.__typeToPasses = {}    #ENodeType value is the key. Value is (starts, ends, nodeIDs, rows, longest pass duration)
+
+        if _passes is None or len(_passes) == 0:
+            return
+
+        _starts = np.fromiter((_row[0].timestamp() for _row in _passes), dtype=np.float64, count=len(_passes))
+        _ends = np.fromiter((_row[1].timestamp() for _row in _passes), dtype=np.float64, count=len(_passes))
+        _nodeIDs = np.fromiter((_row[2] for _row in _passes), dtype=np.int64, count=len(_passes))
+        _types = np.fromiter((_row[3] for _row in _passes), dtype=np.int64, count=len(_passes))
+
+        for _type in np.unique(_types):
+            _rows = np.flatnonzero(_types == _type)
+            _rows = _rows[np.argsort(_starts[_rows], kind='stable')]
+            _longest = float(np.max(_ends[_rows] - _starts[_rows]))
+            self.__typeToPasses[int(_type)] = (_starts[_rows], _ends[_rows], _nodeIDs[_rows], _rows, _longest)
+
+    def get_Visible(
+            self,
+            _unixTime: float,
+            _nodeTypeValues: 'list[int]') -> 'list[int]':
+        '''
+        @desc
+            Finds the nodes having a pass that contains the given time (both ends are inclusive)
+        @param[in]  _unixTime
+            Time of the query (unix time)
+        @param[in]  _nodeTypeValues
+            List of the ENodeType values we are interested in
+        @return
+            List of node IDs, in the order of the rows of the pass table
+        '''
+        _foundIDs = []
+        _foundRows = []
+        for _type in _nodeTypeValues:
+            _entry = self.__typeToPasses.get(_type)
+            if _entry is None:
+                continue
+            _starts, _ends, _nodeIDs, _rows, _longest = _entry
+            _high = np.searchsorted(_starts, _unixTime, side='right')
+            _low = np.searchsorted(_starts, _unixTime - _longest, side='left')
+            _mask = _ends[_low:_high] >= _unixTime
+            _foundIDs.append(_nodeIDs[_low:_high][_mask])
+            _foundRows.append(_rows[_low:_high][_mask])
+
+        if len(_foundIDs) == 0:
+            return []
+        if len(_foundIDs) == 1:
+            _ids = _foundIDs[0]
+            _order = np.argsort(_foundRows[0], kind='stable')
+        else:
+            _ids = np.concatenate(_foundIDs)
+            _order = np.argsort(np.concatenate(_foundRows), kind='stable')
+        return _ids[_order].tolist()
@@ -0,0 +1,336 @@
+'''
+// Copyright (c) Microsoft Corporation.
+// Licensed under the MIT license.
+
+@desc
+    This module implements a precomputed sparse visibility tensor for ModelFovTimeBased.
+    As the simulation time grid is fixed (simtime.delta), the satellites visible from each ground node at each epoch
+    are known before the run starts. They are computed once and kept in compressed sparse row (CSR) form:
+    row (epoch, ground node) -> IDs of the visible satellites sorted by the elevation angle (highest first).
+    The transposed form, (epoch, satellite) -> visible ground nodes, is kept as well, so both sides get their view as a slice.
+    The tensor can be saved to a .npz file with a key (hash of the TLEs, the ground nodes, the minimum elevations and the time grid)
+    and reused by later runs on the same constellation, e.g., cache policy sweeps.
+'''
+import os
+import hashlib
+
+import numpy as np
+
+from src.models.models_orbital.constellationpropagator import ConstellationPropagator
+from src.models.models_fov.passfinder import PassFinder
+
+class VisibilityTensor():
+    '''
+    Sparse (epoch, node) -> visible nodes structure over the simulation time grid
+    '''
+    _elementsPerChunk = 4000000     #Number of (epoch, satellite, ground node) elements evaluated together. Bounds the memory use
+
+    def __init__(
+            self,
+            _key: str,
+            _startUnix: float,
+            _delta: float,
+            _satIDs: np.ndarray,
+            _groundIDs: np.ndarray,
+            _groundTypes: np.ndarray,
+            _groundPointers: np.ndarray,
+            _groundSats: np.ndarray,
+            _satPointers: np.ndarray,
+            _satGrounds: np.ndarray) -> None:
+        '''
+        @desc
+            Constructor of the class. Use build or load to create an instance.
+        @param[in]  _key
+            Key of the tensor (see get_Key)
+        @param[in]  _startUnix
+            Unix time of the first epoch
+        @param[in]  _delta
+            Time gap between two epochs in seconds
+        @param[in]  _satIDs
+            Node IDs of the satellites
+        @param[in]  _groundIDs
+            Node IDs of the ground nodes
+        @param[in]  _groundTypes
+            ENodeType values of the ground nodes
+        @param[in]  _groundPointers
+            CSR row pointers of the ground-major form. Row of (epoch e, ground node g) is e * number of ground nodes + g
+        @param[in]  _groundSats
+            CSR column indices of the ground-major form, i.e., positions in _satIDs
+        @param[in]  _satPointers
+            CSR row pointers of the satellite-major form. Row of (epoch e, satellite s) is e * number of satellites + s
+        @param[in]  _satGrounds
+            CSR column indices of the satellite-major form, i.e., positions in _groundIDs
+        '''
+        self.__key = _key
+        self.__startUnix = float(_startUnix)
+        self.__delta = float(_delta)
+        self.__satIDs = _satIDs
+        self.__groundIDs = _groundIDs
+        self.__groundTypes = _groundTypes
+        self.__groundPointers = _groundPointers
+        self.__groundSats = _groundSats
+        self.__satPointers = _satPointers
+        self.__satGrounds = _satGrounds
+
+        #Node ID -> position lookups. Visible node IDs are kept ready in the CSR order
+        self.__satPositions = {int(_id): _pos for _pos, _id in enumerate(_satIDs)}
+        self.__groundPositions = {int(_id): _pos for _pos, _id in enumerate(_groundIDs)}
+        self.__groundSatIDs = _satIDs[_groundSats]
+        self.__satGroundIDs = _groundIDs[_satGrounds]
+        self.__satGroundTypes = _groundTypes[_satGrounds]
+        self.__numOfEpochs = (len(_groundPointers) - 1) // max(1, len(_groundIDs))
+
+    @property
+    def key(self) -> str:
+        '''
+        @type
+            str
+        @desc
+            Key of the tensor (see get_Key)
+        '''
+        return self.__key
+
+    @property
+    def numOfEpochs(self) -> int:
+        '''
+        @type
+            int
+        @desc
+            Number of epochs in the time grid
+        '''
+        return self.__numOfEpochs
+
+    @staticmethod
+    def get_Key(
+            _satIDs,
+            _tles: 'list[tuple]',
+            _groundIDs,
+            _groundTypes,
+            _groundLocations: 'list[tuple]',
+            _minElevations: np.ndarray,
+            _startUnix: float,
+            _endUnix: float,
+            _delta: float) -> str:
+        '''
+        @desc
+            Computes the key of a tensor from everything it depends on
+        @param[in]  _satIDs
+            Node IDs of the satellites
+        @param[in]  _tles
+            (line 1, line 2) of each satellite
+        @param[in]  _groundIDs
+            Node IDs of the ground nodes
+        @param[in]  _groundTypes
+            ENodeType values of the ground nodes
+        @param[in]  _groundLocations
+            (latitude, longitude, altitude) of each ground node
+        @param[in]  _minElevations
+            Minimum elevation angles of shape (number of satellites, number of ground nodes)
+        @param[in]  _startUnix
+            Start of the time grid (unix time)
+        @param[in]  _endUnix
+            End of the time grid (unix time)
+        @param[in]  _delta
+            Time gap between two epochs in seconds
+        @return
+            Hex digest string
+        '''
+        _hash = hashlib.sha1()
+        _hash.update(f"{float(_startUnix)!r},{float(_endUnix)!r},{float(_delta)!r}\n".encode())
+        for _id, (_line1, _line2) in zip(_satIDs, _tles):
+            _hash.update(f"{int(_id)}\n{_line1.strip()}\n{_line2.strip()}\n".encode())
+        for _id, _type, _location in zip(_groundIDs, _groundTypes, _groundLocations):
+            _hash.update(f"{int(_id)},{int(_type)},{','.join(repr(float(_x)) for _x in _location)}\n".encode())
+        _hash.update(np.ascontiguousarray(_minElevations, dtype=np.float64).tobytes())
+        return _hash.hexdigest()
+
+    @staticmethod
+    def build(
+            _key: str,
+            _satIDs,
+            _satIndices,
+            _groundIDs,
+            _groundTypes,
+            _groundPositions: np.ndarray,
+            _groundUp: np.ndarray,
+            _minElevations: np.ndarray,
+            _startUnix: float,
+            _endUnix: float,
+            _delta: float) -> 'VisibilityTensor':
+        '''
+        @desc
+            Computes the visibility of all the satellite x ground node pairs at every epoch of the time grid.
+            The grid includes both the start and the end time.
+        @param[in]  _key
+            Key of the tensor (see get_Key)
+        @param[in]  _satIDs
+            Node IDs of the satellites
+        @param[in]  _satIndices
+            Rows of the satellites in the ConstellationPropagator
+        @param[in]  _groundIDs
+            Node IDs of the ground nodes
+        @param[in]  _groundTypes
+            ENodeType values of the ground nodes
+        @param[in]  _groundPositions
+            ITRS positions of the ground nodes (see PassFinder.get_GroundFrames)
+        @param[in]  _groundUp
+            Up vectors of the ground nodes (see PassFinder.get_GroundFrames)
+        @param[in]  _minElevations
+            Minimum elevation angles in degrees of shape (number of satellites, number of ground nodes)
+        @param[in]  _startUnix
+            Start of the time grid (unix time)
+        @param[in]  _endUnix
+            End of the time grid (unix time)
+        @param[in]  _delta
+            Time gap between two epochs in seconds
+        @return
+            VisibilityTensor instance
+        '''
+        _satIndices = np.asarray(_satIndices, dtype=np.int64)
+        _numOfSats = len(_satIndices)
+        _numOfGrounds = len(_groundPositions)
+        _sinMin = np.sin(np.radians(np.broadcast_to(_minElevations, (_numOfSats, _numOfGrounds))))
+        _numOfEpochs = int(np.floor((_endUnix - _startUnix) / _delta)) + 1
+        _chunk = max(1, VisibilityTensor._elementsPerChunk // max(1, _numOfSats * _numOfGrounds))
+
+        _groundCounts = np.zeros(_numOfEpochs * _numOfGrounds, dtype=np.int64)
+        _satCounts = np.zeros(_numOfEpochs * _numOfSats, dtype=np.int64)
+        _groundSats = []
+        _satGrounds = []
+        for _first in range(0, _numOfEpochs, _chunk):
+            _epochs = np.arange(_first, min(_first + _chunk, _numOfEpochs))
+            _positions, _ = ConstellationPropagator.propagate(_startUnix + _epochs * _delta)
+            _sinElevations = PassFinder.get_SinElevation(_positions[:, _satIndices, None, :], _groundPositions[None, None], _groundUp[None, None])
+            _epoch, _sat, _ground = np.nonzero(_sinElevations >= _sinMin[None])
+            _elevation = _sinElevations[_epoch, _sat, _ground]
+            _epoch = _epoch + _first
+
+            #Ground-major rows. Highest elevation first within a row
+            _rows = _epoch * _numOfGrounds + _ground
+            _order = np.lexsort((-_elevation, _rows))
+            _groundSats.append(_sat[_order])
+            _groundCounts += np.bincount(_rows, minlength=len(_groundCounts))
+
+            #Satellite-major rows
+            _rows = _epoch * _numOfSats + _sat
+            _order = np.lexsort((-_elevation, _rows))
+            _satGrounds.append(_ground[_order])
+            _satCounts += np.bincount(_rows, minlength=len(_satCounts))
+
+        return VisibilityTensor(_key, _startUnix, _delta,
+                                np.asarray(_satIDs, dtype=np.int64), np.asarray(_groundIDs, dtype=np.int64), np.asarray(_groundTypes, dtype=np.int64),
+                                np.concatenate(([0], np.cumsum(_groundCounts))), np.concatenate(_groundSats).astype(np.int64),
+                                np.concatenate(([0], np.cumsum(_satCounts))), np.concatenate(_satGrounds).astype(np.int64))
+
+    def save(
+            self,
+            _filePath: str):
+        '''
+        @desc
+            Saves the tensor to a .npz file. The file is written under a temporary name first and then renamed.
+        @param[in]  _filePath
+            Path of the file
+        '''
+        _directory = os.path.dirname(_filePath)
+        if _directory != '':
+            os.makedirs(_directory, exist_ok=True)
+        _tempPath = _filePath + "." + str(os.getpid()) + ".tmp"
+        with open(_tempPath, "wb") as _file:
+            np.savez(_file,
+                     key = np.array(self.__key),
+                     grid = np.array([self.__startUnix, self.__delta]),
+                     satIDs = self.__satIDs,
+                     groundIDs = self.__groundIDs,
+                     groundTypes = self.__groundTypes,
+                     groundPointers = self.__groundPointers,
+                     groundSats = self.__groundSats,
+                     satPointers = self.__satPointers,
+                     satGrounds = self.__satGrounds)
+        os.replace(_tempPath, _filePath)
+
+    @staticmethod
+    def load(
+            _filePath: str,
+            _key: str) -> 'VisibilityTensor':
+        '''
+        @desc
+            Loads a tensor from a .npz file
+        @param[in]  _filePath
+            Path of the file
+        @param[in]  _key
+            Expected key of the tensor
+        @return
+            VisibilityTensor instance. None if the file doesn't exist or it was built for something else (key mismatch)
+        '''
+        if not os.path.exists(_filePath):
+            return None
+        with np.load(_filePath) as _data:
+            if str(_data["key"]) != _key:
+                return None
+            _grid = _data["grid"]
+            return VisibilityTensor(_key, _grid[0], _grid[1], _data["satIDs"], _data["groundIDs"], _data["groundTypes"],
+                                    _data["groundPointers"], _data["groundSats"], _data["satPointers"], _data["satGrounds"])
+
+    def __get_Epoch(
+            self,
+            _unixTime: float) -> int:
+        '''
+        @desc
+            Finds the epoch of a time
+        @param[in]  _unixTime
+            Unix time
+        @return
+            Epoch index. None if the time is not on the grid
+        '''
+        _offset = (_unixTime - self.__startUnix) / self.__delta
+        _epoch = int(round(_offset))
+        if _epoch < 0 or _epoch >= self.__numOfEpochs or abs(_offset - _epoch) > 1e-6:
+            return None
+        return _epoch
+
+    def get_VisibleSatellites(
+            self,
+            _groundID: int,
+            _unixTime: float) -> 'list[int]':
+        '''
+        @desc
+            Returns the satellites visible from a ground node at an epoch
+        @param[in]  _groundID
+            Node ID of the ground node
+        @param[in]  _unixTime
+            Unix time of the epoch
+        @return
+            List of satellite node IDs, highest elevation first. None if the node or the time is not in the tensor
+        '''
+        _ground = self.__groundPositions.get(_groundID)
+        _epoch = self.__get_Epoch(_unixTime)
+        if _ground is None or _epoch is None:
+            return None
+        _row = _epoch * len(self.__groundIDs) + _ground
+        return self.__groundSatIDs[self.__groundPointers[_row]:self.__groundPointers[_row + 1]].tolist()
+
+    def get_VisibleGrounds(
+            self,
+            _satID: int,
+            _unixTime: float,
+            _nodeTypeValues: 'list[int]') -> 'list[int]':
+        '''
+        @desc
+            Returns the ground nodes that a satellite can see at an epoch
+        @param[in]  _satID
+            Node ID of the satellite
+        @param[in]  _unixTime
+            Unix time of the epoch
+        @param[in]  _nodeTypeValues
+            List of the ENodeType values we are interested in
+        @return
+            List of ground node IDs, highest elevation first. None if the node or the time is not in the tensor
+        '''
+        _sat = self.__satPositions.get(_satID)
+        _epoch = self.__get_Epoch(_unixTime)
+        if _sat is None or _epoch is None:
+            return None
+        _row = _epoch * len(self.__satIDs) + _sat
+        _start, _end = self.__satPointers[_row], self.__satPointers[_row + 1]
+        _mask = np.isin(self.__satGroundTypes[_start:_end], _nodeTypeValues)
+        return self.__satGroundIDs[_start:_end][_mask].tolist()
@@ -0,0 +1,389 @@
+'''
+// Copyright (c) Microsoft Corporation.
+// Licensed under the MIT license.
+
+@desc
+    This module implements a constellation-wide orbit propagator.
+    Instead of having every satellite evaluate its own skyfield EarthSatellite at every epoch,
+    all the TLEs are loaded once into a vectorized SGP4 array (sgp4.api.SatrecArray) and the positions of all the satellites are computed in one call.
+    Like ModelFovTimeBased, the propagator keeps its state in static variables so that all the ModelOrbit instances share it.
+    The output frames match what ModelOrbit returns through skyfield, i.e., positions in ITRS (meters) and velocities in GCRS (m/s).
+'''
+import threading
+from collections import OrderedDict
+
+import numpy as np
+from sgp4.api import Satrec, SatrecArray
+from skyfield.api import load
+from skyfield.sgp4lib import TEME, theta_GMST1982
+from skyfield.functions import rot_z
+
+from src.utils import Location, Time
+
+class ConstellationPropagator():
+    '''
+    Shared SGP4 propagator for all the satellites of the simulation.
+    Satellites register their TLE once (see ModelOrbit) and the positions of the whole constellation are computed together for an epoch.
+    The results of the last few epochs are cached, so the other satellites asking for the same epoch only do a lookup.
+    '''
+    __nodeIDToIndex = {}        #Static variable mapping the node ID to the row of the satellite in the SGP4 array
+    __tleLines = []             #Static variable holding the (line 1, line 2) of each registered satellite
+    __satrecs = []              #Static variable holding the SGP4 record of each registered satellite
+    __satrecArray = None        #Static variable holding the SGP4 array. Built lazily on the first propagation
+    __skyfieldts = None         #Static variable holding the skyfield time scale. Needed for UT1 and the TEME -> GCRS rotation
+    __epochCache = OrderedDict() #Static variable to hold the positions (and velocities) of the recent epochs. Unix time is the key
+    __epochCacheSize = 8        #Number of epochs kept in the cache
+    __version = 0               #Static variable counting the changes of the registered satellites
+    __lock = threading.Lock()   #Lock for the static variables
+
+    _unixEpochJD = 2440587.5    #Julian date of the unix epoch (1970-01-01 00:00:00 UTC)
+    _secondsPerDay = 86400.0
+
+    @staticmethod
+    def register_Satellite(
+            _nodeID: int,
+            _tleLines: 'list[str]'):
+        '''
+        @desc
+            Registers a satellite to the propagator.
+            Registering the same node ID again replaces the TLE of that satellite.
+        @param[in]  _nodeID
+            ID of the satellite node
+        @param[in]  _tleLines
+            TLE lines of the satellite. Either [line1, line2] or [name, line1, line2]
+        '''
+        if len(_tleLines) == 2:
+            _lines = (_tleLines[0], _tleLines[1])
+        elif len(_tleLines) == 3:
+            _lines = (_tleLines[1], _tleLines[2])
+        else:
+            raise Exception(f"[ConstellationPropagator Error]: Invalid number of TLE lines for node {_nodeID}")
+
+        with ConstellationPropagator.__lock:
+            _index = ConstellationPropagator.__nodeIDToIndex.get(_nodeID)
+            if _index is None:
+                ConstellationPropagator.__nodeIDToIndex[_nodeID] = len(ConstellationPropagator.__tleLines)
+                ConstellationPropagator.__tleLines.append(_lines)
+            elif ConstellationPropagator.__tleLines[_index] != _lines:
+                ConstellationPropagator.__tleLines[_index] = _lines
+            else:
+                #Nothing changed. Keep the current array and the cache
+                return
+
+            #The array has to be rebuilt to include the new satellite
+            ConstellationPropagator.__satrecArray = None
+            ConstellationPropagator.__epochCache.clear()
+            ConstellationPropagator.__version += 1
+
+    @staticmethod
+    def is_Registered(_nodeID: int) -> bool:
+        '''
+        @desc
+            Checks whether a satellite has been registered to the propagator
+        @param[in]  _nodeID
+            ID of the satellite node
+        @return
+            True if the satellite is registered. Otherwise, False
+        '''
+        return _nodeID in ConstellationPropagator.__nodeIDToIndex
+
+    @staticmethod
+    def get_Version() -> int:
+        '''
+        @desc
+            Returns a counter that changes whenever the registered satellites change.
+            Anything derived from the propagated arrays (e.g., cached knots) should be dropped when it changes.
+        @return
+            Version counter
+        '''
+        return ConstellationPropagator.__version
+
+    @staticmethod
+    def get_NodeIDs() -> 'list[int]':
+        '''
+        @desc
+            Returns the node IDs of the registered satellites in the order of the rows of the propagated arrays
+        @return
+            List of node IDs
+        '''
+        _ids = [None] * len(ConstellationPropagator.__nodeIDToIndex)
+        for _nodeID, _index in ConstellationPropagator.__nodeIDToIndex.items():
+            _ids[_index] = _nodeID
+        return _ids
+
+    @staticmethod
+    def get_Index(_nodeID: int) -> int:
+        '''
+        @desc
+            Returns the row of a satellite in the propagated arrays
+        @param[in]  _nodeID
+            ID of the satellite node
+        @return
+            Row index of the satellite
+        '''
+        _index = ConstellationPropagator.__nodeIDToIndex.get(_nodeID)
+        if _index is None:
+            raise Exception(f"[ConstellationPropagator Error]: Node {_nodeID} is not registered")
+        return _index
+
+    @staticmethod
+    def get_TLEs() -> 'list[tuple]':
+        '''
+        @desc
+            Returns the TLE lines of the registered satellites in the order of the rows of the propagated arrays
+        @return
+            List of (line1, line2) tuples
+        '''
+        return list(ConstellationPropagator.__tleLines)
+
+    @staticmethod
+    def __setup():
+        '''
+        @desc
+            Builds the SGP4 array and the skyfield time scale if needed.
+            Caller should hold the lock.
+        '''
+        if ConstellationPropagator.__satrecArray is None:
+            if len(ConstellationPropagator.__tleLines) == 0:
+                raise Exception("[ConstellationPropagator Error]: No satellite has been registered")
+            _satrecs = [Satrec.twoline2rv(_line1, _line2) for _line1, _line2 in ConstellationPropagator.__tleLines]
+            ConstellationPropagator.__satrecs = _satrecs
+            ConstellationPropagator.__satrecArray = SatrecArray(_satrecs)
+        if ConstellationPropagator.__skyfieldts is None:
+            ConstellationPropagator.__skyfieldts = load.timescale()
+
+    @staticmethod
+    def __get_SkyfieldTime(_unixTimes: np.ndarray):
+        '''
+        @desc
+            Converts unix times to a skyfield time array.
+            The day and the seconds of the day are passed separately.
+            Passing the seconds since 1970 directly would make skyfield count the leap seconds.
+        @param[in]  _unixTimes
+            1D numpy array of unix times (UTC)
+        @return
+            skyfield Time object (array)
+        '''
+        _days = np.floor(_unixTimes / ConstellationPropagator._secondsPerDay)
+        _seconds = _unixTimes - _days * ConstellationPropagator._secondsPerDay
+        return ConstellationPropagator.__skyfieldts.utc(1970, 1, 1 + _days, 0, 0, _seconds)
+
+    @staticmethod
+    def propagate_TEME(_unixTimes) -> 'tuple[np.ndarray, np.ndarray]':
+        '''
+        @desc
+            Runs SGP4 for all the registered satellites at the given times.
+        @param[in]  _unixTimes
+            Unix times (UTC). A float or a 1D array of floats
+        @return
+            Tuple of (positions, velocities) in the TEME frame.
+            Both of them are numpy arrays of shape (number of satellites, number of times, 3) in km and km/s.
+            The rows of the satellites that SGP4 could not propagate (e.g., decayed) are NaN.
+        '''
+        _unixTimes = np.atleast_1d(np.asarray(_unixTimes, dtype=np.float64))
+        with ConstellationPropagator.__lock:
+            ConstellationPropagator.__setup()
+            _satrecArray = ConstellationPropagator.__satrecArray
+
+        #SGP4 assumes the TLE epoch is in UTC. So, we can use the UTC julian date directly
+        _days = np.floor(_unixTimes / ConstellationPropagator._secondsPerDay)
+        _jd = ConstellationPropagator._unixEpochJD + _days
+        _fraction = (_unixTimes - _days * ConstellationPropagator._secondsPerDay) / ConstellationPropagator._secondsPerDay
+
+        _errors, _positions, _velocities = _satrecArray.sgp4(_jd, _fraction)
+        return _positions, _velocities
+
+    @staticmethod
+    def propagate(
+            _unixTimes,
+            _withVelocity: bool = False) -> 'tuple[np.ndarray, np.ndarray]':
+        '''
+        @desc
+            Computes the positions (and optionally the velocities) of all the registered satellites at the given times.
+        @param[in]  _unixTimes
+            Unix times (UTC). A float or a 1D array of floats
+        @param[in]  _withVelocity
+            Whether to compute the velocities as well. Default is False
+        @return
+            Tuple of (positions, velocities).
+            positions is a numpy array of shape (number of times, number of satellites, 3) in meters in the ITRS frame.
+            velocities has the same shape in m/s in the GCRS frame (same as the get_Velocity API of ModelOrbit). It's None if _withVelocity is False.
+        '''
+        _unixTimes = np.atleast_1d(np.asarray(_unixTimes, dtype=np.float64))
+        _rTEME, _vTEME = ConstellationPropagator.propagate_TEME(_unixTimes)
+
+        _t = ConstellationPropagator.__get_SkyfieldTime(_unixTimes)
+
+        #The rotation from TEME to ITRS boils down to a z rotation by the GMST angle (see skyfield.sgp4lib.TEME and skyfield.framelib.itrs)
+        _theta, _ = theta_GMST1982(_t.whole, _t.ut1_fraction)
+        _R = rot_z(-_theta)     #shape (3, 3, number of times)
+
+        #(sat, time, xyz) -> (xyz, sat, time) to use the skyfield matrix helpers
+        _r = np.transpose(_rTEME, (2, 0, 1))
+        _rITRS = np.einsum('ij...,j...->i...', _R, _r) * 1000.0
+        _positions = np.ascontiguousarray(np.transpose(_rITRS, (2, 1, 0)))
+
+        _velocities = None
+        if _withVelocity:
+            _RGCRS = np.transpose(TEME.rotation_at(_t), (1, 0, 2))
+            _v = np.transpose(_vTEME, (2, 0, 1))
+            _vGCRS = np.einsum('ij...,j...->i...', _RGCRS, _v) * 1000.0
+            _velocities = np.ascontiguousarray(np.transpose(_vGCRS, (2, 1, 0)))
+
+        return _positions, _velocities
+
+    @staticmethod
+    def propagate_Pairs(
+            _indices,
+            _unixTimes) -> np.ndarray:
+        '''
+        @desc
+            Computes the positions of individual satellites at individual times, e.g., the (satellite, time) pairs of a bisection.
+            Unlike propagate, it doesn't compute every satellite at every time.
+        @param[in]  _indices
+            1D array of the rows of the satellites (see get_Index)
+        @param[in]  _unixTimes
+            1D array of unix times (UTC). Same length as _indices
+        @return
+            Numpy array of shape (number of pairs, 3) holding the positions in meters in the ITRS frame
+        '''
+        _indices = np.asarray(_indices, dtype=np.int64)
+        _unixTimes = np.asarray(_unixTimes, dtype=np.float64)
+        with ConstellationPropagator.__lock:
+            ConstellationPropagator.__setup()
+            _satrecs = ConstellationPropagator.__satrecs
+
+        _days = np.floor(_unixTimes / ConstellationPropagator._secondsPerDay)
+        _jd = ConstellationPropagator._unixEpochJD + _days
+        _fraction = (_unixTimes - _days * ConstellationPropagator._secondsPerDay) / ConstellationPropagator._secondsPerDay
+
+        #Group the pairs by satellite, so SGP4 runs once per satellite over all its times
+        _rTEME = np.empty((len(_indices), 3))
+        _order = np.argsort(_indices, kind='stable')
+        _sortedIndices = _indices[_order]
+        _bounds = np.flatnonzero(np.diff(_sortedIndices)) + 1
+        for _group in np.split(_order, _bounds):
+            if len(_group) == 0:
+                continue
+            _, _r, _ = _satrecs[_indices[_group[0]]].sgp4_array(_jd[_group], _fraction[_group])
+            _rTEME[_group] = _r
+
+        _t = ConstellationPropagator.__get_SkyfieldTime(_unixTimes)
+        _theta, _ = theta_GMST1982(_t.whole, _t.ut1_fraction)
+        _rITRS = np.einsum('ij...,j...->i...', rot_z(-_theta), _rTEME.T) * 1000.0
+        return np.ascontiguousarray(_rITRS.T)
+
+    @staticmethod
+    def propagate_States(_unixTimes) -> 'tuple[np.ndarray, np.ndarray, np.ndarray, np.ndarray]':
+        '''
+        @desc
+            Computes the full states of all the registered satellites at the given times, both in ITRS and in GCRS.
+            The ITRS velocity is the time derivative of the ITRS position, i.e., it accounts for the rotation of the earth.
+            These are the states needed to interpolate the positions and the velocities (see OrbitInterpolator).
+        @param[in]  _unixTimes
+            Unix times (UTC). A float or a 1D array of floats
+        @return
+            Tuple of (ITRS positions, ITRS velocities, GCRS positions, GCRS velocities).
+            Each of them is a numpy array of shape (number of times, number of satellites, 3) in meters or m/s.
+        '''
+        _unixTimes = np.atleast_1d(np.asarray(_unixTimes, dtype=np.float64))
+        _rTEME, _vTEME = ConstellationPropagator.propagate_TEME(_unixTimes)
+
+        _t = ConstellationPropagator.__get_SkyfieldTime(_unixTimes)
+        _theta, _thetaDot = theta_GMST1982(_t.whole, _t.ut1_fraction)
+        _R = rot_z(-_theta)
+        _RGCRS = np.transpose(TEME.rotation_at(_t), (1, 0, 2))
+
+        #(sat, time, xyz) -> (xyz, sat, time) to use the skyfield matrix helpers
+        _r = np.transpose(_rTEME, (2, 0, 1))
+        _v = np.transpose(_vTEME, (2, 0, 1))
+
+        #v_ITRS = R (v_TEME - w x r_TEME), where w is the rotation rate of the earth around the z axis (radians per second)
+        _omega = _thetaDot / ConstellationPropagator._secondsPerDay
+        _vRotating = np.stack((_v[0] + _omega * _r[1], _v[1] - _omega * _r[0], _v[2]))
+
+        _states = []
+        for _rotation, _vector in ((_R, _r), (_R, _vRotating), (_RGCRS, _r), (_RGCRS, _v)):
+            _rotated = np.einsum('ij...,j...->i...', _rotation, _vector) * 1000.0
+            _states.append(np.ascontiguousarray(np.transpose(_rotated, (2, 1, 0))))
+        return tuple(_states)
+
+    @staticmethod
+    def __get_Epoch(
+            _unixTime: float,
+            _withVelocity: bool) -> 'tuple[np.ndarray, np.ndarray]':
+        '''
+        @desc
+            Returns the positions (and velocities) of all the satellites at an epoch from the cache.
+            The whole constellation is propagated if the epoch is not in the cache.
+        @param[in]  _unixTime
+            Unix time of the epoch
+        @param[in]  _withVelocity
+            Whether the velocities are needed
+        @return
+            Tuple of (positions, velocities) of shape (number of satellites, 3). velocities is None if not asked.
+        '''
+        _cached = ConstellationPropagator.__epochCache.get(_unixTime)
+        if _cached is not None and (not _withVelocity or _cached[1] is not None):
+            return _cached
+
+        _positions, _velocities = ConstellationPropagator.propagate(_unixTime, _withVelocity)
+        _entry = (_positions[0], None if _velocities is None else _velocities[0])
+
+        with ConstellationPropagator.__lock:
+            ConstellationPropagator.__epochCache[_unixTime] = _entry
+            while len(ConstellationPropagator.__epochCache) > ConstellationPropagator.__epochCacheSize:
+                ConstellationPropagator.__epochCache.popitem(last=False)
+        return _entry
+
+    @staticmethod
+    def get_Position(
+            _nodeID: int,
+            _time: Time) -> Location:
+        '''
+        @desc
+            Returns the position of a registered satellite at the given time
+        @param[in]  _nodeID
+            ID of the satellite node
+        @param[in]  _time
+            Time at which the position is needed
+        @return
+            Location of the satellite in the ITRS frame
+        '''
+        _index = ConstellationPropagator.get_Index(_nodeID)
+        _positions, _ = ConstellationPropagator.__get_Epoch(_time.to_unix(), False)
+        _pos = _positions[_index]
+        return Location(float(_pos[0]), float(_pos[1]), float(_pos[2]))
+
+    @staticmethod
+    def get_Velocity(
+            _nodeID: int,
+            _time: Time) -> 'tuple[float, float, float]':
+        '''
+        @desc
+            Returns the velocity of a registered satellite at the given time
+        @param[in]  _nodeID
+            ID of the satellite node
+        @param[in]  _time
+            Time at which the velocity is needed
+        @return
+            Velocity (x, y, z) in m/s in the GCRS frame
+        '''
+        _index = ConstellationPropagator.get_Index(_nodeID)
+        _, _velocities = ConstellationPropagator.__get_Epoch(_time.to_unix(), True)
+        _vel = _velocities[_index]
+        return (float(_vel[0]), float(_vel[1]), float(_vel[2]))
+
+    @staticmethod
+    def reset():
+        '''
+        @desc
+            Removes all the registered satellites and the cached epochs
+        '''
+        with ConstellationPropagator.__lock:
+            ConstellationPropagator.__nodeIDToIndex.clear()
+            ConstellationPropagator.__tleLines.clear()
+            ConstellationPropagator.__satrecs = []
+            ConstellationPropagator.__satrecArray = None
+            ConstellationPropagator.__epochCache.clear()
+            ConstellationPropagator.__version += 1
@@ -0,0 +1,219 @@
+'''
+// Copyright (c) Microsoft Corporation.
+// Licensed under the MIT license.
+
+@desc
+    This module implements an on-disk ephemeris store for the satellites.
+    The positions of all the satellites are computed once over the simulation time grid (start time, end time, delta)
+    and saved as a .npy file. The name of the file is a hash of the TLEs and the time grid.
+    Later runs with the same TLEs and the same grid (e.g., parameter sweeps over the cache sizes or the strategies)
+    memory-map the file and skip the orbit propagation entirely. Concurrent runs share the pages of the same file.
+'''
+import os
+import hashlib
+import threading
+
+import numpy as np
+
+from src.utils import Location, Time
+from src.models.models_orbital.constellationpropagator import ConstellationPropagator
+
+class EphemerisStore():
+    '''
+    Shared ephemeris store for all the satellites of the simulation.
+    The positions are kept in a (number of epochs, number of satellites, 3) float64 array in meters (ITRS frame).
+    The satellites are ordered by their node IDs in the array.
+    Like ConstellationPropagator, the state is kept in static variables so that all the ModelOrbit instances share it.
+    '''
+    __directory = None          #Static variable holding the directory of the ephemeris files
+    __startUnix = None          #Static variable holding the start of the time grid (unix time)
+    __delta = None              #Static variable holding the time gap between two epochs of the grid (seconds)
+    __numOfEpochs = 0           #Static variable holding the number of epochs of the grid
+    __nodeIDToTLE = {}          #Static variable mapping the node ID to its (line 1, line 2)
+    __nodeIDToColumn = {}       #Static variable mapping the node ID to its column in the ephemeris array
+    __positions = None          #Static variable holding the memory-mapped ephemeris array. Loaded lazily on the first lookup
+    __lock = threading.Lock()   #Lock for the static variables
+
+    _chunkSize = 1024           #Number of epochs propagated together while building the store
+
+    @staticmethod
+    def setup(
+            _directory: str,
+            _startTime: Time,
+            _endTime: Time,
+            _delta: float):
+        '''
+        @desc
+            Sets the directory and the time grid of the store.
+            The grid includes both the start time and the end time.
+        @param[in]  _directory
+            Directory where the ephemeris files are saved
+        @param[in]  _startTime
+            Start time of the simulation
+        @param[in]  _endTime
+            End time of the simulation
+        @param[in]  _delta
+            Time gap between two epochs in seconds
+        '''
+        if _delta <= 0:
+            raise Exception("[EphemerisStore Error]: delta must be positive")
+
+        _startUnix = _startTime.to_unix()
+        _numOfEpochs = int(np.floor(_endTime.difference_in_seconds(_startTime) / _delta)) + 1
+
+        with EphemerisStore.__lock:
+            if (EphemerisStore.__directory == _directory and EphemerisStore.__startUnix == _startUnix and
+                EphemerisStore.__delta == _delta and EphemerisStore.__numOfEpochs == _numOfEpochs):
+                return
+            EphemerisStore.__directory = _directory
+            EphemerisStore.__startUnix = _startUnix
+            EphemerisStore.__delta = _delta
+            EphemerisStore.__numOfEpochs = _numOfEpochs
+            EphemerisStore.__positions = None
+
+    @staticmethod
+    def register_Satellite(
+            _nodeID: int,
+            _tleLines: 'list[str]'):
+        '''
+        @desc
+            Registers a satellite to the store. The satellite is registered to the ConstellationPropagator as well,
+            which is used to build the store.
+        @param[in]  _nodeID
+            ID of the satellite node
+        @param[in]  _tleLines
+            TLE lines of the satellite. Either [line1, line2] or [name, line1, line2]
+        '''
+        ConstellationPropagator.register_Satellite(_nodeID, _tleLines)
+        _lines = tuple(_tleLines[-2:])
+
+        with EphemerisStore.__lock:
+            if EphemerisStore.__nodeIDToTLE.get(_nodeID) == _lines:
+                return
+            EphemerisStore.__nodeIDToTLE[_nodeID] = _lines
+            #The key of the store changed. It will be loaded (or built) again on the next lookup
+            EphemerisStore.__positions = None
+
+    @staticmethod
+    def get_Key() -> str:
+        '''
+        @desc
+            Returns the key of the store, i.e., the hash of the TLEs and the time grid
+        @return
+            Hex digest string
+        '''
+        _hash = hashlib.sha1()
+        _hash.update(f"{EphemerisStore.__startUnix!r},{EphemerisStore.__delta!r},{EphemerisStore.__numOfEpochs}\n".encode())
+        for _nodeID in sorted(EphemerisStore.__nodeIDToTLE):
+            _line1, _line2 = EphemerisStore.__nodeIDToTLE[_nodeID]
+            _hash.update(f"{_nodeID}\n{_line1.strip()}\n{_line2.strip()}\n".encode())
+        return _hash.hexdigest()
+
+    @staticmethod
+    def get_FilePath() -> str:
+        '''
+        @desc
+            Returns the path of the ephemeris file for the current TLEs and time grid
+        @return
+            Path of the .npy file
+        '''
+        return os.path.join(EphemerisStore.__directory, "ephemeris_" + EphemerisStore.get_Key() + ".npy")
+
+    @staticmethod
+    def __build(_filePath: str):
+        '''
+        @desc
+            Propagates all the satellites over the time grid and writes the positions to the file.
+            The file is written under a temporary name first and then renamed, so other runs never see a partial file.
+        @param[in]  _filePath
+            Path of the .npy file
+        '''
+        _nodeIDs = sorted(EphemerisStore.__nodeIDToTLE)
+        _columns = np.array([ConstellationPropagator.get_Index(_nodeID) for _nodeID in _nodeIDs])
+
+        os.makedirs(EphemerisStore.__directory, exist_ok=True)
+        _tempPath = _filePath + "." + str(os.getpid()) + ".tmp"
+        _array = np.lib.format.open_memmap(_tempPath, mode='w+', dtype=np.float64, shape=(EphemerisStore.__numOfEpochs, len(_nodeIDs), 3))
+        try:
+            for _start in range(0, EphemerisStore.__numOfEpochs, EphemerisStore._chunkSize):
+                _end = min(_start + EphemerisStore._chunkSize, EphemerisStore.__numOfEpochs)
+                _unixTimes = EphemerisStore.__startUnix + np.arange(_start, _end) * EphemerisStore.__delta
+                _positions, _ = ConstellationPropagator.propagate(_unixTimes)
+                _array[_start:_end] = _positions[:, _columns, :]
+            _array.flush()
+            del _array
+            os.replace(_tempPath, _filePath)
+        except:
+            del _array
+            if os.path.exists(_tempPath):
+                os.remove(_tempPath)
+            raise
+
+    @staticmethod
+    def __load():
+        '''
+        @desc
+            Memory-maps the ephemeris file of the current TLEs and time grid. The file is built first if it doesn't exist.
+            Caller should hold the lock.
+        '''
+        _filePath = EphemerisStore.get_FilePath()
+        if not os.path.exists(_filePath):
+            EphemerisStore.__build(_filePath)
+
+        _positions = np.load(_filePath, mmap_mode='r')
+        if _positions.shape != (EphemerisStore.__numOfEpochs, len(EphemerisStore.__nodeIDToTLE), 3):
+            raise Exception(f"[EphemerisStore Error]: Ephemeris file {_filePath} doesn't match the time grid or the satellites")
+
+        EphemerisStore.__nodeIDToColumn = {_nodeID: _column for _column, _nodeID in enumerate(sorted(EphemerisStore.__nodeIDToTLE))}
+        EphemerisStore.__positions = _positions
+
+    @staticmethod
+    def get_Position(
+            _nodeID: int,
+            _time: Time) -> Location:
+        '''
+        @desc
+            Returns the position of a satellite from the store
+        @param[in]  _nodeID
+            ID of the satellite node
+        @param[in]  _time
+            Time at which the position is needed
+        @return
+            Location of the satellite in the ITRS frame.
+            None if the time is not on the grid or the satellite is not in the store. The caller should propagate in that case.
+        '''
+        _positions = EphemerisStore.__positions
+        if _positions is None:
+            with EphemerisStore.__lock:
+                if EphemerisStore.__directory is None:
+                    raise Exception("[EphemerisStore Error]: Store is not set up")
+                if EphemerisStore.__positions is None:
+                    EphemerisStore.__load()
+                _positions = EphemerisStore.__positions
+
+        _column = EphemerisStore.__nodeIDToColumn.get(_nodeID)
+        if _column is None:
+            return None
+
+        _offset = (_time.to_unix() - EphemerisStore.__startUnix) / EphemerisStore.__delta
+        _epoch = int(round(_offset))
+        if _epoch < 0 or _epoch >= EphemerisStore.__numOfEpochs or abs(_offset - _epoch) > 1e-6:
+            return None
+
+        _pos = _positions[_epoch, _column]
+        return Location(float(_pos[0]), float(_pos[1]), float(_pos[2]))
+
+    @staticmethod
+    def reset():
+        '''
+        @desc
+            Removes the registered satellites and unloads the store. The files on the disk are kept.
+        '''
+        with EphemerisStore.__lock:
+            EphemerisStore.__directory = None
+            EphemerisStore.__startUnix = None
+            EphemerisStore.__delta = None
+            EphemerisStore.__numOfEpochs = 0
+            EphemerisStore.__nodeIDToTLE.clear()
+            EphemerisStore.__nodeIDToColumn = {}
+            EphemerisStore.__positions = None
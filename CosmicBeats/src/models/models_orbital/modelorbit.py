@@ -14,10 +14,14 @@ from datetime import datetime, timedelta
 from src.models.imodel import IModel, EModelTag
 from src.nodes.inode import INode
 from src.simlogging.ilogger import ELogType, ILogger
-from skyfield.api import load, wgs84, EarthSatellite
+from skyfield.api import wgs84, EarthSatellite
 from skyfield.framelib import itrs
 from skyfield.positionlib import build_position, Barycentric
 from src.utils import Location, Time
+from src.sim.resourceregistry import ResourceRegistry
+from src.models.models_orbital.constellationpropagator import ConstellationPropagator
+from src.models.models_orbital.ephemerisstore import EphemerisStore
+from src.models.models_orbital.orbitinterpolator import OrbitInterpolator
 
 class ModelOrbit(IModel):
     '''
@@ -317,12 +321,26 @@ class ModelOrbit(IModel):
         if not isinstance(_time, Time):
             raise Exception("[In ModelOrbit] Time is not set/valid")
         
-        _utcTime = self.__skyfieldts.utc(_time.to_datetime())
+        _newLocation = None
+        if self.__ephemerisCache is not None:
+            # look up the precomputed ephemeris. It's None if the time is not on the simulation time grid
+            _newLocation = EphemerisStore.get_Position(self.__ownernode.nodeID, _time)
 
-        # calculate the location
-        _gcrsLocation = self.__earthsatellite.at(_utcTime)
-        _itrs = _gcrsLocation.itrf_xyz().m
-        _newLocation = Location(_itrs[0], _itrs[1], _itrs[2])
+        if _newLocation is None and self.__interpolationStride is not None:
+            # interpolate between the coarse SGP4 samples within the error bound
+            _newLocation = OrbitInterpolator.get_Position(self.__ownernode.nodeID, _time, self.__logger)
+
+        if _newLocation is None and self.__batchPropagation:
+            # the whole constellation is propagated at once and shared among the satellites
+            _newLocation = ConstellationPropagator.get_Position(self.__ownernode.nodeID, _time)
+
+        if _newLocation is None:
+            _utcTime = self.__skyfieldts.utc(_time.to_datetime())
+
+            # calculate the location
+            _gcrsLocation = self.__earthsatellite.at(_utcTime)
+            _itrs = _gcrsLocation.itrf_xyz().m
+            _newLocation = Location(_itrs[0], _itrs[1], _itrs[2])
 
         # update the object's dictionary
         self.__ownernode.update_Position(_newLocation, _time)
@@ -343,6 +361,12 @@ class ModelOrbit(IModel):
         if not isinstance(_time, Time):
             raise Exception("[In ModelOrbit] Time is not set/valid")
         
+        if self.__interpolationStride is not None:
+            return OrbitInterpolator.get_Velocity(self.__ownernode.nodeID, _time, self.__logger)
+
+        if self.__batchPropagation:
+            return ConstellationPropagator.get_Velocity(self.__ownernode.nodeID, _time)
+
         _utcTime = self.__skyfieldts.utc(_time.to_datetime())
         _gcrsLocation = self.__earthsatellite.at(_utcTime)
         _vel = _gcrsLocation.velocity.m_per_s
@@ -361,15 +385,13 @@ class ModelOrbit(IModel):
         # initiate the earth satellite instance
         _tlelines = self.__ownernode.get_TLE()
         
-        if len(_tlelines) == 2:
-            self.__earthsatellite = EarthSatellite(_tlelines[0], _tlelines[1])
-        elif len(_tlelines) == 3:
-            self.__earthsatellite = EarthSatellite(_tlelines[1], _tlelines[2])
-        else:
+        if len(_tlelines) not in (2, 3):
             raise Exception(f"Invalid number of TLE lines in {self.iName}")
+        #The satellites having the same TLE share the EarthSatellite instance
+        self.__earthsatellite = ResourceRegistry.get_EarthSatellite(_tlelines)
         
         #initiate the time scale for skyfield operation 
-        self.__skyfieldts = load.timescale()
+        self.__skyfieldts = ResourceRegistry.get_Timescale()
         
     def __remove_Skyfield(self, **kwargs):
         '''
@@ -420,7 +442,11 @@ class ModelOrbit(IModel):
             self, 
             _ownernodeins: INode, 
             _loggerins: ILogger,
-            _alwaysCalculate: bool = False) -> None:
+            _alwaysCalculate: bool = False,
+            _batchPropagation: bool = False,
+            _ephemerisCache: str = None,
+            _interpolationStride: float = None,
+            _interpolationTolerance: float = 1.0) -> None:
         '''
         @desc
             Constructor of the class
@@ -430,6 +456,15 @@ class ModelOrbit(IModel):
             Logger instance 
         @param[in]  _alwaysCalculate
             Wether to automatically update the location of the node at every time step or not. Default is False
+        @param[in]  _batchPropagation
+            Wether to get the position and velocity from the constellation-wide propagator (see ConstellationPropagator). Default is False
+        @param[in]  _ephemerisCache
+            Directory of the precomputed ephemeris files (see EphemerisStore). Positions are served from there if it's set. Default is None
+        @param[in]  _interpolationStride
+            Time gap in seconds between the SGP4 samples used for interpolation (see OrbitInterpolator).
+            Positions and velocities are interpolated if it's set. Default is None
+        @param[in]  _interpolationTolerance
+            Maximum allowed interpolation error on the position in meters. Default is 1.0
         '''
         assert _ownernodeins is not None
         assert _loggerins is not None
@@ -441,11 +476,25 @@ class ModelOrbit(IModel):
         self.__skyfieldts = None
         self.__setup_Skyfield()
         
-        self.__ephem = load("./dependencies/de440s.bsp") #ephemeris file. This is a binary file that contains the positions of the earth and the sun. 
+        self.__ephem = ResourceRegistry.load_Ephemeris("./dependencies/de440s.bsp") #ephemeris file. This is a binary file that contains the positions of the earth and the sun. 
         #NASA JPL Horizons Ephemeris Service: https://ssd.jpl.nasa.gov/ephem.html provides the ephemeris file 
         
         self.__alwaysCalculate = _alwaysCalculate
         
+        self.__batchPropagation = _batchPropagation
+        if self.__batchPropagation:
+            ConstellationPropagator.register_Satellite(self.__ownernode.nodeID, self.__ownernode.get_TLE())
+        
+        self.__ephemerisCache = _ephemerisCache
+        if self.__ephemerisCache is not None:
+            EphemerisStore.setup(self.__ephemerisCache, self.__ownernode.simStartTime, self.__ownernode.simEndTime, self.__ownernode.deltaTime)
+            EphemerisStore.register_Satellite(self.__ownernode.nodeID, self.__ownernode.get_TLE())
+        
+        self.__interpolationStride = _interpolationStride
+        if self.__interpolationStride is not None:
+            OrbitInterpolator.setup(self.__interpolationStride, _interpolationTolerance, self.__ownernode.simStartTime, self.__ownernode.simEndTime)
+            ConstellationPropagator.register_Satellite(self.__ownernode.nodeID, self.__ownernode.get_TLE())
+        
         self.__timesAndSunlight = None #list of tuples of the form (time, inSunlight). See __in_Sunlight for more details 
         
     def __str__(self) -> str:
@@ -467,6 +516,10 @@ class ModelOrbit(IModel):
             _newLocation = self.__get_Position({'_time': _nodeTime})
         #If not alwaysCalculate, then the position of the node will be calculated & updated when the get_Position API is called
         #This API is currently called by the satellitebasic's get_Position method
+
+    def needs_Tick(self) -> bool:
+        #Without alwaysCalculate, the position is calculated when it's asked for
+        return self.__alwaysCalculate
         
 def init_ModelOrbit(
         _ownernodeins: INode, 
@@ -483,6 +536,16 @@ def init_ModelOrbit(
         It's a converted JSON object containing the model related info. 
         @key always_calculate
             Wether to automatically update the location of the node at every timestep
+        @key batch_propagation
+            Optional. Wether to propagate the whole constellation at once through a shared vectorized SGP4 propagator. Default is False
+        @key ephemeris_cache
+            Optional. Directory of the precomputed ephemeris files. The positions of all the satellites over the simulation time grid are computed once,
+            saved there, and memory-mapped by the later runs having the same TLEs and time grid
+        @key interpolation_stride
+            Optional. Time gap in seconds between the SGP4 samples. If it's given, positions and velocities are interpolated in between (piecewise cubic Hermite).
+            The stride is validated against exact propagation and halved until the error bound is met. The validation report is logged.
+        @key interpolation_tolerance
+            Optional. Maximum allowed interpolation error on the position in meters. Default is 1.0
     @return
         Instance of the model class
     '''
@@ -496,5 +559,21 @@ def init_ModelOrbit(
         _alwaysCalc = _modelArgs['always_calculate']
     else:
         _loggerins.write_Log("always_calculate not provided provided. Defaulting to False", ELogType.LOGWARN, _ownernodeins.timestamp, "ModelOrbit")
+    
+    _batchPropagation = False
+    if "batch_propagation" in _modelArgs:
+        _batchPropagation = _modelArgs.batch_propagation
+    
+    _ephemerisCache = None
+    if "ephemeris_cache" in _modelArgs:
+        _ephemerisCache = _modelArgs.ephemeris_cache
+    
+    _interpolationStride = None
+    if "interpolation_stride" in _modelArgs:
+        _interpolationStride = _modelArgs.interpolation_stride
+    
+    _interpolationTolerance = 1.0
+    if "interpolation_tolerance" in _modelArgs:
+        _interpolationTolerance = _modelArgs.interpolation_tolerance
         
-    return ModelOrbit(_ownernodeins, _loggerins, _alwaysCalc)
\ No newline at end of file
+    return ModelOrbit(_ownernodeins, _loggerins, _alwaysCalc, _batchPropagation, _ephemerisCache, _interpolationStride, _interpolationTolerance)
\ No newline at end of file
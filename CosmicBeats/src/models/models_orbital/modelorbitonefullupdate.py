@@ -13,8 +13,9 @@ Created on: 21 Dec 2022
 from src.models.imodel import IModel, EModelTag
 from src.nodes.inode import INode
 from src.simlogging.ilogger import ELogType, ILogger
-from skyfield.api import load, EarthSatellite
+from skyfield.api import EarthSatellite
 from src.utils import Location, Time
+from src.sim.resourceregistry import ResourceRegistry
 
 class ModelOrbitOneFullUpdate(IModel):
     '''
@@ -162,15 +163,13 @@ class ModelOrbitOneFullUpdate(IModel):
             # get TLE and set up the EarthSatellite
             _tlelines = self.__ownernode.get_TLE()
         
-            if len(_tlelines) == 2:
-                self.__earthsatellite = EarthSatellite(_tlelines[0], _tlelines[1])
-            elif len(_tlelines) == 3:
-                self.__earthsatellite = EarthSatellite(_tlelines[1], _tlelines[2])
-            else:
+            if len(_tlelines) not in (2, 3):
                 raise Exception("[Simulator Exception] Invalid number of TLE lines in " + self.iName)
+            #The satellites having the same TLE share the EarthSatellite instance
+            self.__earthsatellite = ResourceRegistry.get_EarthSatellite(_tlelines)
         
             #initiate the time scale for skyfield operation 
-            self.__skyfieldts = load.timescale()
+            self.__skyfieldts = ResourceRegistry.get_Timescale()
 
             _nodeTime = self.__simStartTime
 
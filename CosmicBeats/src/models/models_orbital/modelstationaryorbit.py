@@ -12,10 +12,11 @@ from datetime import datetime, timedelta
 from src.models.imodel import IModel, EModelTag
 from src.nodes.inode import INode
 from src.simlogging.ilogger import ELogType, ILogger
-from skyfield.api import load, wgs84, EarthSatellite
+from skyfield.api import wgs84, EarthSatellite
 from skyfield.framelib import itrs
 from skyfield.positionlib import build_position, Barycentric
 from src.utils import Location, Time
+from src.sim.resourceregistry import ResourceRegistry
 
 class ModelStationaryOrbit(IModel):
     '''
@@ -368,15 +369,13 @@ class ModelStationaryOrbit(IModel):
         # initiate the earth satellite instance
         _tlelines = self.__ownernode.get_TLE()
         
-        if len(_tlelines) == 2:
-            self.__earthsatellite = EarthSatellite(_tlelines[0], _tlelines[1])
-        elif len(_tlelines) == 3:
-            self.__earthsatellite = EarthSatellite(_tlelines[1], _tlelines[2])
-        else:
+        if len(_tlelines) not in (2, 3):
             raise Exception(f"Invalid number of TLE lines in {self.iName}")
+        #The satellites having the same TLE share the EarthSatellite instance
+        self.__earthsatellite = ResourceRegistry.get_EarthSatellite(_tlelines)
         
         #initiate the time scale for skyfield operation 
-        self.__skyfieldts = load.timescale()
+        self.__skyfieldts = ResourceRegistry.get_Timescale()
         
     def __remove_Skyfield(self, **kwargs):
         '''
@@ -448,7 +447,7 @@ class ModelStationaryOrbit(IModel):
         self.__skyfieldts = None
         self.__setup_Skyfield()
         
-        self.__ephem = load("./dependencies/de440s.bsp") #ephemeris file. This is a binary file that contains the positions of the earth and the sun. 
+        self.__ephem = ResourceRegistry.load_Ephemeris("./dependencies/de440s.bsp") #ephemeris file. This is a binary file that contains the positions of the earth and the sun. 
         #NASA JPL Horizons Ephemeris Service: https://ssd.jpl.nasa.gov/ephem.html provides the ephemeris file 
         
         self.__alwaysCalculate = _alwaysCalculate
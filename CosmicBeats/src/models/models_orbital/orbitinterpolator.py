@@ -0,0 +1,400 @@
+'''
+// Copyright (c) Microsoft Corporation.
+// Licensed under the MIT license.
+
+@desc
+    This module implements interpolated orbit positions and velocities.
+    SGP4 is evaluated only at a coarse stride (knots) for the whole constellation (see ConstellationPropagator).
+    The positions and the velocities at any time in between are served through piecewise cubic Hermite interpolation,
+    which uses both the positions and the velocities at the knots.
+    The stride is validated against exact propagation at the midpoints of the intervals, where the Hermite error peaks.
+    If the error bound is not met, the stride is halved until it is.
+'''
+import threading
+from collections import OrderedDict
+
+import numpy as np
+
+from src.simlogging.ilogger import ELogType
+from src.utils import Location, Time
+from src.models.models_orbital.constellationpropagator import ConstellationPropagator
+
+class OrbitInterpolator():
+    '''
+    Shared interpolator for the positions and the velocities of all the satellites.
+    Knots are aligned to the multiples of the stride (unix time) and computed in blocks, so that all the satellites of an epoch share them.
+    Positions are interpolated in ITRS and velocities in GCRS, matching what ModelOrbit returns.
+    Like ConstellationPropagator, the state is kept in static variables.
+    '''
+    __stride = None             #Static variable holding the time gap between two knots (seconds)
+    __tolerance = None          #Static variable holding the error bound on the position (meters)
+    __validationWindow = None   #Static variable holding the (start, end) unix times used to validate the stride
+    __report = None             #Static variable holding the validation report. None until the stride is validated
+    __blocks = OrderedDict()    #Static variable holding the knots of the recently used blocks. Block number is the key
+    __version = None            #Static variable holding the ConstellationPropagator version the knots were computed for
+    __lock = threading.Lock()   #Lock for the static variables
+
+    _knotsPerBlock = 64         #Number of intervals covered by a block of knots
+    _maxBlocks = 16             #Number of blocks kept in the memory
+    _minStride = 1.0            #The stride is not halved below this (seconds)
+    _numOfValidationSamples = 256 #Number of intervals checked against exact propagation
+
+    @staticmethod
+    def setup(
+            _stride: float,
+            _tolerance: float,
+            _startTime: Time,
+            _endTime: Time):
+        '''
+        @desc
+            Sets the stride, the error bound and the time window over which the stride is validated.
+            The validation itself runs lazily on the first query, when all the satellites have been registered.
+        @param[in]  _stride
+            Time gap between two knots in seconds
+        @param[in]  _tolerance
+            Maximum allowed position error in meters
+        @param[in]  _startTime
+            Start of the validation window (usually the start of the simulation)
+        @param[in]  _endTime
+            End of the validation window (usually the end of the simulation)
+        '''
+        if _stride <= 0 or _tolerance <= 0:
+            raise Exception("[OrbitInterpolator Error]: stride and tolerance must be positive")
+
+        _window = (_startTime.to_unix(), _endTime.to_unix())
+        with OrbitInterpolator.__lock:
+            if (OrbitInterpolator.__stride == _stride and OrbitInterpolator.__tolerance == _tolerance and
+                OrbitInterpolator.__validationWindow == _window):
+                return
+            OrbitInterpolator.__stride = float(_stride)
+            OrbitInterpolator.__tolerance = float(_tolerance)
+            OrbitInterpolator.__validationWindow = _window
+            OrbitInterpolator.__report = None
+            OrbitInterpolator.__blocks.clear()
+
+    @staticmethod
+    def __hermite(
+            _s: np.ndarray,
+            _h: float,
+            _p0: np.ndarray,
+            _v0: np.ndarray,
+            _p1: np.ndarray,
+            _v1: np.ndarray) -> 'tuple[np.ndarray, np.ndarray]':
+        '''
+        @desc
+            Evaluates the cubic Hermite polynomial and its derivative
+        @param[in]  _s
+            Normalized time in the interval, [0, 1]. Broadcastable against the knot arrays
+        @param[in]  _h
+            Length of the interval in seconds
+        @param[in]  _p0, _v0
+            Position and velocity at the start of the interval
+        @param[in]  _p1, _v1
+            Position and velocity at the end of the interval
+        @return
+            Tuple of (position, velocity) at _s
+        '''
+        _s2 = _s * _s
+        _s3 = _s2 * _s
+        _position = ((2 * _s3 - 3 * _s2 + 1) * _p0 + (_s3 - 2 * _s2 + _s) * _h * _v0 +
+                    (-2 * _s3 + 3 * _s2) * _p1 + (_s3 - _s2) * _h * _v1)
+        _velocity = ((6 * _s2 - 6 * _s) * (_p0 - _p1) / _h + (3 * _s2 - 4 * _s + 1) * _v0 + (3 * _s2 - 2 * _s) * _v1)
+        return _position, _velocity
+
+    @staticmethod
+    def __interpolate_Knots(
+            _knots: 'tuple[np.ndarray, np.ndarray, np.ndarray, np.ndarray]',
+            _stride: float,
+            _knotTimes: np.ndarray,
+            _unixTimes: np.ndarray) -> 'tuple[np.ndarray, np.ndarray]':
+        '''
+        @desc
+            Interpolates the states of all the satellites at the given times from the knots around them
+        @param[in]  _knots
+            (ITRS positions, ITRS velocities, GCRS positions, GCRS velocities) at _knotTimes. Shape (number of knots, number of satellites, 3)
+        @param[in]  _stride
+            Time gap between two knots
+        @param[in]  _knotTimes
+            Unix times of the knots
+        @param[in]  _unixTimes
+            Unix times to interpolate at. They must be inside [_knotTimes[0], _knotTimes[-1]]
+        @return
+            Tuple of (ITRS positions, GCRS velocities) of shape (number of times, number of satellites, 3)
+        '''
+        _rITRS, _vITRS, _rGCRS, _vGCRS = _knots
+        _index = np.minimum(((_unixTimes - _knotTimes[0]) // _stride).astype(np.int64), len(_knotTimes) - 2)
+        _s = ((_unixTimes - _knotTimes[_index]) / _stride)[:, None, None]
+        _positions, _ = OrbitInterpolator.__hermite(_s, _stride, _rITRS[_index], _vITRS[_index], _rITRS[_index + 1], _vITRS[_index + 1])
+        _, _velocities = OrbitInterpolator.__hermite(_s, _stride, _rGCRS[_index], _vGCRS[_index], _rGCRS[_index + 1], _vGCRS[_index + 1])
+        return _positions, _velocities
+
+    @staticmethod
+    def __validate(
+            _stride: float,
+            _unixStart: float,
+            _unixEnd: float) -> dict:
+        '''
+        @desc
+            Compares the interpolated states against exact propagation at the midpoints of the intervals spread over the window
+        @param[in]  _stride
+            Time gap between two knots
+        @param[in]  _unixStart
+            Start of the window
+        @param[in]  _unixEnd
+            End of the window
+        @return
+            Validation report dictionary
+        '''
+        _numOfIntervals = max(1, int(np.ceil((_unixEnd - _unixStart) / _stride)))
+        _intervals = np.unique(np.linspace(0, _numOfIntervals - 1, min(_numOfIntervals, OrbitInterpolator._numOfValidationSamples)).astype(np.int64))
+        _knotStart = np.floor(_unixStart / _stride) * _stride + _intervals * _stride
+
+        _knots0 = ConstellationPropagator.propagate_States(_knotStart)
+        _knots1 = ConstellationPropagator.propagate_States(_knotStart + _stride)
+        _midTimes = _knotStart + _stride / 2
+        _exactPositions, _, _, _exactVelocities = ConstellationPropagator.propagate_States(_midTimes)
+
+        _positions, _ = OrbitInterpolator.__hermite(0.5, _stride, _knots0[0], _knots0[1], _knots1[0], _knots1[1])
+        _, _velocities = OrbitInterpolator.__hermite(0.5, _stride, _knots0[2], _knots0[3], _knots1[2], _knots1[3])
+
+        _positionErrors = np.linalg.norm(_positions - _exactPositions, axis=2).ravel()
+        _velocityErrors = np.linalg.norm(_velocities - _exactVelocities, axis=2).ravel()
+        _positionErrors = _positionErrors[~np.isnan(_positionErrors)]
+        _velocityErrors = _velocityErrors[~np.isnan(_velocityErrors)]
+        if len(_positionErrors) == 0:
+            raise Exception("[OrbitInterpolator Error]: No satellite could be propagated in the validation window")
+
+        return {
+            "stride": _stride,
+            "tolerance": OrbitInterpolator.__tolerance,
+            "numOfSatellites": len(ConstellationPropagator.get_NodeIDs()),
+            "numOfSamples": int(len(_positionErrors)),
+            "maxPositionError": float(np.max(_positionErrors)),
+            "p99PositionError": float(np.percentile(_positionErrors, 99)),
+            "rmsPositionError": float(np.sqrt(np.mean(_positionErrors ** 2))),
+            "maxVelocityError": float(np.max(_velocityErrors)),
+            "rmsVelocityError": float(np.sqrt(np.mean(_velocityErrors ** 2)))
+        }
+
+    @staticmethod
+    def validate(
+            _stride: float = None,
+            _startTime: Time = None,
+            _endTime: Time = None) -> dict:
+        '''
+        @desc
+            Builds a validation report of the interpolation against exact propagation.
+            The errors are measured at the midpoints of the intervals, where the Hermite error peaks.
+        @param[in]  _stride
+            Stride to validate. Default is the current stride
+        @param[in]  _startTime
+            Start of the window. Default is the start of the validation window given in setup
+        @param[in]  _endTime
+            End of the window. Default is the end of the validation window given in setup
+        @return
+            Dictionary having the stride, the tolerance, the number of samples,
+            and the max/p99/rms position errors (meters) and the max/rms velocity errors (m/s)
+        '''
+        if OrbitInterpolator.__validationWindow is None:
+            raise Exception("[OrbitInterpolator Error]: Interpolator is not set up")
+        _stride = OrbitInterpolator.__stride if _stride is None else float(_stride)
+        _unixStart = OrbitInterpolator.__validationWindow[0] if _startTime is None else _startTime.to_unix()
+        _unixEnd = OrbitInterpolator.__validationWindow[1] if _endTime is None else _endTime.to_unix()
+        return OrbitInterpolator.__validate(_stride, _unixStart, _unixEnd)
+
+    @staticmethod
+    def __tune() -> bool:
+        '''
+        @desc
+            Validates the stride, halving it until the error bound is met.
+            Caller should hold the lock.
+        @return
+            True if the stride was validated in this call. False if it had already been validated.
+        '''
+        if OrbitInterpolator.__report is not None:
+            return False
+        if OrbitInterpolator.__validationWindow is None:
+            raise Exception("[OrbitInterpolator Error]: Interpolator is not set up")
+
+        _unixStart, _unixEnd = OrbitInterpolator.__validationWindow
+        _stride = OrbitInterpolator.__stride
+        _report = OrbitInterpolator.__validate(_stride, _unixStart, _unixEnd)
+        while _report["maxPositionError"] > OrbitInterpolator.__tolerance and _stride / 2 >= OrbitInterpolator._minStride:
+            _stride = _stride / 2
+            _report = OrbitInterpolator.__validate(_stride, _unixStart, _unixEnd)
+
+        _report["requestedStride"] = OrbitInterpolator.__stride
+        _report["withinTolerance"] = _report["maxPositionError"] <= OrbitInterpolator.__tolerance
+        OrbitInterpolator.__stride = _stride
+        OrbitInterpolator.__report = _report
+        OrbitInterpolator.__blocks.clear()
+        return True
+
+    @staticmethod
+    def get_Report() -> dict:
+        '''
+        @desc
+            Returns the validation report of the current stride
+        @return
+            Report dictionary (see validate). None if the stride hasn't been validated yet
+        '''
+        return OrbitInterpolator.__report
+
+    @staticmethod
+    def __get_Block(_block: int) -> 'tuple[np.ndarray, tuple]':
+        '''
+        @desc
+            Returns the knots of a block. The knots of the whole constellation are propagated if the block is not in the memory.
+            Caller should hold the lock.
+        @param[in]  _block
+            Block number. Block b covers the knots b * _knotsPerBlock ... (b + 1) * _knotsPerBlock
+        @return
+            Tuple of (knot times, knots)
+        '''
+        if OrbitInterpolator.__version != ConstellationPropagator.get_Version():
+            OrbitInterpolator.__blocks.clear()
+            OrbitInterpolator.__version = ConstellationPropagator.get_Version()
+
+        _entry = OrbitInterpolator.__blocks.get(_block)
+        if _entry is not None:
+            OrbitInterpolator.__blocks.move_to_end(_block)
+            return _entry
+
+        _firstKnot = _block * OrbitInterpolator._knotsPerBlock
+        _knotTimes = (_firstKnot + np.arange(OrbitInterpolator._knotsPerBlock + 1)) * OrbitInterpolator.__stride
+        _entry = (_knotTimes, ConstellationPropagator.propagate_States(_knotTimes))
+
+        OrbitInterpolator.__blocks[_block] = _entry
+        while len(OrbitInterpolator.__blocks) > OrbitInterpolator._maxBlocks:
+            OrbitInterpolator.__blocks.popitem(last=False)
+        return _entry
+
+    @staticmethod
+    def __prepare(_loggerins):
+        '''
+        @desc
+            Validates the stride if it hasn't been validated yet and writes the report to the logger.
+            Caller should hold the lock.
+        @param[in]  _loggerins
+            Logger instance. Can be None
+        '''
+        if OrbitInterpolator.__tune() and _loggerins is not None:
+            _loggerins.write_Log(f"Orbit interpolation validation report: {OrbitInterpolator.__report}",
+                                ELogType.LOGINFO, Time().from_unix(OrbitInterpolator.__validationWindow[0]), "ModelOrbit")
+
+    @staticmethod
+    def __get_Interval(
+            _unixTime: float,
+            _loggerins) -> 'tuple[float, float, int, tuple]':
+        '''
+        @desc
+            Finds the knots around a single time
+        @param[in]  _unixTime
+            Unix time
+        @param[in]  _loggerins
+            Logger instance for the validation report. Can be None
+        @return
+            Tuple of (normalized time in the interval, stride, index of the first knot in the block, knots of the block)
+        '''
+        with OrbitInterpolator.__lock:
+            OrbitInterpolator.__prepare(_loggerins)
+            _stride = OrbitInterpolator.__stride
+            _knot = int(np.floor(_unixTime / _stride))
+            _knotTimes, _knots = OrbitInterpolator.__get_Block(_knot // OrbitInterpolator._knotsPerBlock)
+        _index = _knot % OrbitInterpolator._knotsPerBlock
+        return (_unixTime - _knotTimes[_index]) / _stride, _stride, _index, _knots
+
+    @staticmethod
+    def interpolate(
+            _unixTimes,
+            _loggerins = None) -> 'tuple[np.ndarray, np.ndarray]':
+        '''
+        @desc
+            Interpolates the positions and the velocities of all the registered satellites at the given times
+        @param[in]  _unixTimes
+            Unix times (UTC). A float or a 1D array of floats
+        @param[in]  _loggerins
+            Optional logger instance. The validation report is written there if the stride gets validated in this call
+        @return
+            Tuple of (positions, velocities) of shape (number of times, number of satellites, 3).
+            Positions are in meters in ITRS and velocities in m/s in GCRS (same as ConstellationPropagator.propagate)
+        '''
+        _unixTimes = np.atleast_1d(np.asarray(_unixTimes, dtype=np.float64))
+        with OrbitInterpolator.__lock:
+            OrbitInterpolator.__prepare(_loggerins)
+
+            _stride = OrbitInterpolator.__stride
+            _blockLength = _stride * OrbitInterpolator._knotsPerBlock
+            _blockNumbers = np.floor(_unixTimes / _blockLength).astype(np.int64)
+
+            _positions = None
+            _velocities = None
+            for _block in np.unique(_blockNumbers):
+                _mask = _blockNumbers == _block
+                _knotTimes, _knots = OrbitInterpolator.__get_Block(int(_block))
+                _blockPositions, _blockVelocities = OrbitInterpolator.__interpolate_Knots(_knots, _stride, _knotTimes, _unixTimes[_mask])
+                if _positions is None:
+                    _positions = np.empty((len(_unixTimes),) + _blockPositions.shape[1:])
+                    _velocities = np.empty_like(_positions)
+                _positions[_mask] = _blockPositions
+                _velocities[_mask] = _blockVelocities
+        return _positions, _velocities
+
+    @staticmethod
+    def get_Position(
+            _nodeID: int,
+            _time: Time,
+            _loggerins = None) -> Location:
+        '''
+        @desc
+            Returns the interpolated position of a registered satellite at the given time
+        @param[in]  _nodeID
+            ID of the satellite node
+        @param[in]  _time
+            Time at which the position is needed
+        @param[in]  _loggerins
+            Optional logger instance for the validation report
+        @return
+            Location of the satellite in the ITRS frame
+        '''
+        _row = ConstellationPropagator.get_Index(_nodeID)
+        _s, _stride, _index, _knots = OrbitInterpolator.__get_Interval(_time.to_unix(), _loggerins)
+        _rITRS, _vITRS, _, _ = _knots
+        _pos, _ = OrbitInterpolator.__hermite(_s, _stride, _rITRS[_index, _row], _vITRS[_index, _row], _rITRS[_index + 1, _row], _vITRS[_index + 1, _row])
+        return Location(float(_pos[0]), float(_pos[1]), float(_pos[2]))
+
+    @staticmethod
+    def get_Velocity(
+            _nodeID: int,
+            _time: Time,
+            _loggerins = None) -> 'tuple[float, float, float]':
+        '''
+        @desc
+            Returns the interpolated velocity of a registered satellite at the given time
+        @param[in]  _nodeID
+            ID of the satellite node
+        @param[in]  _time
+            Time at which the velocity is needed
+        @param[in]  _loggerins
+            Optional logger instance for the validation report
+        @return
+            Velocity (x, y, z) in m/s in the GCRS frame
+        '''
+        _row = ConstellationPropagator.get_Index(_nodeID)
+        _s, _stride, _index, _knots = OrbitInterpolator.__get_Interval(_time.to_unix(), _loggerins)
+        _, _, _rGCRS, _vGCRS = _knots
+        _, _vel = OrbitInterpolator.__hermite(_s, _stride, _rGCRS[_index, _row], _vGCRS[_index, _row], _rGCRS[_index + 1, _row], _vGCRS[_index + 1, _row])
+        return (float(_vel[0]), float(_vel[1]), float(_vel[2]))
+
+    @staticmethod
+    def reset():
+        '''
+        @desc
+            Clears the configuration, the report and the knots
+        '''
+        with OrbitInterpolator.__lock:
+            OrbitInterpolator.__stride = None
+            OrbitInterpolator.__tolerance = None
+            OrbitInterpolator.__validationWindow = None
+            OrbitInterpolator.__report = None
+            OrbitInterpolator.__blocks.clear()
@@ -10,7 +10,7 @@ Created on: 08 Nov 2022
 from io import StringIO
 
 from src.nodes.inode import INode, ENodeType
-from src.utils import Time, Location
+from src.utils import Time, SimClock, Location
 from src.simlogging.ilogger import ILogger, ELogType
 from src.models.imodel import IModel, EModelTag
 from src.sim.imanager import IManager
@@ -27,10 +27,13 @@ class GSBasic(INode):
     __position: Location
     __managerinstance = None
     __logger: ILogger
-    __timestamp: Time
+    __clock: SimClock                      # clock of the simulation epochs shared with the other nodes
+    __epoch: int                           # index of the current epoch of the node
     __endTimeStamp: Time
     __timedelta: float              #time granularity for the simulation
     __models: 'list[IModel]'          # List of models
+    __tagToModels: 'dict[EModelTag, IModel]'    # Models indexed by the tag
+    __nameToModels: 'dict[str, IModel]'         # Models indexed by the implementation name (iName)
     
     @property
     def iName(self)-> str:
@@ -81,7 +84,7 @@ class GSBasic(INode):
         @desc
             Current timestamp of the node instance 
         """
-        return self.__timestamp
+        return self.__clock.get_Time(self.__epoch)
     @property
     def simStartTime(self) -> Time:
         """
@@ -145,6 +148,11 @@ class GSBasic(INode):
         assert _modelsToAdd is not None
 
         self.__models.extend(_modelsToAdd)
+        #The lookups are done in the innermost loops of the models. So, they are indexed here instead of scanning the models.
+        #The first model with a tag or name wins, as the scan did
+        for _model in _modelsToAdd:
+            self.__tagToModels.setdefault(_model.modelTag, _model)
+            self.__nameToModels.setdefault(_model.iName, _model)
     
     def has_ModelWithTag(
             self, 
@@ -159,14 +167,7 @@ class GSBasic(INode):
             Instance of the model if it was found.
             Otherwise, None 
         """
-        _ret = None
-
-        for _model in self.__models:
-            if _model.modelTag.value == _modelTag.value:
-                _ret = _model
-                break
-        
-        return _ret
+        return self.__tagToModels.get(_modelTag, None)
     
     def get_Models(self) -> 'list[IModel]':
         """
@@ -190,14 +191,7 @@ class GSBasic(INode):
             Instance of the model if it was found.
             Otherwise, None 
         """
-        _ret = None
-
-        for _model in self.__models:
-            if _model.iName == _modelName:
-                _ret = _model
-                break
-        
-        return _ret
+        return self.__nameToModels.get(_modelName, None)
 
     def update_Position(
             self, 
@@ -311,11 +305,14 @@ class GSBasic(INode):
         self.__position = _location
         self.__lat, self.__lon, self.__alt = _location.to_lat_long() #Saves us from calling the function multiple times
         self.__timedelta = _timeDelta
-        self.__timestamp = _timeStamp.copy()
+        self.__clock = SimClock.get_Clock(_timeStamp, _timeDelta)
+        self.__epoch = 0
         self.__startTimeStamp = _timeStamp
         self.__endTimeStamp = _endtime
         self.__logger = _Logger
         self.__models = []
+        self.__tagToModels = {}
+        self.__nameToModels = {}
     
     def Execute(self) -> bool:
         """
@@ -327,15 +324,15 @@ class GSBasic(INode):
             False:  Otherwise
         """
         _ret = False
-        if self.__timestamp <= self.__endTimeStamp:
-            self.__logger.write_Log("Executing", ELogType.LOGDEBUG, self.__timestamp)
+        if self.timestamp <= self.__endTimeStamp:
+            self.__logger.write_Log("Executing", ELogType.LOGDEBUG, self.timestamp)
             
             # execute the models one by one, if any
             for _model in self.__models:
                 _model.Execute() 
 
             # update the time of the node
-            self.__timestamp.add_seconds(self.__timedelta)
+            self.__epoch += 1
             _ret = True
         
         return _ret
@@ -346,22 +343,44 @@ class GSBasic(INode):
         This method executes the models of the node instance one by one continuously until
         it reaches simulation end time.
         """
-        while self.__timestamp <= self.__endTimeStamp:
-            self.__logger.write_Log("Executing", ELogType.LOGDEBUG, self.__timestamp)
+        while self.timestamp <= self.__endTimeStamp:
+            self.__logger.write_Log("Executing", ELogType.LOGDEBUG, self.timestamp)
             
             # execute the models one by one, if any
             for _model in self.__models:
                 _model.Execute() 
 
             # update the time of the node
-            self.__timestamp.add_seconds(self.__timedelta)
+            self.__epoch += 1
+
+    def needs_Tick(self) -> bool:
+        """
+        @desc
+            This method tells whether any of the models of the node has work to do at the current epoch.
+        @return
+            True:   If Execute has to be called
+            False:  Otherwise
+        """
+        for _model in self.__models:
+            if _model.needs_Tick():
+                return True
+        return False
+
+    def skip_Tick(self):
+        """
+        @desc
+            This method is called instead of Execute when the node doesn't need a tick.
+            Only the time of the node is advanced.
+        """
+        if self.timestamp <= self.__endTimeStamp:
+            self.__epoch += 1
     
     def __str__(self):      
 
         _nodeDetails = "".join(["GS node ID:: ", str(self.__nodeid), ", ",
                         "Topology ID: ", str(self.__topologyid), ", "
                         "Current location: ", self.__position.to_str(), ", ",
-                        "Current time: ", self.__timestamp.to_str(), ", ",
+                        "Current time: ", self.timestamp.to_str(), ", ",
                         "End time: ", self.__endTimeStamp.to_str(), ", ",
                         "Models (if any): "])
 
@@ -14,6 +14,7 @@ from enum import Enum
 from src.models.imodel import EModelTag, IModel
 from src.utils import Location
 from src.utils import Time
+from src.sim.checkpoint import Checkpoint
 
 class ENodeType(Enum):
     """
@@ -161,6 +162,49 @@ class INode(ABC):
         """
         pass
 
+    def needs_Tick(self) -> bool:
+        """
+        @desc
+            This method tells whether the node has any work to do at the current epoch.
+            The manager calls skip_Tick instead of Execute for the nodes that don't need a tick (active-set scheduling).
+            By default, the node is always executed.
+        @return
+            True:   If Execute has to be called
+            False:  Otherwise
+        """
+        return True
+
+    def skip_Tick(self):
+        """
+        @desc
+            This method is called instead of Execute when the node doesn't need a tick.
+            The node should only advance its time, which it may do lazily.
+            By default, it executes the node.
+        """
+        self.Execute()
+
+    def get_Checkpoint(self) -> dict:
+        """
+        @desc
+            This method returns the state of the node instance to be stored in a checkpoint (see Checkpoint).
+            By default, it's the attributes of the instance except the references to the other simulation objects, the callables, and the open files.
+            A node keeping such a state (e.g., the position in a trace file) should override it.
+        @return
+            Dictionary of the state. It must be picklable.
+        """
+        return Checkpoint.get_InstanceState(self)
+
+    def restore_Checkpoint(
+            self,
+            _state: dict):
+        """
+        @desc
+            This method restores the state returned by get_Checkpoint on a node instance created from the same config
+        @param[in]  _state
+            State of the node
+        """
+        Checkpoint.set_InstanceState(self, _state)
+
     @abstractmethod
     def ExecuteCntd(self):
         """
@@ -10,7 +10,7 @@ Created on: 06 April 2023
 from io import StringIO
 
 from src.nodes.inode import INode, ENodeType
-from src.utils import Time, Location
+from src.utils import Time, SimClock, Location
 from src.simlogging.ilogger import ILogger, ELogType
 from src.models.imodel import IModel, EModelTag
 from src.sim.imanager import IManager
@@ -26,10 +26,12 @@ class IoTBasic(INode):
     __position: Location
     __managerinstance = None
     __logger: ILogger
-    __timestamp: Time
+    __clock: SimClock                      # clock of the simulation epochs shared with the other nodes
+    __epoch: int                           # index of the current epoch of the node
     __endTimeStamp: Time
     __timedelta: float              #time granularity for the simulation
     __models: 'list[IModel]'          # List of models
+    __nameToModels: 'dict[str, IModel]'      # Models indexed by the implementation name (iName)
     
     @property
     def iName(self)-> str:
@@ -80,7 +82,7 @@ class IoTBasic(INode):
         @desc
             Current timestamp of the node instance 
         """
-        return self.__timestamp
+        return self.__clock.get_Time(self.__epoch)
     @property
     def simStartTime(self) -> Time:
         """
@@ -146,6 +148,7 @@ class IoTBasic(INode):
         self.__models.extend(_modelsToAdd)
         for _model in _modelsToAdd:
             self.__tagToModel[_model.modelTag] = _model
+            self.__nameToModels.setdefault(_model.iName, _model)   #The first model with the name wins, as the scan did
             
     def has_ModelWithTag(
             self, 
@@ -184,14 +187,7 @@ class IoTBasic(INode):
             Instance of the model if it was found.
             Otherwise, None 
         """
-        _ret = None
-
-        for _model in self.__models:
-            if _model.iName == _modelName:
-                _ret = _model
-                break
-        
-        return _ret
+        return self.__nameToModels.get(_modelName, None)
 
     def update_Position(
             self, 
@@ -301,7 +297,8 @@ class IoTBasic(INode):
         self.__topologyid = _topologyID
         self.__position = _location
         self.__timedelta = _timeDelta
-        self.__timestamp = _timeStamp.copy()
+        self.__clock = SimClock.get_Clock(_timeStamp, _timeDelta)
+        self.__epoch = 0
         self.__startTimeStamp = _timeStamp.copy()
         self.__endTimeStamp = _endtime.copy()
         self.__logger = _Logger
@@ -309,6 +306,7 @@ class IoTBasic(INode):
         
         self.__lat, self.__lon, self.__alt = _location.to_lat_long() #Saves us from calling the function again and again
         self.__tagToModel = {}
+        self.__nameToModels = {}
     def Execute(self) -> bool:
         """
         @desc
@@ -319,15 +317,15 @@ class IoTBasic(INode):
             False:  Otherwise
         """
         _ret = False
-        if self.__timestamp <= self.__endTimeStamp:
-            self.__logger.write_Log("Executing", ELogType.LOGDEBUG, self.__timestamp)
+        if self.timestamp <= self.__endTimeStamp:
+            self.__logger.write_Log("Executing", ELogType.LOGDEBUG, self.timestamp)
             
             # execute the models one by one, if any
             for _model in self.__models:
                 _model.Execute() 
 
             # update the time of the node
-            self.__timestamp.add_seconds(self.__timedelta)
+            self.__epoch += 1
             _ret = True
         
         return _ret
@@ -338,22 +336,22 @@ class IoTBasic(INode):
         This method executes the models of the node instance one by one continuously until
         it reaches simulation end time.
         """
-        while self.__timestamp <= self.__endTimeStamp:
-            self.__logger.write_Log("Executing", ELogType.LOGDEBUG, self.__timestamp)
+        while self.timestamp <= self.__endTimeStamp:
+            self.__logger.write_Log("Executing", ELogType.LOGDEBUG, self.timestamp)
             
             # execute the models one by one, if any
             for _model in self.__models:
                 _model.Execute() 
 
             # update the time of the node
-            self.__timestamp.add_seconds(self.__timedelta)
+            self.__epoch += 1
     
     def __str__(self):
         
         _nodeDetails = "".join(["IoT node ID:: ", str(self.__nodeid), ", ",
                         "Topology ID: ", str(self.__topologyid), ", "
                         "Current location: ", self.__position.to_str(), ", ",
-                        "Current time: ", self.__timestamp.to_str(), ", ",
+                        "Current time: ", self.timestamp.to_str(), ", ",
                         "End time: ", self.__endTimeStamp.to_str(), ", ",
                         "Models (if any): "])
 
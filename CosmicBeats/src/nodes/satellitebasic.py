@@ -12,7 +12,7 @@ Created on: 13 Oct 2022
 from src.nodes.inode import INode, ENodeType
 from src.utils import Location
 from src.simlogging.ilogger import ELogType, ILogger
-from src.utils import Time
+from src.utils import Time, SimClock
 from src.models.imodel import IModel, EModelTag
 from src.sim.imanager import IManager
 from io import StringIO
@@ -28,10 +28,12 @@ class SatelliteBasic(INode):
     __positionDictionary: dict
     __managerinstance = None
     __logger: ILogger
-    __timestamp: Time
+    __clock: SimClock                      # clock of the simulation epochs shared with the other nodes
+    __epoch: int                           # index of the current epoch of the node
     __endTimeStamp: Time
     __timedelta: float                      # time granularity for the simulation
     __models: 'list[IModel]'                 # List of models
+    __nameToModels: 'dict[str, IModel]'      # Models indexed by the implementation name (iName)
 
     
     @property
@@ -83,7 +85,7 @@ class SatelliteBasic(INode):
         @desc
             Current timestamp of the node instance 
         """
-        return self.__timestamp
+        return self.__clock.get_Time(self.__epoch)
     
     @property
     def deltaTime(self) -> float:
@@ -138,15 +140,15 @@ class SatelliteBasic(INode):
             False:  Otherwise
         """
         _ret = False
-        if self.__timestamp <= self.__endTimeStamp:
-            self.__logger.write_Log("Executing", ELogType.LOGDEBUG, self.__timestamp)
+        if self.timestamp <= self.__endTimeStamp:
+            self.__logger.write_Log("Executing", ELogType.LOGDEBUG, self.timestamp)
             
             # execute the models one by one, if any
             for _model in self.__models:
                 _model.Execute() 
 
             # update the time of the node
-            self.__timestamp.add_seconds(self.__timedelta)
+            self.__epoch += 1
             _ret = True
         
         return _ret
@@ -157,15 +159,37 @@ class SatelliteBasic(INode):
         This method executes the models of the node instance one by one continuously until
         it reaches simulation end time.
         """
-        while self.__timestamp <= self.__endTimeStamp:
-            self.__logger.write_Log(f"Executing All Models At Once {str(self)}", ELogType.LOGDEBUG, self.__timestamp)
+        while self.timestamp <= self.__endTimeStamp:
+            self.__logger.write_Log(f"Executing All Models At Once {str(self)}", ELogType.LOGDEBUG, self.timestamp)
             
             # execute the models one by one, if any
             for _model in self.__models:
                 _model.Execute() 
 
             # update the time of the node
-            self.__timestamp.add_seconds(self.__timedelta)
+            self.__epoch += 1
+
+    def needs_Tick(self) -> bool:
+        """
+        @desc
+            This method tells whether any of the models of the node has work to do at the current epoch.
+        @return
+            True:   If Execute has to be called
+            False:  Otherwise
+        """
+        for _model in self.__models:
+            if _model.needs_Tick():
+                return True
+        return False
+
+    def skip_Tick(self):
+        """
+        @desc
+            This method is called instead of Execute when the node doesn't need a tick.
+            Only the time of the node is advanced.
+        """
+        if self.timestamp <= self.__endTimeStamp:
+            self.__epoch += 1
     
     def add_Models(
             self, 
@@ -181,6 +205,7 @@ class SatelliteBasic(INode):
         self.__models.extend(_modelsToAdd)
         for _model in _modelsToAdd:
             self.__tagToModels[_model.modelTag] = _model
+            self.__nameToModels.setdefault(_model.iName, _model)   #The first model with the name wins, as the scan did
     
     def has_ModelWithTag(
             self, 
@@ -210,14 +235,7 @@ class SatelliteBasic(INode):
             Instance of the model if it was found.
             Otherwise, None 
         """
-        _ret = None
-
-        for _model in self.__models:
-            if _model.iName == _modelName:
-                _ret = _model
-                break
-        
-        return _ret
+        return self.__nameToModels.get(_modelName, None)
     
     def get_Models(self) -> 'list[IModel]':
         """
@@ -258,7 +276,7 @@ class SatelliteBasic(INode):
             otherwise, none
         """
         if _time is None:
-            _time = self.__timestamp
+            _time = self.timestamp
         assert _time is not None
 
         _ret = None
@@ -334,13 +352,15 @@ class SatelliteBasic(INode):
         self.__topologyid = _topologyID
         self.__tle = [_tleline1, _tleline2]
         self.__timedelta = _timeDelta
-        self.__timestamp = _timeStamp.copy()
+        self.__clock = SimClock.get_Clock(_timeStamp, _timeDelta)
+        self.__epoch = 0
         self.__startTimeStamp = _timeStamp.copy()
         self.__endTimeStamp = _endtime
         self.__logger = _Logger
         self.__models = []
         self.__positionDictionary = dict()
         self.__tagToModels = {}
+        self.__nameToModels = {}
     
     def __str__(self):
         
@@ -348,7 +368,7 @@ class SatelliteBasic(INode):
                             "Topology ID: ", str(self.__topologyid), ", "
                             "TLE line 1: ", self.__tle[0], ", ",
                             "TLE line 2: ", self.__tle[1], ", ",
-                            "Current time: ", self.__timestamp.to_str(), ", ",
+                            "Current time: ", self.timestamp.to_str(), ", ",
                             "End time: ", self.__endTimeStamp.to_str(), ", ",
                             "Models (if any): "])
         
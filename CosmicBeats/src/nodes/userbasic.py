@@ -10,10 +10,11 @@ Created on: 08 Nov 2022
 from io import StringIO
 
 from src.nodes.inode import INode, ENodeType
-from src.utils import Time, Location, File
+from src.utils import Time, SimClock, Location, File
 from src.simlogging.ilogger import ILogger, ELogType
 from src.models.imodel import IModel, EModelTag
 from src.sim.imanager import IManager
+from src.models.models_cdn.objectdictionary import ObjectDictionary
 import os
 class UserBasic(INode):
     '''
@@ -28,10 +29,13 @@ class UserBasic(INode):
     __position: Location
     __managerinstance = None
     __logger: ILogger
-    __timestamp: Time
+    __clock: SimClock                      # clock of the simulation epochs shared with the other nodes
+    __epoch: int                           # index of the current epoch of the node
     __endTimeStamp: Time
     __timedelta: float              #time granularity for the simulation
     __models: 'list[IModel]'          # List of models
+    __tagToModels: 'dict[EModelTag, IModel]'    # Models indexed by the tag
+    __nameToModels: 'dict[str, IModel]'         # Models indexed by the implementation name (iName)
     __request_time = 1
     
     @property
@@ -83,7 +87,7 @@ class UserBasic(INode):
         @desc
             Current timestamp of the node instance 
         """
-        return self.__timestamp
+        return self.__clock.get_Time(self.__epoch)
 
     @property
     def simStartTime(self) -> Time:
@@ -178,6 +182,11 @@ class UserBasic(INode):
         assert _modelsToAdd is not None
 
         self.__models.extend(_modelsToAdd)
+        #The lookups are done in the innermost loops of the models. So, they are indexed here instead of scanning the models.
+        #The first model with a tag or name wins, as the scan did
+        for _model in _modelsToAdd:
+            self.__tagToModels.setdefault(_model.modelTag, _model)
+            self.__nameToModels.setdefault(_model.iName, _model)
     
     def has_ModelWithTag(
             self, 
@@ -192,14 +201,7 @@ class UserBasic(INode):
             Instance of the model if it was found.
             Otherwise, None 
         """
-        _ret = None
-
-        for _model in self.__models:
-            if _model.modelTag.value == _modelTag.value:
-                _ret = _model
-                break
-        
-        return _ret
+        return self.__tagToModels.get(_modelTag, None)
     
     def get_Models(self) -> 'list[IModel]':
         """
@@ -223,14 +225,7 @@ class UserBasic(INode):
             Instance of the model if it was found.
             Otherwise, None 
         """
-        _ret = None
-
-        for _model in self.__models:
-            if _model.iName == _modelName:
-                _ret = _model
-                break
-        
-        return _ret
+        return self.__nameToModels.get(_modelName, None)
 
     def update_Position(
             self, 
@@ -325,19 +320,27 @@ class UserBasic(INode):
         self.__position = _location
         self.__lat, self.__lon, self.__alt = _location.to_lat_long() #Saves us from calling the function multiple times
         self.__timedelta = _timeDelta
-        self.__timestamp = _timeStamp.copy()
+        self.__clock = SimClock.get_Clock(_timeStamp, _timeDelta)
+        self.__epoch = 0
         self.__startTimeStamp = _timeStamp
         self.__endTimeStamp = _endtime
         self.__logger = _Logger
         self.__models = []
+        self.__tagToModels = {}
+        self.__nameToModels = {}
+        # the object IDs are integers if the traces are encoded (see ObjectDictionary)
+        _objectDictionary = ObjectDictionary.get_Active()
+        self.__integerIDs = _objectDictionary is not None
+        if self.__integerIDs:
+            _trace = _objectDictionary.get_EncodedTrace(_trace)
         self.__trace_file = open(_trace, 'rb') 
 
         # Sync the first timestamp of the trace file to first emulation timestamp
         time_trace_start = float(self.__trace_file.readline().decode('utf-8').split(':')[0])
         self.__trace_file.seek(0, os.SEEK_SET)
-        self.__trace_emulation_time_diff = self.__timestamp.to_unix() - time_trace_start
+        self.__trace_emulation_time_diff = self.timestamp.to_unix() - time_trace_start
 
-        self.__logger.write_Log(f"User{_nodeID}, trace: {_trace}, coordinate{(self.__lat, self.__lon)}, trace_emulation_time_diff{self.__trace_emulation_time_diff}", ELogType.LOGDEBUG, self.__timestamp)
+        self.__logger.write_Log(f"User{_nodeID}, trace: {_trace}, coordinate{(self.__lat, self.__lon)}, trace_emulation_time_diff{self.__trace_emulation_time_diff}", ELogType.LOGDEBUG, self.timestamp)
 
         
     
@@ -353,21 +356,21 @@ class UserBasic(INode):
         _ret = False
        
 
-        if self.__timestamp <= self.__endTimeStamp:
-            self.__logger.write_Log("Executing", ELogType.LOGDEBUG, self.__timestamp)
+        if self.timestamp <= self.__endTimeStamp:
+            self.__logger.write_Log("Executing", ELogType.LOGDEBUG, self.timestamp)
 
             # Read file schedule traffic into user model, who is responsible to send to the cdn server
             while True:
                 line = self.__trace_file.readline()
                 if line is None or len(line) == 0: 
                     # Already end of file
-                    self.__logger.write_Log("Log EOF", ELogType.LOGDEBUG, self.__timestamp)
+                    self.__logger.write_Log("Log EOF", ELogType.LOGDEBUG, self.timestamp)
                     break
 
                 tokens = line.strip().decode('utf-8').split(':') # Akamai's seperator
                 time = float(tokens[0]) + self.__trace_emulation_time_diff
-                if time < self.__timestamp.to_unix():
-                    self.has_ModelWithName('ModelCDNUser').call_APIs('add_request', request=File(str(tokens[1]), int(tokens[2]))) # append [time, id, size]
+                if time < self.timestamp.to_unix():
+                    self.has_ModelWithName('ModelCDNUser').call_APIs('add_request', request=File(int(tokens[1]) if self.__integerIDs else str(tokens[1]), int(tokens[2]))) # append [time, id, size]
                 else:
                     # Rewind if time is not up there yet
                     self.__trace_file.seek(-len(line), os.SEEK_CUR)
@@ -380,33 +383,56 @@ class UserBasic(INode):
                 _model.Execute() 
 
             # update the time of the node
-            self.__timestamp.add_seconds(self.__timedelta)
+            self.__epoch += 1
             _ret = True
         
         return _ret
-    
+
+    def get_Checkpoint(self) -> dict:
+        """
+        @desc
+            This method returns the state of the node for a checkpoint, including the position in the trace file
+        @return
+            Dictionary of the state
+        """
+        return {"node": INode.get_Checkpoint(self), "trace": self.__trace_file.name, "traceOffset": self.__trace_file.tell()}
+
+    def restore_Checkpoint(
+            self,
+            _state: dict):
+        """
+        @desc
+            This method restores the state returned by get_Checkpoint. The trace file is read from the stored position onwards
+        @param[in]  _state
+            State of the node
+        """
+        if _state["trace"] != self.__trace_file.name:
+            raise Exception(f"[UserBasic Error]: The checkpoint was taken on the trace {_state['trace']}, but node {self.__nodeid} reads {self.__trace_file.name}. Resume with the same object ID encoding")
+        INode.restore_Checkpoint(self, _state["node"])
+        self.__trace_file.seek(_state["traceOffset"], os.SEEK_SET)
+
     def ExecuteCntd(self):
         """
         @desc
         This method executes the models of the node instance one by one continuously until
         it reaches simulation end time.
         """
-        while self.__timestamp <= self.__endTimeStamp:
-            self.__logger.write_Log("Executing", ELogType.LOGDEBUG, self.__timestamp)
+        while self.timestamp <= self.__endTimeStamp:
+            self.__logger.write_Log("Executing", ELogType.LOGDEBUG, self.timestamp)
             
             # execute the models one by one, if any
             for _model in self.__models:
                 _model.Execute() 
 
             # update the time of the node
-            self.__timestamp.add_seconds(self.__timedelta)
+            self.__epoch += 1
     
     def __str__(self):      
 
         _nodeDetails = "".join(["GS node ID:: ", str(self.__nodeid), ", ",
                         "Topology ID: ", str(self.__topologyid), ", "
                         "Current location: ", self.__position.to_str(), ", ",
-                        "Current time: ", self.__timestamp.to_str(), ", ",
+                        "Current time: ", self.timestamp.to_str(), ", ",
                         "End time: ", self.__endTimeStamp.to_str(), ", ",
                         "Models (if any): "])
 
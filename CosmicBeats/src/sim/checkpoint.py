@@ -0,0 +1,194 @@
+'''
+// Copyright (c) Microsoft Corporation.
+// Licensed under the MIT license.
+
+@desc
+    This is the implementation of the checkpoint of the simulation state.
+    A checkpoint is taken between two epochs. It has the state of every node and model (see INode get_Checkpoint and IModel get_Checkpoint),
+    the state shared by all the instances of a model class (see IModel get_SharedCheckpoint, e.g., the FoV tables), and the positions of the log files.
+    It's restored on top of a simulation environment freshly created from the same config. So, the state that is derived from the config
+    (e.g., the skyfield objects, the static registries, the references between the nodes and the models) is built as usual and not stored.
+    The checkpoint is a compressed pickle file.
+'''
+import gzip
+import io
+import os
+import pickle
+import threading
+
+class Checkpoint():
+    '''
+    Static helpers to take, save, load, and restore checkpoints
+    '''
+    _formatVersion = 1
+    _compressLevel = 1              #Fast gzip level. The state is mostly small integers and strings
+    __transientModules = ("skyfield", "jplephem", "sgp4")  #Objects of these packages are rebuilt from the config (e.g., setup_Skyfield)
+    __lockTypes = (type(threading.Lock()), type(threading.RLock()), threading.Event, threading.Condition)
+
+    @staticmethod
+    def __is_Transient(_value) -> bool:
+        '''
+        @desc
+            Tells whether a value is not part of the simulation state, i.e., it's a reference to another simulation object, a callable,
+            a lock, an open file, or a skyfield object. Containers are transient if any of their items is.
+        '''
+        from src.nodes.inode import INode
+        from src.nodes.itopology import ITopology
+        from src.models.imodel import IModel
+        from src.simlogging.ilogger import ILogger
+        from src.sim.imanager import IManager
+        from src.utils import SimClock
+
+        if isinstance(_value, (str, bytes, int, float, bool)) or _value is None:
+            return False
+        if isinstance(_value, (INode, ITopology, IModel, ILogger, IManager, SimClock, io.IOBase) + Checkpoint.__lockTypes) or callable(_value):
+            return True
+        if type(_value).__module__.split(".")[0] in Checkpoint.__transientModules:
+            return True
+        if isinstance(_value, dict):
+            return any(Checkpoint.__is_Transient(_item) for _item in _value.values())
+        if isinstance(_value, (list, tuple, set, frozenset)):
+            return any(Checkpoint.__is_Transient(_item) for _item in _value)
+        return False
+
+    @staticmethod
+    def get_InstanceState(_instance) -> dict:
+        '''
+        @desc
+            Returns the state of a node or a model instance, i.e., its attributes except the transient ones (see __is_Transient)
+            and the ones listed in the _checkpointExclude attribute of its class (e.g., the parameters of a model that a sweep varies)
+        @param[in]  _instance
+            Node or model instance
+        @return
+            Dictionary where the attribute name is the key
+        '''
+        _exclude = getattr(type(_instance), "_checkpointExclude", ())
+        return {_name: _value for _name, _value in vars(_instance).items() if _name not in _exclude and not Checkpoint.__is_Transient(_value)}
+
+    @staticmethod
+    def set_InstanceState(
+            _instance,
+            _state: dict):
+        '''
+        @desc
+            Sets the state returned by get_InstanceState to an instance
+        @param[in]  _instance
+            Node or model instance
+        @param[in]  _state
+            State of the instance
+        '''
+        vars(_instance).update(_state)
+
+    @staticmethod
+    def take(
+            _topologies: list,
+            _epoch: int,
+            _nodeFilter: callable = None) -> dict:
+        '''
+        @desc
+            Takes the checkpoint of the nodes of the topologies
+        @param[in]  _topologies
+            List of the topologies
+        @param[in]  _epoch
+            Number of the epochs executed so far
+        @param[in]  _nodeFilter
+            Optional. Function telling whether a node is included. All the nodes are included by default
+        @return
+            Checkpoint dictionary (see save)
+        '''
+        from src.simlogging.loggerfilechunkwise import LoggerFileChunkwise
+        from src.simlogging.recordsinkbinary import RecordSinkBinary
+
+        _nodes = {}
+        _shared = {}
+        for _topology in _topologies:
+            for _node in _topology.nodes:
+                if _nodeFilter is not None and not _nodeFilter(_node):
+                    continue
+                _models = {}
+                for _model in _node.get_Models():
+                    _models[_model.iName] = _model.get_Checkpoint()
+                    if _model.iName not in _shared:
+                        _shared[_model.iName] = _model.get_SharedCheckpoint()
+                _nodes[(_topology.id, _node.nodeID)] = {"node": _node.get_Checkpoint(), "models": _models}
+
+        #The logs and the binary request records written so far are dumped, so that the file sizes are the positions of the checkpoint
+        LoggerFileChunkwise.flush_All()
+        RecordSinkBinary.flush_All()
+        return {
+            "version": Checkpoint._formatVersion,
+            "epoch": _epoch,
+            "nodes": _nodes,
+            "shared": _shared,
+            "logs": {**LoggerFileChunkwise.get_Positions(), **RecordSinkBinary.get_Positions()}}
+
+    @staticmethod
+    def restore(
+            _topologies: list,
+            _checkpoint: dict) -> int:
+        '''
+        @desc
+            Restores a checkpoint on the nodes of the topologies. The topologies must have the same nodes and models as the ones of the checkpoint.
+        @param[in]  _topologies
+            List of the topologies
+        @param[in]  _checkpoint
+            Checkpoint dictionary
+        @return
+            Number of the epochs executed before the checkpoint
+        '''
+        from src.simlogging.loggerfilechunkwise import LoggerFileChunkwise
+        from src.simlogging.recordsinkbinary import RecordSinkBinary
+
+        if _checkpoint.get("version", None) != Checkpoint._formatVersion:
+            raise Exception(f"[Checkpoint Error]: Unsupported checkpoint version {_checkpoint.get('version', None)}")
+
+        _nodes = {(_topology.id, _node.nodeID): _node for _topology in _topologies for _node in _topology.nodes}
+        if set(_nodes.keys()) != set(_checkpoint["nodes"].keys()):
+            raise Exception("[Checkpoint Error]: The nodes of the checkpoint don't match the ones of the simulation")
+
+        _sharedRestored = set()
+        for _key, _node in _nodes.items():
+            _nodeCheckpoint = _checkpoint["nodes"][_key]
+            _models = _node.get_Models()
+            if set([_model.iName for _model in _models]) != set(_nodeCheckpoint["models"].keys()):
+                raise Exception(f"[Checkpoint Error]: The models of node {_key[1]} of topology {_key[0]} don't match the ones of the checkpoint")
+            _node.restore_Checkpoint(_nodeCheckpoint["node"])
+            for _model in _models:
+                _model.restore_Checkpoint(_nodeCheckpoint["models"][_model.iName])
+                if _model.iName not in _sharedRestored:
+                    _sharedRestored.add(_model.iName)
+                    _model.restore_SharedCheckpoint(_checkpoint["shared"].get(_model.iName, None))
+
+        LoggerFileChunkwise.restore_Positions(_checkpoint["logs"])
+        RecordSinkBinary.restore_Positions(_checkpoint["logs"])
+        return _checkpoint["epoch"]
+
+    @staticmethod
+    def save(
+            _filePath: str,
+            _checkpoint: dict):
+        '''
+        @desc
+            Writes a checkpoint to a file. It's written to a temporary file first, so that an interrupted write doesn't leave a broken checkpoint
+        @param[in]  _filePath
+            Path of the checkpoint file
+        @param[in]  _checkpoint
+            Checkpoint dictionary
+        '''
+        _tempPath = _filePath + ".tmp"
+        with gzip.open(_tempPath, "wb", compresslevel = Checkpoint._compressLevel) as _file:
+            pickle.dump(_checkpoint, _file, protocol = pickle.HIGHEST_PROTOCOL)
+        os.replace(_tempPath, _filePath)
+
+    @staticmethod
+    def load(_filePath: str) -> dict:
+        '''
+        @desc
+            Reads a checkpoint file
+        @param[in]  _filePath
+            Path of the checkpoint file
+        @return
+            Checkpoint dictionary
+        '''
+        with gzip.open(_filePath, "rb") as _file:
+            return pickle.load(_file)
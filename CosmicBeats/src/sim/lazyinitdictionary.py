@@ -0,0 +1,79 @@
+'''
+// Copyright (c) Microsoft Corporation.
+// Licensed under the MIT license.
+
+@desc
+    This is the implementation of the lazy init dictionary, which backs the model, node, and logger init dictionaries.
+    Importing every implementation module up front (with their astropy, skyfield, dask, etc. dependencies) makes the simulator slow to start,
+    although a config uses a handful of them. So, the dictionary maps the implementation name to the module path instead,
+    and imports the module when the init method is looked up first time.
+    The import time of each implementation is recorded for the startup report (see get_ImportReport).
+'''
+import importlib
+import time
+from collections.abc import MutableMapping
+
+class LazyInitDictionary(MutableMapping):
+    '''
+    Dictionary where the implementation name (iname) is the key and the init method is the value.
+    The init method of the implementation "Name" is init_Name of the module given against the key.
+    A callable can also be given as the value, which is used as it is.
+    '''
+    __importReport = []         #List of (iname, module path, import time in seconds) in the order of the imports. Shared by all the dictionaries
+
+    def __init__(
+            self,
+            _modulePaths: 'dict[str, str]') -> None:
+        '''
+        @desc
+            Constructor of the class
+        @param[in]  _modulePaths
+            Dictionary where the implementation name is the key and the path of the module implementing it (e.g., "src.nodes.satellitebasic") is the value
+        '''
+        self.__entries = dict(_modulePaths)
+
+    def __getitem__(
+            self,
+            _iName: str) -> callable:
+        _entry = self.__entries[_iName]
+        if isinstance(_entry, str):
+            _startTime = time.perf_counter()
+            _module = importlib.import_module(_entry)
+            LazyInitDictionary.__importReport.append((_iName, _entry, time.perf_counter() - _startTime))
+            _entry = getattr(_module, "init_" + _iName)
+            self.__entries[_iName] = _entry
+        return _entry
+
+    def __setitem__(
+            self,
+            _iName: str,
+            _entry) -> None:
+        self.__entries[_iName] = _entry
+
+    def __delitem__(
+            self,
+            _iName: str) -> None:
+        del self.__entries[_iName]
+
+    def __contains__(
+            self,
+            _iName) -> bool:
+        #Checking a name doesn't import the module
+        return _iName in self.__entries
+
+    def __iter__(self):
+        return iter(self.__entries)
+
+    def __len__(self) -> int:
+        return len(self.__entries)
+
+    @staticmethod
+    def get_ImportReport() -> 'list[tuple[str, str, float]]':
+        '''
+        @desc
+            Returns the implementations imported so far by the lazy init dictionaries.
+            Like python -X importtime, the time of a module includes the modules imported by it first time. So, the first one pays for the shared dependencies.
+        @return
+            List of (iname, module path, import time in seconds) in the order of the imports
+        '''
+        return list(LazyInitDictionary.__importReport)
@@ -7,7 +7,8 @@ Created on: 31 Oct 2022
 @desc
     In this module, we list the initialization methods for different logger class implementations.
     Initialization method must be written in the same module as where class implementation is written. 
-    The initialization method must be added in the dictionary below as the value against the key as the name of class
+    The path of the module must be added in the dictionary below as the value against the key as the name of class
+    The module is imported when the initialization method is looked up first time. So, the name of the method must be init_ followed by the key.
     The prototype of the initialization method goes below.
     
     init_LoggerFile(__loglevel : ELogType, __logGeneratorName : str, __simsetupDetails) -> ILogger:
@@ -30,17 +31,14 @@ Created on: 31 Oct 2022
 
 from src.simlogging.ilogger import ELogType
 
-# import the logger classes here
-from src.simlogging.loggercmd import init_LoggerCmd
-from src.simlogging.loggerfile import init_LoggerFile
-from src.simlogging.loggerfilechunkwise import init_LoggerFileChunkwise
+# the logger classes are imported on their first use (see LazyInitDictionary)
+from src.sim.lazyinitdictionary import LazyInitDictionary
 
-
-loggerInitDictionary = {
-    "LoggerCmd" : init_LoggerCmd,
-    "LoggerFile": init_LoggerFile,
-    "LoggerFileChunkwise": init_LoggerFileChunkwise
-    }
+loggerInitDictionary = LazyInitDictionary({
+    "LoggerCmd" : "src.simlogging.loggercmd",
+    "LoggerFile": "src.simlogging.loggerfile",
+    "LoggerFileChunkwise": "src.simlogging.loggerfilechunkwise"
+    })
 
 loggerTypeDictionary = {
     "error" : ELogType.LOGERROR,
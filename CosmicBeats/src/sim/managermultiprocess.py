@@ -0,0 +1,680 @@
+'''
+// Copyright (c) Microsoft Corporation.
+// Licensed under the MIT license.
+
+@desc
+    This module implements the ManagerMultiprocess class of the simulator.
+    The nodes are split into shards and each shard is run by a forked worker process that owns its nodes, their caches and their loggers.
+    The satellites are split into contiguous blocks of node IDs, so that most of the neighbors of a satellite are in its own shard.
+    The other nodes are spread over the shards round-robin.
+    The workers run an epoch in phases (prev_epoch_hook, Execute, post_epoch_hook) and meet at a barrier after each phase.
+    In a worker, the nodes are reached through proxies:
+        - The requests of the users to the satellites (handle_requests) are queued as messages, even if the shard owns the satellite.
+          The caller gets a PendingResult, and the owner sends the return value back. So, the results arrive at the barrier.
+        - The calls that change the state of a node and whose return value is not needed (e.g., record, redistribute)
+          are queued as messages too, also when the shard owns the node, so that their order doesn't depend on the shards.
+        - The messages are exchanged in batches at the barrier and run by the owner of the node, in the order of the calls in the sequential run
+          (the order of the calling nodes, and the order of the calls of a node). Running a message may produce new messages and return values.
+          They are exchanged until there are no more messages.
+        - The cache lookups of remote nodes (e.g., check_in_cache) are answered from a mirror of the remote caches.
+          The owners publish the changes of their caches at every barrier, so the mirror is the state at the last barrier,
+          i.e., it doesn't have the changes made by the other shards in the current phase.
+        - The APIs whose answer doesn't change (e.g., get_neighbors, or get_Passes for given times) are served by the copy of the remote node forked at the start of the run.
+        - Any other call to a remote node raises an exception, as its answer would come from a stale copy.
+    So, it's a bulk synchronous version of the sequential run of ManagerParallel. The other calls between the nodes of one shard are run right away.
+    The logs are the ones of the sequential run as long as a node doesn't look up a cache changed by another shard in the same phase,
+    and a message doesn't change a node that another message of the phase reads (e.g., a redistribute runs after all the requests of the phase).
+    The workers are forked. Where fork isn't available (e.g., on Windows), the simulation runs on one process as in ManagerParallel.
+'''
+import time
+import traceback
+import multiprocessing as mp
+from tqdm import tqdm
+
+from src.nodes.itopology import ITopology
+from src.nodes.inode import INode, ENodeType
+from src.models.imodel import IModel
+from src.sim.imanager import EManagerReqType
+from src.sim.managerparallel import ManagerParallel
+from src.simlogging.loggerfilechunkwise import LoggerFileChunkwise
+from src.simlogging.recordsinkbinary import RecordSinkBinary
+from src.sim.profiler import Profiler
+from src.sim.checkpoint import Checkpoint
+from src.sim.pendingresult import PendingResult
+
+class ShardModelProxy():
+    '''
+    Proxy of a model of a node in a shard. See ManagerMultiprocess
+    '''
+    def __init__(
+            self,
+            _nodeID: int,
+            _model,
+            _manager: 'ManagerMultiprocess',
+            _isOwned: bool) -> None:
+        '''
+        @desc
+            Constructor of the class
+        @param[in]  _nodeID
+            ID of the node
+        @param[in]  _model
+            The model, or its forked copy if the node is owned by another shard
+        @param[in]  _manager
+            Manager instance of the worker
+        @param[in]  _isOwned
+            True if the shard owns the node
+        '''
+        self.__nodeID = _nodeID
+        self.__model = _model
+        self.__manager = _manager
+        self.__isOwned = _isOwned
+
+    def call_APIs(
+            self,
+            _apiName: str,
+            **_kwargs):
+        '''
+        @desc
+            Routes an API call to the model. See ManagerMultiprocess call_RemoteAPI
+        '''
+        return self.__manager.call_RemoteAPI(self.__nodeID, self.__model, _apiName, _kwargs)
+
+    def get_APIHandle(
+            self,
+            _apiName: str) -> callable:
+        '''
+        @desc
+            Returns a handle routing the API calls through call_APIs. See IModel get_APIHandle.
+            The handle of the model itself is returned if the shard owns the node and the calls aren't queued
+        '''
+        if self.__isOwned and not ManagerMultiprocess.is_QueuedAPI(self.__model.iName, _apiName):
+            return self.__model.get_APIHandle(_apiName)
+        return IModel.get_APIHandle(self, _apiName)
+
+    def __getattr__(self, _name):
+        return getattr(self.__model, _name)
+
+class ShardNodeProxy():
+    '''
+    Proxy of a node in a shard. See ManagerMultiprocess
+    '''
+    def __init__(
+            self,
+            _node: INode,
+            _manager: 'ManagerMultiprocess',
+            _isOwned: bool) -> None:
+        '''
+        @desc
+            Constructor of the class
+        @param[in]  _node
+            The node, or its forked copy if it's owned by another shard
+        @param[in]  _manager
+            Manager instance of the worker
+        @param[in]  _isOwned
+            True if the shard owns the node
+        '''
+        self.__node = _node
+        self.__manager = _manager
+        self.__isOwned = _isOwned
+        self.__modelProxies = {}    #Model name is the key
+
+    def has_ModelWithName(
+            self,
+            _modelName: str):
+        '''
+        @desc
+            Same as INode has_ModelWithName, but returns a proxy of the model
+        '''
+        _model = self.__node.has_ModelWithName(_modelName)
+        if _model is None:
+            return None
+        if _modelName not in self.__modelProxies:
+            self.__modelProxies[_modelName] = ShardModelProxy(self.__node.nodeID, _model, self.__manager, self.__isOwned)
+        return self.__modelProxies[_modelName]
+
+    def has_ModelWithTag(
+            self,
+            _modelTag):
+        '''
+        @desc
+            Same as INode has_ModelWithTag, but returns a proxy of the model
+        '''
+        _model = self.__node.has_ModelWithTag(_modelTag)
+        if _model is None:
+            return None
+        return self.has_ModelWithName(_model.iName)
+
+    def Execute(self) -> bool:
+        if not self.__isOwned:
+            raise Exception(f"[ManagerMultiprocess Error]: Node {self.__node.nodeID} is executed by another shard")
+        return self.__node.Execute()
+
+    def __getattr__(self, _name):
+        return getattr(self.__node, _name)
+
+class ShardTopology(ITopology):
+    '''
+    View of a topology from a shard. The nodes are proxies, so that the calls between the nodes go through the manager of the worker
+    '''
+    def __init__(
+            self,
+            _topology: ITopology,
+            _ownedNodeIDs: 'set[int]',
+            _manager: 'ManagerMultiprocess') -> None:
+        '''
+        @desc
+            Constructor of the class
+        @param[in]  _topology
+            Topology instance
+        @param[in]  _ownedNodeIDs
+            IDs of the nodes owned by the shard
+        @param[in]  _manager
+            Manager instance of the worker
+        '''
+        self.__topology = _topology
+        self.__proxies = {_node.nodeID: ShardNodeProxy(_node, _manager, _node.nodeID in _ownedNodeIDs) for _node in _topology.nodes}
+        self.__nodes = [self.__proxies[_node.nodeID] for _node in _topology.nodes]
+
+    @property
+    def id(self) -> int:
+        return self.__topology.id
+
+    @property
+    def name(self) -> str:
+        return self.__topology.name
+
+    def add_Node(
+            self,
+            _node: INode):
+        raise Exception("[ManagerMultiprocess Error]: Nodes can't be added while the simulation is running")
+
+    def get_Node(
+            self,
+            _nodeId: int) -> INode:
+        return self.__proxies.get(_nodeId, None)
+
+    def get_NodesOfAType(
+            self,
+            _nodeType: ENodeType) -> 'list[INode]':
+        return [_node for _node in self.__nodes if _node.nodeType == _nodeType]
+
+    @property
+    def nodes(self) -> 'list[INode]':
+        return self.__nodes
+
+class ManagerMultiprocess(ManagerParallel):
+    '''
+    @desc
+    This class runs the simulation on multiple processes. Each process owns a shard of the nodes.
+    The runtime APIs of ManagerParallel (e.g., compute_FOVs and load_FOVs) can be used before run_Sim.
+    The forked workers get a copy of everything the main process has computed by then.
+    The state of the nodes stays in the workers. So, the nodes of the main process are not updated by run_Sim.
+    A checkpoint taken while running (see save_Checkpoint) is merged from the states of the nodes sent by their owners.
+    '''
+    #Model name is the key. Value is the set of the APIs that are sent to the owner of the node as messages, even by the owner itself.
+    #The owner sends the return value back. They return a PendingResult to the caller
+    _replyAPIs = {
+        "ModelCDNProvider": {"handle_requests"}
+    }
+    #Model name is the key. Value is the set of the APIs that are sent to the owner of the node as messages, even by the owner itself.
+    #They return None to the caller
+    _deferredAPIs = {
+        "ModelCDNProvider": {"record", "redistribute", "proactive_cache_push"},
+        "ModelCDNUser": {"add_request"},
+        "ModelCDNGs": {"request_uplink", "write_prefetch_stat"}
+    }
+    #Model name is the key. Value is (name of the attribute holding the cache, name of the API listing the neighbors, {API name: name of the key argument})
+    #The listed APIs are answered from the mirror of the cache. Only the caches of the nodes that are neighbors of a node of another shard are mirrored
+    _mirroredAPIs = {
+        "ModelCDNProvider": ("cache", "get_neighbors", {"check_in_cache": "request_id", "in_cache": "id"})
+    }
+    #Model name is the key. Value is the set of the APIs whose answer doesn't change during the run. They are served by the forked copy
+    _staticAPIs = {
+        "ModelCDNProvider": {"get_neighbors"},
+        "ModelOrbit": {"get_Passes"}
+    }
+    _phases = ("prev", "execute", "post")
+    _maxRounds = 100    #Maximum number of message exchanges in a phase
+
+    def __init__(
+            self,
+            **_simEnv):
+        '''
+        @desc
+            Constructor of the class.
+        @param[in]  __simEnv
+            Simulation environment embedded in a keyworded arbitrary arguments. Same as ManagerParallel and the following
+                @key    numOfProcesses
+                    Number of worker processes (shards)
+        '''
+        super().__init__(**_simEnv)
+        self.__topologies = _simEnv["topologies"]
+        self.__numOfSteps = int(_simEnv["numOfSimSteps"])
+        self.__numOfProcesses = max(1, int(_simEnv["numOfProcesses"]))
+        assert len(self.__topologies) == 1, "[ManagerMultiprocess Error]: Only a single topology is supported"
+
+        #Shard of each node
+        _nodes = self.__topologies[0].nodes
+        _sats = sorted(_node.nodeID for _node in _nodes if _node.nodeType == ENodeType.SAT)
+        _others = sorted(_node.nodeID for _node in _nodes if _node.nodeType != ENodeType.SAT)
+        self.__shardOf = {}
+        for _index, _nodeID in enumerate(_sats):
+            self.__shardOf[_nodeID] = _index * self.__numOfProcesses // len(_sats)
+        for _index, _nodeID in enumerate(_others):
+            self.__shardOf[_nodeID] = _index % self.__numOfProcesses
+
+        #The state of the worker. It's set in the forked process
+        self.__shard = None
+        self.__shardTopologies = None
+        self.__outbox = None
+        self.__mirrors = None
+        self.__published = None
+        self.__ownedNodes = None
+        self.__pendingResults = None    #Key of the call is the key. See __get_MessageKey
+        self.__callContext = None       #Key of the node or the message being run. See __get_MessageKey
+        self.__callIndex = 0
+
+        self.__connections = None   #Pipe connections to the workers while the simulation is running
+
+    def get_Shard(
+            self,
+            _nodeID: int) -> int:
+        '''
+        @desc
+            Returns the shard that owns a node
+        @param[in]  _nodeID
+            ID of the node
+        @return
+            Index of the shard
+        '''
+        return self.__shardOf[_nodeID]
+
+    def req_Manager(self,
+                    _reqType: EManagerReqType,
+                    **_kwargs):
+        '''
+        @desc
+           Same as ManagerParallel req_Manager. In a worker, the topologies are the views of the shard (see ShardTopology)
+        '''
+        if self.__shard is not None and _reqType == EManagerReqType.GET_TOPOLOGIES:
+            return self.__shardTopologies
+        return super().req_Manager(_reqType, **_kwargs)
+
+    @staticmethod
+    def is_QueuedAPI(
+            _modelName: str,
+            _apiName: str) -> bool:
+        '''
+        @desc
+            Tells whether the calls of an API are queued as messages, whichever shard owns the node (see _replyAPIs and _deferredAPIs)
+        @return
+            True if the calls are queued
+        '''
+        return _apiName in ManagerMultiprocess._replyAPIs.get(_modelName, ()) or _apiName in ManagerMultiprocess._deferredAPIs.get(_modelName, ())
+
+    def __get_MessageKey(self) -> tuple:
+        '''
+        @desc
+            Returns the key of a message being queued. The key of the calls of a node is (index of the node in the topology, index of the call),
+            and the key of the calls made while running a message is (key of the message, index of the call).
+            So, sorting the messages by key gives the order of the calls in the sequential run, whatever the shards are
+        @return
+            Key tuple
+        '''
+        _key = self.__callContext + (self.__callIndex,)
+        self.__callIndex += 1
+        return _key
+
+    def __set_CallContext(
+            self,
+            _context: tuple):
+        '''
+        @desc
+            Sets the key of the node or the message being run. See __get_MessageKey
+        '''
+        self.__callContext = _context
+        self.__callIndex = 0
+
+    def call_RemoteAPI(
+            self,
+            _nodeID: int,
+            _model,
+            _apiName: str,
+            _kwargs: dict):
+        '''
+        @desc
+            Handles an API call to a model of a node. It's called by ShardModelProxy in a worker.
+        @param[in]  _nodeID
+            ID of the node
+        @param[in]  _model
+            The model, or its forked copy if the node is owned by another shard
+        @param[in]  _apiName
+            Name of the API
+        @param[in]  _kwargs
+            Keyworded arguments of the API
+        @return
+            A PendingResult for the reply APIs, and None for the deferred APIs. Otherwise, the return of the model for an owned node,
+            the answer of the mirror for the mirrored APIs, and the return of the forked copy for the static APIs
+        '''
+        _modelName = _model.iName
+        _shard = self.__shardOf[_nodeID]
+        if _apiName in ManagerMultiprocess._replyAPIs.get(_modelName, ()):
+            _key = self.__get_MessageKey()
+            _result = PendingResult()
+            self.__pendingResults[_key] = _result
+            self.__outbox.setdefault(_shard, []).append((_key, _nodeID, _modelName, _apiName, _kwargs, self.__shard))
+            return _result
+
+        if _apiName in ManagerMultiprocess._deferredAPIs.get(_modelName, ()):
+            self.__outbox.setdefault(_shard, []).append((self.__get_MessageKey(), _nodeID, _modelName, _apiName, _kwargs, None))
+            return None
+
+        if _shard == self.__shard:
+            return _model.call_APIs(_apiName, **_kwargs)
+
+        _mirrored = ManagerMultiprocess._mirroredAPIs.get(_modelName)
+        if _mirrored is not None and _apiName in _mirrored[2]:
+            return _kwargs[_mirrored[2][_apiName]] in self.__mirrors[(_nodeID, _modelName)]
+
+        if _apiName in ManagerMultiprocess._staticAPIs.get(_modelName, ()):
+            return _model.call_APIs(_apiName, **_kwargs)
+
+        raise Exception(f"[ManagerMultiprocess Error]: The API {_apiName} of {_modelName} can't be called on node {_nodeID} of another shard. "
+                        "It has to be listed in the reply, deferred, mirrored, or static APIs of ManagerMultiprocess")
+
+    def __setup_Worker(
+            self,
+            _shard: int):
+        '''
+        @desc
+            Sets up the state of a worker process
+        @param[in]  _shard
+            Index of the shard of the worker
+        '''
+        self.__shard = _shard
+        self.__outbox = {}
+        self.__pendingResults = {}
+        _ownedNodeIDs = {_nodeID for _nodeID, _shard in self.__shardOf.items() if _shard == self.__shard}
+        #(index in the topology, node) of the owned nodes. The index is the key of their calls (see __get_MessageKey)
+        self.__ownedNodes = [(_index, _node) for _index, _node in enumerate(self.__topologies[0].nodes) if _node.nodeID in _ownedNodeIDs]
+        self.__shardTopologies = [ShardTopology(_topology, _ownedNodeIDs, self) for _topology in self.__topologies]
+
+        #The mirrors of the remote caches start from the forked copies. The owners only publish the changes
+        #An owned cache is published if a remote node has it as a neighbor
+        self.__mirrors = {}
+        self.__published = {}
+        _remoteNeighbors = set()
+        for _node in self.__topologies[0].nodes:
+            for _modelName, (_cacheName, _neighborsAPI, _) in ManagerMultiprocess._mirroredAPIs.items():
+                _model = _node.has_ModelWithName(_modelName)
+                if _model is None or _node.nodeID in _ownedNodeIDs:
+                    continue
+                self.__mirrors[(_node.nodeID, _modelName)] = set(getattr(_model, _cacheName).keys())
+                _neighbors = _model.call_APIs(_neighborsAPI) if _neighborsAPI is not None else None
+                _remoteNeighbors.update((int(_neighbor), _modelName) for _neighbor in (_neighbors if _neighbors is not None else _ownedNodeIDs))
+
+        for _nodeID in _ownedNodeIDs:
+            _node = self.__topologies[0].get_Node(_nodeID)
+            for _modelName, (_cacheName, _, _) in ManagerMultiprocess._mirroredAPIs.items():
+                _model = _node.has_ModelWithName(_modelName)
+                if _model is not None and (_nodeID, _modelName) in _remoteNeighbors:
+                    self.__published[(_nodeID, _modelName)] = set(getattr(_model, _cacheName).keys())
+
+    def __get_MirrorChanges(self) -> list:
+        '''
+        @desc
+            Finds the changes of the published caches since the last call
+        @return
+            List of (node ID, model name, added keys, removed keys)
+        '''
+        _changes = []
+        for (_nodeID, _modelName), _published in self.__published.items():
+            _model = self.__topologies[0].get_Node(_nodeID).has_ModelWithName(_modelName)
+            _current = set(getattr(_model, ManagerMultiprocess._mirroredAPIs[_modelName][0]).keys())
+            _added = _current - _published
+            _removed = _published - _current
+            if len(_added) > 0 or len(_removed) > 0:
+                _changes.append((_nodeID, _modelName, _added, _removed))
+                self.__published[(_nodeID, _modelName)] = _current
+        return _changes
+
+    def __apply_MirrorChanges(
+            self,
+            _changes: list):
+        '''
+        @desc
+            Applies the changes of the caches published by the other shards
+        @param[in]  _changes
+            See __get_MirrorChanges
+        '''
+        for _nodeID, _modelName, _added, _removed in _changes:
+            _mirror = self.__mirrors[(_nodeID, _modelName)]
+            _mirror -= _removed
+            _mirror |= _added
+
+    def __run_WorkerPhase(
+            self,
+            _phase: str):
+        '''
+        @desc
+            Runs a phase of an epoch for the nodes of the shard
+        @param[in]  _phase
+            Name of the phase. See _phases
+        '''
+        if _phase == "execute":
+            for _index, _node in self.__ownedNodes:
+                self.__set_CallContext((_index,))
+                ManagerParallel.execute_ActiveNodes([_node])
+            return
+
+        if _phase == "prev":
+            for _index, _node in self.__ownedNodes:
+                if _node.nodeType == ENodeType.TRAFFIC_SCHEDULER:
+                    self.__set_CallContext((_index,))
+                    _node.schedule_traffic()
+        for _index, _node in self.__ownedNodes:
+            if _node.nodeType == ENodeType.SAT:
+                self.__set_CallContext((_index,))
+                ManagerParallel.call_EpochHook([_node], "prev_epoch_hook" if _phase == "prev" else "post_epoch_hook")
+
+    def __run_Messages(
+            self,
+            _messages: list):
+        '''
+        @desc
+            Runs the messages delivered to the shard in the order of their keys (see __get_MessageKey).
+            A message is (key, node ID, model name, API name, keyworded arguments, shard of the caller for a reply API or None).
+            A reply is (key of the call, None, None, None, return value, None). It sets the PendingResult of the call
+        @param[in]  _messages
+            List of the messages
+        '''
+        for _key, _nodeID, _modelName, _apiName, _kwargs, _replyShard in sorted(_messages, key = lambda _message: _message[0]):
+            self.__set_CallContext(_key)
+            if _nodeID is None:
+                self.__pendingResults.pop(_key).set_Result(_kwargs)
+                continue
+            _result = self.__topologies[0].get_Node(_nodeID).has_ModelWithName(_modelName).call_APIs(_apiName, **_kwargs)
+            if _replyShard is not None:
+                self.__outbox.setdefault(_replyShard, []).append((_key, None, None, None, _result, None))
+
+    def __run_Worker(
+            self,
+            _shard: int,
+            _connection):
+        '''
+        @desc
+            Main method of a worker process. It runs the commands of the main process until it's asked to stop.
+            After each command, it replies with ("ok", messages for the other shards, changes of the published caches)
+        @param[in]  _shard
+            Index of the shard of the worker
+        @param[in]  _connection
+            Pipe connection to the main process
+        '''
+        try:
+            self.__setup_Worker(_shard)
+            while True:
+                _command, _payload, _changes = _connection.recv()
+                self.__apply_MirrorChanges(_changes)
+                if _command == "phase":
+                    self.__run_WorkerPhase(_payload)
+                elif _command == "deliver":
+                    self.__run_Messages(_payload)
+                elif _command == "profile":
+                    #The records of the models owned by this shard
+                    _connection.send(("ok", Profiler.get_State(), []))
+                    continue
+                elif _command == "checkpoint":
+                    #The state of the nodes owned by this shard. The payload is the epoch
+                    _connection.send(("ok", Checkpoint.take(self.__topologies, _payload, lambda _node: self.__shardOf[_node.nodeID] == self.__shard), []))
+                    continue
+                elif _command == "stop":
+                    LoggerFileChunkwise.flush_All()
+                    RecordSinkBinary.flush_All()
+                    _connection.send(("ok", {}, []))
+                    break
+
+                _outbox, self.__outbox = self.__outbox, {}
+                _connection.send(("ok", _outbox, self.__get_MirrorChanges()))
+        except Exception:
+            LoggerFileChunkwise.flush_All()
+            RecordSinkBinary.flush_All()
+            _connection.send(("error", traceback.format_exc(), None))
+        finally:
+            _connection.close()
+
+    def __exchange(
+            self,
+            _connections: list,
+            _pendingChanges: 'list[list]',
+            _command: str,
+            _payloads: list) -> 'list[list]':
+        '''
+        @desc
+            Sends a command to all the workers and waits for them (the barrier). Then, routes their messages to the owners.
+        @param[in]  _connections
+            Pipe connections to the workers
+        @param[in]  _pendingChanges
+            Cache changes to be sent to each worker. It's updated with the changes the workers publish
+        @param[in]  _command
+            Command name
+        @param[in]  _payloads
+            Payload of the command for each worker
+        @return
+            Messages to be delivered to each worker
+        '''
+        for _shard, _connection in enumerate(_connections):
+            _connection.send((_command, _payloads[_shard], _pendingChanges[_shard]))
+            _pendingChanges[_shard] = []
+
+        _inboxes = [[] for _ in _connections]
+        for _shard, _connection in enumerate(_connections):
+            _status, _outbox, _changes = _connection.recv()
+            if _status != "ok":
+                raise Exception(f"[ManagerMultiprocess Error]: Shard {_shard} failed:\n{_outbox}")
+            for _other in range(len(_connections)):
+                if _other != _shard:
+                    _pendingChanges[_other].extend(_changes)
+            for _destination, _messages in _outbox.items():
+                _inboxes[_destination].extend(_messages)
+        return _inboxes
+
+    def take_Checkpoint(
+            self,
+            _epoch: int) -> dict:
+        '''
+        @desc
+            Same as ManagerParallel take_Checkpoint. While the simulation is running, the states of the nodes are collected from the workers.
+            The state shared by the instances of a model class is taken from the first shard, and a log file is at the largest position reported for it
+            (i.e., by its owner, which flushes it before reporting).
+        @param[in]  _epoch
+            Number of the epochs executed so far
+        @return
+            Checkpoint dictionary
+        '''
+        if self.__connections is None:
+            return super().take_Checkpoint(_epoch)
+
+        for _connection in self.__connections:
+            _connection.send(("checkpoint", _epoch, []))
+        _checkpoint = None
+        for _shard, _connection in enumerate(self.__connections):
+            _status, _shardCheckpoint, _ = _connection.recv()
+            if _status != "ok":
+                raise Exception(f"[ManagerMultiprocess Error]: Shard {_shard} failed:\n{_shardCheckpoint}")
+            if _checkpoint is None:
+                _checkpoint = _shardCheckpoint
+                continue
+            _checkpoint["nodes"].update(_shardCheckpoint["nodes"])
+            for _modelName, _state in _shardCheckpoint["shared"].items():
+                _checkpoint["shared"].setdefault(_modelName, _state)
+            for _path, _size in _shardCheckpoint["logs"].items():
+                _checkpoint["logs"][_path] = max(_size, _checkpoint["logs"].get(_path, 0))
+        return _checkpoint
+
+    def run_Sim(self):
+        '''
+        @desc
+            This method is called to run the simulation. It runs on one process as in ManagerParallel if the workers can't be forked
+        '''
+        if "fork" not in mp.get_all_start_methods():
+            print(f"[ManagerMultiprocess Info]: The fork start method isn't available on this platform. The simulation runs on one process instead of {self.__numOfProcesses}")
+            super().run_Sim()
+            return
+
+        #The inherited log chunks would be written by every worker otherwise
+        LoggerFileChunkwise.flush_All()
+        RecordSinkBinary.flush_All()
+
+        _context = mp.get_context("fork")
+        _connections = []
+        _processes = []
+        for _shard in range(self.__numOfProcesses):
+            _parentConnection, _childConnection = _context.Pipe()
+            _process = _context.Process(target = self.__run_Worker, args = (_shard, _childConnection))
+            _process.start()
+            _childConnection.close()
+            _connections.append(_parentConnection)
+            _processes.append(_process)
+
+        _pendingChanges = [[] for _ in _connections]
+        _profiling = Profiler.is_Enabled()
+        self.__connections = _connections
+        try:
+            #A simulation resumed from a checkpoint starts at its epoch (see load_Checkpoint)
+            _startStep = self.get_CurrentStep()
+            for _step in tqdm(range(_startStep, self.__numOfSteps), initial = _startStep, total = self.__numOfSteps, desc = "Epoch"):
+                self.save_DueCheckpoint(_step)
+                if _profiling:
+                    _epochStartTime = time.perf_counter()
+                for _phase in ManagerMultiprocess._phases:
+                    _inboxes = self.__exchange(_connections, _pendingChanges, "phase", [_phase] * len(_connections))
+                    _rounds = 0
+                    while any(len(_inbox) > 0 for _inbox in _inboxes):
+                        _rounds += 1
+                        if _rounds > ManagerMultiprocess._maxRounds:
+                            raise Exception(f"[ManagerMultiprocess Error]: The messages of the {_phase} phase didn't settle in {ManagerMultiprocess._maxRounds} exchanges")
+                        _inboxes = self.__exchange(_connections, _pendingChanges, "deliver", _inboxes)
+                if _profiling:
+                    Profiler.record_Epoch(time.perf_counter() - _epochStartTime)
+
+            self.save_DueCheckpoint(self.__numOfSteps)
+
+            if _profiling:
+                for _connection in _connections:
+                    _connection.send(("profile", None, []))
+                for _shard, _connection in enumerate(_connections):
+                    _status, _state, _ = _connection.recv()
+                    if _status != "ok":
+                        raise Exception(f"[ManagerMultiprocess Error]: Shard {_shard} failed:\n{_state}")
+                    Profiler.merge_State(_state)
+
+            self.__exchange(_connections, _pendingChanges, "stop", [None] * len(_connections))
+        finally:
+            self.__connections = None
+            for _process in _processes:
+                _process.join(timeout = 10)
+                if _process.is_alive():
+                    _process.terminate()
+            for _connection in _connections:
+                _connection.close()
+        Profiler.write_Report()
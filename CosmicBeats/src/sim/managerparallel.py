@@ -9,17 +9,74 @@ Created on: 13 Dec 2022
     It leverages the parallel computing capabilities offered by Python
 '''
 import concurrent.futures
+import os
 import pickle
-import queue
 import threading
-import multiprocessing as mp
 import time
+import multiprocessing as mp
 import numpy as np
 from tqdm import tqdm
 
 from src.nodes.itopology import ITopology
 from src.sim.imanager import IManager, EManagerReqType
-from src.nodes.inode import ENodeType
+from src.nodes.inode import INode, ENodeType
+from src.models.models_fov.fovcache import FovCache
+from src.utils import Time
+from src.sim.profiler import Profiler
+from src.sim.checkpoint import Checkpoint
+
+_fovManager = None #Manager instance the forked processes of compute_FOVs work on. See _compute_FovChunk
+
+def _compute_FovChunk(
+        _satIDs: 'list[int]',
+        _targetNodeTypes: 'list[ENodeType]') -> 'tuple[np.ndarray, np.ndarray, np.ndarray, np.ndarray, np.ndarray]':
+    '''
+    @desc
+        Finds the passes of a chunk of satellites over the target nodes. It runs in a forked process of ManagerParallel compute_FOVs,
+        or in the process of the manager where fork isn't available.
+    @param[in]  _satIDs
+        Node IDs of the satellites
+    @param[in]  _targetNodeTypes
+        List of the target node types
+    @return
+        Tuple of (satellite IDs, other node IDs, other node ENodeType values, start unix times, end unix times) arrays of the passes
+    '''
+    _columns = ([], [], [], [], [])
+    _dtypes = (np.int64, np.int64, np.int64, np.float64, np.float64)
+    if len(_satIDs) == 0:
+        return tuple(np.zeros(0, dtype = _dtype) for _dtype in _dtypes)
+    
+    for _satID in _satIDs:
+        _fovManager.call_APIs(
+            "call_ModelAPIsByModelName",
+            _topologyID = 0,
+            _nodeID = _satID, 
+            _modelName = "ModelFovTimeBased",
+            _apiName = "find_Passes",
+            _apiArgs = {
+                "_targetNodeTypes" : _targetNodeTypes
+            })
+    
+    _globalDictionary = _fovManager.call_APIs(
+        "call_ModelAPIsByModelName",
+        _topologyID = 0,
+        _nodeID = _satIDs[0],
+        _modelName = "ModelFovTimeBased",
+        _apiName = "get_GlobalDictionary",
+        _apiArgs = {})
+    
+    #Only the satellites' own pass times are sent back. The rest of the dictionary is the mirror of them
+    for _satID in _satIDs:
+        _table = _globalDictionary.get(_satID)
+        if _table is None or len(_table) == 0:
+            continue
+        _columns[0].append(np.full(len(_table), _satID, dtype = np.int64))
+        _columns[1].append(np.asarray(_table[:, 2], dtype = np.int64))
+        _columns[2].append(np.asarray(_table[:, 3], dtype = np.int64))
+        _columns[3].append(np.fromiter((_row[0].timestamp() for _row in _table), dtype = np.float64, count = len(_table)))
+        _columns[4].append(np.fromiter((_row[1].timestamp() for _row in _table), dtype = np.float64, count = len(_table)))
+    
+    return tuple(np.concatenate(_column) if len(_column) > 0 else np.zeros(0, dtype = _dtype) for _column, _dtype in zip(_columns, _dtypes))
 
 class ManagerParallel(IManager):
     '''
@@ -213,193 +270,210 @@ class ManagerParallel(IManager):
             This method should be called before the simulation starts.
             The idea here is to pre-compute all the FOVs then load them during the simulation.
             This will save a lot of time, especially if you are running the same simulation multiple times or have a lot of cores.
+            The satellites are split into chunks and the chunks are spread over a pool of forked processes.
+            Where fork isn't available (e.g., on Windows), the chunks are computed one after another in this process.
+            Each process finds the passes of its satellites and returns them as compact arrays. 
+            The pass times of the target nodes are the mirror of the satellites' ones, so they are filled in by this process.
+            Once the FOVs are loaded, get_View doesn't search for passes anymore. So, include all the node types you will ask get_View for.
+            If the satellites use vectorized_passes, one process finds the passes of the whole constellation anyway. So, use one process then.
         @param[in]  _kwargs
             Keyworded arguments:
             @key _outputPath
-                Optional path to the output file where the FOVs will be stored. 
+                Optional path to the output directory where the FOVs will be stored (see FovCache). 
                 If you store the FOVs, you can use the load_FOVs method to load them during a simulation.
                 If you decide not to store them, the FOVs will be updated in the node instances. 
             @key _numProcesses
                 Optional number of processes to use for the computation. Default is number of existing CPUs.
+            @key _targetNodeTypes
+                Optional list of the node types whose passes over the satellites are computed. Default is [ENodeType.GS, ENodeType.IOTDEVICE, ENodeType.USER]
         """
         _numProcesses = mp.cpu_count()
         if ("_numProcesses" in _kwargs):
             _numProcesses = _kwargs["_numProcesses"]
+        _targetNodeTypes = [ENodeType.GS, ENodeType.IOTDEVICE, ENodeType.USER]
+        if ("_targetNodeTypes" in _kwargs):
+            _targetNodeTypes = _kwargs["_targetNodeTypes"]
         
-        _nodeQueue = mp.Queue() #queue to store the node IDs to be processed
-        _fovQueue = mp.Queue() #the output queue to store the FOVs
-
-        def __processMethod():
-            #This is the method that will be run by each process            
-            try:
-                #let's calculate how many ever FOVs we can 
-                #If you look through the model, you will see that each one internally stores their FOVs. So, we just need to calculate then retrieve them
-                _lastNodeID = -1 #this is to keep track of the last node ID that was processed
-                while True:
-                    try:
-                        _satID = _nodeQueue.get(timeout=1)
-                        #Let's add in the skyfield model again. Look below for the reason
-                        self.__call_ModelAPIsByModelName(
-                            _topologyID = 0,
-                            _nodeID = _satID,
-                            _modelName = "ModelOrbit",
-                            _apiName = "setup_Skyfield",
-                            _apiArgs = {}
-                        )
-                        
-                        #Let's actually compute the FOVs
-                        self.__call_ModelAPIsByModelName(
-                            _topologyID = 0,
-                            _nodeID = _satID, 
-                            _modelName = "ModelFovTimeBased",
-                            _apiName = "find_Passes",
-                            _apiArgs = {
-                                "_targetNodeTypes" : [ENodeType.GS, ENodeType.IOTDEVICE]
-                            })
-                        
-                        _lastNodeID = _satID
-                    
-                    except queue.Empty:
-                        #We have processed all the nodes
-                        break
-                    
-                    except Exception as _e:
-                        #We have an exception. Let's print it and exit
-                        print(f"[API: compute_FOVs]: An exception occurred while computing FOVs: {_e}")
-                        exit(1)
-                
-                if _lastNodeID != -1:
-                    #Let's get the FOVs and store them in the queue
-                    _dict = self.__call_ModelAPIsByModelName(
-                        _topologyID = 0,
-                        _nodeID = _satID,
-                        _modelName = "ModelFovTimeBased",
-                        _apiName = "get_GlobalDictionary",
-                        _apiArgs = {}
-                    )
-                    _fovQueue.put(_dict)
-                    
-                #let's exit the process
-            except Exception as _e:
-                print(f"[API: compute_FOVs]: An exception occurred while computing FOVs: {_e}")
-                exit(1)
-            
-            #let's exit the process
-            return
-        
-        #Now back to the main process
         assert len(self.__topologies) == 1, "[API: compute_FOVs]: This method is only supported for a single topology"
         
-        #We're going to loop through all the satellites, which will then find the passes for all the ground stations/IoT devices
+        #We're going to loop through all the satellites, which will then find the passes for all the target nodes
         _sats = self.__topologies[0].get_NodesOfAType(ENodeType.SAT)
-        for _sat in _sats:
-            #We need to remove the pickle skyfield object from the node instance. 
-            #See the API documentation for more details
-            #TODO: This is a hack. We need to find a better way to do this
-            self.__call_ModelAPIsByModelName(
-                _topologyID = 0,
-                _nodeID = _sat.nodeID,
-                _modelName = "ModelOrbit",
-                _apiName = "remove_Skyfield",
-                _apiArgs = {}
-            )
-            
-            _nodeQueue.put(_sat.nodeID)
-            
-        #let's create the processes
-        _processes = []
-        for _ in range(_numProcesses):
-            _process = mp.Process(target=__processMethod)
-            _processes.append(_process)
-            _process.start()
+        _satIDs = [_sat.nodeID for _sat in _sats]
+        _numOfChunks = max(1, min(len(_satIDs), _numProcesses * 4))
+        _chunks = [_chunk.tolist() for _chunk in np.array_split(_satIDs, _numOfChunks) if len(_chunk) > 0]
         
-        #In this main process, we need to keep checking if the processes are done and emptying the fovQueue
-        #We can't use the join() yet because the queue's buffer might get full and the processes might get stuck
-        #So, we need to keep checking if the processes are done and emptying the queue
-        _processDicts = []
-        while True:
-            _allDone = True
-            for _process in _processes:
-                if _process.is_alive():
-                    _allDone = False
-                    break
-            if _allDone:
-                break
+        #The processes are forked, so they get a copy of the topologies and nothing but the satellite IDs is pickled
+        #The worker method finds this manager through a module variable
+        global _fovManager
+        _fovManager = self
+        _columns = []
+        try:
+            if "fork" in mp.get_all_start_methods():
+                with concurrent.futures.ProcessPoolExecutor(max_workers = _numProcesses, mp_context = mp.get_context("fork")) as _executor:
+                    _futures = [_executor.submit(_compute_FovChunk, _chunk, _targetNodeTypes) for _chunk in _chunks]
+                    for _future in tqdm(concurrent.futures.as_completed(_futures), total = len(_futures), desc = "FoV"):
+                        _columns.append(_future.result())
             else:
-                #Let's wait for 1 second
-                time.sleep(1)
-                #Let's check if the queue is empty
-                while not _fovQueue.empty():
-                    _processDicts.append(_fovQueue.get())
+                print(f"[Simulator Info]: The fork start method isn't available on this platform. The FoVs are computed on one process instead of {_numProcesses}")
+                for _chunk in tqdm(_chunks, desc = "FoV"):
+                    _columns.append(_compute_FovChunk(_chunk, _targetNodeTypes))
+        finally:
+            _fovManager = None
+        
+        #Let's build the pass times of all the nodes from the columns. Each pass of a satellite with a non-satellite node is added to both of them
+        if len(_columns) == 0:
+            _columns.append(_compute_FovChunk([], _targetNodeTypes))
+        _satColumn, _otherColumn, _typeColumn, _startColumn, _endColumn = [np.concatenate(_column) for _column in zip(*_columns)]
+        _nodeTypes = {_node.nodeID: _node.nodeType.value for _node in self.__topologies[0].nodes}
+        _mirror = _typeColumn != ENodeType.SAT.value
+        _ownerColumn = np.concatenate((_satColumn, _otherColumn[_mirror]))
+        _peerColumn = np.concatenate((_otherColumn, _satColumn[_mirror]))
+        _peerTypeColumn = np.concatenate((_typeColumn, [_nodeTypes[_satID] for _satID in _satColumn[_mirror].tolist()])).astype(np.int64)
+        _startColumn = np.concatenate((_startColumn, _startColumn[_mirror]))
+        _endColumn = np.concatenate((_endColumn, _endColumn[_mirror]))
         
-        #Let's reap the processes
-        for _process in _processes:
-            _process.join()
-                
-        #Let's combine all the dictionaries. Non-sat devices will have their FOVs spread across multiple dictionaries
         _outputFOV = {}
-        for _fovDict in _processDicts:
-            for _nodeID, _fovArray in _fovDict.items():
-                if _fovArray is None or _fovArray.shape[0] == 0:
-                    continue
-                _thisList = _outputFOV.get(_nodeID, None)
-                
-                if _thisList is None:
-                    _thisList = _fovArray
-                else:
-                    _thisList = np.concatenate((_thisList, _fovArray), axis=0)
-                
-                _outputFOV[_nodeID] = _thisList
+        _order = np.lexsort((_startColumn, _ownerColumn))
+        _owners, _firsts = np.unique(_ownerColumn[_order], return_index = True)
+        for _owner, _rows in zip(_owners.tolist(), np.split(_order, _firsts[1:])):
+            _table = np.empty((len(_rows), 4), dtype = object)
+            _table[:, 0] = [Time().from_unix(_start).to_datetime() for _start in _startColumn[_rows].tolist()]
+            _table[:, 1] = [Time().from_unix(_end).to_datetime() for _end in _endColumn[_rows].tolist()]
+            _table[:, 2] = _peerColumn[_rows].tolist()
+            _table[:, 3] = _peerTypeColumn[_rows].tolist()
+            _outputFOV[_owner] = _table
 
         #Load the FOVs into the nodes  
-        #Since we're using a single topology, we can just use the first node
         self.__call_ModelAPIsByModelName(
             _topologyID = 0,
-            _nodeID = _sats[0].nodeID,
+            _nodeID = self.__get_FovNodeID(),
             _modelName = "ModelFovTimeBased",
             _apiName = "set_GlobalDictionary",
             _apiArgs = {
                 "_globalDictionary" : _outputFOV
             }
         )
-        
-        #Let's add the skyfield model again. Look above for the reason
-        for _sat in _sats:
-            self.__call_ModelAPIsByModelName(
-                            _topologyID = 0,
-                            _nodeID = _sat.nodeID,
-                            _modelName = "ModelOrbit",
-                            _apiName = "setup_Skyfield",
-                            _apiArgs = {}
-                        )
-
-        #Now, let's save it to a file if needed
+
+        #Now, let's save it to the cache directory if needed
         if ("_outputPath" in _kwargs):
-            _outputPath = _kwargs["_outputPath"]
-            with open(_outputPath, "wb") as _f:
-                pickle.dump(_outputFOV, _f)
+            FovCache.save(_kwargs["_outputPath"], self.__get_FovCacheKey(), _outputFOV)
+    
+    def __get_FovCacheKey(self) -> str:
+        """
+        @desc
+            This method computes the key of the current configuration for the FoV cache (see FovCache)
+        @return
+            Key string. None if no node has ModelFovTimeBased
+        """
+        _nodeID = self.__get_FovNodeID()
+        if _nodeID is None:
+            return None
+        return self.__call_ModelAPIsByModelName(
+            _topologyID = 0,
+            _nodeID = _nodeID,
+            _modelName = "ModelFovTimeBased",
+            _apiName = "get_CacheKey",
+            _apiArgs = {}
+        )
+    
+    def __get_FovNodeID(self) -> int:
+        """
+        @desc
+            This method finds a node having ModelFovTimeBased in the first topology
+        @return
+            Node ID. None if there is no such node
+        """
+        for _node in self.__topologies[0].nodes:
+            if _node.has_ModelWithName("ModelFovTimeBased") is not None:
+                return _node.nodeID
+        return None
             
     def __load_FOVs(self, **_kwargs):
         """
         @desc
-            This method loads the FOVs from a file and sets it to the nodes
+            This method loads the FOVs from a cache directory and sets it to the nodes.
+            The cache is only loaded if it was computed for the current configuration (TLEs, node positions, minimum elevations and simulation time).
+            The columns are memory-mapped and the pass times of a node are only read when the node needs them.
             Look in the compute_FOVs() method for details on generating the FOVs
         @param[in] _kwargs
-            _inputPath: Path to the file containing the FOVs
+            _inputPath: Path to the cache directory containing the FOVs.
+            A file is treated as a pickle of the old format. It can't be checked against the configuration
+        @return
+            True if the FOVs are loaded. False if the cache doesn't exist or it's stale
         """
         _inputPath = _kwargs["_inputPath"]
-        with open(_inputPath, "rb") as _f:
-            _fovDict = pickle.load(_f)
-            self.__call_ModelAPIsByModelName(
-                _topologyID = 0,
-                _nodeID = 0,
-                _modelName = "ModelFovTimeBased",
-                _apiName = "set_GlobalDictionary",
-                _apiArgs = {
-                    "_globalDictionary" : _fovDict
-                }
-            )
+        if os.path.isfile(_inputPath):
+            print(f"[API: load_FOVs]: {_inputPath} is in the old pickle format. It's loaded without checking the configuration")
+            with open(_inputPath, "rb") as _f:
+                _fovDict = pickle.load(_f)
+        else:
+            _key = self.__get_FovCacheKey()
+            _fovDict = FovCache.load(_inputPath, _key) if _key is not None else None
+            if _fovDict is None:
+                if FovCache.read_Key(_inputPath) is not None:
+                    print(f"[API: load_FOVs]: {_inputPath} was computed for a different configuration. It's not loaded")
+                return False
+        
+        self.__call_ModelAPIsByModelName(
+            _topologyID = 0,
+            _nodeID = self.__get_FovNodeID(),
+            _modelName = "ModelFovTimeBased",
+            _apiName = "set_GlobalDictionary",
+            _apiArgs = {
+                "_globalDictionary" : _fovDict
+            }
+        )
+        return True
     
+    def __save_Checkpoint(self, **_kwargs):
+        """
+        @desc
+            This method saves a checkpoint of the simulation state (see Checkpoint), e.g., to resume the simulation later or to fork a sweep from a warmed state.
+            The checkpoint is taken between two epochs. If it's asked for a later epoch, it's taken by run_Sim when the simulation gets there.
+            This overwrites the previously scheduled checkpoint.
+        @param[in]  _kwargs
+            Keyworded arguments
+            @key _outputPath
+                Path of the checkpoint file
+            @key _epoch
+                Optional. Number of the epochs to be executed before the checkpoint is taken. 
+                If it's the current one, the checkpoint is taken right away. Default is the end of the simulation
+        @return
+            True if the checkpoint is saved. False if it's scheduled
+        """
+        if "_outputPath" not in _kwargs:
+            raise Exception("[API: save_Checkpoint]: The keyworded arguments are not complete for the API")
+        _epoch = _kwargs.get("_epoch", None)
+        if _epoch is None:
+            _epoch = self.__numOfSteps
+        if _epoch < self.__currentStep or _epoch > self.__numOfSteps:
+            raise Exception(f"[API: save_Checkpoint]: The epoch {_epoch} is out of the remaining epochs [{self.__currentStep}, {self.__numOfSteps}]")
+        
+        if _epoch == self.__currentStep:
+            Checkpoint.save(_kwargs["_outputPath"], self.take_Checkpoint(self.__currentStep))
+            return True
+        self.__checkpointRequest = (_epoch, _kwargs["_outputPath"])
+        return False
+
+    def __load_Checkpoint(self, **_kwargs):
+        """
+        @desc
+            This method restores a checkpoint saved by save_Checkpoint. It should be called before run_Sim,
+            on a simulation environment created from the same config (the parameters of the models may differ, see IModel get_Checkpoint).
+            The simulation resumes at the epoch of the checkpoint.
+            The log files are truncated to their positions at the checkpoint. So, create the loggers keeping the existing files (see LoggerFileChunkwise keep_ExistingFiles).
+        @param[in]  _kwargs
+            Keyworded arguments
+            @key _inputPath
+                Path of the checkpoint file
+        @return
+            True if the checkpoint is restored
+        """
+        if "_inputPath" not in _kwargs:
+            raise Exception("[API: load_Checkpoint]: The keyworded arguments are not complete for the API")
+        self.__currentStep = Checkpoint.restore(self.__topologies, Checkpoint.load(_kwargs["_inputPath"]))
+        return True
+
     def __run_OneStep(self, **_kwargs):
         '''
         @desc
@@ -418,6 +492,8 @@ class ManagerParallel(IManager):
         "get_Topologies": __get_Topologies,
         "compute_FOVs" : __compute_FOVs,
         "load_FOVs" : __load_FOVs,
+        "save_Checkpoint" : __save_Checkpoint,
+        "load_Checkpoint" : __load_Checkpoint,
         "run_OneStep" : __run_OneStep
     }
 
@@ -468,6 +544,8 @@ class ManagerParallel(IManager):
         self.__currentStep = 0
 
         self.__timeStepToStop = None
+
+        self.__checkpointRequest = None     #(epoch, path) of the scheduled checkpoint. See save_Checkpoint
         
         # This is the threading.Condition() object that is used to pause the simulation
         self.__stoppingCondition = threading.Event()
@@ -487,15 +565,86 @@ class ManagerParallel(IManager):
                 break
 
                 
+
+    def get_CurrentStep(self) -> int:
+        '''
+        @desc
+            Returns the number of the epochs executed so far, including the ones before the restored checkpoint (see load_Checkpoint)
+        @return
+            Number of the epochs
+        '''
+        return self.__currentStep
+
+    def take_Checkpoint(
+            self,
+            _epoch: int) -> dict:
+        '''
+        @desc
+            Takes a checkpoint of the nodes (see Checkpoint take)
+        @param[in]  _epoch
+            Number of the epochs executed so far
+        @return
+            Checkpoint dictionary
+        '''
+        return Checkpoint.take(self.__topologies, _epoch)
+
+    def save_DueCheckpoint(
+            self,
+            _epoch: int):
+        '''
+        @desc
+            Saves the checkpoint scheduled by save_Checkpoint if it's due at this epoch. The run loop calls it between the epochs
+        @param[in]  _epoch
+            Number of the epochs executed so far
+        '''
+        if self.__checkpointRequest is not None and self.__checkpointRequest[0] == _epoch:
+            _path = self.__checkpointRequest[1]
+            self.__checkpointRequest = None
+            Checkpoint.save(_path, self.take_Checkpoint(_epoch))
+            tqdm.write(f"[Simulator Info] Checkpoint of epoch {_epoch} saved to {_path}")
+
+    @staticmethod
+    def execute_ActiveNodes(_nodes: 'list[INode]'):
+        '''
+        @desc
+            Executes the nodes that need a tick at this epoch (active-set scheduling).
+            The other nodes only advance their time, lazily (see INode needs_Tick and skip_Tick)
+        @param[in]  _nodes
+            List of the nodes
+        '''
+        for _node in _nodes:
+            if _node.needs_Tick():
+                _node.Execute()
+            else:
+                _node.skip_Tick()
+
+    @staticmethod
+    def call_EpochHook(
+            _satNodes: 'list[INode]',
+            _hookName: str):
+        '''
+        @desc
+            Calls an epoch hook of ModelCDNProvider on the satellites that have work to do for it (see needs_prev_epoch_hook and needs_post_epoch_hook)
+        @param[in]  _satNodes
+            List of the satellite nodes
+        @param[in]  _hookName
+            "prev_epoch_hook" or "post_epoch_hook"
+        '''
+        for _node in _satNodes:
+            _model = _node.has_ModelWithName('ModelCDNProvider')
+            if _model is not None and _model.call_APIs("needs_" + _hookName):
+                _model.call_APIs(_hookName)
                                 
     def run_Sim(self):
         '''
         @desc
             This method is called to run the simulation.
         '''
-        progress_bar = tqdm(total=self.__numOfSteps, desc="Epoch")
+        progress_bar = tqdm(total=self.__numOfSteps, initial=self.__currentStep, desc="Epoch")
+        _profiling = Profiler.is_Enabled()
         # To keep the nodes in sync, we ensure that the threads join at the end of each step.
         while self.__currentStep < self.__numOfSteps:
+            self.save_DueCheckpoint(self.__currentStep)
             
             # Check if the simulation is to be paused. If it is, then we wait until the user resumes it
             if self.__timeStepToStop is not None and self.__timeStepToStop == self.__currentStep:
@@ -506,6 +655,9 @@ class ManagerParallel(IManager):
                 #Let's reset the stopping and resuming conditions
                 self.__resumingCondition.clear()
                     
+            if _profiling:
+                _epochStartTime = time.perf_counter()
+
             # if self.__currentStep % 5 == 0:
             # print(f"[Running Sim]: Current step: {self.__currentStep}")
             
@@ -524,30 +676,27 @@ class ManagerParallel(IManager):
                     #If we don't do this, then the exceptions will be ignored and the nodes will be out of sync
                     for _result in _results:
                         _result.result() 
-                sat_nodes = _topology.get_NodesOfAType(ENodeType.SAT)
-                for node in sat_nodes:
-                    node.has_ModelWithName('ModelCDNProvider').call_APIs("post_epoch_hook")
+                ManagerParallel.call_EpochHook(_topology.get_NodesOfAType(ENodeType.SAT), "post_epoch_hook")
                 self.__currentStep += 1 
                 progress_bar.update(1)
             else:
                 # Schedule traffic first
                 if self.__traffic_scheduler:
                     self.__traffic_scheduler.schedule_traffic()
-                sat_nodes = self.__topologies[0].get_NodesOfAType(ENodeType.SAT)
-                for node in sat_nodes:
-                    node.has_ModelWithName('ModelCDNProvider').call_APIs("prev_epoch_hook")
-                # Epoch main logic
+                ManagerParallel.call_EpochHook(self.__topologies[0].get_NodesOfAType(ENodeType.SAT), "prev_epoch_hook")
+                # Epoch main logic. Only the nodes having work to do are executed
                 for _topology in self.__topologies:
-                    for _node in _topology.nodes:
-                        _node.Execute()        
+                    ManagerParallel.execute_ActiveNodes(_topology.nodes)
                 # Post epoch hook
-                sat_nodes = _topology.get_NodesOfAType(ENodeType.SAT)
-                for node in sat_nodes:
-                    node.has_ModelWithName('ModelCDNProvider').call_APIs("post_epoch_hook")
+                ManagerParallel.call_EpochHook(_topology.get_NodesOfAType(ENodeType.SAT), "post_epoch_hook")
+            if _profiling:
+                Profiler.record_Epoch(time.perf_counter() - _epochStartTime)
             self.__currentStep += 1 
             progress_bar.update(1)
             
+        self.save_DueCheckpoint(self.__currentStep)
         #Just to be sure, let's raise the stopping condition - some nodes might be waiting for it
         self.__stoppingCondition.set()
         progress_bar.close()
+        Profiler.write_Report()
         
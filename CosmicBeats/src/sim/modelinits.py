@@ -7,7 +7,8 @@ Created on: 31 Oct 2022
 @desc
     In this module, we list the initialization methods for different model class implementations.
     Initialization method must be written in the same module as where class implementation is written. 
-    The initialization method must be added in the dictionary below as the value against the key as the name of the class
+    The path of the module must be added in the dictionary below as the value against the key as the name of the class
+    The module is imported when the initialization method is looked up first time. So, the name of the method must be init_ followed by the key.
     The prototype of the initialization method goes below.
     
     init_Classname(_ownernodeins:INode, _loggerins:ILogger, _modelArgs) -> IModel
@@ -29,80 +30,45 @@ Created on: 31 Oct 2022
         Instance of the model class
 '''
 
-# import the node class here
-from src.models.models_orbital.modelorbit import init_ModelOrbit
-from src.models.models_orbital.modelorbitonefullupdate import init_ModelOrbitOneFullUpdate
-from src.models.models_orbital.modelfixedorbit import init_ModelFixedOrbit
-from src.models.models_orbital.modelorbitnomotion import init_ModelOrbitNoMotion
-from src.models.models_orbital.modelstationaryorbit import init_ModelStationaryOrbit
+# the model classes are imported on their first use (see LazyInitDictionary)
+from src.sim.lazyinitdictionary import LazyInitDictionary
 
-from src.models.models_fov.modelhelperfov import init_ModelHelperFoV
-from src.models.models_fov.modelfovtimebased import init_ModelFovTimeBased
-
-from src.models.models_power.modelpower import init_ModelPower
-
-from src.models.models_radio.modelisl import init_ModelISL
-
-from src.models.models_radio.modelloraradio import init_ModelLoraRadio
-from src.models.models_radio.modelaggregatorradio import init_ModelAggregatorRadio
-from src.models.models_radio.modeldownlinkradio import init_ModelDownlinkRadio
-from src.models.models_radio.modelimagingradio import init_ModelImagingRadio
-
-from src.models.models_data.modeldatagenerator import init_ModelDataGenerator
-from src.models.models_data.modeldatarelay import init_ModelDataRelay
-from src.models.models_data.modeldatastore import init_ModelDataStore
-
-from src.models.models_mac.modelmacttnc import init_ModelMACTTnC
-from src.models.models_mac.modelmacgateway import init_ModelMACgateway
-from src.models.models_mac.modelmaciot import init_ModelMACiot
-from src.models.models_mac.modelmacgs import init_ModelMACgs
-
-from src.models.models_scheduling.modelcompute import init_ModelCompute
-from src.models.models_scheduling.modeledgecompute import init_ModelEdgeCompute
-
-from src.models.models_tumbling.modeladacs import init_ModelADACS
-
-from src.models.models_imaging.modelimaginglogicbased import init_ModelImagingLogicBased
-
-from src.models.models_cdn.modelcdnprovider import init_ModelCDNProvider
-from src.models.models_cdn.modelcdnuser import init_ModelCDNUser
-
-modelInitDictionary = {
-    "ModelOrbit" : init_ModelOrbit,
-    "ModelOrbitOneFullUpdate": init_ModelOrbitOneFullUpdate,
-    "ModelFixedOrbit": init_ModelFixedOrbit,
-    "ModelOrbitNoMotion": init_ModelOrbitNoMotion,
-    "ModelStationaryOrbit": init_ModelStationaryOrbit,
+modelInitDictionary = LazyInitDictionary({
+    "ModelOrbit" : "src.models.models_orbital.modelorbit",
+    "ModelOrbitOneFullUpdate": "src.models.models_orbital.modelorbitonefullupdate",
+    "ModelFixedOrbit": "src.models.models_orbital.modelfixedorbit",
+    "ModelOrbitNoMotion": "src.models.models_orbital.modelorbitnomotion",
+    "ModelStationaryOrbit": "src.models.models_orbital.modelstationaryorbit",
     
-    "ModelHelperFoV": init_ModelHelperFoV,
-    "ModelFovTimeBased": init_ModelFovTimeBased,
+    "ModelHelperFoV": "src.models.models_fov.modelhelperfov",
+    "ModelFovTimeBased": "src.models.models_fov.modelfovtimebased",
 
-    "ModelDataGenerator": init_ModelDataGenerator,
+    "ModelDataGenerator": "src.models.models_data.modeldatagenerator",
     
-    "ModelPower": init_ModelPower,
+    "ModelPower": "src.models.models_power.modelpower",
 
-    "ModelISL": init_ModelISL,
+    "ModelISL": "src.models.models_radio.modelisl",
 
-    "ModelLoraRadio": init_ModelLoraRadio,
-    "ModelAggregatorRadio": init_ModelAggregatorRadio,
-    "ModelDownlinkRadio": init_ModelDownlinkRadio,
-    "ModelImagingRadio": init_ModelImagingRadio,
+    "ModelLoraRadio": "src.models.models_radio.modelloraradio",
+    "ModelAggregatorRadio": "src.models.models_radio.modelaggregatorradio",
+    "ModelDownlinkRadio": "src.models.models_radio.modeldownlinkradio",
+    "ModelImagingRadio": "src.models.models_radio.modelimagingradio",
 
-    "ModelDataStore": init_ModelDataStore,
-    "ModelDataRelay": init_ModelDataRelay,
+    "ModelDataStore": "src.models.models_data.modeldatastore",
+    "ModelDataRelay": "src.models.models_data.modeldatarelay",
 
-    "ModelMACTTnC": init_ModelMACTTnC,
-    "ModelMACgateway": init_ModelMACgateway,
-    "ModelMACiot": init_ModelMACiot,
-    "ModelMACgs": init_ModelMACgs,
+    "ModelMACTTnC": "src.models.models_mac.modelmacttnc",
+    "ModelMACgateway": "src.models.models_mac.modelmacgateway",
+    "ModelMACiot": "src.models.models_mac.modelmaciot",
+    "ModelMACgs": "src.models.models_mac.modelmacgs",
     
-    "ModelCompute": init_ModelCompute,
-    "ModelEdgeCompute": init_ModelEdgeCompute,
+    "ModelCompute": "src.models.models_scheduling.modelcompute",
+    "ModelEdgeCompute": "src.models.models_scheduling.modeledgecompute",
     
-    "ModelADACS": init_ModelADACS,
+    "ModelADACS": "src.models.models_tumbling.modeladacs",
     
-    "ModelImagingLogicBased": init_ModelImagingLogicBased,
+    "ModelImagingLogicBased": "src.models.models_imaging.modelimaginglogicbased",
 
-    "ModelCDNProvider": init_ModelCDNProvider,
-    "ModelCDNUser": init_ModelCDNUser
-    }
\ No newline at end of file
+    "ModelCDNProvider": "src.models.models_cdn.modelcdnprovider",
+    "ModelCDNUser": "src.models.models_cdn.modelcdnuser"
+    })
\ No newline at end of file
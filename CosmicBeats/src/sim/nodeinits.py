@@ -7,7 +7,8 @@ Created on: 31 Oct 2022
 @desc
     In this module, we list the initialization methods for different node class implementations.
     Initialization method must be written in the same module as where class implementation is written. 
-    The initialization method must be added in the dictionary below as the value against the key as "iname" (implementation name) of the class
+    The path of the module must be added in the dictionary below as the value against the key as "iname" (implementation name) of the class
+    The module is imported when the initialization method is looked up first time. So, the name of the method must be init_ followed by the key.
     The prototype of the initialization method goes below.
     
     init_ClassName(__nodeDetails, __timeDetails, __topologyID, __logger, _managerInstance) -> INode
@@ -32,15 +33,12 @@ Created on: 31 Oct 2022
         Created instance of the class
 '''
 
-# import the node class here
-from src.nodes.satellitebasic import init_SatelliteBasic
-from src.nodes.gsbasic import init_GSBasic
-from src.nodes.iotbasic import init_IoTBasic
-from src.nodes.userbasic import init_UserBasic
+# the node classes are imported on their first use (see LazyInitDictionary)
+from src.sim.lazyinitdictionary import LazyInitDictionary
 
-nodeInitDictionary = {
-    "SatelliteBasic" : init_SatelliteBasic,
-    "GSBasic": init_GSBasic,
-    "IoTBasic": init_IoTBasic,
-    "UserBasic": init_UserBasic,
-    }
\ No newline at end of file
+nodeInitDictionary = LazyInitDictionary({
+    "SatelliteBasic" : "src.nodes.satellitebasic",
+    "GSBasic": "src.nodes.gsbasic",
+    "IoTBasic": "src.nodes.iotbasic",
+    "UserBasic": "src.nodes.userbasic",
+    })
\ No newline at end of file
@@ -11,6 +11,7 @@ Created on: 17 Oct 2022
 
 import json
 import os
+import time
 from argparse import Namespace
 from typing import List
 
@@ -23,6 +24,8 @@ from src.models.imodel import IModel
 from src.sim.nodeinits import nodeInitDictionary
 from src.sim.loggerinits import loggerInitDictionary, loggerTypeDictionary
 from src.sim.modelinits import modelInitDictionary
+from src.sim.resourceregistry import ResourceRegistry
+from src.sim.lazyinitdictionary import LazyInitDictionary
 
 class Orchestrator():
     '''
@@ -33,13 +36,17 @@ class Orchestrator():
     __configdata = None
     __topologies: 'list[ITopology]'
     __numOfSimSteps: int
-    __dependencyResolvedSetsOfModels = []
+    __validatedModelSets = set()        # (node iName, tuple of model inames) of the model lists that passed the node support and dependency checks
+    __startupProfile: 'dict[str, float]' # Phase name is the key and the time spent in seconds is the value
 
     def create_SimEnv(self):
         '''
         @desc
             This function takes care of the main job of the orchestrator class, i.e., preparing the nodes with proper models
         '''
+        _startTime = time.perf_counter()
+        _phaseStartTime = _startTime
+
         # read the config file first in the JSON format
         if os.path.isfile(self.__configFilePath):
             try:
@@ -65,6 +72,10 @@ class Orchestrator():
         self.__numOfSimSteps = self.__simEndTime.difference_in_seconds(self.__simStartTime)/self.__timeDelta
         assert self.__numOfSimSteps > 0
 
+        _phaseEndTime = time.perf_counter()
+        self.__startupProfile["config"] += _phaseEndTime - _phaseStartTime
+        _numOfNodes = 0
+
         #  Create topologies and the nodes for each topology
         for _topologyConfig in self.__configdata.topologies:
             # get the topology node and ID
@@ -77,6 +88,7 @@ class Orchestrator():
             # Let's config the node as the user wants to do
             for _nodeConfig in _topologyConfig.nodes:
                 try:
+                    _phaseStartTime = time.perf_counter()
                     # initialize logger by looking the at the logger init dictionary. 
                     # We just look for the log handler that user wants to use and the corresponding initialization function from the dictionary
                     _loggerName = ("" + str(_topologyConfig.name) + "_" 
@@ -88,6 +100,9 @@ class Orchestrator():
                                                                                             _loggerName, 
                                                                                             self.__configdata.simlogsetup)
                     assert _logger is not None
+                    _phaseEndTime = time.perf_counter()
+                    self.__startupProfile["loggers"] += _phaseEndTime - _phaseStartTime
+                    _phaseStartTime = _phaseEndTime
                     
                     # initialize the node by looking at the node init dictionary. 
                     # User mentions the iname (implementation class name of a node) of the node and we try to find the corresponding initialization function in the dictionary 
@@ -97,15 +112,41 @@ class Orchestrator():
                                                                     _topologyConfig.id, 
                                                                     _logger)
                     assert _newNode is not None
+                    _phaseEndTime = time.perf_counter()
+                    self.__startupProfile["nodes"] += _phaseEndTime - _phaseStartTime
                    
                     # Node is ready. Now, it's time to add models to the node
                     _modelConfig = _nodeConfig.models
+                    _phaseStartTime = time.perf_counter()
                     self._add_Models(_newNode, _logger, _modelConfig)
+                    self.__startupProfile["models"] += time.perf_counter() - _phaseStartTime
                     
                     # Models have been added to the node. Now, we can add the  node to the topology
                     _topologyIns.add_Node(_newNode)
+                    _numOfNodes += 1
                 except:
                     raise Exception(f"[Simulator Exception] Error in initializing node of topology: {str(_topologyConfig.id)}, node: {str(_nodeConfig.nodeid)}")
+
+        self.__startupProfile["total"] = time.perf_counter() - _startTime
+        self.__print_StartupProfile(_numOfNodes)
+
+    def __print_StartupProfile(
+            self,
+            _numOfNodes: int):
+        '''
+        @desc
+            Prints the time spent in each phase of create_SimEnv, the import time of the implementations used by the config, and how much the shared resources were reused
+        @param[in]  _numOfNodes
+            Number of the nodes created
+        '''
+        _phases = ", ".join([f"{_phase}: {_seconds:.3f} s" for _phase, _seconds in self.__startupProfile.items()])
+        print(f"[Simulator Info] Startup profile of {_numOfNodes} nodes. {_phases}")
+        _imports = ", ".join([f"{_iName}: {_seconds:.3f} s" for _iName, _, _seconds in LazyInitDictionary.get_ImportReport()])
+        print(f"[Simulator Info] Imported implementations. {_imports}")
+        _stats = ResourceRegistry.get_Stats()
+        if len(_stats) > 0:
+            _resources = ", ".join([f"{_kind}: {_loads} loaded, {_reuses} reused" for _kind, (_loads, _reuses) in _stats.items()])
+            print(f"[Simulator Info] Shared resources. {_resources}")
     
     def _add_Models(
             self, 
@@ -124,6 +165,10 @@ class Orchestrator():
         '''
         _tempModelList: List[IModel] = []
         _modelNameSet = set()
+
+        # Most of the nodes have the same list of models. The checks below are done once per node class and model list
+        _validationKey = (_nodeInstance.iName, tuple([_thisModelDetails.iname for _thisModelDetails in _modelDetails]))
+        _isValidated = _validationKey in self.__validatedModelSets
         
         for _thisModelDetails in _modelDetails:
             #first, try to create the model instance by looking at the model init dictionary
@@ -135,10 +180,10 @@ class Orchestrator():
             except:
                 raise Exception(f"[Simulator Exception] Error in initializing model: {_thisModelDetails.iname}")
             
-            # check whether this node is supported by the model
+            # check whether this node is supported by the model, unless it's known from the same model list
             _isThisNodeSupported = False
             # if the supported node class list is empty, the model supports any node. End of story.
-            if len(_modelIns.supportedNodeClasses) == 0:
+            if _isValidated or len(_modelIns.supportedNodeClasses) == 0:
                 _isThisNodeSupported = True
             else:
                 # Supported node list is not empty. So, check whether the node is supported or not
@@ -167,14 +212,8 @@ class Orchestrator():
 
         # We are here without any exception means the node is supported by the all models that the user included in the config file
         # Now, resolve the model inter-dependency. 
-        _dependencyResolved = False
-
-        # First, check whether we already resolved dependency for this group of models earlier
-        for _dependencyResolvedSet in self.__dependencyResolvedSetsOfModels:
-            if _modelNameSet == _dependencyResolvedSet:
-                # We have resolved dependency for this model group earlier!!! Phew! No further computation then.
-                _dependencyResolved = True
-                break
+        # First, check whether we already resolved dependency for this list of models earlier. If so, no further computation.
+        _dependencyResolved = _isValidated
 
         if not _dependencyResolved:
             # Nope, we didn't resolve dependency for this group of models earlier.
@@ -216,9 +255,8 @@ class Orchestrator():
                     raise Exception(f"[Simulator Exception] Model {_modelToBeChecked.iName } has dependency mismatch inside node ID: {str(_nodeInstance.nodeID)} Model wanted: {str(_modelNameSet)}")
                     
             
-            # update the set of uVersions in the dependency resolved sets of models for easing future computation 
-            if len(_modelNameSet) > 1:
-                self.__dependencyResolvedSetsOfModels.append(_modelNameSet)
+            # update the validated model lists for easing future computation 
+            self.__validatedModelSets.add(_validationKey)
         
         # finally, add the models to the node
         if len(_tempModelList) > 0:
@@ -236,6 +274,7 @@ class Orchestrator():
         '''
         self.__configFilePath = _configfilepath
         self.__topologies = []
+        self.__startupProfile = {"config": 0.0, "loggers": 0.0, "nodes": 0.0, "models": 0.0}
 
     def get_SimEnv(self):
         '''
@@ -0,0 +1,79 @@
+'''
+// Copyright (c) Microsoft Corporation.
+// Licensed under the MIT license.
+
+@desc
+    This module implements the result of an API call that is run later, e.g., by the owner of the node in another process (see ManagerMultiprocess).
+    The caller registers what to do with the return value, and it's done when the value arrives.
+'''
+
+class PendingResult():
+    '''
+    Return value of an API call that is run later
+    '''
+    def __init__(self) -> None:
+        '''
+        @desc
+            Constructor of the class
+        '''
+        self.__callbacks = []
+        self.__isReady = False
+        self.__value = None
+
+    @property
+    def isReady(self) -> bool:
+        '''
+        @type
+            bool
+        @desc
+            True once the return value has arrived
+        '''
+        return self.__isReady
+
+    def set_Result(
+            self,
+            _value):
+        '''
+        @desc
+            Sets the return value and runs the callbacks in the order they were added
+        @param[in]  _value
+            Return value of the call
+        '''
+        if self.__isReady:
+            raise Exception("[PendingResult Error]: The result is already set")
+        self.__isReady = True
+        self.__value = _value
+        _callbacks, self.__callbacks = self.__callbacks, []
+        for _callback in _callbacks:
+            _callback(_value)
+
+    def add_Callback(
+            self,
+            _callback: callable):
+        '''
+        @desc
+            Adds a function to be called with the return value. It's called right away if the value has already arrived
+        @param[in]  _callback
+            Function taking the return value
+        '''
+        if self.__isReady:
+            _callback(self.__value)
+        else:
+            self.__callbacks.append(_callback)
+
+    @staticmethod
+    def when_Ready(
+            _result,
+            _callback: callable):
+        '''
+        @desc
+            Calls a function with the return value of an API call, right away if it's a value or once it arrives if it's a PendingResult
+        @param[in]  _result
+            Return of the API call
+        @param[in]  _callback
+            Function taking the return value
+        '''
+        if isinstance(_result, PendingResult):
+            _result.add_Callback(_callback)
+        else:
+            _callback(_result)
@@ -0,0 +1,316 @@
+'''
+// Copyright (c) Microsoft Corporation.
+// Licensed under the MIT license.
+
+@desc
+    This is the implementation of the opt-in profiler of the simulation run.
+    When it's enabled, the Execute method of the nodes and the models, and the call_APIs (and get_APIHandle) of the models are wrapped on the instances.
+    The wrappers record the time of each call for the (node/model, Execute/API) pair. The manager records the wall time of each epoch.
+    When it's not enabled, nothing is wrapped. So, it costs nothing.
+    At the end of the run, a report of the call counts, the cumulative, p50, and p99 times, and the epoch times is written as JSON or CSV (by the extension of the file).
+    The times aren't kept. Each pair keeps its count, sum, min, and max, and a histogram of log-spaced buckets for the percentiles (see CallStats).
+'''
+import csv
+import json
+import math
+import time
+import functools
+
+from tqdm import tqdm
+
+class CallStats():
+    '''
+    Count, sum, min, max, and log-spaced histogram of the times of a call.
+    The percentiles are within the width of a bucket (2^(1/_bucketsPerOctave), about 9%) of the exact ones
+    '''
+    _bucketsPerOctave = 8
+    _minExponent = -30                      # 2^-30 s (about 1 ns) is the bottom of the first bucket
+    _numOfBuckets = 8 * 40                  # up to 2^10 s. The times out of the range go to the first or the last bucket
+
+    __slots__ = ("count", "total", "min", "max", "buckets")
+
+    def __init__(self) -> None:
+        self.count = 0
+        self.total = 0.
+        self.min = math.inf
+        self.max = 0.
+        self.buckets = [0] * CallStats._numOfBuckets
+
+    def add(
+            self,
+            _seconds: float):
+        '''
+        @desc
+            Adds a time
+        @param[in]  _seconds
+            Time in seconds
+        '''
+        self.count += 1
+        self.total += _seconds
+        if _seconds < self.min:
+            self.min = _seconds
+        if _seconds > self.max:
+            self.max = _seconds
+        _bucket = int((math.log2(_seconds) - CallStats._minExponent) * CallStats._bucketsPerOctave) if _seconds > 0 else 0
+        self.buckets[min(max(_bucket, 0), CallStats._numOfBuckets - 1)] += 1
+
+    def merge(
+            self,
+            _other: 'CallStats'):
+        '''
+        @desc
+            Adds the times of another one, e.g., of a worker process
+        '''
+        self.count += _other.count
+        self.total += _other.total
+        self.min = min(self.min, _other.min)
+        self.max = max(self.max, _other.max)
+        self.buckets = [_a + _b for _a, _b in zip(self.buckets, _other.buckets)]
+
+    def get_Percentile(
+            self,
+            _percent: float) -> float:
+        '''
+        @desc
+            Returns a percentile of the times, i.e., the geometric middle of its bucket, clamped to the min and max
+        @param[in]  _percent
+            Percentile between 0 and 100
+        @return
+            Time in seconds. 0 if there is no time
+        '''
+        if self.count == 0:
+            return 0.
+        _rank = max(1, math.ceil(self.count * _percent / 100))
+        _seen = 0
+        for _bucket, _count in enumerate(self.buckets):
+            _seen += _count
+            if _seen >= _rank:
+                break
+        _value = 2 ** (CallStats._minExponent + (_bucket + 0.5) / CallStats._bucketsPerOctave)
+        return min(max(_value, self.min), self.max)
+
+class Profiler():
+    '''
+    Static profiler of the simulation run
+    '''
+    __enabled = False
+    __reportPath: str = None
+    __progressInterval: float = None        #Seconds between the progress lines. None for no progress line
+    __records = {}                          #(name of the node/model, Execute or API name) is the key and the CallStats of the call times in seconds is the value
+    __epochTimes = CallStats()
+    __numOfRequests = 0
+    __lastProgress = None                   #(time, number of epochs, number of requests) when the last progress line was printed
+
+    _requestAPIs = {"handle_requests"}      #APIs where the user requests enter. The length of their "requests" argument is counted for the requests/s
+
+    @staticmethod
+    def enable(
+            _reportPath: str,
+            _progressInterval: float = None):
+        '''
+        @desc
+            Enables the profiler. It has to be called before the nodes are instrumented (see instrument_Topologies)
+        @param[in]  _reportPath
+            Path of the report file. A .csv file gets the CSV report, anything else the JSON report
+        @param[in]  _progressInterval
+            Optional. Seconds between the progress lines (epochs/s and requests/s) printed during the run
+        '''
+        Profiler.__enabled = True
+        Profiler.__reportPath = _reportPath
+        Profiler.__progressInterval = _progressInterval
+
+    @staticmethod
+    def is_Enabled() -> bool:
+        '''
+        @desc
+            Tells whether the profiler is enabled
+        @return
+            True if it's enabled
+        '''
+        return Profiler.__enabled
+
+    @staticmethod
+    def reset():
+        '''
+        @desc
+            Disables the profiler and drops the records. The nodes and models instrumented so far stay wrapped.
+        '''
+        Profiler.__enabled = False
+        Profiler.__reportPath = None
+        Profiler.__progressInterval = None
+        Profiler.__records = {}
+        Profiler.__epochTimes = CallStats()
+        Profiler.__numOfRequests = 0
+        Profiler.__lastProgress = None
+
+    @staticmethod
+    def __record(
+            _key: tuple,
+            _seconds: float):
+        _times = Profiler.__records.get(_key, None)
+        if _times is None:
+            _times = CallStats()
+            Profiler.__records[_key] = _times
+        _times.add(_seconds)
+
+    @staticmethod
+    def __wrap_Execute(
+            _name: str,
+            _execute: callable) -> callable:
+        _key = (_name, "Execute")
+
+        @functools.wraps(_execute)
+        def _timedExecute(*_args, **_kwargs):
+            _startTime = time.perf_counter()
+            try:
+                return _execute(*_args, **_kwargs)
+            finally:
+                Profiler.__record(_key, time.perf_counter() - _startTime)
+        return _timedExecute
+
+    @staticmethod
+    def __wrap_CallAPIs(
+            _name: str,
+            _callAPIs: callable) -> callable:
+
+        @functools.wraps(_callAPIs)
+        def _timedCallAPIs(_apiName, **_kwargs):
+            if _apiName in Profiler._requestAPIs and "requests" in _kwargs:
+                Profiler.__numOfRequests += len(_kwargs["requests"])
+            _startTime = time.perf_counter()
+            try:
+                return _callAPIs(_apiName, **_kwargs)
+            finally:
+                Profiler.__record((_name, _apiName), time.perf_counter() - _startTime)
+        return _timedCallAPIs
+
+    @staticmethod
+    def __wrap_GetAPIHandle(_timedCallAPIs: callable) -> callable:
+
+        def _getAPIHandle(_apiName):
+            return functools.partial(_timedCallAPIs, _apiName)
+        return _getAPIHandle
+
+    @staticmethod
+    def instrument_Topologies(_topologies: list):
+        '''
+        @desc
+            Wraps the Execute of the nodes and the models, and the call_APIs of the models of the topologies.
+            The API handles (see IModel get_APIHandle) are routed through the wrapped call_APIs, so that they are recorded too.
+        @param[in]  _topologies
+            List of the topologies
+        '''
+        if not Profiler.__enabled:
+            return
+        for _topology in _topologies:
+            for _node in _topology.nodes:
+                _node.Execute = Profiler.__wrap_Execute(_node.iName, _node.Execute)
+                for _model in _node.get_Models():
+                    _model.Execute = Profiler.__wrap_Execute(_model.iName, _model.Execute)
+                    _model.call_APIs = Profiler.__wrap_CallAPIs(_model.iName, _model.call_APIs)
+                    _model.get_APIHandle = Profiler.__wrap_GetAPIHandle(_model.call_APIs)
+
+    @staticmethod
+    def record_Epoch(_seconds: float):
+        '''
+        @desc
+            Records the wall time of an epoch. It prints the progress line if it's due.
+        @param[in]  _seconds
+            Wall time of the epoch in seconds
+        '''
+        Profiler.__epochTimes.add(_seconds)
+        if Profiler.__progressInterval is None:
+            return
+
+        _now = time.perf_counter()
+        if Profiler.__lastProgress is None:
+            Profiler.__lastProgress = (_now - _seconds, 0, 0)
+        _lastTime, _lastEpochs, _lastRequests = Profiler.__lastProgress
+        if _now - _lastTime >= Profiler.__progressInterval:
+            _elapsed = _now - _lastTime
+            tqdm.write(f"[Profiler Info] Epoch {Profiler.__epochTimes.count}: "
+                       f"{(Profiler.__epochTimes.count - _lastEpochs) / _elapsed:.2f} epochs/s, "
+                       f"{(Profiler.__numOfRequests - _lastRequests) / _elapsed:.1f} requests/s")
+            Profiler.__lastProgress = (_now, Profiler.__epochTimes.count, Profiler.__numOfRequests)
+
+    @staticmethod
+    def get_State() -> dict:
+        '''
+        @desc
+            Returns the recorded calls and requests, e.g., to be sent from a worker process to the main one (see merge_State)
+        @return
+            Dictionary of the records (CallStats of each key) and the number of requests
+        '''
+        return {"records": Profiler.__records, "requests": Profiler.__numOfRequests}
+
+    @staticmethod
+    def merge_State(_state: dict):
+        '''
+        @desc
+            Adds the records of another process to this one
+        @param[in]  _state
+            State returned by get_State
+        '''
+        for _key, _times in _state["records"].items():
+            Profiler.__records.setdefault(_key, CallStats()).merge(_times)
+        Profiler.__numOfRequests += _state["requests"]
+
+    @staticmethod
+    def get_Report() -> dict:
+        '''
+        @desc
+            Builds the report of the recorded calls and epochs
+        @return
+            Dictionary having the summary of the epochs, the number of requests, and the calls sorted by the cumulative time
+        '''
+        _calls = []
+        for (_name, _api), _times in Profiler.__records.items():
+            _calls.append({
+                "name": _name,
+                "api": _api,
+                "calls": _times.count,
+                "total_s": _times.total,
+                "mean_us": _times.total / _times.count * 1e6,
+                "p50_us": _times.get_Percentile(50) * 1e6,
+                "p99_us": _times.get_Percentile(99) * 1e6})
+        _calls.sort(key = lambda _call: _call["total_s"], reverse = True)
+
+        _epochTimes = Profiler.__epochTimes
+        _epochs = {"epochs": _epochTimes.count}
+        if _epochTimes.count > 0:
+            _epochs.update({
+                "total_s": _epochTimes.total,
+                "mean_ms": _epochTimes.total / _epochTimes.count * 1e3,
+                "p50_ms": _epochTimes.get_Percentile(50) * 1e3,
+                "p99_ms": _epochTimes.get_Percentile(99) * 1e3,
+                "max_ms": _epochTimes.max * 1e3})
+        return {"epochs": _epochs, "requests": Profiler.__numOfRequests, "calls": _calls}
+
+    @staticmethod
+    def write_Report(_numOfHotPaths: int = 10):
+        '''
+        @desc
+            Writes the report to the report path and prints the hot paths, i.e., the calls taking the most cumulative time.
+            Note that the time of a node's Execute includes the time of its models, and an API may call other APIs.
+        @param[in]  _numOfHotPaths
+            Number of the hot paths to be printed
+        '''
+        if not Profiler.__enabled:
+            return
+        _report = Profiler.get_Report()
+        if Profiler.__reportPath.endswith(".csv"):
+            with open(Profiler.__reportPath, "w", newline = "") as _file:
+                _writer = csv.DictWriter(_file, fieldnames = ["name", "api", "calls", "total_s", "mean_us", "p50_us", "p99_us"])
+                _writer.writeheader()
+                _writer.writerows(_report["calls"])
+                _epochs = _report["epochs"]
+                if _epochs["epochs"] > 0:
+                    _writer.writerow({"name": "Manager", "api": "epoch", "calls": _epochs["epochs"], "total_s": _epochs["total_s"],
+                                      "mean_us": _epochs["mean_ms"] * 1e3, "p50_us": _epochs["p50_ms"] * 1e3, "p99_us": _epochs["p99_ms"] * 1e3})
+        else:
+            with open(Profiler.__reportPath, "w") as _file:
+                json.dump(_report, _file, indent = 2)
+
+        print(f"[Profiler Info] Report written to {Profiler.__reportPath}. {_report['epochs']['epochs']} epochs, {_report['requests']} requests. Hot paths:")
+        for _call in _report["calls"][:_numOfHotPaths]:
+            print(f"    {_call['name']}.{_call['api']}: {_call['calls']} calls, {_call['total_s']:.3f} s, p50 {_call['p50_us']:.1f} us, p99 {_call['p99_us']:.1f} us")
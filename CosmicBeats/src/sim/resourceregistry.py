@@ -0,0 +1,128 @@
+'''
+// Copyright (c) Microsoft Corporation.
+// Licensed under the MIT license.
+
+@desc
+    This is the implementation of the resource registry.
+    The nodes of a topology mostly share the same auxiliary resources, e.g., the topology/color file of the CDN satellites, the skyfield time scale, and the ephemeris file.
+    Loading them for each node makes the start up of large configs (tens of thousands of nodes) slow.
+    The registry loads each resource once and hands out the same instance to all the nodes and models asking for it.
+    The resources are shared. So, the callers must not modify them.
+'''
+import os
+import json
+
+class ResourceRegistry():
+    '''
+    Static registry of the shared resources. Resources are identified by the kind and a key (e.g., the path of the file).
+    '''
+    __resources = {}        #(kind, key) is the key and the resource is the value
+    __stats = {}            #kind is the key and [number of loads, number of reuses] is the value
+
+    @staticmethod
+    def get_Resource(
+            _kind: str,
+            _key,
+            _loader: callable):
+        '''
+        @desc
+            Returns the resource of the kind and the key. It's loaded through the loader only if it's not in the registry yet.
+        @param[in]  _kind
+            Kind of the resource, e.g., "json". Used for the stats
+        @param[in]  _key
+            Hashable key identifying the resource within the kind
+        @param[in]  _loader
+            Callable taking no argument that loads the resource
+        @return
+            The shared resource
+        '''
+        _stat = ResourceRegistry.__stats.setdefault(_kind, [0, 0])
+        _registryKey = (_kind, _key)
+        if _registryKey in ResourceRegistry.__resources:
+            _stat[1] += 1
+            return ResourceRegistry.__resources[_registryKey]
+
+        _resource = _loader()
+        ResourceRegistry.__resources[_registryKey] = _resource
+        _stat[0] += 1
+        return _resource
+
+    @staticmethod
+    def load_JSON(_filePath: str):
+        '''
+        @desc
+            Returns the parsed JSON file. The file is parsed again if it has been modified since it was parsed last time.
+        @param[in]  _filePath
+            Path of the JSON file
+        @return
+            Parsed JSON object (shared, read only)
+        '''
+        _absPath = os.path.abspath(_filePath)
+
+        def _load():
+            with open(_absPath, "r") as _file:
+                return json.load(_file)
+
+        return ResourceRegistry.get_Resource("json", (_absPath, os.path.getmtime(_absPath)), _load)
+
+    @staticmethod
+    def get_Timescale():
+        '''
+        @desc
+            Returns the skyfield time scale. Loading it reads the bundled leap second and UT1 tables, which takes a few milliseconds.
+        @return
+            skyfield Timescale instance
+        '''
+        from skyfield.api import load
+        return ResourceRegistry.get_Resource("timescale", None, load.timescale)
+
+    @staticmethod
+    def load_Ephemeris(_filePath: str):
+        '''
+        @desc
+            Returns the ephemeris (SPK) file, e.g., ./dependencies/de440s.bsp. Only one handle of the file is kept open.
+        @param[in]  _filePath
+            Path of the ephemeris file
+        @return
+            skyfield SpiceKernel instance
+        '''
+        from skyfield.api import load
+        return ResourceRegistry.get_Resource("ephemeris", os.path.abspath(_filePath), lambda: load(_filePath))
+
+    @staticmethod
+    def get_EarthSatellite(_tleLines: 'list[str]'):
+        '''
+        @desc
+            Returns the skyfield EarthSatellite of the TLE
+        @param[in]  _tleLines
+            TLE lines. Either [line 1, line 2] or [name, line 1, line 2]
+        @return
+            skyfield EarthSatellite instance
+        '''
+        from skyfield.api import EarthSatellite
+        if len(_tleLines) == 2:
+            _line1, _line2 = _tleLines
+        elif len(_tleLines) == 3:
+            _line1, _line2 = _tleLines[1], _tleLines[2]
+        else:
+            raise Exception(f"[ResourceRegistry Error]: Invalid number of TLE lines: {len(_tleLines)}")
+        return ResourceRegistry.get_Resource("tle", (_line1, _line2), lambda: EarthSatellite(_line1, _line2))
+
+    @staticmethod
+    def get_Stats() -> 'dict[str, tuple[int, int]]':
+        '''
+        @desc
+            Returns the usage stats of the registry
+        @return
+            Dictionary where the kind of the resource is the key and (number of loads, number of reuses) is the value
+        '''
+        return {_kind: tuple(_stat) for _kind, _stat in ResourceRegistry.__stats.items()}
+
+    @staticmethod
+    def clear():
+        '''
+        @desc
+            Drops all the resources and the stats. The resources already handed out stay valid.
+        '''
+        ResourceRegistry.__resources.clear()
+        ResourceRegistry.__stats.clear()
@@ -11,6 +11,10 @@ Created on: 07 Nov 2022
 from src.sim.orchestrator import Orchestrator
 from src.sim.imanager import IManager
 from src.sim.managerparallel import ManagerParallel
+from src.sim.managermultiprocess import ManagerMultiprocess
+from src.sim.profiler import Profiler
+from src.simlogging.loggerfilechunkwise import LoggerFileChunkwise
+from src.simlogging.recordsinkbinary import RecordSinkBinary
 
 
 class Simulator():
@@ -25,7 +29,9 @@ class Simulator():
     def __init__(
             self,
             _configfilepath: str,
-            _numWorkers: int = 1) -> None:
+            _numWorkers: int = 1,
+            _numProcesses: int = 1,
+            _resumePath: str = None) -> None:
         '''
         @desc
             Constructor of the simulator class.
@@ -33,21 +39,44 @@ class Simulator():
             File path to the configuration file
         @param[in]  _numWorkers
             Number of workers to be used for parallel execution
+        @param[in]  _numProcesses
+            Number of processes the nodes are sharded over. ManagerMultiprocess is used if it's more than 1
+        @param[in]  _resumePath
+            Optional. Path of a checkpoint file (see Checkpoint) to resume the simulation from. The config must have the same nodes and models
         '''
         self.__configFilePath = _configfilepath
 
         #  invoke the orchestrator to create the simulation environment
+        #  a resumed simulation continues the existing log files (see load_Checkpoint)
         self.__orchestrator = Orchestrator(self.__configFilePath)
-        self.__orchestrator.create_SimEnv()
+        LoggerFileChunkwise.keep_ExistingFiles(_resumePath is not None)
+        RecordSinkBinary.keep_ExistingFiles(_resumePath is not None)
+        try:
+            self.__orchestrator.create_SimEnv()
+        finally:
+            LoggerFileChunkwise.keep_ExistingFiles(False)
+            RecordSinkBinary.keep_ExistingFiles(False)
         __simEnv = self.__orchestrator.get_SimEnv()
+        self.__topologies = __simEnv[0]
 
         # hand over the simulation environment to the manager
-        self.__manager = ManagerParallel(
+        if _numProcesses > 1:
+            self.__manager = ManagerMultiprocess(
+                                    topologies = __simEnv[0], 
+                                    numOfSimSteps = __simEnv[1],
+                                    numOfWorkers = _numWorkers,
+                                    numOfProcesses = _numProcesses
+                                    )
+        else:
+            self.__manager = ManagerParallel(
                                     topologies = __simEnv[0], 
                                     numOfSimSteps = __simEnv[1],
                                     numOfWorkers = _numWorkers
                                     )
 
+        if _resumePath is not None and not self.__manager.call_APIs("load_Checkpoint", _inputPath = _resumePath):
+            raise Exception(f"[Simulator]: The checkpoint {_resumePath} could not be restored")
+
     def call_RuntimeAPIs(self, 
                         _api: str, 
                         **_kwargs):
@@ -82,6 +111,7 @@ class Simulator():
     def execute(self):
         '''
         @desc
-            Executes the simulation
+            Executes the simulation. If the profiler is enabled (see Profiler enable), the nodes and models are instrumented first
         '''
+        Profiler.instrument_Topologies(self.__topologies)
         self.__manager.run_Sim()
\ No newline at end of file
@@ -110,6 +110,16 @@ class LoggerFile(ILogger):
         '''
         return self.__logTypeLevel
 
+    @property
+    def filePath(self) -> str:
+        '''
+        @type
+            str
+        @desc
+            Path of the log file
+        '''
+        return self.__filePath
+
 def init_LoggerFile(
         _loglevel: ELogType, 
         _logGeneratorName: str, 
@@ -34,6 +34,8 @@ class LoggerFileChunkwise(ILogger):
    __currentLogChunkBuffer: StringIO # string buffer to store the log chunk
    
    __overwritePermission: bool = False # whether all the log files can be overwritten without asking the user
+   __instances: 'list[LoggerFileChunkwise]' = [] # all the instances of this class. See flush_All
+   __keepExistingFiles: bool = False # whether the existing log files are kept on the creation of an instance. See keep_ExistingFiles
    
    def write_Log(
         self, 
@@ -91,6 +93,16 @@ class LoggerFileChunkwise(ILogger):
         
         return _ret
    
+   @property
+   def filePath(self) -> str:
+        '''
+        @type
+            str
+        @desc
+            Path of the log file
+        '''
+        return self.__filePath
+
    @property
    def logTypeLevel(self) -> ELogType:
         '''
@@ -108,6 +120,13 @@ class LoggerFileChunkwise(ILogger):
             Destructor of the class.
             It dumps the current log chunk in the file before the instance is destroyed
         '''
+        self.flush()
+   
+   def flush(self):
+        '''
+        @desc
+            It dumps the current log chunk in the file and starts a new chunk
+        '''
         try:
             if(self.__currentChunkSize > 0):
                 with open(self.__filePath, "a") as _file:
@@ -115,7 +134,58 @@ class LoggerFileChunkwise(ILogger):
                         shutil.copyfileobj(self.__currentLogChunkBuffer, _file, -1)
         except Exception as e:
             raise Exception(f"[Simulator Exception] Couldn't open the log file at {self.__filePath}: " + str(e))
+        
+        self.__currentLogChunkBuffer = StringIO()
+        self.__currentChunkSize = 0
+   
+   @staticmethod
+   def flush_All():
+        '''
+        @desc
+            It dumps the current log chunks of all the instances.
+            A forked process (see ManagerMultiprocess) should call this before it exits, as the exit handlers don't run there. 
+            The parent should call it before forking, so that the inherited chunks are not written twice.
+        '''
+        for _instance in LoggerFileChunkwise.__instances:
+            _instance.flush()
    
+   @staticmethod
+   def keep_ExistingFiles(_keep: bool = True):
+        '''
+        @desc
+            Sets whether the instances created from now on keep their existing log files instead of starting them over.
+            A simulation resumed from a checkpoint (see Checkpoint) keeps them and truncates them to the positions of the checkpoint (see restore_Positions).
+        @param[in]  _keep
+            True to keep the existing files
+        '''
+        LoggerFileChunkwise.__keepExistingFiles = _keep
+
+   @staticmethod
+   def get_Positions() -> 'dict[str, int]':
+        '''
+        @desc
+            It returns the sizes of the log files of all the instances. The current log chunks are not included. So, flush them first (see flush_All)
+        @return
+            Dictionary where the file path is the key and the size in bytes is the value
+        '''
+        return {_instance.__filePath: os.path.getsize(_instance.__filePath) for _instance in LoggerFileChunkwise.__instances if os.path.isfile(_instance.__filePath)}
+
+   @staticmethod
+   def restore_Positions(_positions: 'dict[str, int]'):
+        '''
+        @desc
+            It truncates the log files of the instances to the sizes returned by get_Positions, i.e., drops what was logged after them.
+            The current log chunks are dropped too, as they were logged while the simulation environment was being created again.
+        @param[in]  _positions
+            Dictionary where the file path is the key and the size in bytes is the value
+        '''
+        for _instance in LoggerFileChunkwise.__instances:
+            _instance.__currentLogChunkBuffer = StringIO()
+            _instance.__currentChunkSize = 0
+            _size = _positions.get(_instance.__filePath, None)
+            if _size is not None and os.path.isfile(_instance.__filePath):
+                os.truncate(_instance.__filePath, _size)
+
    def __init__(
         self, 
         _logLevel: ELogType, 
@@ -146,16 +216,18 @@ class LoggerFileChunkwise(ILogger):
         if(not os.path.isdir(_logDir)):
             os.mkdir(_logDir)               # let it throw exception if it can't create the directory 
 
-        # create the file
-        try:
-            __file = open (self.__filePath, "w")
-            __file.write("logType, timestamp, modelName, message\n")
-            __file.close()
-        except:
-            raise Exception("[Simulator Exception] Couldn't create the log file.") 
+        # create the file, unless the existing one is kept (see keep_ExistingFiles)
+        if not (LoggerFileChunkwise.__keepExistingFiles and os.path.isfile(self.__filePath)):
+            try:
+                __file = open (self.__filePath, "w")
+                __file.write("logType, timestamp, modelName, message\n")
+                __file.close()
+            except:
+                raise Exception("[Simulator Exception] Couldn't create the log file.") 
         
         #Setup close at exit
         atexit.register(self.closing)
+        LoggerFileChunkwise.__instances.append(self)
 
 def init_LoggerFileChunkwise(
         _loglevel: ELogType, 
@@ -0,0 +1,194 @@
+'''
+// Copyright (c) Microsoft Corporation.
+// Licensed under the MIT license.
+
+@desc
+    This module implements the binary sink of the request records of ModelCDNProvider, an alternative to the [Requests Records] log lines.
+    The sink is a directory of columns next to the log file of the node (e.g., Log_Constln1_0_SAT_0.rec), one raw little-endian file per column,
+    with a row per requested object:
+        time.bin (int64, seconds since the unix epoch of the log timestamp), user.bin (int32, user ID), hops.bin (int16 x 2, hop vector),
+        object.bin (fixed-width bytes, UTF-8 object ID, zero-padded, or int64 for the integer object IDs), size.bin (int64, object size)
+    and a header.json with the dtypes of the columns and the length of the hop vector. The rows are appended in the order of the simulation time.
+    So, the replayer memory-maps the columns and finds the rows of an epoch with a binary search on the time column (see cache-replayer/records.py).
+    The rows are buffered and appended in chunks, like the log lines of LoggerFileChunkwise. The sink has the same static helpers
+    (flush_All, keep_ExistingFiles, get_Positions, restore_Positions) for the checkpoints and the forked processes.
+'''
+import os
+import json
+import atexit
+import numpy as np
+
+class RecordSinkBinary():
+    '''
+    It writes the request records of a node in a binary columnar format
+    '''
+    _formatVersion = 1
+    _numOfHops = 2                  # length of the hop vector. See ModelCDNProvider __hash_bfs
+    __columnNames = ("time", "user", "hops", "object", "size")
+
+    __instances: 'list[RecordSinkBinary]' = []  # all the instances of this class. See flush_All
+    __keepExistingFiles: bool = False           # whether the existing columns are kept on the creation of an instance. See keep_ExistingFiles
+
+    @staticmethod
+    def get_Dtypes(
+            _objectIDWidth: int,
+            _integerIDs: bool = False) -> 'dict[str, np.dtype]':
+        '''
+        @desc
+            Returns the dtypes of the columns
+        @param[in]  _objectIDWidth
+            Width of the object ID column in bytes
+        @param[in]  _integerIDs
+            Whether the object IDs are integers. The width isn't used then
+        @return
+            Dictionary where the column name is the key and the dtype is the value
+        '''
+        return {
+            "time": np.dtype("<i8"),
+            "user": np.dtype("<i4"),
+            "hops": np.dtype(("<i2", (RecordSinkBinary._numOfHops,))),
+            "object": np.dtype("<i8") if _integerIDs else np.dtype(f"S{_objectIDWidth}"),
+            "size": np.dtype("<i8")}
+
+    def write_Records(
+            self,
+            _time: int,
+            _userID: int,
+            _hops: 'list[int]',
+            _objects: 'list[tuple[str, int]]') -> None:
+        '''
+        @desc
+            Appends the rows of the objects requested by a user at a time
+        @param[in]  _time
+            Time in seconds since the unix epoch
+        @param[in]  _userID
+            ID of the user
+        @param[in]  _hops
+            Hop vector of the requests
+        @param[in]  _objects
+            List of (object ID, size)
+        '''
+        if len(_hops) != RecordSinkBinary._numOfHops:
+            raise Exception(f"[RecordSinkBinary Error]: The hop vector should have {RecordSinkBinary._numOfHops} items. Got {_hops}")
+        for _objectID, _size in _objects:
+            if not self.__integerIDs:
+                #The column has UTF-8 bytes. So, the length is checked on them
+                _objectID = _objectID.encode()
+                if len(_objectID) > self.__objectIDWidth:
+                    raise Exception(f"[RecordSinkBinary Error]: The object ID {_objectID.decode()} is longer than {self.__objectIDWidth} bytes. Increase the record_id_width of ModelCDNProvider")
+            self.__rows["time"].append(_time)
+            self.__rows["user"].append(_userID)
+            self.__rows["hops"].append(_hops)
+            self.__rows["object"].append(_objectID)
+            self.__rows["size"].append(_size)
+        if len(self.__rows["time"]) >= self.__maxChunkRows:
+            self.flush()
+
+    def flush(self):
+        '''
+        @desc
+            It appends the buffered rows to the column files
+        '''
+        if len(self.__rows["time"]) == 0:
+            return
+        for _name in RecordSinkBinary.__columnNames:
+            with open(self.__columnPaths[_name], "ab") as _file:
+                np.asarray(self.__rows[_name], dtype=self.__dtypes[_name].base).tofile(_file)
+        self.__rows = {_name: [] for _name in RecordSinkBinary.__columnNames}
+
+    @property
+    def directory(self) -> str:
+        '''
+        @type
+            str
+        @desc
+            Path of the directory of the columns
+        '''
+        return self.__directory
+
+    @staticmethod
+    def flush_All():
+        '''
+        @desc
+            It appends the buffered rows of all the instances. See LoggerFileChunkwise flush_All
+        '''
+        for _instance in RecordSinkBinary.__instances:
+            _instance.flush()
+
+    @staticmethod
+    def keep_ExistingFiles(_keep: bool = True):
+        '''
+        @desc
+            Sets whether the instances created from now on keep their existing columns instead of starting them over. See LoggerFileChunkwise keep_ExistingFiles
+        @param[in]  _keep
+            True to keep the existing columns
+        '''
+        RecordSinkBinary.__keepExistingFiles = _keep
+
+    @staticmethod
+    def get_Positions() -> 'dict[str, int]':
+        '''
+        @desc
+            It returns the sizes of the column files of all the instances. The buffered rows are not included. So, flush them first (see flush_All)
+        @return
+            Dictionary where the file path is the key and the size in bytes is the value
+        '''
+        return {_path: os.path.getsize(_path) for _instance in RecordSinkBinary.__instances for _path in _instance.__columnPaths.values() if os.path.isfile(_path)}
+
+    @staticmethod
+    def restore_Positions(_positions: 'dict[str, int]'):
+        '''
+        @desc
+            It truncates the column files of the instances to the sizes returned by get_Positions and drops the buffered rows
+        @param[in]  _positions
+            Dictionary where the file path is the key and the size in bytes is the value
+        '''
+        for _instance in RecordSinkBinary.__instances:
+            _instance.__rows = {_name: [] for _name in RecordSinkBinary.__columnNames}
+            for _path in _instance.__columnPaths.values():
+                _size = _positions.get(_path, None)
+                if _size is not None and os.path.isfile(_path):
+                    os.truncate(_path, _size)
+
+    def __init__(
+            self,
+            _directory: str,
+            _objectIDWidth: int = 32,
+            _maxChunkRows: int = 65536,
+            _integerIDs: bool = False) -> None:
+        '''
+        @desc
+            Constructor of the class. It creates the directory and empty columns, unless the existing ones are kept (see keep_ExistingFiles)
+        @param[in]  _directory
+            Path of the directory of the columns
+        @param[in]  _objectIDWidth
+            Width of the object ID column in bytes
+        @param[in]  _maxChunkRows
+            Number of the rows buffered before they are appended to the files
+        @param[in]  _integerIDs
+            Whether the object IDs are integers (see ObjectDictionary)
+        '''
+        self.__directory = _directory
+        self.__objectIDWidth = _objectIDWidth
+        self.__integerIDs = _integerIDs
+        self.__dtypes = RecordSinkBinary.get_Dtypes(_objectIDWidth, _integerIDs)
+        self.__maxChunkRows = _maxChunkRows
+        self.__rows = {_name: [] for _name in RecordSinkBinary.__columnNames}
+        self.__columnPaths = {_name: os.path.join(_directory, _name + ".bin") for _name in RecordSinkBinary.__columnNames}
+
+        _headerPath = os.path.join(_directory, "header.json")
+        _header = {"version": RecordSinkBinary._formatVersion, "dtypes": {_name: self.__dtypes[_name].base.str for _name in RecordSinkBinary.__columnNames}, "hops": RecordSinkBinary._numOfHops}
+        if RecordSinkBinary.__keepExistingFiles and os.path.isfile(_headerPath):
+            with open(_headerPath, "r") as _file:
+                if json.load(_file) != _header:
+                    raise Exception(f"[RecordSinkBinary Error]: The existing records at {_directory} have another format")
+        else:
+            os.makedirs(_directory, exist_ok=True)
+            for _path in self.__columnPaths.values():
+                open(_path, "wb").close()
+            with open(_headerPath, "w") as _file:
+                json.dump(_header, _file)
+
+        #Setup flush at exit
+        atexit.register(self.flush)
+        RecordSinkBinary.__instances.append(self)
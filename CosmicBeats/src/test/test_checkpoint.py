@@ -0,0 +1,128 @@
+'''
+// Copyright (c) Microsoft Corporation.
+// Licensed under the MIT license.
+
+@desc
+    We conduct the unit test of the checkpoint here.
+    The state of an instance must leave out the references and the excluded attributes, and survive a save and load.
+    A small CDN config resumed from a checkpoint must write the same logs as the run straight through.
+'''
+import unittest
+import os
+import sys
+import json
+import tempfile
+import threading
+import subprocess
+from src.sim.checkpoint import Checkpoint
+from src.simlogging.ilogger import ELogType
+from src.simlogging.loggerfilechunkwise import LoggerFileChunkwise
+
+class _Counter():
+    _checkpointExclude = ("capacity",)
+
+    def __init__(self, _peer = None) -> None:
+        self.count = 0
+        self.capacity = 10
+        self.seen = {"a", "b"}
+        self.peer = _peer
+        self.lock = threading.Lock()
+        self.handles = {"add": self.__init__}
+
+_configPath = os.path.join("configs", "testconfigs", "config_testcdn.json")
+_ephemerisPath = os.path.join("dependencies", "de440s.bsp")
+
+class TestCheckpoint(unittest.TestCase):
+    def setUp(self) -> None:
+        self.__dir = tempfile.TemporaryDirectory()
+
+    def tearDown(self) -> None:
+        self.__dir.cleanup()
+
+    def test_InstanceState(self):
+        _counter = _Counter()
+        _counter.count = 5
+        _state = Checkpoint.get_InstanceState(_counter)
+        self.assertEqual(set(_state.keys()), {"count", "seen", "peer"})
+
+        # the peer is a reference to another simulation object once it's set
+        from src.models.models_cdn.modelcdnuser import ModelCDNUser
+        _counter.peer = [ModelCDNUser.__new__(ModelCDNUser)]
+        self.assertNotIn("peer", Checkpoint.get_InstanceState(_counter))
+
+        _restored = _Counter()
+        _restored.capacity = 20
+        Checkpoint.set_InstanceState(_restored, _state)
+        self.assertEqual(_restored.count, 5)
+        self.assertEqual(_restored.capacity, 20)
+
+    def test_SaveLoad(self):
+        _path = os.path.join(self.__dir.name, "checkpoint.gz")
+        _checkpoint = {"version": Checkpoint._formatVersion, "epoch": 3, "nodes": {(0, 1): {"node": {"x": 1}, "models": {}}}, "shared": {}, "logs": {}}
+        Checkpoint.save(_path, _checkpoint)
+        self.assertEqual(Checkpoint.load(_path), _checkpoint)
+        self.assertFalse(os.path.exists(_path + ".tmp"))
+
+    def test_LogPositions(self):
+        _logger = LoggerFileChunkwise(ELogType.LOGALL, "TestCheckpoint", self.__dir.name, 1)
+        _logger.write_Log("before", ELogType.LOGINFO)
+        LoggerFileChunkwise.flush_All()
+        _positions = LoggerFileChunkwise.get_Positions()
+        _path = os.path.join(self.__dir.name, "Log_TestCheckpoint.log")
+        _logger.write_Log("after", ELogType.LOGINFO)
+        _logger.flush()
+
+        # a resumed run keeps the file and drops what was logged after the checkpoint
+        LoggerFileChunkwise.keep_ExistingFiles()
+        try:
+            LoggerFileChunkwise(ELogType.LOGALL, "TestCheckpoint", self.__dir.name, 1)
+        finally:
+            LoggerFileChunkwise.keep_ExistingFiles(False)
+        LoggerFileChunkwise.restore_Positions(_positions)
+        with open(_path) as _file:
+            _content = _file.read()
+        self.assertIn("before", _content)
+        self.assertNotIn("after", _content)
+
+    def __run_Config(
+            self,
+            _name: str,
+            *_options: str) -> str:
+        '''
+        Runs the test config with its logs in a folder of the test directory, and returns the path of the config
+        '''
+        with open(_configPath) as _file:
+            _config = json.load(_file)
+        _config["simlogsetup"]["logfolder"] = os.path.join(self.__dir.name, _name)
+        _path = os.path.join(self.__dir.name, _name + ".json")
+        with open(_path, "w") as _file:
+            json.dump(_config, _file)
+        self.__run_Main(_path, *_options)
+        return _path
+
+    def __run_Main(
+            self,
+            _path: str,
+            *_options: str):
+        subprocess.run([sys.executable, "main.py", _path, *_options], check = True, stdout = subprocess.DEVNULL, stderr = subprocess.DEVNULL)
+
+    def __read_Logs(self, _name: str) -> dict:
+        _logs = {}
+        _folder = os.path.join(self.__dir.name, _name)
+        for _fileName in sorted(os.listdir(_folder)):
+            with open(os.path.join(_folder, _fileName)) as _file:
+                _logs[_fileName] = _file.read()
+        return _logs
+
+    @unittest.skipUnless(os.path.isfile(_ephemerisPath), "The ephemeris file is needed to run a config")
+    def test_Resume(self):
+        self.__run_Config("straight")
+        _straight = self.__read_Logs("straight")
+        self.assertTrue(any("[Request Result]" in _log for _log in _straight.values()))
+
+        # the checkpoint run goes on to the end, and the resumed run truncates its logs and runs the epochs after the checkpoint again
+        _checkpointPath = os.path.join(self.__dir.name, "checkpoint.gz")
+        _path = self.__run_Config("resumed", "--checkpoint", _checkpointPath, "--checkpoint-at", "50")
+        self.assertEqual(self.__read_Logs("resumed"), _straight)
+        self.__run_Main(_path, "--resume", _checkpointPath)
+        self.assertEqual(self.__read_Logs("resumed"), _straight)
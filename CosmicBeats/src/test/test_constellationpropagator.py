@@ -0,0 +1,56 @@
+'''
+// Copyright (c) Microsoft Corporation.
+// Licensed under the MIT license.
+
+@desc
+    We conduct the unit test of the constellation-wide SGP4 propagator here.
+    The batched results are compared against the per-satellite skyfield EarthSatellite path used by ModelOrbit.
+'''
+import unittest
+import numpy as np
+from skyfield.api import load, EarthSatellite
+from src.utils import Time
+from src.models.models_orbital.constellationpropagator import ConstellationPropagator
+
+class TestConstellationPropagator(unittest.TestCase):
+    def setUp(self) -> None:
+        ConstellationPropagator.reset()
+        with open("data/starlinks_5_2_brief.txt", "r") as _file:
+            _lines = [_line.strip() for _line in _file.readlines() if _line.strip() != ""]
+        self.__tles = [_lines[_i:_i + 3] for _i in range(0, 30, 3)]
+        for _nodeID, _tle in enumerate(self.__tles):
+            ConstellationPropagator.register_Satellite(_nodeID, _tle)
+        self.__ts = load.timescale()
+
+    def tearDown(self) -> None:
+        ConstellationPropagator.reset()
+
+    def test_MatchesEarthSatellite(self):
+        _start = Time().from_str("2024-05-03 12:00:00")
+        _times = [_start.copy().add_seconds(_step * 60) for _step in range(0, 15)]
+        _unixTimes = [_time.to_unix() for _time in _times]
+
+        _positions, _velocities = ConstellationPropagator.propagate(_unixTimes, _withVelocity=True)
+        self.assertEqual(_positions.shape, (len(_times), len(self.__tles), 3))
+
+        for _nodeID, _tle in enumerate(self.__tles):
+            _earthSat = EarthSatellite(_tle[1], _tle[2], _tle[0], self.__ts)
+            for _timeIndex, _time in enumerate(_times):
+                _gcrs = _earthSat.at(self.__ts.utc(_time.to_datetime()))
+                _expectedPos = _gcrs.itrf_xyz().m
+                _expectedVel = _gcrs.velocity.m_per_s
+                self.assertLess(np.linalg.norm(_positions[_timeIndex, _nodeID] - _expectedPos), 1e-3)
+                self.assertLess(np.linalg.norm(_velocities[_timeIndex, _nodeID] - _expectedVel), 1e-6)
+
+    def test_GetPosition(self):
+        _time = Time().from_str("2024-05-03 12:30:00")
+        _earthSat = EarthSatellite(self.__tles[3][1], self.__tles[3][2], self.__tles[3][0], self.__ts)
+        _expectedPos = _earthSat.at(self.__ts.utc(_time.to_datetime())).itrf_xyz().m
+
+        _location = ConstellationPropagator.get_Position(3, _time)
+        self.assertAlmostEqual(_location.x, _expectedPos[0], 2)
+        self.assertAlmostEqual(_location.y, _expectedPos[1], 2)
+        self.assertAlmostEqual(_location.z, _expectedPos[2], 2)
+
+        with self.assertRaises(Exception):
+            ConstellationPropagator.get_Position(1000, _time)
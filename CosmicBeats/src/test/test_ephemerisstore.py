@@ -0,0 +1,69 @@
+'''
+// Copyright (c) Microsoft Corporation.
+// Licensed under the MIT license.
+
+@desc
+    We conduct the unit test of the on-disk ephemeris store here.
+'''
+import os
+import tempfile
+import unittest
+from src.utils import Time
+from src.models.models_orbital.constellationpropagator import ConstellationPropagator
+from src.models.models_orbital.ephemerisstore import EphemerisStore
+
+class TestEphemerisStore(unittest.TestCase):
+    def setUp(self) -> None:
+        ConstellationPropagator.reset()
+        EphemerisStore.reset()
+        with open("data/starlinks_5_2_brief.txt", "r") as _file:
+            _lines = [_line.strip() for _line in _file.readlines() if _line.strip() != ""]
+        self.__tles = [_lines[_i:_i + 3] for _i in range(0, 15, 3)]
+        self.__start = Time().from_str("2024-05-03 12:00:00")
+        self.__end = Time().from_str("2024-05-03 13:00:00")
+        self.__directory = tempfile.TemporaryDirectory()
+
+    def tearDown(self) -> None:
+        ConstellationPropagator.reset()
+        EphemerisStore.reset()
+        self.__directory.cleanup()
+
+    def register(self):
+        EphemerisStore.setup(self.__directory.name, self.__start, self.__end, 15)
+        for _nodeID, _tle in enumerate(self.__tles):
+            EphemerisStore.register_Satellite(_nodeID + 10, _tle)
+
+    def test_Lookup(self):
+        self.register()
+        _time = self.__start.copy().add_seconds(15 * 37)
+        _location = EphemerisStore.get_Position(12, _time)
+        _expected = ConstellationPropagator.get_Position(12, _time)
+        self.assertAlmostEqual(_location.x, _expected.x, 6)
+        self.assertAlmostEqual(_location.y, _expected.y, 6)
+        self.assertAlmostEqual(_location.z, _expected.z, 6)
+
+        # the end time is on the grid. The times off the grid are left to the caller
+        self.assertIsNotNone(EphemerisStore.get_Position(10, self.__end))
+        self.assertIsNone(EphemerisStore.get_Position(10, self.__start.copy().add_seconds(7)))
+        self.assertIsNone(EphemerisStore.get_Position(10, self.__end.copy().add_seconds(15)))
+        self.assertIsNone(EphemerisStore.get_Position(1000, _time))
+
+        self.assertTrue(os.path.exists(EphemerisStore.get_FilePath()))
+
+    def test_Reuse(self):
+        self.register()
+        EphemerisStore.get_Position(10, self.__start)
+        _filePath = EphemerisStore.get_FilePath()
+        _modifiedTime = os.path.getmtime(_filePath)
+
+        # same TLEs and grid in a new run. The file is memory-mapped, not built again
+        ConstellationPropagator.reset()
+        EphemerisStore.reset()
+        self.register()
+        self.assertEqual(_filePath, EphemerisStore.get_FilePath())
+        EphemerisStore.get_Position(10, self.__start)
+        self.assertEqual(_modifiedTime, os.path.getmtime(_filePath))
+
+        # a different grid is a different file
+        EphemerisStore.setup(self.__directory.name, self.__start, self.__end, 30)
+        self.assertNotEqual(_filePath, EphemerisStore.get_FilePath())
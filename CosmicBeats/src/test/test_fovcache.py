@@ -0,0 +1,70 @@
+'''
+// Copyright (c) Microsoft Corporation.
+// Licensed under the MIT license.
+
+@desc
+    We conduct the unit test of the on-disk cache of the pass times of ModelFovTimeBased here.
+'''
+import os
+import random
+import tempfile
+import unittest
+import numpy as np
+from src.utils import Time
+from src.nodes.inode import ENodeType
+from src.models.models_fov.fovcache import FovCache
+
+class TestFovCache(unittest.TestCase):
+    def setUp(self) -> None:
+        random.seed(0)
+        _start = Time().from_str("2024-05-02 12:00:00")
+        self.__fovDict = {}
+        for _nodeID in range(0, 20):
+            _passes = []
+            for _ in range(0, random.randint(0, 30)):
+                _passStart = _start.copy().add_seconds(random.uniform(0, 86400))
+                _passEnd = _passStart.copy().add_seconds(random.uniform(0, 600))
+                _passes.append((_passStart.to_datetime(), _passEnd.to_datetime(), random.randint(1000, 1010), ENodeType.GS.value))
+            self.__fovDict[_nodeID] = np.array(_passes) if len(_passes) > 0 else None
+        self.__nodes = [(0, ENodeType.SAT.value, ("1 44713U", "2 44713 "), 25.0), (1000, ENodeType.GS.value, (47.6, -122.3, 0.0), 25.0)]
+        self.__key = FovCache.get_Key(self.__nodes, _start.to_unix(), _start.to_unix() + 86400, 15)
+
+    def test_SaveLoad(self):
+        with tempfile.TemporaryDirectory() as _directory:
+            _path = os.path.join(_directory, "fovcache")
+            self.assertIsNone(FovCache.load(_path, self.__key))
+            FovCache.save(_path, self.__key, self.__fovDict)
+
+            _loaded = FovCache.load(_path, self.__key)
+            self.assertIsNotNone(_loaded)
+            for _nodeID, _table in self.__fovDict.items():
+                if _table is None:
+                    self.assertIsNone(_loaded.get(_nodeID))
+                    continue
+                _loadedTable = _loaded[_nodeID]
+                self.assertEqual(_loadedTable.shape, _table.shape)
+                for _row, _loadedRow in zip(_table, _loadedTable):
+                    self.assertAlmostEqual(_row[0].timestamp(), _loadedRow[0].timestamp(), places = 5)
+                    self.assertAlmostEqual(_row[1].timestamp(), _loadedRow[1].timestamp(), places = 5)
+                    self.assertEqual(_row[0].tzinfo, _loadedRow[0].tzinfo)
+                    self.assertEqual((_row[2], _row[3]), (_loadedRow[2], _loadedRow[3]))
+
+            # the table can be updated like a dictionary
+            _loaded[99] = None
+            self.assertIn(99, _loaded)
+
+    def test_Stale(self):
+        with tempfile.TemporaryDirectory() as _directory:
+            FovCache.save(_directory, self.__key, self.__fovDict)
+            for _nodes, _end in [(self.__nodes[:1], 86400), (self.__nodes, 86400 + 15), ([self.__nodes[0], (1000, ENodeType.GS.value, (47.6, -122.3, 0.0), 30.0)], 86400)]:
+                _start = Time().from_str("2024-05-02 12:00:00").to_unix()
+                _key = FovCache.get_Key(_nodes, _start, _start + _end, 15)
+                self.assertNotEqual(_key, self.__key)
+                self.assertIsNone(FovCache.load(_directory, _key))
+
+    def test_Empty(self):
+        with tempfile.TemporaryDirectory() as _directory:
+            FovCache.save(_directory, self.__key, {0: None})
+            _loaded = FovCache.load(_directory, self.__key)
+            self.assertEqual(len(_loaded), 0)
+            self.assertIsNone(_loaded.get(0))
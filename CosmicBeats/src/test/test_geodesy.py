@@ -0,0 +1,63 @@
+'''
+// Copyright (c) Microsoft Corporation.
+// Licensed under the MIT license.
+
+@desc
+    We conduct the unit test of the WGS84 geodesy here.
+    The conversions are compared against the astropy reference implementation kept in Location.
+'''
+import unittest
+import numpy as np
+from src import geodesy
+from src.utils import Location, Time
+
+class TestGeodesy(unittest.TestCase):
+    def setUp(self) -> None:
+        _rng = np.random.default_rng(0)
+        self.__lats = _rng.uniform(-90, 90, 200)
+        self.__lons = _rng.uniform(-180, 180, 200)
+        self.__heights = _rng.uniform(-100, 36000e3, 200)
+
+    def test_RoundTrip(self):
+        _x, _y, _z = geodesy.geodetic_to_ecef(self.__lats, self.__lons, self.__heights)
+        _lats, _lons, _heights = geodesy.ecef_to_geodetic(_x, _y, _z)
+        np.testing.assert_allclose(_lats, self.__lats, atol = 1e-9)
+        np.testing.assert_allclose(_lons, self.__lons, atol = 1e-9)
+        np.testing.assert_allclose(_heights, self.__heights, atol = 1e-6)
+
+        # a single point gives the same as the arrays
+        _lat, _lon, _height = geodesy.ecef_to_geodetic(_x[3], _y[3], _z[3])
+        self.assertIsInstance(_lat, float)
+        self.assertAlmostEqual(_lat, _lats[3], places = 9)
+        self.assertAlmostEqual(_height, _heights[3], places = 5)
+
+    def test_MatchesAstropy(self):
+        for _lat, _lon, _height in zip(self.__lats[:50], self.__lons[:50], self.__heights[:50]):
+            _location = Location().from_lat_long(_lat, _lon, _height)
+            _reference = Location().from_lat_long(_lat, _lon, _height, useAstropy = True)
+            self.assertLess(_location.get_distance(_reference), 1e-3)
+            self.assertEqual(_location.to_lat_long(), _location.to_lat_long(useAstropy = True))
+
+        _lats, _lons, _heights = Location.multiple_to_lat_long(Location.multiple_from_lat_long(self.__lats.tolist(), self.__lons.tolist(), self.__heights.tolist()))
+        np.testing.assert_allclose(_lats, self.__lats, atol = 1e-4)
+
+    def test_ElevationAzimuth(self):
+        _time = Time().from_str("2024-05-02 12:00:00")
+        _ground = Location().from_lat_long(47.6, -122.3, 0)
+        for _lat, _lon in [(45, -120), (50, -122.3), (47.6, -130), (30, -100)]:
+            _sat = Location().from_lat_long(_lat, _lon, 550e3)
+            _alt, _az, _distance = _sat.to_alt_az(_ground, _time)
+            _refAlt, _refAz, _refDistance = _sat.to_alt_az(_ground, _time, useAstropy = True)
+            self.assertAlmostEqual(_alt, _refAlt, places = 3)
+            self.assertAlmostEqual(_az, _refAz, places = 3)
+            self.assertAlmostEqual(_distance, _refDistance, delta = 1)
+
+        # due north, straight up
+        _elevation, _azimuth, _ = geodesy.elevation_azimuth(np.array(geodesy.geodetic_to_ecef([48.6, 47.6], -122.3, [0, 1000])).T, _ground.to_tuple())
+        self.assertAlmostEqual(min(float(_azimuth[0]), 360 - float(_azimuth[0])), 0, places = 6)
+        self.assertAlmostEqual(float(_elevation[1]), 90, places = 6)
+
+    def test_GreatCircle(self):
+        self.assertAlmostEqual(float(geodesy.great_circle_distance(0, 0, 0, 90)), np.pi / 2 * geodesy.EARTH_MEAN_RADIUS, places = 3)
+        self.assertAlmostEqual(float(geodesy.great_circle_distance(10, 20, 10, 20)), 0)
+        np.testing.assert_allclose(geodesy.great_circle_distance([0, 90], 0, [-90, -90], 180), [np.pi / 2 * geodesy.EARTH_MEAN_RADIUS, np.pi * geodesy.EARTH_MEAN_RADIUS])
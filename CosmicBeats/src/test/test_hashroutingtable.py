@@ -0,0 +1,41 @@
+'''
+// Copyright (c) Microsoft Corporation.
+// Licensed under the MIT license.
+
+@desc
+    We conduct the unit test of the routing table of the hash buckets here.
+    The bucket of a color must be the first satellite of the color found by the BFS from a satellite, with the hop vector of its path,
+    and a cached table must only be loaded for the same ISLs and colors.
+'''
+import unittest
+import tempfile
+from src.models.models_cdn.hashroutingtable import HashRoutingTable
+
+class TestHashRoutingTable(unittest.TestCase):
+    def setUp(self) -> None:
+        # a line 10-11-12-13 along the first axis, and 13-10 along the second one
+        self.__nodeIDs = [10, 11, 12, 13]
+        self.__neighbors = [[-1, 11, 13, -1], [10, 12, -1, -1], [11, 13, -1, -1], [12, -1, -1, 10]]
+        self.__colors = [0, 1, 0, 2]
+
+    def test_Build(self):
+        _table = HashRoutingTable.build(self.__nodeIDs, self.__neighbors, self.__colors, 4)
+        self.assertEqual(_table.get_Routes(10), ([10, 11, 13, -1], [[0, 0], [1, 0], [0, 1], -1]))
+        self.assertEqual(_table.get_Routes(11), ([10, 11, 13, -1], [[1, 0], [0, 0], [1, 1], -1]))
+        self.assertEqual(_table.get_Routes(12), ([12, 11, 13, -1], [[0, 0], [1, 0], [1, 0], -1]))
+
+    def test_Cache(self):
+        with tempfile.TemporaryDirectory() as _directory:
+            HashRoutingTable.set_CacheDirectory(_directory)
+            try:
+                _, _loaded = HashRoutingTable.prepare(self.__nodeIDs, self.__neighbors, self.__colors, 4)
+                self.assertFalse(_loaded)
+                _table, _loaded = HashRoutingTable.prepare(self.__nodeIDs, self.__neighbors, self.__colors, 4)
+                self.assertTrue(_loaded)
+                self.assertEqual(_table.get_Routes(13), ([12, 11, 13, -1], [[1, 0], [2, 0], [0, 0], -1]))
+
+                # other colors are built again
+                _, _loaded = HashRoutingTable.prepare(self.__nodeIDs, self.__neighbors, [0, 1, 2, 2], 4)
+                self.assertFalse(_loaded)
+            finally:
+                HashRoutingTable.set_CacheDirectory(None)
@@ -0,0 +1,36 @@
+'''
+// Copyright (c) Microsoft Corporation.
+// Licensed under the MIT license.
+
+@desc
+    We conduct the unit test of the lazy init dictionaries here.
+    Every listed implementation must resolve to its init method.
+'''
+import unittest
+from src.sim.lazyinitdictionary import LazyInitDictionary
+from src.sim.modelinits import modelInitDictionary
+from src.sim.nodeinits import nodeInitDictionary
+from src.sim.loggerinits import loggerInitDictionary
+
+class TestLazyInitDictionary(unittest.TestCase):
+    def test_Resolve(self):
+        _dictionary = LazyInitDictionary({"SatelliteBasic": "src.nodes.satellitebasic"})
+        self.assertIn("SatelliteBasic", _dictionary)
+        self.assertNotIn("GSBasic", _dictionary)
+
+        from src.nodes.satellitebasic import init_SatelliteBasic
+        self.assertIs(_dictionary["SatelliteBasic"], init_SatelliteBasic)
+        self.assertIn(("SatelliteBasic", "src.nodes.satellitebasic"), [_entry[:2] for _entry in LazyInitDictionary.get_ImportReport()])
+        with self.assertRaises(KeyError):
+            _dictionary["GSBasic"]
+
+        # a callable is used as it is
+        _init = lambda *args: None
+        _dictionary["MyNode"] = _init
+        self.assertIs(_dictionary["MyNode"], _init)
+        self.assertEqual(len(_dictionary), 2)
+
+    def test_Listed(self):
+        for _dictionary in [modelInitDictionary, nodeInitDictionary, loggerInitDictionary]:
+            for _iName in _dictionary:
+                self.assertTrue(callable(_dictionary[_iName]), _iName)
@@ -0,0 +1,103 @@
+'''
+// Copyright (c) Microsoft Corporation.
+// Licensed under the MIT license.
+
+@desc
+    We conduct the unit test of ManagerMultiprocess here.
+    A small CDN config sharded over several processes must write the same logs as the sequential run of ManagerParallel,
+    including the results of the requests of the users, which come back from the shards owning the satellites.
+'''
+import unittest
+import os
+import sys
+import json
+import tempfile
+import subprocess
+import multiprocessing as mp
+from src.sim.pendingresult import PendingResult
+
+_configPath = os.path.join("configs", "testconfigs", "config_testcdn.json")
+_ephemerisPath = os.path.join("dependencies", "de440s.bsp")
+
+class TestManagerMultiprocess(unittest.TestCase):
+    def setUp(self) -> None:
+        self.__dir = tempfile.TemporaryDirectory()
+
+    def tearDown(self) -> None:
+        self.__dir.cleanup()
+
+    def test_PendingResult(self):
+        _values = []
+        _result = PendingResult()
+        _result.add_Callback(_values.append)
+        PendingResult.when_Ready(_result, lambda _value: _values.append(("second", _value)))
+        self.assertFalse(_result.isReady)
+        self.assertEqual(_values, [])
+
+        # the callbacks run in order once the value arrives, and right away after that
+        _result.set_Result(3)
+        self.assertTrue(_result.isReady)
+        _result.add_Callback(_values.append)
+        PendingResult.when_Ready(4, _values.append)
+        self.assertEqual(_values, [3, ("second", 3), 3, 4])
+        with self.assertRaises(Exception):
+            _result.set_Result(5)
+
+    def __run_Config(
+            self,
+            _name: str,
+            _strategy: str,
+            *_options: str):
+        '''
+        Runs the test config with a request strategy and its logs in a folder of the test directory
+        '''
+        with open(_configPath) as _file:
+            _config = json.load(_file)
+        _config["simlogsetup"]["logfolder"] = os.path.join(self.__dir.name, _name)
+        for _node in _config["topologies"][0]["nodes"]:
+            for _model in _node["models"]:
+                if "handle_requests_strategy" in _model:
+                    _model["handle_requests_strategy"] = _strategy
+        _path = os.path.join(self.__dir.name, _name + ".json")
+        with open(_path, "w") as _file:
+            json.dump(_config, _file)
+        subprocess.run([sys.executable, "main.py", _path, *_options], check = True, stdout = subprocess.DEVNULL, stderr = subprocess.DEVNULL)
+
+    def __read_Logs(self, _name: str) -> dict:
+        _logs = {}
+        _folder = os.path.join(self.__dir.name, _name)
+        for _fileName in sorted(os.listdir(_folder)):
+            with open(os.path.join(_folder, _fileName)) as _file:
+                _logs[_fileName] = _file.read()
+        return _logs
+
+    def __check_Sharded(
+            self,
+            _strategy: str,
+            _numsOfProcesses: 'list[int]') -> 'list[str]':
+        '''
+        Runs the test config sequentially and sharded, compares the logs, and returns the [Request Result] lines
+        '''
+        self.__run_Config("sequential", _strategy)
+        _sequential = self.__read_Logs("sequential")
+        for _numOfProcesses in _numsOfProcesses:
+            _name = f"sharded_{_numOfProcesses}"
+            self.__run_Config(_name, _strategy, "--processes", str(_numOfProcesses))
+            self.assertEqual(self.__read_Logs(_name), _sequential, f"{_numOfProcesses} processes")
+
+        _results = [_line for _log in _sequential.values() for _line in _log.splitlines() if "[Request Result]" in _line]
+        self.assertTrue(len(_results) > 0)
+        return _results
+
+    @unittest.skipUnless(os.path.isfile(_ephemerisPath), "The ephemeris file is needed to run a config")
+    @unittest.skipUnless("fork" in mp.get_all_start_methods(), "The shards are forked")
+    def test_ShardedLRU(self):
+        # the satellites look up the caches of their neighbors, some of which are in other shards
+        _results = self.__check_Sharded("check_lru", [2, 3])
+        self.assertFalse(any(_line.endswith(",None\"") for _line in _results))
+
+    @unittest.skipUnless(os.path.isfile(_ephemerisPath), "The ephemeris file is needed to run a config")
+    @unittest.skipUnless("fork" in mp.get_all_start_methods(), "The shards are forked")
+    def test_ShardedHashCheck(self):
+        # the satellites fan the requests out to the buckets, some of which are in other shards
+        self.__check_Sharded("hash_check", [2])
@@ -0,0 +1,58 @@
+'''
+// Copyright (c) Microsoft Corporation.
+// Licensed under the MIT license.
+
+@desc
+    We conduct the unit test of the integer encoding of the object IDs here.
+    The codes must follow the first requests across the traces, and an encoded directory must only be reused while the traces are the same.
+'''
+import unittest
+import os
+import json
+import tempfile
+import hashlib
+from src.models.models_cdn.objectdictionary import ObjectDictionary
+
+class TestObjectDictionary(unittest.TestCase):
+    def setUp(self) -> None:
+        self.__dir = tempfile.TemporaryDirectory()
+        self.__traces = [os.path.join(self.__dir.name, "trace0.txt"), os.path.join(self.__dir.name, "trace1.txt")]
+        with open(self.__traces[0], "w") as _file:
+            _file.write("0:objA:10\n15:objB:20\n30:objA:10\n")
+        with open(self.__traces[1], "w") as _file:
+            _file.write("0:objB:20\n15:objC:5\n")
+        self.__config = os.path.join(self.__dir.name, "config.json")
+        with open(self.__config, "w") as _file:
+            json.dump({"topologies": [{"nodes": [{"nodeid": 0}, {"nodeid": 1000, "trace": self.__traces[0]}, {"nodeid": 1001, "trace": self.__traces[1]}]}]}, _file)
+        self.__output = os.path.join(self.__dir.name, "config_objectids")
+
+    def tearDown(self) -> None:
+        ObjectDictionary.activate(None)
+        self.__dir.cleanup()
+
+    def test_EncodeTraces(self):
+        _dictionary, _loaded = ObjectDictionary.prepare(self.__config, self.__output)
+        self.assertFalse(_loaded)
+        self.assertEqual(len(_dictionary), 3)
+        with open(_dictionary.get_EncodedTrace(self.__traces[1])) as _file:
+            self.assertEqual(_file.read(), "0:1:20\n15:2:5\n")
+
+        ObjectDictionary.activate(_dictionary)
+        self.assertEqual([ObjectDictionary.get_Name(_code) for _code in range(3)], ["objA", "objB", "objC"])
+        self.assertEqual(ObjectDictionary.get_Name("objB"), "objB")
+        self.assertEqual(_dictionary.get_Colors(25), [int(hashlib.md5(_name.encode()).hexdigest(), 16) % 25 for _name in ["objA", "objB", "objC"]])
+        with self.assertRaises(Exception):
+            _dictionary.get_EncodedTrace(self.__config)
+
+    def test_Reuse(self):
+        ObjectDictionary.prepare(self.__config, self.__output)
+        _dictionary, _loaded = ObjectDictionary.prepare(self.__config, self.__output)
+        self.assertTrue(_loaded)
+        self.assertEqual(len(_dictionary), 3)
+
+        # a changed trace is encoded again
+        with open(self.__traces[1], "a") as _file:
+            _file.write("30:objD:1\n")
+        _dictionary, _loaded = ObjectDictionary.prepare(self.__config, self.__output)
+        self.assertFalse(_loaded)
+        self.assertEqual(len(_dictionary), 4)
@@ -0,0 +1,59 @@
+'''
+// Copyright (c) Microsoft Corporation.
+// Licensed under the MIT license.
+
+@desc
+    We conduct the unit test of the interpolated orbit positions here.
+    The interpolated positions and velocities are compared against exact SGP4 propagation.
+'''
+import unittest
+import numpy as np
+from src.utils import Time
+from src.models.models_orbital.constellationpropagator import ConstellationPropagator
+from src.models.models_orbital.orbitinterpolator import OrbitInterpolator
+
+class TestOrbitInterpolator(unittest.TestCase):
+    def setUp(self) -> None:
+        ConstellationPropagator.reset()
+        OrbitInterpolator.reset()
+        with open("data/starlinks_5_2_brief.txt", "r") as _file:
+            _lines = [_line.strip() for _line in _file.readlines() if _line.strip() != ""]
+        for _nodeID in range(0, 8):
+            ConstellationPropagator.register_Satellite(_nodeID, _lines[_nodeID * 3:_nodeID * 3 + 3])
+        self.__start = Time().from_str("2024-05-02 12:00:00")
+        self.__end = Time().from_str("2024-05-02 18:00:00")
+
+    def tearDown(self) -> None:
+        ConstellationPropagator.reset()
+        OrbitInterpolator.reset()
+
+    def test_ErrorBound(self):
+        OrbitInterpolator.setup(60, 1.0, self.__start, self.__end)
+        _time = self.__start.copy()
+        for _ in range(0, 50):
+            _time.add_seconds(41.7)
+            _location = OrbitInterpolator.get_Position(3, _time)
+            _exact = ConstellationPropagator.get_Position(3, _time)
+            _error = np.linalg.norm([_location.x - _exact.x, _location.y - _exact.y, _location.z - _exact.z])
+            self.assertLess(_error, 1.0)
+
+            _velocity = np.array(OrbitInterpolator.get_Velocity(3, _time))
+            _exactVelocity = np.array(ConstellationPropagator.get_Velocity(3, _time))
+            self.assertLess(np.linalg.norm(_velocity - _exactVelocity), 0.1)
+
+        _report = OrbitInterpolator.get_Report()
+        self.assertTrue(_report["withinTolerance"])
+        self.assertEqual(_report["stride"], 60)
+
+    def test_StrideHalving(self):
+        # a 10 minute stride can't meet a 1 meter bound. It should be halved until it does
+        OrbitInterpolator.setup(600, 1.0, self.__start, self.__end)
+        _unixTimes = self.__start.to_unix() + np.linspace(0, 6 * 3600, 200)
+        _positions, _ = OrbitInterpolator.interpolate(_unixTimes)
+        _exact, _ = ConstellationPropagator.propagate(_unixTimes)
+
+        _report = OrbitInterpolator.get_Report()
+        self.assertLess(_report["stride"], 600)
+        self.assertEqual(_report["requestedStride"], 600)
+        self.assertLessEqual(_report["maxPositionError"], 1.0)
+        self.assertLess(np.max(np.linalg.norm(_positions - _exact, axis=2)), 1.0)
@@ -0,0 +1,70 @@
+'''
+// Copyright (c) Microsoft Corporation.
+// Licensed under the MIT license.
+
+@desc
+    We conduct the unit test of the vectorized pass finder here.
+    The passes are compared against the skyfield find_events search that ModelOrbit get_Passes uses.
+'''
+import unittest
+import numpy as np
+from skyfield.api import load, wgs84, EarthSatellite
+from src.utils import Time
+from src.models.models_orbital.constellationpropagator import ConstellationPropagator
+from src.models.models_fov.passfinder import PassFinder
+
+class TestPassFinder(unittest.TestCase):
+    def setUp(self) -> None:
+        ConstellationPropagator.reset()
+        with open("data/starlinks_5_2_brief.txt", "r") as _file:
+            _lines = [_line.strip() for _line in _file.readlines() if _line.strip() != ""]
+        self.__tles = [_lines[_i:_i + 3] for _i in range(0, 36, 3)]
+        for _nodeID, _tle in enumerate(self.__tles):
+            ConstellationPropagator.register_Satellite(_nodeID, _tle)
+        self.__grounds = [(19.4326, -99.1332, 0.0), (47.6, -122.3, 50.0), (-33.9, 151.2, 10.0)]
+        self.__start = Time().from_str("2024-05-02 12:00:00")
+        self.__end = Time().from_str("2024-05-02 20:00:00")
+        self.__delta = 15
+
+    def tearDown(self) -> None:
+        ConstellationPropagator.reset()
+
+    def find_SkyfieldPasses(self, _tle, _ground):
+        # same as ModelOrbit get_Passes
+        _ts = load.timescale()
+        _sat = EarthSatellite(_tle[1], _tle[2], _tle[0], _ts)
+        _t, _events = _sat.find_events(wgs84.latlon(_ground[0], _ground[1], elevation_m=_ground[2]),
+                                       _ts.utc(self.__start.copy().add_seconds(-600).to_datetime()),
+                                       _ts.utc(self.__end.copy().add_seconds(600).to_datetime()), altitude_degrees=25)
+        _events = [(Time().from_datetime(_ti.utc_datetime()).to_unix(), _event) for _ti, _event in zip(_t, _events) if _event != 1]
+        _events = [(_ti, _event) for _ti, _event in _events if _ti >= self.__start.to_unix() and _ti <= self.__end.to_unix()]
+        _passes = []
+        for _ti, _event in _events:
+            if _event == 0:
+                _passes.append([_ti, self.__end.to_unix()])
+            elif len(_passes) == 0:
+                _passes.append([self.__start.to_unix(), _ti])
+            else:
+                _passes[-1][1] = _ti
+        return _passes
+
+    def test_MatchesSkyfield(self):
+        _positions, _up = PassFinder.get_GroundFrames(*zip(*self.__grounds))
+        _minElevations = np.full((len(self.__tles), len(self.__grounds)), 25.0)
+        _sat, _ground, _starts, _ends = PassFinder.find_Passes(np.arange(len(self.__tles)), _positions, _up, _minElevations,
+                                                               self.__start.to_unix(), self.__end.to_unix(), self.__delta)
+        self.assertTrue(np.all(np.diff(_starts) >= 0))
+
+        for _satPos, _tle in enumerate(self.__tles):
+            for _groundPos, _groundNode in enumerate(self.__grounds):
+                _expected = self.find_SkyfieldPasses(_tle, _groundNode)
+                _mask = (_sat == _satPos) & (_ground == _groundPos)
+                _found = list(zip(_starts[_mask], _ends[_mask]))
+
+                # passes shorter than a time step can fall between two samples
+                _expected = [_pass for _pass in _expected if _pass[1] - _pass[0] >= self.__delta or
+                             any(abs(_pass[0] - _start) <= self.__delta for _start, _ in _found)]
+                self.assertEqual(len(_found), len(_expected))
+                for (_start, _end), (_expectedStart, _expectedEnd) in zip(_found, _expected):
+                    self.assertLess(abs(_start - _expectedStart), self.__delta)
+                    self.assertLess(abs(_end - _expectedEnd), self.__delta)
@@ -0,0 +1,50 @@
+'''
+// Copyright (c) Microsoft Corporation.
+// Licensed under the MIT license.
+
+@desc
+    We conduct the unit test of the interval index over the pass times here.
+    The results are compared against the linear scan over the datetimes that ModelFovTimeBased get_View used to do.
+'''
+import random
+import unittest
+import numpy as np
+from src.utils import Time
+from src.nodes.inode import ENodeType
+from src.models.models_fov.passindex import PassIndex
+
+class TestPassIndex(unittest.TestCase):
+    def setUp(self) -> None:
+        random.seed(0)
+        _start = Time().from_str("2024-05-02 12:00:00")
+        _passes = []
+        for _ in range(0, 500):
+            _passStart = _start.copy().add_seconds(random.uniform(0, 86400))
+            _passEnd = _passStart.copy().add_seconds(random.choice([0, 15, random.uniform(30, 600)]))
+            _nodeType = random.choice([ENodeType.SAT, ENodeType.GS, ENodeType.USER])
+            _passes.append((_passStart.to_datetime(), _passEnd.to_datetime(), random.randint(0, 50), _nodeType.value))
+        _passes = np.array(_passes)
+        self.__passes = _passes[_passes[:,0].argsort()]
+        self.__start = _start
+
+    def scan(self, _time, _nodeTypeValues):
+        _datetime = _time.to_datetime()
+        _inds = np.argwhere((self.__passes[:,0] <= _datetime) & (self.__passes[:,1] >= _datetime) & (np.isin(self.__passes[:,3], _nodeTypeValues))).flatten()
+        return [i[2] for i in self.__passes[_inds]]
+
+    def test_MatchesScan(self):
+        _index = PassIndex(self.__passes)
+        _types = [[ENodeType.SAT.value], [ENodeType.GS.value, ENodeType.USER.value], [ENodeType.IOTDEVICE.value]]
+        _time = self.__start.copy().add_seconds(-30)
+        for _ in range(0, 3000):
+            _time.add_seconds(30)
+            for _nodeTypeValues in _types:
+                self.assertEqual(_index.get_Visible(_time.to_unix(), _nodeTypeValues), self.scan(_time, _nodeTypeValues))
+
+        # both ends of a pass are inclusive
+        _first = self.__passes[0]
+        self.assertIn(_first[2], _index.get_Visible(Time().from_datetime(_first[0]).to_unix(), [_first[3]]))
+        self.assertIn(_first[2], _index.get_Visible(Time().from_datetime(_first[1]).to_unix(), [_first[3]]))
+
+    def test_Empty(self):
+        self.assertEqual(PassIndex(None).get_Visible(0, [ENodeType.SAT.value]), [])
@@ -0,0 +1,129 @@
+'''
+// Copyright (c) Microsoft Corporation.
+// Licensed under the MIT license.
+
+@desc
+    We conduct the unit test of the profiler here.
+    A node with a model is instrumented, and the calls are checked in the report.
+'''
+import unittest
+import os
+import math
+import csv
+import json
+import tempfile
+from src.sim.profiler import Profiler, CallStats
+
+class _Model():
+    iName = "ModelTest"
+
+    def call_APIs(self, _apiName, **_kwargs):
+        return len(_kwargs.get("requests", []))
+
+    def get_APIHandle(self, _apiName):
+        return lambda **_kwargs: self.call_APIs(_apiName, **_kwargs)
+
+    def Execute(self):
+        self.call_APIs("get_Nothing")
+
+class _Node():
+    iName = "NodeTest"
+
+    def __init__(self):
+        self.__models = [_Model()]
+
+    def get_Models(self):
+        return self.__models
+
+    def Execute(self):
+        for _model in self.__models:
+            _model.Execute()
+
+class _Topology():
+    def __init__(self):
+        self.nodes = [_Node(), _Node()]
+
+class TestProfiler(unittest.TestCase):
+    def setUp(self) -> None:
+        self.__dir = tempfile.TemporaryDirectory()
+
+    def tearDown(self) -> None:
+        Profiler.reset()
+        self.__dir.cleanup()
+
+    def test_Disabled(self):
+        _topology = _Topology()
+        _execute = _topology.nodes[0].Execute
+        Profiler.instrument_Topologies([_topology])
+        self.assertEqual(_topology.nodes[0].Execute, _execute)
+        self.assertNotIn("call_APIs", vars(_topology.nodes[0].get_Models()[0]))
+
+    def test_Report(self):
+        _path = os.path.join(self.__dir.name, "profile.json")
+        Profiler.enable(_path)
+        _topology = _Topology()
+        Profiler.instrument_Topologies([_topology])
+        for _ in range(3):
+            for _node in _topology.nodes:
+                _node.Execute()
+            Profiler.record_Epoch(0.5)
+        _model = _topology.nodes[0].get_Models()[0]
+        self.assertEqual(_model.call_APIs("handle_requests", requests = [1, 2, 3]), 3)
+        self.assertEqual(_model.get_APIHandle("handle_requests")(requests = [1]), 1)
+        Profiler.write_Report()
+
+        with open(_path) as _file:
+            _report = json.load(_file)
+        _calls = {(_call["name"], _call["api"]): _call["calls"] for _call in _report["calls"]}
+        self.assertEqual(_calls[("NodeTest", "Execute")], 6)
+        self.assertEqual(_calls[("ModelTest", "Execute")], 6)
+        self.assertEqual(_calls[("ModelTest", "get_Nothing")], 6)
+        self.assertEqual(_calls[("ModelTest", "handle_requests")], 2)
+        self.assertEqual(_report["requests"], 4)
+        self.assertEqual(_report["epochs"]["epochs"], 3)
+        self.assertAlmostEqual(_report["epochs"]["p50_ms"], 500)
+
+        # the records of another process are merged
+        _stats = CallStats()
+        _stats.add(0.1)
+        Profiler.merge_State({"records": {("ModelTest", "get_Nothing"): _stats}, "requests": 2})
+        _report = Profiler.get_Report()
+        self.assertEqual(_report["requests"], 6)
+        self.assertEqual({(_call["name"], _call["api"]): _call["calls"] for _call in _report["calls"]}[("ModelTest", "get_Nothing")], 7)
+
+    def test_CallStats(self):
+        # the percentiles of the histogram are within a bucket of the exact ones
+        _times = [1e-6 * 1.05 ** i for i in range(300)]
+        _stats = CallStats()
+        for _time in _times:
+            _stats.add(_time)
+        _width = 2 ** (1 / CallStats._bucketsPerOctave)
+        for _percent in (50, 99):
+            _exact = sorted(_times)[math.ceil(len(_times) * _percent / 100) - 1]
+            self.assertLessEqual(_stats.get_Percentile(_percent), _exact * _width)
+            self.assertGreaterEqual(_stats.get_Percentile(_percent), _exact / _width)
+        self.assertEqual(_stats.count, 300)
+        self.assertAlmostEqual(_stats.total, sum(_times))
+        self.assertEqual(_stats.max, _times[-1])
+
+        # the memory doesn't grow with the calls, and the merged stats are the stats of all the times
+        _other = CallStats()
+        for _time in _times[::-1]:
+            _other.add(_time)
+        self.assertEqual(len(_other.buckets), CallStats._numOfBuckets)
+        _other.merge(_stats)
+        self.assertEqual(_other.count, 600)
+        self.assertEqual(_other.get_Percentile(50), _stats.get_Percentile(50))
+        self.assertEqual(CallStats().get_Percentile(50), 0.)
+
+    def test_CSV(self):
+        _path = os.path.join(self.__dir.name, "profile.csv")
+        Profiler.enable(_path)
+        _topology = _Topology()
+        Profiler.instrument_Topologies([_topology])
+        _topology.nodes[0].Execute()
+        Profiler.record_Epoch(0.25)
+        Profiler.write_Report()
+        with open(_path) as _file:
+            _rows = list(csv.DictReader(_file))
+        self.assertIn(("Manager", "epoch"), [(_row["name"], _row["api"]) for _row in _rows])
@@ -0,0 +1,64 @@
+'''
+// Copyright (c) Microsoft Corporation.
+// Licensed under the MIT license.
+
+@desc
+    We conduct the unit test of the binary request record sink here.
+    The rows must come back column by column, and a checkpoint position must drop the rows written after it.
+'''
+import unittest
+import os
+import json
+import tempfile
+import numpy as np
+from src.simlogging.recordsinkbinary import RecordSinkBinary
+
+class TestRecordSinkBinary(unittest.TestCase):
+    def setUp(self) -> None:
+        self.__dir = tempfile.TemporaryDirectory()
+        self.__path = os.path.join(self.__dir.name, "Log_TestRecords.rec")
+
+    def tearDown(self) -> None:
+        self.__dir.cleanup()
+
+    def read_Column(self, _name: str) -> np.ndarray:
+        with open(os.path.join(self.__path, "header.json")) as _file:
+            _dtype = json.load(_file)["dtypes"][_name]
+        return np.fromfile(os.path.join(self.__path, _name + ".bin"), dtype=_dtype)
+
+    def test_WriteRecords(self):
+        _sink = RecordSinkBinary(self.__path, 8, 2)
+        _sink.write_Records(100, 1003, [1, 0], [["obj1", 5], ["obj22", 7]])
+        _sink.write_Records(115, 7, [0, 2], [["o", 1]])
+        _sink.flush()
+        self.assertEqual(self.read_Column("time").tolist(), [100, 100, 115])
+        self.assertEqual(self.read_Column("user").tolist(), [1003, 1003, 7])
+        self.assertEqual(self.read_Column("hops").reshape(-1, 2).tolist(), [[1, 0], [1, 0], [0, 2]])
+        self.assertEqual(self.read_Column("object").tolist(), [b"obj1", b"obj22", b"o"])
+        self.assertEqual(self.read_Column("size").tolist(), [5, 7, 1])
+
+        with self.assertRaises(Exception):
+            _sink.write_Records(130, 7, [0, 0], [["object_id_too_long", 1]])
+        # the width is in bytes, not characters
+        with self.assertRaises(Exception):
+            _sink.write_Records(130, 7, [0, 0], [["объект", 1]])
+        _sink.write_Records(130, 7, [0, 0], [["obé", 1]])
+        _sink.flush()
+        self.assertEqual(self.read_Column("object").tolist()[-1].decode(), "obé")
+
+    def test_Positions(self):
+        _sink = RecordSinkBinary(self.__path)
+        _sink.write_Records(100, 1, [0, 0], [["a", 1]])
+        RecordSinkBinary.flush_All()
+        _positions = RecordSinkBinary.get_Positions()
+        _sink.write_Records(115, 1, [0, 0], [["b", 2]])
+        _sink.flush()
+
+        # a resumed run keeps the columns and drops the rows written after the checkpoint
+        RecordSinkBinary.keep_ExistingFiles()
+        try:
+            RecordSinkBinary(self.__path)
+        finally:
+            RecordSinkBinary.keep_ExistingFiles(False)
+        RecordSinkBinary.restore_Positions(_positions)
+        self.assertEqual(self.read_Column("object").tolist(), [b"a"])
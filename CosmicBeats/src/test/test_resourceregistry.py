@@ -0,0 +1,54 @@
+'''
+// Copyright (c) Microsoft Corporation.
+// Licensed under the MIT license.
+
+@desc
+    We conduct the unit test of the resource registry here.
+    The shared resources are checked to be loaded once and reloaded only when the file changes.
+'''
+import unittest
+import os
+import json
+import tempfile
+from src.sim.resourceregistry import ResourceRegistry
+
+class TestResourceRegistry(unittest.TestCase):
+    def setUp(self) -> None:
+        ResourceRegistry.clear()
+        self.__dir = tempfile.TemporaryDirectory()
+        self.__path = os.path.join(self.__dir.name, "colors.json")
+        with open(self.__path, "w") as _file:
+            json.dump({"0": 3, "1": 5}, _file)
+
+    def tearDown(self) -> None:
+        ResourceRegistry.clear()
+        self.__dir.cleanup()
+
+    def test_JSON(self):
+        _data = ResourceRegistry.load_JSON(self.__path)
+        self.assertEqual(_data, {"0": 3, "1": 5})
+        self.assertIs(ResourceRegistry.load_JSON(os.path.join(self.__dir.name, ".", "colors.json")), _data)
+        self.assertEqual(ResourceRegistry.get_Stats()["json"], (1, 1))
+
+        # a modified file is parsed again
+        with open(self.__path, "w") as _file:
+            json.dump({"0": 4}, _file)
+        os.utime(self.__path, (0, os.path.getmtime(self.__path) + 10))
+        self.assertEqual(ResourceRegistry.load_JSON(self.__path), {"0": 4})
+        self.assertEqual(ResourceRegistry.get_Stats()["json"], (2, 1))
+
+    def test_Resource(self):
+        _loads = []
+        _loader = lambda: _loads.append(1) or len(_loads)
+        self.assertEqual(ResourceRegistry.get_Resource("counter", "a", _loader), 1)
+        self.assertEqual(ResourceRegistry.get_Resource("counter", "a", _loader), 1)
+        self.assertEqual(ResourceRegistry.get_Resource("counter", "b", _loader), 2)
+        self.assertEqual(ResourceRegistry.get_Stats()["counter"], (2, 1))
+
+    def test_EarthSatellite(self):
+        _tle = ["1 50985U 22002B   22290.71715197  .00032099  00000+0  13424-2 0  9994",
+                "2 50985  97.4784 357.5505 0011839 353.6613   6.4472 15.23462773 42039"]
+        _satellite = ResourceRegistry.get_EarthSatellite(_tle)
+        self.assertIs(ResourceRegistry.get_EarthSatellite(["SAT"] + _tle), _satellite)
+        with self.assertRaises(Exception):
+            ResourceRegistry.get_EarthSatellite(_tle[:1])
@@ -0,0 +1,52 @@
+'''
+// Copyright (c) Microsoft Corporation.
+// Licensed under the MIT license.
+
+@desc
+    We conduct the unit test of the Time class and the shared simulation clock here.
+    Time is checked against the datetime arithmetic it replaces.
+'''
+import unittest
+from datetime import datetime, timedelta, timezone
+from src.utils import Time, SimClock
+
+class TestTime(unittest.TestCase):
+    def test_Conversions(self):
+        _time = Time().from_str("2024-05-02 12:00:00")
+        _datetime = datetime(2024, 5, 2, 12, 0, 0, tzinfo=timezone.utc)
+        self.assertEqual(_time.to_datetime(), _datetime)
+        self.assertEqual(_time.to_unix(), _datetime.timestamp())
+        self.assertEqual(Time().from_unix(_time.to_unix()), _time)
+        self.assertEqual(Time().from_datetime(_datetime.replace(tzinfo=None)), _time)
+
+        for _seconds in [15, 0.25, 1e-6, 86400 * 3 + 0.5, -7.75]:
+            _added = _time.copy().add_seconds(_seconds)
+            _expected = _datetime + timedelta(seconds = _seconds)
+            self.assertEqual(_added.to_datetime(), _expected)
+            self.assertEqual(_added.to_unix(), _expected.timestamp())
+            self.assertEqual(_added.to_str(), _expected.strftime("%Y-%m-%d %H:%M:%S.%f" if _expected.microsecond != 0 else "%Y-%m-%d %H:%M:%S"))
+            self.assertEqual(Time.difference_in_seconds(_added, _time), (_expected - _datetime).total_seconds())
+
+        # the copy doesn't change with the original
+        _copy = _time.copy()
+        _time.add_seconds(1)
+        self.assertLess(_copy, _time)
+        self.assertNotEqual(_copy, _time)
+        self.assertEqual(_copy.to_str(), "2024-05-02 12:00:00")
+
+    def test_Clock(self):
+        _start = Time().from_str("2024-05-02 12:00:00")
+        _clock = SimClock.get_Clock(_start, 15)
+        self.assertIs(_clock, SimClock.get_Clock(_start.copy(), 15.0))
+        self.assertIsNot(_clock, SimClock.get_Clock(_start, 30))
+
+        _time = _start.copy()
+        for _epoch in range(0, 100):
+            self.assertEqual(_clock.get_Time(_epoch), _time)
+            _time.add_seconds(15)
+        self.assertIs(_clock.get_Time(7), _clock.get_Time(7))
+
+        # the shared times are read only
+        with self.assertRaises(Exception):
+            _clock.get_Time(7).add_seconds(1)
+        self.assertEqual(_clock.get_Time(7).copy().add_seconds(15), _clock.get_Time(8))
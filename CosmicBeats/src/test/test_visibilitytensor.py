@@ -0,0 +1,87 @@
+'''
+// Copyright (c) Microsoft Corporation.
+// Licensed under the MIT license.
+
+@desc
+    We conduct the unit test of the precomputed visibility tensor here.
+    The views are compared against the elevation angles computed for every epoch one by one.
+'''
+import os
+import tempfile
+import unittest
+import numpy as np
+from src.utils import Time
+from src.nodes.inode import ENodeType
+from src.models.models_orbital.constellationpropagator import ConstellationPropagator
+from src.models.models_fov.passfinder import PassFinder
+from src.models.models_fov.visibilitytensor import VisibilityTensor
+
+class TestVisibilityTensor(unittest.TestCase):
+    def setUp(self) -> None:
+        ConstellationPropagator.reset()
+        with open("data/starlinks_5_2_brief.txt", "r") as _file:
+            _lines = [_line.strip() for _line in _file.readlines() if _line.strip() != ""]
+        self.__tles = [_lines[_i:_i + 3] for _i in range(0, 36, 3)]
+        self.__satIDs = list(range(0, len(self.__tles)))
+        for _nodeID, _tle in zip(self.__satIDs, self.__tles):
+            ConstellationPropagator.register_Satellite(_nodeID, _tle)
+        self.__grounds = [(19.4326, -99.1332, 0.0), (47.6, -122.3, 50.0), (-33.9, 151.2, 10.0)]
+        self.__groundIDs = [100, 101, 102]
+        self.__groundTypes = [ENodeType.GS.value, ENodeType.USER.value, ENodeType.GS.value]
+        self.__start = Time().from_str("2024-05-02 12:00:00").to_unix()
+        self.__end = Time().from_str("2024-05-02 16:00:00").to_unix()
+        self.__delta = 30
+        self.__minElevations = np.full((len(self.__tles), len(self.__grounds)), 25.0)
+        self.__key = VisibilityTensor.get_Key(self.__satIDs, [tuple(_tle[-2:]) for _tle in self.__tles], self.__groundIDs, self.__groundTypes,
+                                              self.__grounds, self.__minElevations, self.__start, self.__end, self.__delta)
+        self.__positions, self.__up = PassFinder.get_GroundFrames(*zip(*self.__grounds))
+        self.__tensor = VisibilityTensor.build(self.__key, self.__satIDs, self.__satIDs, self.__groundIDs, self.__groundTypes,
+                                               self.__positions, self.__up, self.__minElevations, self.__start, self.__end, self.__delta)
+
+    def tearDown(self) -> None:
+        ConstellationPropagator.reset()
+
+    def test_MatchesElevations(self):
+        self.assertEqual(self.__tensor.numOfEpochs, (self.__end - self.__start) // self.__delta + 1)
+        _numOfVisible = 0
+        for _unix in np.arange(self.__start, self.__end + 1, self.__delta):
+            _positions, _ = ConstellationPropagator.propagate([_unix])
+            _sinElevations = PassFinder.get_SinElevation(_positions[0][:, None, :], self.__positions[None], self.__up[None])
+            _elevations = np.degrees(np.arcsin(_sinElevations))
+
+            for _ground, _groundID in enumerate(self.__groundIDs):
+                _visible = self.__tensor.get_VisibleSatellites(_groundID, _unix)
+                _expected = sorted(np.flatnonzero(_elevations[:, _ground] >= 25).tolist(), key = lambda _sat: -_elevations[_sat, _ground])
+                self.assertEqual(_visible, _expected)
+                _numOfVisible += len(_visible)
+
+            for _sat in self.__satIDs:
+                _visible = self.__tensor.get_VisibleGrounds(_sat, _unix, [ENodeType.GS.value])
+                _expected = [self.__groundIDs[_ground] for _ground in np.argsort(-_elevations[_sat], kind='stable')
+                             if _elevations[_sat, _ground] >= 25 and self.__groundTypes[_ground] == ENodeType.GS.value]
+                self.assertEqual(_visible, _expected)
+        self.assertGreater(_numOfVisible, 0)
+
+    def test_OffGrid(self):
+        self.assertIsNone(self.__tensor.get_VisibleSatellites(self.__groundIDs[0], self.__start + 1))
+        self.assertIsNone(self.__tensor.get_VisibleSatellites(self.__groundIDs[0], self.__end + self.__delta))
+        self.assertIsNone(self.__tensor.get_VisibleSatellites(999, self.__start))
+        self.assertIsNone(self.__tensor.get_VisibleGrounds(999, self.__start, [ENodeType.GS.value]))
+
+    def test_SaveLoad(self):
+        with tempfile.TemporaryDirectory() as _directory:
+            _path = os.path.join(_directory, "fov", "visibility.npz")
+            self.assertIsNone(VisibilityTensor.load(_path, self.__key))
+            self.__tensor.save(_path)
+
+            _loaded = VisibilityTensor.load(_path, self.__key)
+            self.assertIsNotNone(_loaded)
+            for _unix in np.arange(self.__start, self.__end + 1, self.__delta * 7):
+                for _groundID in self.__groundIDs:
+                    self.assertEqual(_loaded.get_VisibleSatellites(_groundID, _unix), self.__tensor.get_VisibleSatellites(_groundID, _unix))
+
+            # a tensor built for another configuration is not reused
+            _otherKey = VisibilityTensor.get_Key(self.__satIDs, [tuple(_tle[-2:]) for _tle in self.__tles], self.__groundIDs, self.__groundTypes,
+                                                 self.__grounds, self.__minElevations + 1, self.__start, self.__end, self.__delta)
+            self.assertNotEqual(_otherKey, self.__key)
+            self.assertIsNone(VisibilityTensor.load(_path, _otherKey))
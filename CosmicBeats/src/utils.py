@@ -6,26 +6,62 @@
 from datetime import datetime, timedelta, timezone
 from typing import Tuple, List
 
-from astropy.coordinates import EarthLocation, ITRS, AltAz, CIRS # type: ignore
-from astropy import units as astropyUnit # type: ignore
 import numpy.linalg as la # type: ignore
 import numpy as np
 
+from src import geodesy
+
 class Time:
     """
     Wrapper from datetime class cause python datetime can be annoying at times.
+    The time is kept as an integer number of microseconds since the unix epoch (UTC), which is the resolution of datetime.
+    The datetime and the default string rendering are only built when they are asked for, and then cached.
 
     Attributes:
-        time (datetime) - All times here are UTC!
+        time (datetime) - All times here are UTC! Read only. Use the from_* methods to set the time
     """
+    __slots__ = ("__micros", "__datetime", "__str", "__frozen")
+
+    __epoch = datetime(1970, 1, 1, tzinfo=timezone.utc)
+    __defaultFormat = "%Y-%m-%d %H:%M:%S"
+
     def __init__(self) -> None:
-        pass
+        self.__micros = None
+        self.__datetime = None
+        self.__str = None
+        self.__frozen = False
+
+    def __set_Micros(self, micros: int) -> 'Time':
+        """
+        Sets the time and drops the cached renderings
+        """
+        if self.__frozen:
+            raise Exception("[Time Error]: This time is shared (see SimClock) and can't be modified. Use a copy instead")
+        self.__micros = micros
+        self.__datetime = None
+        self.__str = None
+        return self
+
+    def freeze(self) -> 'Time':
+        """
+        Makes the time read only. It's used for the times shared by many owners (see SimClock)
+        """
+        self.__frozen = True
+        return self
 
     def copy(self) -> 'Time':
         """
-        Returns another time object with same date
+        Returns another time object with same date. The copy can be modified
         """
-        return Time().from_datetime(self.time) # deep copy
+        _copy = Time()
+        _copy.__micros = self.__micros
+        _copy.__datetime = self.__datetime
+        _copy.__str = self.__str
+        return _copy
+
+    @property
+    def time(self) -> datetime:
+        return self.to_datetime()
 
     def from_str(self, time: str, format: str = "%Y-%m-%d %H:%M:%S") -> 'Time':
         """
@@ -35,9 +71,7 @@ class Time:
             time (str) - time in format specified by second input
             format (str) - format string, by default YYYY-MM-DD HH:MM:SS
         """
-        self.time = datetime.strptime(time, format)
-        self.time = self.time.replace(tzinfo=timezone.utc)
-        return self
+        return self.from_datetime(datetime.strptime(time, format))
 
     def to_str(self, format: str = "%Y-%m-%d %H:%M:%S") -> str:
         """
@@ -46,28 +80,50 @@ class Time:
         Arguments:
             format (str) - optional format string to change default
         """
+        if format == Time.__defaultFormat and self.__str is not None:
+            return self.__str
+
+        _time = self.to_datetime()
         #If there's microseconds, then add it to the format
-        if self.time.microsecond != 0:
-            format += ".%f"
-        return self.time.strftime(format)
+        if _time.microsecond != 0:
+            _ret = _time.strftime(format + ".%f")
+        else:
+            _ret = _time.strftime(format)
+
+        if format == Time.__defaultFormat:
+            self.__str = _ret
+        return _ret
 
     def from_datetime(self, time: datetime) -> 'Time':
-        self.time = time
-        self.time = self.time.replace(tzinfo=timezone.utc)
-        return self
-    
+        """
+        Gets time from a datetime. A naive datetime is taken as UTC, as is the tzinfo of an aware one
+        """
+        _delta = time.replace(tzinfo=timezone.utc) - Time.__epoch
+        return self.__set_Micros((_delta.days * 86400 + _delta.seconds) * 1000000 + _delta.microseconds)
+
     def from_unix(self, unix: float) -> 'Time':
-        self.time = datetime.utcfromtimestamp(unix)
-        self.time = self.time.replace(tzinfo=timezone.utc)
-        return self
-    
+        #Same rounding as datetime.utcfromtimestamp
+        _seconds = int(unix // 1)
+        return self.__set_Micros(_seconds * 1000000 + round((unix - _seconds) * 1e6))
+
     def to_unix(self) -> float:
         """
         Returns time in unix time (UTC)
         """
-        assert self.time.tzinfo == timezone.utc, "Time object is not in UTC"
-        return self.time.timestamp()
-    
+        return self.__micros / 1e6
+
+    def from_micros(self, micros: int) -> 'Time':
+        """
+        Gets time from microseconds since the unix epoch (UTC)
+        """
+        return self.__set_Micros(int(micros))
+
+    def to_micros(self) -> int:
+        """
+        Returns time in microseconds since the unix epoch (UTC)
+        """
+        return self.__micros
+
     def difference_in_seconds(time1: 'Time' , time2: 'Time') -> float:
         """
         Finds the difference between two time objects. Finds time1 - time2
@@ -76,11 +132,15 @@ class Time:
             time1 (Time) - time object
             time2 (Time) - time object
         """
-        return (time1.time - time2.time).total_seconds()
+        return (time1.__micros - time2.__micros) / 1e6
 
     def to_datetime(self) -> datetime:
-        self.time = self.time.replace(tzinfo=timezone.utc)
-        return self.time
+        """
+        Returns time as a timezone aware (UTC) datetime. Only needed at the boundary with the libraries (e.g., skyfield)
+        """
+        if self.__datetime is None:
+            self.__datetime = Time.__epoch + timedelta(microseconds = self.__micros)
+        return self.__datetime
 
     def add_seconds(self, second: float) -> 'Time':
         """
@@ -89,27 +149,27 @@ class Time:
         Arguments:
             second (float)
         """
-        self.time = self.time + timedelta(seconds = second)
-        return self
+        #timedelta rounds the seconds to microseconds the same way
+        return self.__set_Micros(self.__micros + round(second * 1e6))
 
     ##Operators:
     def __lt__(self, other):
-        return (self.time < other.time)
+        return (self.__micros < other.__micros)
 
     def __le__(self, other):
-        return(self.time <= other.time)
+        return(self.__micros <= other.__micros)
 
     def __gt__(self, other):
-        return(self.time > other.time)
+        return(self.__micros > other.__micros)
 
     def __ge__(self, other):
-        return(self.time >= other.time)
+        return(self.__micros >= other.__micros)
 
     def __eq__(self, other):
-        return (self.time == other.time)
+        return (self.__micros == other.__micros)
 
     def __ne__(self, other):
-        return not(self.__eq__(self, other))
+        return not(self.__eq__(other))
 
     def __str__(self) -> str:
         return self.to_str()
@@ -118,11 +178,55 @@ class Time:
         return self.to_str()
     
     def __hash__(self) -> int:
-        return hash(self.time)
+        return hash(self.__micros)
+
+class SimClock:
+    """
+    Clock of the simulation epochs, shared by the nodes having the same start time and time step.
+    The Time of an epoch is built once and shared by all the nodes at that epoch, so a node only keeps the index of its epoch.
+    The shared Time instances are read only. Use copy() to get one that can be modified.
+    """
+    __slots__ = ("__startMicros", "__deltaMicros", "__times")
+
+    __clocks = {}   #(start in microseconds, time step in microseconds) is the key
+
+    @staticmethod
+    def get_Clock(start: Time, delta: float) -> 'SimClock':
+        """
+        Returns the clock of a start time and time step. It's created at the first call
+
+        Arguments:
+            start (Time) - time of the epoch 0
+            delta (float) - time step in seconds
+        """
+        _key = (start.to_micros(), round(delta * 1e6))
+        _clock = SimClock.__clocks.get(_key)
+        if _clock is None:
+            _clock = SimClock(*_key)
+            SimClock.__clocks[_key] = _clock
+        return _clock
+
+    def __init__(self, startMicros: int, deltaMicros: int) -> None:
+        self.__startMicros = startMicros
+        self.__deltaMicros = deltaMicros
+        self.__times = []
+
+    def get_Time(self, epoch: int) -> Time:
+        """
+        Returns the time of an epoch, i.e., start + epoch x time step. The returned instance is shared and read only
+
+        Arguments:
+            epoch (int) - index of the epoch
+        """
+        _times = self.__times
+        while len(_times) <= epoch:
+            _times.append(Time().from_micros(self.__startMicros + len(_times) * self.__deltaMicros).freeze())
+        return _times[epoch]
 
 class Location:
     """
-    Location class in ITRF Frame
+    Location class in ITRF Frame.
+    The conversions are done by src.geodesy. The astropy implementations are kept as a reference (useAstropy = True)
 
     Attributes:
         x (float) - meters
@@ -135,7 +239,7 @@ class Location:
         self.z = z
 
 
-    def from_lat_long(self, lat: float, lon: float, elev: float = 0) -> 'Location':
+    def from_lat_long(self, lat: float, lon: float, elev: float = 0, useAstropy: bool = False) -> 'Location':
         """
         Converts location from WGS84 lat, long, height to x, y, z in ITRF
 
@@ -143,48 +247,69 @@ class Location:
             lat (float) - latitude in degrees
             lon (float) - longitude in degrees
             elev (float)- elevation in meters relative to WGS84's ground.
+            useAstropy (bool) - use the astropy reference implementation
         Returns:
             Location at point (self)
         """
-        earthLoc = EarthLocation.from_geodetic(lon=lon, lat=lat,  height=elev, ellipsoid='WGS84').get_itrs() #Idk why they have this order, but it takes lon, lat.Also elev is distance above WGS reference, so like 0 is sea level
-
-        self.x = float(earthLoc.x.value)
-        self.y = float(earthLoc.y.value)
-        self.z = float(earthLoc.z.value)
+        if useAstropy:
+            from astropy.coordinates import EarthLocation # type: ignore
+            earthLoc = EarthLocation.from_geodetic(lon=lon, lat=lat,  height=elev, ellipsoid='WGS84').get_itrs() #Idk why they have this order, but it takes lon, lat.Also elev is distance above WGS reference, so like 0 is sea level
+            x, y, z = earthLoc.x.value, earthLoc.y.value, earthLoc.z.value
+        else:
+            x, y, z = geodesy.geodetic_to_ecef(lat, lon, elev)
+
+        self.x = float(x)
+        self.y = float(y)
+        self.z = float(z)
         return self
 
-    def to_lat_long(self) -> 'Tuple[float, float, float]':
+    def to_lat_long(self, useAstropy: bool = False) -> 'Tuple[float, float, float]':
         """
         Returns lat, long, and elevation (WGS 84 output)
 
+        Arguments:
+            useAstropy (bool) - use the astropy reference implementation
         Returns:
             Tuple (float, float, float) - lat, long, elevation in (deg, deg, m)
 
         """
-        #Original astropy way. This is probably much slower than algo 13 in Vallado but it's fine for now
-        geoCentric = EarthLocation.from_geocentric(x = self.x, y = self.y, z = self.z, unit=astropyUnit.m)
-
-        lat = round(geoCentric.lat.value, 4) ##round all of these to four decimal places
-        lon = round(geoCentric.lon.value, 4)
-        elev = round(geoCentric.height.value, 4)
+        if useAstropy:
+            #Original astropy way
+            from astropy.coordinates import EarthLocation # type: ignore
+            from astropy import units as astropyUnit # type: ignore
+            geoCentric = EarthLocation.from_geocentric(x = self.x, y = self.y, z = self.z, unit=astropyUnit.m)
+            lat, lon, elev = geoCentric.lat.value, geoCentric.lon.value, geoCentric.height.value
+        else:
+            lat, lon, elev = geodesy.ecef_to_geodetic(self.x, self.y, self.z)
+
+        lat = round(float(lat), 4) ##round all of these to four decimal places
+        lon = round(float(lon), 4)
+        elev = round(float(elev), 4)
         return (lat, lon, elev)        
     
-    def to_alt_az(self, groundPoint: 'Location', time: 'Time') -> 'Tuple[float, float, float]':
+    def to_alt_az(self, groundPoint: 'Location', time: 'Time', useAstropy: bool = False) -> 'Tuple[float, float, float]':
         """
         Converts this location (self) to get the alt, az, and elevation relative to this point
 
         Arguments:
             groundPoint (Location) - location of ground point
-            time (Time) - time when calculation needed
+            time (Time) - time when calculation needed. Only used by astropy (ITRS is earth fixed)
+            useAstropy (bool) - use the astropy reference implementation
         Returns:
             tuple (float, float, float) - (alt, az, distance) in (degrees, degrees, and meters)
         Raise:
             ValueError - if input location and self are the same
         """
-        if self == groundPoint:
+        if self.to_tuple() == groundPoint.to_tuple():
             raise ValueError("Location of object and ground are the same")
 
+        if not useAstropy:
+            alt, az, distance = geodesy.elevation_azimuth(self.to_tuple(), groundPoint.to_tuple())
+            return (float(alt), float(az), float(distance))
+
         #based on https://docs.astropy.org/en/stable/coordinates/common_errors.html
+        from astropy.coordinates import EarthLocation, ITRS, AltAz, CIRS # type: ignore
+        from astropy import units as astropyUnit # type: ignore
 
         t = time.to_datetime()
         sat = EarthLocation.from_geocentric(x = self.x, y = self.y, z = self.z, unit=astropyUnit.m)
@@ -248,11 +373,11 @@ class Location:
 
         """
         xLst, yLst, zLst = zip(*[(pos.x, pos.y, pos.z) for pos in locs])
-        geoCentric = EarthLocation.from_geocentric(x = xLst, y = yLst, z = zLst, unit=astropyUnit.m)
+        lat, lon, elev = geodesy.ecef_to_geodetic(xLst, yLst, zLst)
 
-        lat = np.round(geoCentric.lat.value, 4).tolist()
-        lon = np.round(geoCentric.lon.value, 4).tolist()
-        elev = np.round(geoCentric.height.value, 4).tolist()
+        lat = np.round(lat, 4).tolist()
+        lon = np.round(lon, 4).tolist()
+        elev = np.round(elev, 4).tolist()
 
         return (lat, lon, elev)
     
@@ -268,11 +393,11 @@ class Location:
         Returns:
             List[Location] - locations
         """
-        earthLoc = EarthLocation.from_geodetic(lon=lonLst, lat=latLst,  height=elevLst, ellipsoid='WGS84').get_itrs() #Idk why they have this order, but it takes lon, lat.Also elev is distance above WGS reference, so like 0 is sea level
+        x, y, z = geodesy.geodetic_to_ecef(latLst, lonLst, elevLst)
 
-        xLst = np.round(earthLoc.x.value, 4).tolist()
-        yLst = np.round(earthLoc.y.value, 4).tolist()
-        zLst = np.round(earthLoc.z.value, 4).tolist()
+        xLst = np.round(x, 4).tolist()
+        yLst = np.round(y, 4).tolist()
+        zLst = np.round(z, 4).tolist()
 
         return [Location(x, y, z) for x, y, z in zip(xLst, yLst, zLst)]
 
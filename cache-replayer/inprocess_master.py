@@ -0,0 +1,57 @@
+"""
+    In-process cache replay engine. It replays the same satellite logs as master.py with the same logic (see replay_core.py),
+    but all the satellites live in this process and the neighbor lookups are in-memory calls. So, no satellite process or socket is needed.
+    In each epoch, the satellites are replayed one by one in the order of the config.
+    The per-satellite logs have the same [Data] and [Latency] lines as the ones of sat.py, so analyze_script.py works on them as it is.
+    The first line of a log (the CONF of the satellite) has no topology, as there are no ports.
+
+    Usage: python inprocess_master.py <CosmicBeats config> <CosmicBeats log dir> <output dir> <cache size> <fetch_k_x.json>
+"""
+import sys
+import os
+try:
+    import resource
+except ImportError:
+    # No resource module on Windows, where the C runtime limit of the open files is already in the thousands
+    resource = None
+from replay_core import SatelliteReplay, load_sat_conf, emulation_epochs
+
+conf_path = sys.argv[1]
+fov_path = sys.argv[2]
+log_dir = sys.argv[3]
+cache_size = int(sys.argv[4])
+os.makedirs(log_dir, exist_ok=True)
+
+sat_conf, starttime, endtime = load_sat_conf(conf_path, fov_path, log_dir, cache_size, sys.argv[5])
+
+# Every satellite keeps its trace and its log open
+if resource is not None:
+    soft, hard = resource.getrlimit(resource.RLIMIT_NOFILE)
+    needed = 2 * len(sat_conf) + 64
+    if soft != resource.RLIM_INFINITY and soft < needed:
+        resource.setrlimit(resource.RLIMIT_NOFILE, (needed if hard == resource.RLIM_INFINITY else min(needed, hard), hard))
+
+satellites = {}
+def query_neighbor(sat_id):
+    # The neighbor's cache is checked in place of the CHKB round trip over the ISL socket
+    def query(neighbor_idx, object_ids):
+        cache = satellites[int(satellites[sat_id].neighbors[neighbor_idx])].cache
+        return [object_id in cache for object_id in object_ids]
+    return query
+
+for sat_id, conf in sat_conf.items():
+    satellites[sat_id] = SatelliteReplay(conf, query_neighbor(sat_id))
+
+print("Finish configuring servers")
+
+# Main emulation
+cont = 0 # index for FoV
+for cur_time in emulation_epochs(starttime, endtime):
+    for satellite in satellites.values():
+        satellite.replay_epoch(cur_time)
+    if cont % 2000 == 0:
+        print(f"Emulation {cont}")
+    cont += 1
+
+for satellite in satellites.values():
+    satellite.close()
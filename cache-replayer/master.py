@@ -7,8 +7,9 @@ import time
 import os
 import ast
 from utils import *
+from replay_core import load_sat_conf, emulation_epochs
 import threading
-from concurrent.futures import ThreadPoolExecutor, as_completed
+import asyncio
 
 sat_conf = {} # id to config
 topology = {} # id to (host, port)
@@ -26,31 +27,7 @@ master_port = master_sock.getsockname()[1]
 master_sock.listen()
 
 # Read configuration file
-with open(conf_path, 'r') as f:
-    emulation_conf = json.load(f)
-with open(sys.argv[5]) as f:
-    logical_neighbor = json.load(f)
-starttime = datetime.strptime(emulation_conf['simtime']['starttime'], "%Y-%m-%d %H:%M:%S").timestamp()
-
-for d in emulation_conf['topologies'][0]['nodes']:
-    node_id = d['nodeid']
-    
-    if d['type'] == 'SAT':
-        #save neighbors ids as well
-        neighbors = []
-        for model in d['models']:
-            if model['iname'] == 'ModelCDNProvider':
-                neighbors = model.get('neighbors', [])
-                break
-            
-        sat_conf[node_id] = {
-            "log_dir": f"{log_dir}/{d['type']}_{node_id}",
-            "cache_size": cache_size,
-            "id": node_id,
-            "neighbors": logical_neighbor[str(node_id)],
-            "starttime": starttime,
-            "trace": os.path.join(fov_path, f"Log_Constln1_0_SAT_{node_id}.log")
-        }
+sat_conf, starttime, endtime = load_sat_conf(conf_path, fov_path, log_dir, cache_size, sys.argv[5])
 
 processes = []
 threshold = 2000 
@@ -64,57 +41,107 @@ def start_server(processes, topology, master_port, file_name, server_id):
     data = json.loads(data.decode())
     topology[int(data['server_id'])] = ('0.0.0.0', int(data['port']))
     conn.shutdown(socket.SHUT_RDWR)
-starting_threads = []
-for sat_id, conf in sat_conf.items():
-    server_thread = threading.Thread(target=start_server, args=[processes, topology, master_port, 'sat.py', sat_id])
-    server_thread.start()
-    starting_threads.append(server_thread)
-    if cont > threshold:
-        break
-    cont += 1
-for thread in starting_threads:
-    thread.join()
-time.sleep(1)
-cont = 0
-# Configuring servers
-for sat_id, conf in sat_conf.items():
-    host, port = topology[sat_id] 
-    conf["topology"] = topology
-    verb, ret = send_request_wait_response(host, int(port), "CONF", json.dumps(conf))
-    assert verb == "ACK "
-    if cont > threshold:
-        break
-    cont += 1
+# The satellite servers are terminated however the emulation ends
+try:
+    starting_threads = []
+    for sat_id, conf in sat_conf.items():
+        server_thread = threading.Thread(target=start_server, args=[processes, topology, master_port, 'sat.py', sat_id])
+        server_thread.start()
+        starting_threads.append(server_thread)
+        if cont > threshold:
+            break
+        cont += 1
+    for thread in starting_threads:
+        thread.join()
+    time.sleep(1)
+    cont = 0
+    # Configuring servers
+    for sat_id, conf in sat_conf.items():
+        host, port = topology[sat_id] 
+        conf["topology"] = topology
+        verb, ret = send_request_wait_response(host, int(port), "CONF", json.dumps(conf))
+        if verb != "ACK ":
+            raise ConnectionError(f"Satellite {sat_id} didn't acknowledge its CONF")
+        if cont > threshold:
+            break
+        cont += 1
+
+    print("Finish configuring servers")
+
+    # Main emulation
+    # One persistent stream per satellite. The REQ of an epoch is released to all the satellites together once every satellite has
+    # acknowledged the epoch pipeline_depth epochs before, so with the default depth of 1 each epoch waits for the previous one (a barrier)
+    # and with a larger depth the next REQ is already queued at a satellite when it finishes, while the stragglers catch up.
+    epochs = emulation_epochs(starttime, endtime)
+    pipeline_depth = int(sys.argv[6]) if len(sys.argv) > 6 else 1
+    barrier_latency = [] # (emulation time, seconds from the release of the epoch to its last ACK, slowest satellite)
+
+    async def emulate():
+        streams = {}
+        for sat_id in sat_conf:
+            host, port = topology[sat_id]
+            reader, writer = await asyncio.open_connection(host, port)
+            writer.get_extra_info('socket').setsockopt(socket.SOL_SOCKET, socket.SO_KEEPALIVE, 1)
+            write_to_stream(writer, "REQS", "")
+            verb, _ = await read_from_stream(reader)
+            if verb != "ACK ":
+                raise ConnectionError(f"Satellite {sat_id} didn't acknowledge its REQS")
+            streams[sat_id] = (reader, writer)
+
+        released = asyncio.Condition()
+        released_upto = min(pipeline_depth, len(epochs)) # epochs [0, released_upto) can be sent
+        release_time = [time.perf_counter()] * released_upto
+        pending_ack = [len(streams)] * len(epochs)
+
+        async def acknowledge(epoch_idx, sat_id):
+            nonlocal released_upto
+            pending_ack[epoch_idx] -= 1
+            if pending_ack[epoch_idx] > 0:
+                return
+            now = time.perf_counter()
+            barrier_latency.append((epochs[epoch_idx], now - release_time[epoch_idx], sat_id))
+            if epoch_idx % 2000 == 0:
+                print(f"Emulation {epoch_idx}")
+            if released_upto < len(epochs):
+                async with released:
+                    released_upto += 1
+                    release_time.append(now)
+                    released.notify_all()
+
+        async def send_requests(writer):
+            for epoch_idx, cur_time in enumerate(epochs):
+                if epoch_idx >= released_upto:
+                    async with released:
+                        await released.wait_for(lambda: epoch_idx < released_upto)
+                write_to_stream(writer, "REQ ", json.dumps({"time": cur_time}))
+                await writer.drain()
+
+        async def drive_satellite(sat_id):
+            reader, writer = streams[sat_id]
+            sender = asyncio.create_task(send_requests(writer))
+            for epoch_idx in range(len(epochs)):
+                verb, data = await read_from_stream(reader)
+                if verb != "ACK ":
+                    raise ConnectionError(f"Satellite {sat_id} closed the stream at epoch {epoch_idx}")
+                await acknowledge(epoch_idx, sat_id)
+            await sender
 
-print("Finish configuring servers")
+        await asyncio.gather(*(drive_satellite(sat_id) for sat_id in streams))
+        for reader, writer in streams.values():
+            writer.close()
 
-# Main emulation
-cont = 0 # index for FoV
-sat_links = {}
-for sat_id, conf in sat_conf.items():
-    s = socket.socket(socket.AF_INET, socket.SOCK_STREAM) 
-    s.setsockopt(socket.SOL_SOCKET, socket.SO_KEEPALIVE, 1)
-    host, port = topology[sat_id] 
-    s.connect((host, port)) 
-    write_to_socket(s, "REQS", "")
-    read_from_socket(s)
-    sat_links[sat_id] = s 
-for cur_time in range(int(starttime), int(starttime) + 15 * 4 * 60 * 24 * 5, 15):
-    
-    with ThreadPoolExecutor(30) as executor:
-        def orchestraClient(host, port, client_id, verb, message):
-            write_to_socket(sat_links[client_id], verb, message) 
-            read_from_socket(sat_links[client_id])
-            # assert verb == "ACK "
-        future_list = []
-        for client_id, conf in sat_conf.items():
-            host, port = topology[client_id] 
-            future_list.append(executor.submit(orchestraClient, host, port, client_id, "REQ ", json.dumps({"time": cur_time})))
-        for future in future_list:
-            future.result()
-    if cont % 2000 == 0:
-        print(f"Emulation {cont}")
-    cont += 1
+    emulation_start = time.perf_counter()
+    asyncio.run(emulate())
+    emulation_time = time.perf_counter() - emulation_start
 
-for process in processes:
-    process.terminate()
\ No newline at end of file
+    with open(os.path.join(log_dir, "barrier_latency.csv"), 'w') as f:
+        f.write("time,latency,slowest_satellite\n")
+        for cur_time, latency, sat_id in barrier_latency:
+            f.write(f"{cur_time},{latency},{sat_id}\n")
+    latencies = sorted(latency for _, latency, _ in barrier_latency)
+    if latencies:
+        print(f"{len(latencies)} epochs in {emulation_time:.2f} s, barrier latency mean {sum(latencies) / len(latencies) * 1000:.2f} ms, "
+              f"p50 {latencies[len(latencies) // 2] * 1000:.2f} ms, p99 {latencies[int(len(latencies) * 0.99)] * 1000:.2f} ms, max {latencies[-1] * 1000:.2f} ms")
+finally:
+    for process in processes:
+        process.terminate()
\ No newline at end of file
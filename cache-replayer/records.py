@@ -0,0 +1,140 @@
+"""
+    Binary columnar request records, written by the simulator instead of the [Requests Records] log lines
+    (see record_format of ModelCDNProvider and CosmicBeats/src/simlogging/recordsinkbinary.py for the format).
+    A record directory (e.g., Log_Constln1_0_SAT_0.rec) has one raw file per column, a row per requested object, in the order of the time:
+    time.bin (int64), user.bin (int32), hops.bin (int16 x 2), object.bin (fixed-width bytes, or int64 for the integer object IDs of
+    CosmicBeats main.py --intern-object-ids), size.bin (int64), and a header.json with the dtypes.
+    The time is in seconds since the unix epoch of the log timestamp, i.e., the timestamp is taken as UTC.
+    The columns are memory-mapped and the rows of an epoch are found with a binary search on the time column, so no line is parsed during the replay.
+
+    Converting the logs of an earlier run: python records.py <CosmicBeats log dir> [--id-width N]
+    It writes the records of each Log_*SAT*.log next to it, where load_sat_conf (see replay_core.py) picks them up.
+"""
+import argparse
+import ast
+import calendar
+import json
+import os
+from datetime import datetime
+import numpy as np
+
+RECORD_TAG = "[Requests Records]: "
+FORMAT_VERSION = 1
+NUM_HOPS = 2
+COLUMNS = ("time", "user", "hops", "object", "size")
+
+def record_dtypes(id_width):
+    """
+    @param id_width
+        Width of the object ID column in bytes, None for the integer object IDs
+    @return
+        dict of column name to dtype of its items. The hop column has NUM_HOPS items per row
+    """
+    object_dtype = np.dtype("<i8") if id_width is None else np.dtype(f"S{id_width}")
+    return {"time": np.dtype("<i8"), "user": np.dtype("<i4"), "hops": np.dtype("<i2"), "object": object_dtype, "size": np.dtype("<i8")}
+
+def record_path(log_path):
+    return os.path.splitext(log_path)[0] + ".rec"
+
+class RequestRecords():
+    """
+    Memory-mapped request records of a satellite, read epoch by epoch
+    """
+    def __init__(self, directory):
+        with open(os.path.join(directory, "header.json")) as f:
+            header = json.load(f)
+        if header["version"] != FORMAT_VERSION or header["hops"] != NUM_HOPS:
+            raise ValueError(f"Unsupported request records at {directory}: {header}")
+        self.columns = {}
+        for name in COLUMNS:
+            dtype = np.dtype(header["dtypes"][name])
+            path = os.path.join(directory, name + ".bin")
+            # An empty file can't be memory-mapped
+            self.columns[name] = np.memmap(path, dtype=dtype, mode='r') if os.path.getsize(path) > 0 else np.zeros(0, dtype)
+        self.columns["hops"] = self.columns["hops"].reshape(-1, NUM_HOPS)
+        self.__cursor = 0
+
+    def __len__(self):
+        return len(self.columns["time"])
+
+    def read_until(self, trace_time):
+        """
+        Yield (user id, hop vector, [(object id, size), ...]) of the records not read yet up to the time, one per run of rows of the same time, user and hops
+        @param trace_time
+            Seconds since the unix epoch, same as the time column
+        """
+        start = self.__cursor
+        end = int(np.searchsorted(self.columns["time"], trace_time, side='right'))
+        if end <= start:
+            return
+        self.__cursor = end
+        times = self.columns["time"][start:end]
+        users = self.columns["user"][start:end]
+        hops = self.columns["hops"][start:end]
+        boundaries = np.flatnonzero((times[1:] != times[:-1]) | (users[1:] != users[:-1]) | (hops[1:] != hops[:-1]).any(axis=1)) + 1
+        boundaries = [0] + boundaries.tolist() + [end - start]
+        objects = self.columns["object"][start:end].tolist()
+        if self.columns["object"].dtype.kind == 'S':
+            objects = [object_id.decode() for object_id in objects]
+        sizes = self.columns["size"][start:end].tolist()
+        users, hops = users.tolist(), hops.tolist()
+        for run_start, run_end in zip(boundaries[:-1], boundaries[1:]):
+            yield users[run_start], hops[run_start], list(zip(objects[run_start:run_end], sizes[run_start:run_end]))
+
+def write_records(directory, rows, id_width):
+    """
+    Write the columns of rows (time, user id, hop vector, object id, size) in the format of RecordSinkBinary
+    """
+    dtypes = record_dtypes(id_width)
+    os.makedirs(directory, exist_ok=True)
+    columns = list(zip(*rows)) if rows else [[] for _ in COLUMNS]
+    for name, column in zip(COLUMNS, columns):
+        np.asarray(column, dtype=dtypes[name]).reshape(-1).tofile(os.path.join(directory, name + ".bin"))
+    with open(os.path.join(directory, "header.json"), 'w') as f:
+        json.dump({"version": FORMAT_VERSION, "dtypes": {name: dtypes[name].str for name in COLUMNS}, "hops": NUM_HOPS}, f)
+
+def convert_log(log_path, id_width=None):
+    """
+    Convert the [Requests Records] lines of a satellite log to a record directory next to it
+    @return
+        record directory, number of rows
+    """
+    rows = []
+    with open(log_path, 'r') as f:
+        for line in f:
+            idx = line.find(RECORD_TAG)
+            if idx == -1:
+                continue
+            timestamp = calendar.timegm(datetime.strptime(line.split(',')[1][1:], "%Y-%m-%d %H:%M:%S").timetuple())
+            line = line[idx + len(RECORD_TAG):].strip()
+            user_id = int(line[:line.find(",")])
+            hops = ast.literal_eval(line[line.find('[') : line.find(']') + 1])
+            line = line[line.find(']') + 1 : ]
+            for req_id, req_size in ast.literal_eval(line[line.find('['):-1]):
+                rows.append((timestamp, user_id, hops, req_id, req_size))
+    directory = record_path(log_path)
+    if rows and all(type(row[3]) is int for row in rows):
+        # integer object IDs
+        write_records(directory, rows, None)
+        return directory, len(rows)
+    # the column has the UTF-8 bytes of the IDs, so the width is in bytes
+    rows = [(timestamp, user_id, hops, req_id.encode(), req_size) for timestamp, user_id, hops, req_id, req_size in rows]
+    width = max([len(row[3]) for row in rows] + [1])
+    if id_width is not None:
+        if id_width < width:
+            raise ValueError(f"{log_path} has object ids of {width} bytes, longer than --id-width")
+        width = id_width
+    write_records(directory, rows, width)
+    return directory, len(rows)
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser()
+    parser.add_argument("log_dir", help="Directory of the satellite logs of the simulator")
+    parser.add_argument("--id-width", type=int, default=None, help="Width of the object ID column in bytes. Default is the longest ID of each log. Not used for the integer object IDs")
+    args = parser.parse_args()
+
+    for root, dirs, files in os.walk(args.log_dir):
+        for file in sorted(files):
+            if "SAT" in file and file.endswith(".log"):
+                directory, count = convert_log(os.path.join(root, file), args.id_width)
+                print(f"{directory}: {count} records")
@@ -0,0 +1,218 @@
+"""
+    The cache replay logic of a satellite, shared by the TCP satellite server (sat.py) and the in-process engine (inprocess_master.py).
+    The neighbors are reached through a callback, so the same logic runs over the ISL sockets or with in-memory calls.
+    The misses of an epoch are looked up in the neighbors in one batch per neighbor after the local cache is replayed.
+    The local admissions don't depend on the neighbors. In the in-process engine, the satellites replay one after another, so a neighbor's cache
+    doesn't change while a satellite replays an epoch and the hits are the same as looking up each miss right away (a CHK per miss in the original sat.py).
+    Over TCP, this doesn't hold: the satellites replay an epoch concurrently and a neighbor keeps admitting its own requests meanwhile.
+    The batch (CHKB) is sent after all the local admissions of the epoch, so it sees the neighbor's cache later in the epoch than the CHK of each miss did,
+    and the neighbor hits of sat.py may differ from the ones of the original sat.py. Both depend on the timing of the processes.
+    The requests are read from the binary records of the satellite (see records.py) if the simulator wrote them or they were converted,
+    and from the [Requests Records] lines of its log otherwise.
+"""
+import os
+import json
+import ast
+import time
+import calendar
+from datetime import datetime
+from collections import defaultdict
+from lru import LRU_Cache, LRU_Freq_Cache
+from records import RequestRecords, record_path
+
+EPOCH_LENGTH = 15 # Seconds of simulated time between two REQ
+
+def load_sat_conf(conf_path, fov_path, log_dir, cache_size, neighbor_path):
+    """
+    Build the CONF of each satellite from the CosmicBeats config
+    @return
+        sat_conf: dict of satellite id to CONF
+        starttime: float
+        endtime: float
+    """
+    sat_conf = {}
+    with open(conf_path, 'r') as f:
+        emulation_conf = json.load(f)
+    with open(neighbor_path) as f:
+        logical_neighbor = json.load(f)
+    starttime = datetime.strptime(emulation_conf['simtime']['starttime'], "%Y-%m-%d %H:%M:%S").timestamp()
+    endtime = datetime.strptime(emulation_conf['simtime']['endtime'], "%Y-%m-%d %H:%M:%S").timestamp()
+
+    for d in emulation_conf['topologies'][0]['nodes']:
+        node_id = d['nodeid']
+
+        if d['type'] == 'SAT':
+            trace = os.path.join(fov_path, f"Log_Constln1_0_SAT_{node_id}.log")
+            if os.path.isdir(record_path(trace)):
+                trace = record_path(trace)
+            sat_conf[node_id] = {
+                "log_dir": f"{log_dir}/{d['type']}_{node_id}",
+                "cache_size": cache_size,
+                "id": node_id,
+                "neighbors": logical_neighbor[str(node_id)],
+                "starttime": starttime,
+                "trace": trace
+            }
+    return sat_conf, starttime, endtime
+
+def emulation_epochs(starttime, endtime):
+    """
+    Emulation time of each REQ, from the start time until the epoch that covers the end time of the simulation
+    """
+    return range(int(starttime), int(endtime) + EPOCH_LENGTH, EPOCH_LENGTH)
+
+class TextTrace():
+    """
+    Request records of a satellite log, read line by line
+    """
+    def __init__(self, path):
+        self.__trace = open(path, 'rb')
+        # Skip the header and the first line, which is logged before any request
+        self.__trace.readline()
+        self.__trace.readline()
+
+    def read_until(self, emulation_time):
+        """
+        Yield (user id, latency, [[object id, size], ...]) of the [Requests Records] lines not read yet up to the emulation time
+        """
+        while True:
+            line = self.__trace.readline()
+            if line is None or len(line) == 0:
+                # Already end of file
+                break
+            line = line.decode()
+            time_now = datetime.strptime(line.split(',')[1][1:], "%Y-%m-%d %H:%M:%S").timestamp()
+
+            if int(time_now) <= emulation_time:
+                idx = line.find("[Requests Records]")
+                if idx != -1:
+                    line = line[idx + len("[Requests Records]: "):].strip()
+                    # Read user id (location)
+                    user_id = int(line[:line.find(",")])
+                    # Read latency
+                    latency = ast.literal_eval(line[line.find('[') : line.find(']') + 1])
+                    line = line[line.find(']') + 1 : ]
+                    yield user_id, latency, ast.literal_eval(line[line.find('['):-1])
+            else:
+                # Rewind if time is not up there yet
+                self.__trace.seek(-len(line), os.SEEK_CUR)
+                break
+
+    def close(self):
+        self.__trace.close()
+
+class BinaryTrace():
+    """
+    Request records of a satellite in the binary format, read with a binary search per epoch
+    """
+    def __init__(self, path):
+        self.__records = RequestRecords(path)
+
+    def read_until(self, emulation_time):
+        # The emulation time is the local time of the config timestamps (see load_sat_conf), while the record time takes the log timestamps as UTC
+        return self.__records.read_until(calendar.timegm(time.localtime(emulation_time)))
+
+    def close(self):
+        pass
+
+class SatelliteReplay():
+    """
+    Replays the request records of a satellite log against its LRU cache, epoch by epoch
+    """
+    def __init__(self, data: dict, query_neighbor):
+        """
+        @param data
+            CONF of the satellite. See load_sat_conf
+        @param query_neighbor
+            Function (neighbor index, list of object ids) -> list of bool telling whether each object is in the cache of that neighbor
+        """
+        self.log_handler = open(data['log_dir'], 'w')
+        self.cache = LRU_Cache(int(data['cache_size']))
+        self.sat_id = data['id']
+        self.neighbors = data.get('neighbors', [])
+        self.__query_neighbor = query_neighbor
+        self.__trace = BinaryTrace(data['trace']) if os.path.isdir(data['trace']) else TextTrace(data['trace'])
+        self.cur_time = data['starttime']
+        self.log_handler.write(f'{data}\n')
+
+        # Utility and metrics for prefetch
+        self.location_last_serve = {} # Last serving time of a location
+        self.location_lfu = {} # Map location to their lfu
+
+    def replay_epoch(self, emulation_time) -> list:
+        """
+        Replay the requests up to the emulation time and write the [Data] and [Latency] lines of the epoch
+        @return
+            [total_obj, total_byte, hit_obj, hit_byte, hit_obj_by_neigh, hit_byte_by_neigh]
+        """
+        cur_time = emulation_time
+        self.cur_time = emulation_time
+        total_obj, total_byte, hit_obj, hit_byte = 0, 0, 0, 0
+        hit_obj_by_neigh, hit_byte_by_neigh = 0, 0
+        hit_obj_by_pref, hit_byte_by_pref = 0, 0
+        latency_array = [0, 0, 0, 0]
+        latency_dict = defaultdict(int)
+        requests = [] # (object id, size, latency, local hit) of the epoch in order
+        for user_id, latency, line_data in self.__trace.read_until(cur_time):
+            if user_id not in self.location_last_serve or self.location_last_serve[user_id] - self.cur_time >= 1800:
+                # Clear the LFU for stale
+                self.location_lfu[user_id] = LRU_Freq_Cache(100000)
+                self.log_handler.write(f"[DEBUG]: clear {user_id} cache\n")
+            self.location_last_serve[user_id] = self.cur_time
+            for req_id, req_size in line_data:
+                requests.append((req_id, req_size, latency, req_id in self.cache))
+                self.cache.admit(req_id, req_size, 0)
+
+        neighbor_hits = self.__lookup_neighbors(dict.fromkeys(req_id for req_id, _, _, req_hit in requests if not req_hit))
+        for req_id, req_size, latency, req_hit in requests:
+            total_obj += 1
+            total_byte += req_size
+            latency_array[0] += latency[0]
+            latency_array[1] += latency[1]
+            found_in_neighbor = False
+
+            if req_hit:
+                hit_byte += req_size
+                hit_obj += 1
+            elif req_id in neighbor_hits:
+                neighbor_idx = neighbor_hits[req_id]
+                found_in_neighbor = True
+                latency_array[2 + (neighbor_idx // 2)] += 3
+                latency_array[(neighbor_idx // 2)] += 3
+                hit_obj += 1
+                hit_byte += req_size
+                hit_obj_by_neigh += 1
+                hit_byte_by_neigh += req_size
+
+            if req_hit:
+                latency_dict[(latency[0] * 2, latency[1] * 2, 2)] += 1
+            elif found_in_neighbor:
+                latency_dict[(latency[0] * 2, latency[1] * 2 + 6, 2)] += 1
+            else:
+                latency_dict[(latency[0] * 2, latency[1] * 2 + 6, 4)] += 1
+        self.log_handler.write(f"[Data]: {emulation_time}, {[total_obj, total_byte, hit_obj, hit_byte, hit_obj_by_neigh, hit_byte_by_neigh] + latency_array + [hit_obj_by_pref, hit_byte_by_pref]}\n")
+        self.log_handler.write(f"[Latency]: {str(dict(latency_dict))}\n")
+        return [total_obj, total_byte, hit_obj, hit_byte, hit_obj_by_neigh, hit_byte_by_neigh]
+
+    def __lookup_neighbors(self, object_ids) -> dict:
+        """
+        Look up the objects in the neighbors in order, one batch per neighbor with the objects not found so far
+        @return
+            dict of object id to the index of the first neighbor having it
+        """
+        found = {}
+        pending = list(object_ids)
+        for neighbor_idx, neighbor_id in enumerate(self.neighbors):
+            if not pending:
+                break
+            if int(neighbor_idx) < 2 or int(neighbor_id) == -1:
+                continue
+            for req_id, in_neighbor in zip(pending, self.__query_neighbor(neighbor_idx, pending)):
+                if in_neighbor:
+                    found[req_id] = neighbor_idx
+            pending = [req_id for req_id in pending if req_id not in found]
+        return found
+
+    def close(self):
+        self.__trace.close()
+        self.log_handler.close()
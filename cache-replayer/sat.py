@@ -5,10 +5,8 @@ import threading
 import os
 import traceback
 from utils import *
-from lru import LRU_Cache, LRU_Freq_Cache
-from datetime import datetime
-import ast
-from collections import defaultdict
+from lru import LRU_Freq_Cache
+from replay_core import SatelliteReplay
 
 class Satellite():
     """
@@ -29,22 +27,10 @@ class Satellite():
 
     def __handle_config(self, conn, data: str):
         data: dict = json.loads(data)
-        self.__log_handler = open(data['log_dir'], 'w')
         self.__log_data = []  # List to store request logs
-        self.__cache = LRU_Cache(int(data['cache_size']))
-        self.__sat_id = data['id']
-        # Store neighbors
-        self.__neighbors = data.get('neighbors', [])  
-        self.__trace = open(data['trace'], 'rb')
-        self.__trace.readline()
-        time_trace_start = int(datetime.strptime(self.__trace.readline().decode().split(',')[1][1:], "%Y-%m-%d %H:%M:%S").timestamp())
-        emulation_start_time = data['starttime']
-        self.__trace_emulation_time_diff = emulation_start_time - time_trace_start
-        self.__cur_time = emulation_start_time
-        self.__log_handler.write(f'{data}\n')
         self.__topology = data['topology']
         self.__isl = []
-        for neigh in self.__neighbors:
+        for neigh in data.get('neighbors', []):
             if int(neigh) == -1:
                 self.__isl.append(None)
             else:
@@ -55,6 +41,9 @@ class Satellite():
                 write_to_socket(s, "ISL ", "")
                 read_from_socket(s)
                 self.__isl.append(s)
+        # The replay logic is shared with the in-process engine. The neighbors are queried over the ISL sockets
+        self.__replay = SatelliteReplay(data, self.__query_neighbor_by_idx)
+        self.__sat_id = self.__replay.sat_id
 
         write_to_socket(conn, "ACK ", "")
         
@@ -66,98 +55,24 @@ class Satellite():
         write_to_socket(conn, "ACK ", "")
         while True:
             verb, data = read_from_socket(conn)
+            if verb is None:
+                break
             data = json.loads(data)
-            emulation_time = data['time']
-            cur_time = emulation_time 
-            self.__cur_time = emulation_time
-            total_obj, total_byte, hit_obj, hit_byte = 0, 0, 0, 0
-            hit_obj_by_neigh, hit_byte_by_neigh = 0, 0
-            hit_obj_by_pref, hit_byte_by_pref = 0, 0
-            latency_array = [0, 0, 0, 0]
-            latency_dict = defaultdict(int) 
-            has_traffic = False
-            while True:
-                line = self.__trace.readline() 
-                if line is None or len(line) == 0: 
-                    # Already end of file
-                    break
-                line = line.decode()
-                time_now = datetime.strptime(line.split(',')[1][1:], "%Y-%m-%d %H:%M:%S").timestamp()
-                # print(time_now, cur_time)
-
-                if int(time_now) <= cur_time:
-                    idx = line.find("[Requests Records]")
-                    if idx != -1:
-                        has_traffic = True
-                        line = line[idx + len("[Requests Records]: "):].strip()
-                        # Read user id (location)
-                        user_id = int(line[:line.find(",")])
-                        if user_id not in self.__location_last_serve or self.__location_last_serve[user_id] - self.__cur_time >= 1800:
-                            # Clear the LFU for stale
-                            self.__location_lfu[user_id] = LRU_Freq_Cache(100000)
-                            self.__log_handler.write(f"[DEBUG]: clear {user_id} cache\n")
-                        self.__location_last_serve[user_id] = self.__cur_time
-                        # Read latency
-                        latency = ast.literal_eval(line[line.find('[') : line.find(']') + 1])
-                        line = line[line.find(']') + 1 : ]
-
-                        line_data = ast.literal_eval(line[line.find('['):-1])
-                        for req_id, req_size in line_data:
-                            remote_hit = False
-                            total_obj += 1
-                            total_byte += req_size
-                            req_hit = req_id in self.__cache 
-                            latency_array[0] += latency[0]
-                            latency_array[1] += latency[1]
-                            found_in_neighbor = False
-
-                            if req_hit:
-                                hit_byte += req_size
-                                hit_obj += 1
-                            else:
-                                for neighbor_idx, neighbor_id in enumerate(self.__neighbors):
-                                    if int(neighbor_idx) < 2:
-                                        continue
-                                    if int(neighbor_id) != -1 and self.__query_neighbor_by_idx(neighbor_idx, req_id):
-                                        found_in_neighbor = True
-                                        which_neighbor = neighbor_id
-                                        latency_array[2 + (neighbor_idx // 2)] += 3
-                                        latency_array[(neighbor_idx // 2)] += 3
-                                        hit_obj += 1
-                                        hit_byte += req_size
-                                        hit_obj_by_neigh += 1
-                                        hit_byte_by_neigh += req_size
-                                        break
-                            
-                            if req_hit:
-                                latency_dict[(latency[0] * 2, latency[1] * 2, 2)] += 1
-                            elif found_in_neighbor:
-                                latency_dict[(latency[0] * 2, latency[1] * 2 + 6, 2)] += 1
-                            else:
-                                latency_dict[(latency[0] * 2, latency[1] * 2 + 6, 4)] += 1
+            result = self.__replay.replay_epoch(data['time'])
+            self.__replay.log_handler.flush()
+            write_to_socket(conn, "ACK ", f"{result}") 
 
-
-
-                            self.__cache.admit(req_id, req_size, 0)
-                            
-
-                else:
-                    # Rewind if time is not up there yet
-                    self.__trace.seek(-len(line), os.SEEK_CUR)
-                    # Suggest some id to prefetch
-                    break
-            self.__log_handler.write(f"[Data]: {data['time']}, {[total_obj, total_byte, hit_obj, hit_byte, hit_obj_by_neigh, hit_byte_by_neigh] + latency_array + [hit_obj_by_pref, hit_byte_by_pref]}\n")
-            self.__log_handler.write(f"[Latency]: {str(dict(latency_dict))}\n")
-            self.__log_handler.flush()
-            write_to_socket(conn, "ACK ", f"{[total_obj, total_byte, hit_obj, hit_byte, hit_obj_by_neigh, hit_byte_by_neigh]}") 
-
-    def __query_neighbor_by_idx(self, neighbor_idx, object_id):
-        write_to_socket(self.__isl[neighbor_idx], "CHK ", str(object_id))
+    def __query_neighbor_by_idx(self, neighbor_idx, object_ids):
+        # One CHKB round trip for all the objects, answered with a bitmap of the ones found in neighbor's cache
+        write_to_socket(self.__isl[neighbor_idx], "CHKB", json.dumps(object_ids))
         verb, data = read_from_socket(self.__isl[neighbor_idx])
-        if verb == "ACK " and data.decode() == "FOUND":
-            # print("***Found in neighbour:",neighbor_idx,"********")
-            return True  # Object found in neighbor's cache
-        return False
+        if verb == "ACK ":
+            return unpack_bitmap(data, len(object_ids))
+        return [False] * len(object_ids)
+
+    def __check_batch(self, conn, data):
+        object_ids = json.loads(data.decode())
+        write_to_socket(conn, "ACK ", pack_bitmap([object_id in self.__replay.cache for object_id in object_ids]))
 
     def __query_neighbor(self, neighbor_id, object_id):
         try:
@@ -179,11 +94,11 @@ class Satellite():
     
     def __handle_get(self, conn, data: str):
         if data == 'cache_key':
-            write_to_socket(conn, "ACK ", json.dumps(list(self.__cache.cache_keys))) 
+            write_to_socket(conn, "ACK ", json.dumps(list(self.__replay.cache.cache_keys))) 
         if data == 'cache_capacity':
-            write_to_socket(conn, "ACK ", str(self.__cache.capacity))
+            write_to_socket(conn, "ACK ", str(self.__replay.cache.capacity))
         if data == 'cache_size':
-            write_to_socket(conn, "ACK ", str(self.__cache.size))
+            write_to_socket(conn, "ACK ", str(self.__replay.cache.size))
     
     def __handle_isl(self, conn):
         write_to_socket(conn, "ACK ", "")
@@ -193,34 +108,37 @@ class Satellite():
                 break
             # assert verb == "CHK ", verb
             if verb == "CHK ": # Logic for collaboration check
-                if data.decode() in self.__cache:
+                if data.decode() in self.__replay.cache:
                     write_to_socket(conn, "ACK ", "FOUND")
                 else:
                     write_to_socket(conn, "ACK ", "NOT_FOUND")
+            elif verb == "CHKB": # Batched collaboration check
+                self.__check_batch(conn, data)
             elif verb == "PREF": # Logic for prefetch
+                replay = self.__replay
                 data = json.loads(data.decode()) 
                 user_id = data['user']
-                if user_id not in self.__prefetch_map_last_update or self.__cur_time - self.__prefetch_map_last_update[user_id] >= 30 * 60:
-                    self.__log_handler.write(f"[DEBUG]: clear {user_id} map\n")
+                if user_id not in self.__prefetch_map_last_update or replay.cur_time - self.__prefetch_map_last_update[user_id] >= 30 * 60:
+                    replay.log_handler.write(f"[DEBUG]: clear {user_id} map\n")
                     self.__prefetch_map[user_id] = []
-                self.__prefetch_map_last_update[user_id] = self.__cur_time
+                self.__prefetch_map_last_update[user_id] = replay.cur_time
                 accepted_cnt = 0
                 for req_id, req_size, req_freq in data['data']:
-                    if req_id not in self.__cache:
-                        self.__cache.admit(req_id, req_size, 0)
+                    if req_id not in replay.cache:
+                        replay.cache.admit(req_id, req_size, 0)
 
-                        if user_id not in self.__location_last_serve or self.__location_last_serve[user_id] - self.__cur_time >= 30 * 60:
+                        if user_id not in replay.location_last_serve or replay.location_last_serve[user_id] - replay.cur_time >= 30 * 60:
                             # Clear the LFU for stale
-                            self.__location_lfu[user_id] = LRU_Freq_Cache(100000)
-                            self.__log_handler.write(f"[DEBUG]: clear {user_id} cache\n")
-                        self.__location_lfu[user_id].admit(req_id, 0)
-                        self.__location_lfu[user_id].set_freq(req_id, int(req_freq * 0.5) + 1) 
+                            replay.location_lfu[user_id] = LRU_Freq_Cache(100000)
+                            replay.log_handler.write(f"[DEBUG]: clear {user_id} cache\n")
+                        replay.location_lfu[user_id].admit(req_id, 0)
+                        replay.location_lfu[user_id].set_freq(req_id, int(req_freq * 0.5) + 1) 
 
-                        self.__location_last_serve[user_id] = self.__cur_time
+                        replay.location_last_serve[user_id] = replay.cur_time
                         self.__prefetch_map.setdefault(user_id, [])
                         self.__prefetch_map[user_id].append(req_id)
                         accepted_cnt += 1
-                self.__log_handler.write(f"[DEBUG]: Accept {accepted_cnt}/{len(data['data'])}\n")
+                replay.log_handler.write(f"[DEBUG]: Accept {accepted_cnt}/{len(data['data'])}\n")
                 write_to_socket(conn, "ACK ", "")
 
     def __handle_client(self, conn, addr):
@@ -246,10 +164,12 @@ class Satellite():
                 #new flag for checking neighboring sats request for object
                 if verb == "CHK ":
                     # Check if the requested object is in the local cache
-                    if data.decode() in self.__cache:
+                    if data.decode() in self.__replay.cache:
                         write_to_socket(conn, "ACK ", "FOUND")
                     else:
                         write_to_socket(conn, "ACK ", "NOT_FOUND")
+                if verb == "CHKB":
+                    self.__check_batch(conn, data)
             except Exception as e:
                 print(f'Exception {repr(e)}') 
                 print(traceback.format_exc())
@@ -292,8 +212,6 @@ class Satellite():
         # Utility and metrics for prefetch
         self.__prefetch_map = {} # Map trace id to list of objects being prefetched
         self.__prefetch_map_last_update = {} # Last update time of prefetch
-        self.__location_last_serve = {} # Last serving time of a location
-        self.__location_lfu = {} # Map location to their lfu
 
 
 
@@ -309,7 +227,7 @@ class Satellite():
     
     @property
     def neighbors(self):
-        return self.__neighbors
+        return self.__replay.neighbors
 
 
 
@@ -0,0 +1,185 @@
+"""
+    Single-pass LRU hit-ratio curves for all cache sizes.
+    The request records of each satellite log are replayed once, computing the byte-weighted LRU stack distance of every request
+    (Mattson's algorithm, with a Fenwick tree over the request positions). A request hits an LRU cache of capacity C iff its distance is at most C,
+    so the object and byte hit ratios of every cache size come out of one pass.
+    Only the local cache is modeled, i.e., the hits from the neighbors that master.py counts are not included.
+    The distances are exact as long as no object is larger than the cache (LRU_Cache doesn't admit such objects at all).
+    With --sample-rate, only the objects whose ID hashes below the rate are replayed and the distances are scaled up (SHARDS),
+    which makes the curve of a very large trace about as cheap as a run of a much smaller one.
+    The requests are read from the binary records of the satellite (see records.py) if the simulator wrote them or they were converted,
+    and from the [Requests Records] lines of its log otherwise.
+
+    Usage: python stack_distance.py <log dir> <output csv> [--sizes C1 C2 ...] [--points N] [--sample-rate R] [--processes N]
+"""
+import argparse
+import ast
+import csv
+import os
+import zlib
+import numpy as np
+from multiprocessing import Pool
+from records import RequestRecords, record_path
+
+RECORD_TAG = "[Requests Records]: "
+SAMPLE_MODULUS = 1 << 24
+
+class Fenwick:
+    """
+    Fenwick (binary indexed) tree of the sizes at the request positions
+    """
+    def __init__(self, size):
+        self.__tree = [0] * (size + 1)
+
+    def add(self, position, delta):
+        position += 1
+        tree = self.__tree
+        while position < len(tree):
+            tree[position] += delta
+            position += position & -position
+
+    def prefix_sum(self, end):
+        """
+        Sum of the positions [0, end)
+        """
+        total = 0
+        tree = self.__tree
+        while end > 0:
+            total += tree[end]
+            end -= end & -end
+        return total
+
+def read_requests(log_path):
+    """
+    Yield (object id, size) of the request records of a satellite in order, from its record directory if there is one (see records.py),
+    and from the lines of its log otherwise. See sat.py __handle_req for the line format
+    """
+    directory = record_path(log_path)
+    if os.path.isdir(directory):
+        records = RequestRecords(directory)
+        objects = records.columns["object"].tolist()
+        if records.columns["object"].dtype.kind == 'S':
+            objects = [object_id.decode() for object_id in objects]
+        yield from zip(objects, records.columns["size"].tolist())
+        return
+    with open(log_path, 'r') as f:
+        for line in f:
+            idx = line.find(RECORD_TAG)
+            if idx == -1:
+                continue
+            line = line[idx + len(RECORD_TAG):].strip()
+            # Skip user id and latency
+            line = line[line.find(']') + 1:]
+            for req_id, req_size in ast.literal_eval(line[line.find('['):-1]):
+                yield req_id, req_size
+
+def is_sampled(req_id, sample_rate):
+    return zlib.crc32(str(req_id).encode()) % SAMPLE_MODULUS < sample_rate * SAMPLE_MODULUS
+
+def stack_distances(requests, sample_rate=1.0):
+    """
+    Compute the byte-weighted LRU stack distance of each request, i.e., the bytes of the distinct objects accessed since the previous request
+    of the object, including the object itself. First requests get inf.
+    @return
+        distances: np.ndarray
+        sizes: np.ndarray
+    """
+    if sample_rate < 1.0:
+        requests = [(req_id, req_size) for req_id, req_size in requests if is_sampled(req_id, sample_rate)]
+    else:
+        requests = list(requests)
+    distances = np.full(len(requests), np.inf)
+    sizes = np.zeros(len(requests))
+    tree = Fenwick(len(requests))
+    total = 0
+    last_access = {} # object id to (position, size) of its last request
+    for position, (req_id, req_size) in enumerate(requests):
+        sizes[position] = req_size
+        last = last_access.get(req_id)
+        if last is not None:
+            last_position, last_size = last
+            distances[position] = total - tree.prefix_sum(last_position + 1) + last_size
+            tree.add(last_position, -last_size)
+            total -= last_size
+        tree.add(position, req_size)
+        total += req_size
+        last_access[req_id] = (position, req_size)
+    # The sampled objects stand for 1 / sample_rate as many bytes
+    return distances / sample_rate, sizes
+
+def process_file(args):
+    """
+    Compute the hit-ratio curve of a satellite log
+    @return
+        file name, sorted finite distances, cumulative hit bytes at them, number of requests, total bytes
+    """
+    file_name, sample_rate = args
+    distances, sizes = stack_distances(read_requests(file_name), sample_rate)
+    order = np.argsort(distances, kind='stable')
+    distances, sizes = distances[order], sizes[order]
+    finite = np.isfinite(distances)
+    return file_name, distances[finite], np.cumsum(sizes[finite]), len(sizes), float(sizes.sum())
+
+def hit_ratios(curve, cache_sizes):
+    """
+    Evaluate a curve returned by process_file at the cache sizes
+    @return
+        hit objects, hit bytes
+    """
+    _, distances, cum_bytes, _, _ = curve
+    hits = np.searchsorted(distances, cache_sizes, side='right')
+    return hits, np.concatenate(([0], cum_bytes))[hits]
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser()
+    parser.add_argument("log_dir", help="Directory of the satellite logs of the simulator")
+    parser.add_argument("output", help="Output CSV of the hit ratios per satellite and cache size")
+    parser.add_argument("--sizes", type=float, nargs="+", default=None, help="Cache sizes. Default is a log-spaced grid over the observed distances")
+    parser.add_argument("--points", type=int, default=50, help="Number of the cache sizes of the default grid")
+    parser.add_argument("--sample-rate", type=float, default=1.0, help="Fraction of the objects replayed (SHARDS). Default is all")
+    parser.add_argument("--processes", type=int, default=os.cpu_count())
+    args = parser.parse_args()
+
+    file_list = []
+    for root, dirs, files in os.walk(args.log_dir):
+        for file in files:
+            if "SAT" in file and file.endswith(".log"):
+                file_list.append(os.path.join(root, file))
+        # The records of a satellite may be kept without its log
+        for directory in dirs:
+            log_path = os.path.join(root, os.path.splitext(directory)[0] + ".log")
+            if "SAT" in directory and directory.endswith(".rec") and not os.path.exists(log_path):
+                file_list.append(log_path)
+        dirs[:] = [directory for directory in dirs if not directory.endswith(".rec")]
+
+    with Pool(args.processes) as pool:
+        curves = sorted(pool.imap_unordered(process_file, [(file_name, args.sample_rate) for file_name in file_list]))
+
+    if args.sizes is not None:
+        cache_sizes = np.array(sorted(args.sizes))
+    else:
+        finite = np.concatenate([curve[1] for curve in curves] + [np.zeros(0)])
+        if len(finite) == 0:
+            finite = np.ones(1)
+        cache_sizes = np.unique(np.geomspace(max(finite.min(), 1), max(finite.max(), 1), args.points).round())
+
+    total_obj = sum(curve[3] for curve in curves)
+    total_byte = sum(curve[4] for curve in curves)
+    agg_hits, agg_hit_bytes = np.zeros(len(cache_sizes)), np.zeros(len(cache_sizes))
+    with open(args.output, 'w', newline='') as f:
+        writer = csv.writer(f)
+        writer.writerow(["satellite", "cache_size", "total_obj", "total_byte", "obj_hit_ratio", "byte_hit_ratio"])
+        for curve in curves:
+            hits, hit_bytes = hit_ratios(curve, cache_sizes)
+            agg_hits += hits
+            agg_hit_bytes += hit_bytes
+            for cache_size, hit, hit_byte in zip(cache_sizes, hits, hit_bytes):
+                writer.writerow([os.path.basename(curve[0]), cache_size, curve[3], curve[4],
+                                 hit / curve[3] if curve[3] else 0, hit_byte / curve[4] if curve[4] else 0])
+        for cache_size, hit, hit_byte in zip(cache_sizes, agg_hits, agg_hit_bytes):
+            writer.writerow(["all", cache_size, total_obj, total_byte,
+                             hit / total_obj if total_obj else 0, hit_byte / total_byte if total_byte else 0])
+
+    print(f"{len(curves)} satellites, {total_obj} requests, {total_byte} bytes")
+    for cache_size, hit, hit_byte in zip(cache_sizes, agg_hits, agg_hit_bytes):
+        print(cache_size, hit / total_obj if total_obj else 0, hit_byte / total_byte if total_byte else 0)
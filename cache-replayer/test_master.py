@@ -0,0 +1,167 @@
+"""
+    Loopback test of the asyncio master (master.py) with two fake satellites in place of sat.py.
+    The fake satellites timestamp each REQ as soon as it arrives and acknowledge it after a fixed delay, so the release of the epochs
+    can be checked against the pipeline depth, and the barrier latencies against the delay of the slow satellite.
+    A satellite can also drop its stream in the middle of an ACK, which must stop the master and all the satellite processes.
+
+    Usage: python -m pytest -q test_master.py
+"""
+import csv
+import os
+import socket
+import subprocess
+import sys
+import tempfile
+import time
+import unittest
+from datetime import datetime
+
+from replay_core import emulation_epochs
+from test_replay_core import END_TIME, REPLAYER_DIR, START_TIME, write_replay_inputs
+
+SLOW_DELAY = 0.02 # Seconds satellite 1 takes per epoch. Satellite 0 answers right away
+
+FAKE_SATELLITE = """
+import json
+import os
+import queue
+import socket
+import sys
+import threading
+import time
+sys.path.insert(0, {replayer_dir!r})
+from utils import read_from_socket, write_to_socket, send_request
+
+master_port, server_id = int(sys.argv[1]), int(sys.argv[2])
+delay = {slow_delay!r} if server_id == 1 else 0
+drop_at = {drop_at!r} if server_id == 1 else None # Number of ACK sent before the stream is dropped
+with open(f"pid_{{server_id}}", "w") as f:
+    f.write(str(os.getpid()))
+server = socket.socket(socket.AF_INET, socket.SOCK_STREAM)
+server.setsockopt(socket.SOL_SOCKET, socket.SO_REUSEADDR, 1)
+server.bind(('0.0.0.0', 0))
+server.listen()
+send_request('0.0.0.0', master_port, 'REGR', json.dumps({{"port": server.getsockname()[1], "server_id": server_id}}))
+events = open(f"events_{{server_id}}.csv", "w")
+while True:
+    conn, _ = server.accept()
+    verb, _ = read_from_socket(conn)
+    write_to_socket(conn, "ACK ", "")
+    if verb != "REQS":
+        conn.close()
+        continue
+    # The REQ are read as soon as they arrive, while the epochs are replayed one by one
+    received = queue.Queue()
+    events_written = []
+    def receive():
+        while True:
+            verb, data = read_from_socket(conn)
+            received.put(None if verb is None else (json.loads(data)["time"], time.time()))
+            if verb is None:
+                break
+    threading.Thread(target=receive, daemon=True).start()
+    while True:
+        item = received.get()
+        if item is None:
+            break
+        time.sleep(delay)
+        if drop_at is not None and len(events_written) == drop_at:
+            conn.sendall(b"AC")
+            # The receiving thread still holds the socket, so only a shutdown sends the FIN
+            conn.shutdown(socket.SHUT_RDWR)
+            # Stay up until the master terminates the satellite
+            time.sleep(600)
+        events_written.append(item[0])
+        events.write(f"{{item[0]}},{{item[1]}},{{time.time()}}\\n")
+        events.flush()
+        write_to_socket(conn, "ACK ", "[0, 0, 0, 0, 0, 0]")
+    break
+"""
+
+def is_running(pid):
+    """
+    Whether a process (not a child of this one) is still running. A zombie has exited
+    """
+    try:
+        with open(f"/proc/{pid}/stat") as f:
+            return f.read().rsplit(")", 1)[1].split()[0] != "Z"
+    except FileNotFoundError:
+        return False
+
+def write_fake_satellite(work_dir, drop_at=None):
+    # master.py starts "python sat.py" in its working directory
+    with open(os.path.join(work_dir, "sat.py"), "w") as f:
+        f.write(FAKE_SATELLITE.format(replayer_dir=REPLAYER_DIR, slow_delay=SLOW_DELAY, drop_at=drop_at))
+
+@unittest.skipUnless(hasattr(socket, "SO_REUSEPORT"), "master.py binds with SO_REUSEPORT")
+class TestMaster(unittest.TestCase):
+    def run_master(self, pipeline_depth):
+        """
+        Run master.py with the fake satellites
+        @return
+            epochs, rows of barrier_latency.csv, dict of satellite id to {epoch time: (receive time, ack time)}
+        """
+        with tempfile.TemporaryDirectory() as work_dir:
+            config_path, log_dir, neighbor_path, _ = write_replay_inputs(work_dir, num_satellites=2)
+            write_fake_satellite(work_dir)
+            output_dir = os.path.join(work_dir, "replay")
+            subprocess.run([sys.executable, os.path.join(REPLAYER_DIR, "master.py"), config_path, log_dir, output_dir, "100", neighbor_path,
+                            str(pipeline_depth)], cwd=work_dir, check=True, stdout=subprocess.DEVNULL, timeout=60)
+            with open(os.path.join(output_dir, "barrier_latency.csv")) as f:
+                rows = list(csv.DictReader(f))
+            events = {}
+            for sat_id in (0, 1):
+                with open(os.path.join(work_dir, f"events_{sat_id}.csv")) as f:
+                    events[sat_id] = {int(epoch): (float(receive), float(ack)) for epoch, receive, ack in csv.reader(f)}
+        epochs = list(emulation_epochs(datetime.strptime(START_TIME, "%Y-%m-%d %H:%M:%S").timestamp(),
+                                       datetime.strptime(END_TIME, "%Y-%m-%d %H:%M:%S").timestamp()))
+        return epochs, rows, events
+
+    def check_run(self, pipeline_depth):
+        epochs, rows, events = self.run_master(pipeline_depth)
+        for sat_id in events:
+            self.assertEqual(sorted(events[sat_id]), epochs)
+
+        # An epoch is released once both satellites have acknowledged the epoch pipeline_depth epochs before
+        for idx in range(len(epochs) - pipeline_depth):
+            last_ack = max(events[sat_id][epochs[idx]][1] for sat_id in events)
+            first_receive = min(events[sat_id][epochs[idx + pipeline_depth]][0] for sat_id in events)
+            self.assertGreaterEqual(first_receive, last_ack, f"Epoch {idx + pipeline_depth} released early")
+
+        # One row per epoch, in order, each waiting for the slow satellite
+        self.assertEqual([int(row["time"]) for row in rows], epochs)
+        self.assertTrue(all(float(row["latency"]) >= SLOW_DELAY for row in rows))
+        self.assertTrue(all(row["slowest_satellite"] == "1" for row in rows))
+        return epochs, events
+
+    def test_barrier(self):
+        self.check_run(1)
+
+    def test_pipeline(self):
+        epochs, events = self.check_run(2)
+        # The fast satellite gets the next epoch while the slow one still replays the current one
+        self.assertTrue(any(events[0][epochs[idx + 1]][0] < events[1][epochs[idx]][1] for idx in range(len(epochs) - 1)))
+
+    @unittest.skipUnless(os.path.isdir("/proc"), "The satellite processes are checked in /proc")
+    def test_dropped_stream(self):
+        # Without asserts (-O), the master still stops at the truncated ACK, and terminates the satellite processes on the way out
+        with tempfile.TemporaryDirectory() as work_dir:
+            config_path, log_dir, neighbor_path, _ = write_replay_inputs(work_dir, num_satellites=2)
+            write_fake_satellite(work_dir, drop_at=3)
+            result = subprocess.run([sys.executable, "-O", os.path.join(REPLAYER_DIR, "master.py"), config_path, log_dir,
+                                     os.path.join(work_dir, "replay"), "100", neighbor_path], cwd=work_dir, stdout=subprocess.DEVNULL,
+                                    stderr=subprocess.PIPE, text=True, timeout=60)
+            self.assertNotEqual(result.returncode, 0)
+            self.assertIn("ConnectionError", result.stderr)
+            self.assertFalse(os.path.exists(os.path.join(work_dir, "replay", "barrier_latency.csv")))
+            pids = []
+            for sat_id in (0, 1):
+                with open(os.path.join(work_dir, f"pid_{sat_id}")) as f:
+                    pids.append(int(f.read()))
+            deadline = time.time() + 10
+            while any(is_running(pid) for pid in pids) and time.time() < deadline:
+                time.sleep(0.05)
+            self.assertFalse(any(is_running(pid) for pid in pids))
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,149 @@
+"""
+    Tests of the replay logic shared by sat.py and inprocess_master.py (see replay_core.py).
+    The engines are run on a small synthetic constellation and compared with a reference of the per-request logic of the original sat.py,
+    which looked up each miss in the neighbors right away.
+
+    Usage: python -m pytest -q test_replay_core.py
+"""
+import ast
+import json
+import os
+import random
+import subprocess
+import sys
+import tempfile
+import unittest
+from collections import defaultdict
+from datetime import datetime
+
+from lru import LRU_Cache
+from replay_core import emulation_epochs
+
+REPLAYER_DIR = os.path.dirname(os.path.abspath(__file__))
+START_TIME = "2024-05-02 12:00:00"
+END_TIME = "2024-05-02 12:05:00"
+
+def write_replay_inputs(input_dir, num_satellites=4, requests_per_satellite=300, seed=0):
+    """
+    Write a CosmicBeats config, the satellite logs, and the neighbor file of a ring of satellites with a shared popular set of objects
+    @return
+        config path, log dir, neighbor file path, dict of satellite id to [(time, user id, latency, [[object id, size], ...]), ...]
+    """
+    rng = random.Random(seed)
+    start = datetime.strptime(START_TIME, "%Y-%m-%d %H:%M:%S").timestamp()
+    end = datetime.strptime(END_TIME, "%Y-%m-%d %H:%M:%S").timestamp()
+    object_sizes = {f"obj{i}": rng.randint(1, 40) for i in range(60)}
+    log_dir = os.path.join(input_dir, "logs")
+    os.makedirs(log_dir)
+    traces = {}
+    for sat_id in range(num_satellites):
+        times = sorted(rng.uniform(start, end) for _ in range(requests_per_satellite // 3))
+        records = []
+        for record_time in times:
+            requests = [f"obj{min(int(rng.expovariate(0.08)), 59)}" for _ in range(rng.randint(1, 5))]
+            records.append((int(record_time), 1000 + rng.randrange(3), [rng.randrange(3), rng.randrange(3)],
+                            [[req_id, object_sizes[req_id]] for req_id in requests]))
+        traces[sat_id] = records
+        with open(os.path.join(log_dir, f"Log_Constln1_0_SAT_{sat_id}.log"), "w") as f:
+            f.write("LogType, Timestamp, Module, Message\n")
+            f.write(f'[ELogType.LOGINFO], {START_TIME}, ModelCDNProvider, "[Location]: 0"\n')
+            for record_time, user_id, latency, traffic in records:
+                timestamp = datetime.fromtimestamp(record_time).strftime("%Y-%m-%d %H:%M:%S")
+                f.write(f'[ELogType.LOGALL], {timestamp}, ModelCDNProvider, "[Requests Records]: {user_id}, {latency},{traffic}"\n')
+
+    config_path = os.path.join(input_dir, "config.json")
+    with open(config_path, "w") as f:
+        json.dump({"simtime": {"starttime": START_TIME, "endtime": END_TIME},
+                   "topologies": [{"nodes": [{"nodeid": sat_id, "type": "SAT"} for sat_id in range(num_satellites)] +
+                                            [{"nodeid": 1000, "type": "USER"}]}]}, f)
+    neighbor_path = os.path.join(input_dir, "neighbors.json")
+    with open(neighbor_path, "w") as f:
+        json.dump({str(sat_id): [-1, -1, (sat_id + 1) % num_satellites, (sat_id - 1) % num_satellites] for sat_id in range(num_satellites)}, f)
+    return config_path, log_dir, neighbor_path, traces
+
+def reference_replay(traces, neighbors, cache_size):
+    """
+    Replay the traces epoch by epoch, the satellites one by one, with the per-request logic of the original sat.py
+    @return
+        dict of satellite id to the list of ([Data] values, [Latency] dict) of each epoch
+    """
+    start = datetime.strptime(START_TIME, "%Y-%m-%d %H:%M:%S").timestamp()
+    end = datetime.strptime(END_TIME, "%Y-%m-%d %H:%M:%S").timestamp()
+    caches = {sat_id: LRU_Cache(cache_size) for sat_id in traces}
+    positions = {sat_id: 0 for sat_id in traces}
+    results = {sat_id: [] for sat_id in traces}
+    for cur_time in emulation_epochs(start, end):
+        for sat_id, records in traces.items():
+            cache = caches[sat_id]
+            data = [0] * 12
+            latency_dict = defaultdict(int)
+            while positions[sat_id] < len(records) and records[positions[sat_id]][0] <= cur_time:
+                _, _, latency, traffic = records[positions[sat_id]]
+                positions[sat_id] += 1
+                for req_id, req_size in traffic:
+                    data[0] += 1
+                    data[1] += req_size
+                    data[6] += latency[0]
+                    data[7] += latency[1]
+                    req_hit = req_id in cache
+                    found_in_neighbor = False
+                    if req_hit:
+                        data[2] += 1
+                        data[3] += req_size
+                    else:
+                        for neighbor_idx, neighbor_id in enumerate(neighbors[sat_id]):
+                            if neighbor_idx < 2 or neighbor_id == -1 or req_id not in caches[neighbor_id]:
+                                continue
+                            found_in_neighbor = True
+                            data[8 + neighbor_idx // 2] += 3
+                            data[6 + neighbor_idx // 2] += 3
+                            data[2] += 1
+                            data[3] += req_size
+                            data[4] += 1
+                            data[5] += req_size
+                            break
+                    if req_hit:
+                        latency_dict[(latency[0] * 2, latency[1] * 2, 2)] += 1
+                    elif found_in_neighbor:
+                        latency_dict[(latency[0] * 2, latency[1] * 2 + 6, 2)] += 1
+                    else:
+                        latency_dict[(latency[0] * 2, latency[1] * 2 + 6, 4)] += 1
+                    cache.admit(req_id, req_size, 0)
+            results[sat_id].append((data, dict(latency_dict)))
+    return results
+
+def read_replay_log(path):
+    """
+    @return
+        list of ([Data] values, [Latency] dict) of each epoch of a replay log
+    """
+    results = []
+    with open(path) as f:
+        for line in f:
+            if line.startswith("[Data]: "):
+                data = ast.literal_eval(line[line.find(", ") + 2:])
+            elif line.startswith("[Latency]: "):
+                results.append((data, ast.literal_eval(line[len("[Latency]: "):])))
+    return results
+
+class TestReplayCore(unittest.TestCase):
+    def test_inprocess_matches_sat(self):
+        cache_size = 150
+        with tempfile.TemporaryDirectory() as input_dir:
+            config_path, log_dir, neighbor_path, traces = write_replay_inputs(input_dir)
+            output_dir = os.path.join(input_dir, "replay")
+            subprocess.run([sys.executable, "inprocess_master.py", config_path, log_dir, output_dir, str(cache_size), neighbor_path],
+                           cwd=REPLAYER_DIR, check=True, stdout=subprocess.DEVNULL)
+            with open(neighbor_path) as f:
+                neighbors = {int(sat_id): sat_neighbors for sat_id, sat_neighbors in json.load(f).items()}
+            expected = reference_replay(traces, neighbors, cache_size)
+            for sat_id in traces:
+                replayed = read_replay_log(os.path.join(output_dir, f"SAT_{sat_id}"))
+                self.assertEqual(replayed, expected[sat_id], f"Satellite {sat_id}")
+        # Some misses hit a neighbor, and there are more local misses than the first requests of the objects, i.e., the caches evict
+        self.assertGreater(sum(data[4] for results in expected.values() for data, _ in results), 0)
+        self.assertLess(sum(data[2] - data[4] for results in expected.values() for data, _ in results),
+                        sum(data[0] for results in expected.values() for data, _ in results) - len(expected) * 60)
+
+if __name__ == "__main__":
+    unittest.main()
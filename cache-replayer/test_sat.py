@@ -0,0 +1,69 @@
+"""
+    Tests of the ISL handlers of the satellite server (sat.py), on a socket pair in place of the ISL connection.
+
+    Usage: python -m pytest -q test_sat.py
+"""
+import json
+import socket
+import threading
+import types
+import unittest
+
+from lru import LRU_Cache
+from sat import Satellite
+from utils import read_from_socket, unpack_bitmap, write_to_socket
+
+class TestSatellite(unittest.TestCase):
+    def setUp(self):
+        # The master port isn't used unless the satellite runs
+        self.satellite = Satellite(0, 0)
+        cache = LRU_Cache(100)
+        for object_id in ("obj1", "obj3", "obj8"):
+            cache.admit(object_id, 10, 0)
+        self.satellite._Satellite__replay = types.SimpleNamespace(cache=cache)
+
+    def tearDown(self):
+        self.satellite._Satellite__socket.close()
+
+    def serve(self):
+        """
+        Serve a connection of the satellite in a thread
+        @return
+            client end of the connection, the thread
+        """
+        client, server = socket.socketpair()
+        self.satellite.threads_conn.append(server)
+        thread = threading.Thread(target=self.satellite._Satellite__handle_client, args=(server, None))
+        thread.start()
+        return client, thread
+
+    def test_chkb(self):
+        object_ids = ["obj0", "obj1", "obj2", "obj3", "obj4", "obj5", "obj6", "obj7", "obj8"]
+        client, thread = self.serve()
+        with client:
+            write_to_socket(client, "CHKB", json.dumps(object_ids))
+            verb, data = read_from_socket(client)
+        thread.join()
+        self.assertEqual(verb, "ACK ")
+        self.assertEqual(len(data), 2)
+        self.assertEqual(unpack_bitmap(data, len(object_ids)), [object_id in ("obj1", "obj3", "obj8") for object_id in object_ids])
+
+    def test_isl_query(self):
+        # A neighbor queries over a persistent ISL connection, one CHKB per batch, as in __query_neighbor_by_idx
+        client, thread = self.serve()
+        with client:
+            write_to_socket(client, "ISL ", "")
+            self.assertEqual(read_from_socket(client)[0], "ACK ")
+            neighbor = Satellite(0, 1)
+            try:
+                neighbor._Satellite__isl = [None, None, client]
+                self.assertEqual(neighbor._Satellite__query_neighbor_by_idx(2, ["obj3", "obj4"]), [True, False])
+                self.assertEqual(neighbor._Satellite__query_neighbor_by_idx(2, []), [])
+                self.assertEqual(neighbor._Satellite__query_neighbor_by_idx(2, ["obj8"] * 17), [True] * 17)
+            finally:
+                neighbor._Satellite__socket.close()
+            client.shutdown(socket.SHUT_WR)
+            thread.join()
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,122 @@
+"""
+    Tests of the single-pass LRU hit-ratio curves of stack_distance.py.
+    The Fenwick distances are checked against a brute-force O(n^2) reference, and the curve of a log against a replay of LRU_Cache.
+    The curve of the binary records of a satellite must be the one of its log lines.
+
+    Usage: python -m pytest -q test_stack_distance.py
+"""
+import os
+import random
+import tempfile
+import unittest
+
+import numpy as np
+
+from lru import LRU_Cache
+from records import record_path, write_records
+from stack_distance import hit_ratios, is_sampled, process_file, stack_distances
+
+def brute_force_distances(requests):
+    """
+    Bytes of the distinct objects requested since the previous request of each object (at their last sizes), including the object itself
+    """
+    distances = []
+    for position, (req_id, req_size) in enumerate(requests):
+        previous = [i for i in range(position) if requests[i][0] == req_id]
+        if not previous:
+            distances.append(np.inf)
+            continue
+        last_sizes = {req_id: requests[previous[-1]][1]}
+        for other_id, other_size in requests[previous[-1] + 1:position]:
+            last_sizes[other_id] = other_size
+        distances.append(sum(last_sizes.values()))
+    return np.array(distances)
+
+def random_trace(seed, length=400, num_objects=40):
+    rng = random.Random(seed)
+    object_sizes = {f"obj{i}": rng.randint(1, 100) for i in range(num_objects)}
+    # Skewed popularity, so that there are both short and long distances
+    ids = [f"obj{min(int(rng.expovariate(0.1)), num_objects - 1)}" for _ in range(length)]
+    return [(req_id, object_sizes[req_id]) for req_id in ids]
+
+class TestStackDistance(unittest.TestCase):
+    def test_brute_force(self):
+        for seed in range(5):
+            requests = random_trace(seed)
+            distances, sizes = stack_distances(requests)
+            np.testing.assert_array_equal(distances, brute_force_distances(requests))
+            np.testing.assert_array_equal(sizes, [req_size for _, req_size in requests])
+
+    def test_changing_sizes(self):
+        # A request of an object with another size replaces its bytes in the stack
+        rng = random.Random(7)
+        requests = [(f"obj{rng.randrange(15)}", rng.randint(1, 50)) for _ in range(300)]
+        np.testing.assert_array_equal(stack_distances(requests)[0], brute_force_distances(requests))
+
+    def test_full_sample_rate(self):
+        # SHARDS at rate 1.0 keeps all the objects and doesn't scale the distances
+        requests = random_trace(3)
+        self.assertTrue(all(is_sampled(req_id, 1.0) for req_id, _ in requests))
+        exact, _ = stack_distances(requests)
+        sampled, _ = stack_distances(requests, 1.0)
+        np.testing.assert_array_equal(sampled, exact)
+        finite = np.isfinite(exact)
+        np.testing.assert_array_equal(np.histogram(sampled[finite], bins=20)[0], np.histogram(exact[finite], bins=20)[0])
+
+    def test_sample_rate(self):
+        # The sampled distances are the distances of the sampled objects alone, scaled up by 1 / rate
+        requests = random_trace(4, num_objects=200)
+        kept = [(req_id, req_size) for req_id, req_size in requests if is_sampled(req_id, 0.5)]
+        self.assertTrue(0 < len(kept) < len(requests))
+        sampled, sizes = stack_distances(requests, 0.5)
+        np.testing.assert_array_equal(sampled, brute_force_distances(kept) / 0.5)
+        self.assertEqual(len(sizes), len(kept))
+
+    def test_lru_replay(self):
+        # The hits of the curve of a log are the hits of a replay of LRU_Cache of each size
+        requests = random_trace(5)
+        with tempfile.TemporaryDirectory() as log_dir:
+            log_path = os.path.join(log_dir, "Log_C_0_SAT_0.log")
+            with open(log_path, "w") as f:
+                for start in range(0, len(requests), 4):
+                    traffic = [list(request) for request in requests[start:start + 4]]
+                    f.write(f'[ELogType.LOGALL], 2024-05-02 12:10:30, ModelCDNProvider, "[Requests Records]: 1003, [1, 4],{traffic}"\n')
+            curve = process_file((log_path, 1.0))
+        self.assertEqual(curve[3], len(requests))
+        cache_sizes = np.array([100, 250, 500, 1000, 4000])
+        hits, hit_bytes = hit_ratios(curve, cache_sizes)
+        for cache_size, hit, hit_byte in zip(cache_sizes, hits, hit_bytes):
+            cache = LRU_Cache(cache_size)
+            lru_hits, lru_hit_bytes = 0, 0
+            for req_id, req_size in requests:
+                if req_id in cache:
+                    lru_hits += 1
+                    lru_hit_bytes += req_size
+                cache.admit(req_id, req_size, 0)
+            self.assertEqual(hit, lru_hits)
+            self.assertEqual(hit_byte, lru_hit_bytes)
+
+    def test_binary_records(self):
+        # The satellite log of a run with the binary records has no [Requests Records] line
+        for integer_ids in (False, True):
+            requests = random_trace(6)
+            if integer_ids:
+                requests = [(int(req_id[len("obj"):]), req_size) for req_id, req_size in requests]
+            with tempfile.TemporaryDirectory() as log_dir:
+                text_path = os.path.join(log_dir, "text", "Log_C_0_SAT_0.log")
+                binary_path = os.path.join(log_dir, "binary", "Log_C_0_SAT_0.log")
+                os.makedirs(os.path.dirname(text_path))
+                with open(text_path, "w") as f:
+                    for req_id, req_size in requests:
+                        f.write(f'[ELogType.LOGALL], 2024-05-02 12:10:30, ModelCDNProvider, "[Requests Records]: 1003, [1, 4],{[[req_id, req_size]]}"\n')
+                rows = [(1714651830, 1003, [1, 4], req_id if integer_ids else req_id.encode(), req_size) for req_id, req_size in requests]
+                write_records(record_path(binary_path), rows, None if integer_ids else 8)
+                with open(binary_path, "w") as f:
+                    f.write('[ELogType.LOGINFO], 2024-05-02 12:00:00, ModelCDNProvider, "[Location]: 0"\n')
+                text_curve, binary_curve = process_file((text_path, 1.0)), process_file((binary_path, 1.0))
+            self.assertEqual(binary_curve[3], len(requests))
+            for text_column, binary_column in zip(text_curve[1:], binary_curve[1:]):
+                np.testing.assert_array_equal(binary_column, text_column)
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,85 @@
+"""
+    Tests of the socket protocol helpers of utils.py.
+
+    Usage: python -m pytest -q test_utils.py
+"""
+import asyncio
+import random
+import socket
+import threading
+import unittest
+
+from utils import pack_bitmap, read_from_socket, read_from_stream, unpack_bitmap, write_to_socket
+
+class TestBitmap(unittest.TestCase):
+    def test_round_trip(self):
+        rng = random.Random(0)
+        for count in list(range(0, 20)) + [63, 64, 65, 1000, 1001]:
+            flags = [rng.random() < 0.5 for _ in range(count)]
+            bitmap = pack_bitmap(flags)
+            self.assertEqual(len(bitmap), (count + 7) // 8)
+            self.assertEqual(unpack_bitmap(bitmap, count), flags)
+
+    def test_layout(self):
+        # Bit i of byte i // 8 for flag i, and the padding bits of the last byte are zero
+        self.assertEqual(pack_bitmap([True] + [False] * 7 + [False, True, True]), bytes([0b00000001, 0b00000110]))
+        self.assertEqual(pack_bitmap([True] * 3), bytes([0b00000111]))
+        self.assertEqual(pack_bitmap([]), b"")
+        self.assertEqual(unpack_bitmap(bytes([0xFF]), 5), [True] * 5)
+
+class TestReadFromSocket(unittest.TestCase):
+    def test_packets(self):
+        client, server = socket.socketpair()
+        with client, server:
+            # The payload is read in several chunks while it's being written
+            def write():
+                write_to_socket(client, "CHKB", "x" * 300000)
+                write_to_socket(client, "ACK ", b"")
+                client.shutdown(socket.SHUT_WR)
+            writer = threading.Thread(target=write)
+            writer.start()
+            self.assertEqual(read_from_socket(server), ("CHKB", b"x" * 300000))
+            writer.join()
+            self.assertEqual(read_from_socket(server), ("ACK ", b""))
+            # A connection closed between two packets is the end of the stream
+            self.assertEqual(read_from_socket(server), (None, None))
+
+    def test_truncated(self):
+        # A connection closed in the middle of the header or of the payload raises instead of spinning on empty reads
+        for truncated in (b"ACK", b"ACK " + (10).to_bytes(4, byteorder='big') + b"12345"):
+            client, server = socket.socketpair()
+            with client, server:
+                client.sendall(truncated)
+                client.shutdown(socket.SHUT_WR)
+                with self.assertRaises(ConnectionError):
+                    read_from_socket(server)
+
+class TestReadFromStream(unittest.TestCase):
+    def read_all(self, data):
+        """
+        Read the packets of the data with read_from_stream until the end of the stream
+        """
+        async def read():
+            reader = asyncio.StreamReader()
+            reader.feed_data(data)
+            reader.feed_eof()
+            packets = []
+            while True:
+                packet = await read_from_stream(reader)
+                packets.append(packet)
+                if packet == (None, None):
+                    return packets
+        return asyncio.run(read())
+
+    def test_packets(self):
+        data = b"ACK " + (3).to_bytes(4, byteorder='big') + b"abc" + b"REQ " + (0).to_bytes(4, byteorder='big')
+        self.assertEqual(self.read_all(data), [("ACK ", b"abc"), ("REQ ", b""), (None, None)])
+
+    def test_truncated(self):
+        # Same as read_from_socket: only a close between two packets is the end of the stream
+        for truncated in (b"ACK", b"ACK " + (10).to_bytes(4, byteorder='big') + b"12345"):
+            with self.assertRaises(ConnectionError):
+                self.read_all(truncated)
+
+if __name__ == "__main__":
+    unittest.main()
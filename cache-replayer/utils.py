@@ -1,27 +1,83 @@
 import socket
+import asyncio
 
 def read_from_socket(conn) -> tuple[str, bytearray]:
     """ 
     Receive customed protocol from sockets
+    @return
+        verb and payload. None, None if the connection is closed before a packet, and ConnectionError is raised if it's closed in the middle of one
     """
     # Read 4 bytes verb and payload size
     data = conn.recv(8)
     if len(data) == 0:
         return None, None
+    while len(data) < 8:
+        chunk = conn.recv(8 - len(data))
+        if len(chunk) == 0:
+            raise ConnectionError(f"Connection closed after {len(data)} bytes of a packet header")
+        data += chunk
     verb = data[:4].decode()
     payload_size = int.from_bytes(data[4:], byteorder='big') 
-    data_read_in = 0
     data = bytes()
+    # Never read past the payload, the next packet may already be there when the sender pipelines
     while len(data) < payload_size:
-        data += conn.recv(102400)
+        chunk = conn.recv(min(payload_size - len(data), 102400))
+        if len(chunk) == 0:
+            raise ConnectionError(f"Connection closed after {len(data)} of {payload_size} bytes of a {verb} payload")
+        data += chunk
     return verb, data
 
-def write_to_socket(conn, verb: str, data: str):
+def write_to_socket(conn, verb: str, data):
     """
-    Send a packet with specified verb and payload to socket
+    Send a packet with specified verb and payload (str or bytes) to socket
     """
+    if isinstance(data, str):
+        data = data.encode()
     header = verb.encode() + len(data).to_bytes(4, byteorder='big') 
-    conn.sendall(header + data.encode())
+    conn.sendall(header + data)
+
+async def read_from_stream(reader) -> tuple[str, bytes]:
+    """
+    Receive customed protocol from asyncio streams
+    @return
+        verb and payload. None, None if the connection is closed before a packet, and ConnectionError is raised if it's closed in the middle of one
+    """
+    try:
+        data = await reader.readexactly(8)
+    except asyncio.IncompleteReadError as e:
+        if len(e.partial) > 0:
+            raise ConnectionError(f"Connection closed after {len(e.partial)} bytes of a packet header") from e
+        return None, None
+    verb = data[:4].decode()
+    payload_size = int.from_bytes(data[4:], byteorder='big')
+    try:
+        return verb, await reader.readexactly(payload_size)
+    except asyncio.IncompleteReadError as e:
+        raise ConnectionError(f"Connection closed after {len(e.partial)} of {payload_size} bytes of a {verb} payload") from e
+
+def write_to_stream(writer, verb: str, data):
+    """
+    Queue a packet with specified verb and payload to asyncio stream. Call writer.drain() to wait for the buffer to flush
+    """
+    if isinstance(data, str):
+        data = data.encode()
+    writer.write(verb.encode() + len(data).to_bytes(4, byteorder='big') + data)
+
+def pack_bitmap(flags) -> bytes:
+    """
+    Pack a list of bool into a bitmap, bit i of byte i // 8 for flag i
+    """
+    bitmap = bytearray((len(flags) + 7) // 8)
+    for i, flag in enumerate(flags):
+        if flag:
+            bitmap[i >> 3] |= 1 << (i & 7)
+    return bytes(bitmap)
+
+def unpack_bitmap(bitmap: bytes, count: int) -> list[bool]:
+    """
+    Unpack the first count flags of a bitmap made by pack_bitmap
+    """
+    return [bool(bitmap[i >> 3] >> (i & 7) & 1) for i in range(count)]
 
 def send_request(host: str, port: int, verb: str, data: str):
     """